@@ -0,0 +1,23 @@
+# Generated by Django 5.2.14 on 2026-10-16 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_licenseexportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkenrollmentjob',
+            name='num_chunks',
+            field=models.PositiveIntegerField(default=0, help_text='The number of (learners, course runs) chunks the job was split into.'),
+        ),
+        migrations.AddField(
+            model_name='bulkenrollmentjob',
+            name='num_chunks_completed',
+            field=models.PositiveIntegerField(default=0, help_text='The number of chunks of the job that have been enrolled.'),
+        ),
+    ]
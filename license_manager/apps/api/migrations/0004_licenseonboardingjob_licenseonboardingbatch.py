@@ -0,0 +1,50 @@
+# Generated by Django 5.2.14 on 2026-10-16 23:10
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_bulkenrollmentjob_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LicenseOnboardingJob',
+            fields=[
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('subscription_plan_uuid', models.UUIDField()),
+                ('license_uuids', models.JSONField(help_text='The uuids of the assigned licenses whose learners are onboarded.')),
+                ('notify_users', models.BooleanField(default=True, help_text='Whether the learners are sent a license assignment email.')),
+                ('custom_template_text', models.JSONField(default=dict, help_text='The greeting and closing of the license assignment email.')),
+                ('num_batches', models.PositiveIntegerField(default=0, help_text='The number of batches the job was split into.')),
+                ('num_batches_completed', models.PositiveIntegerField(default=0, help_text='The number of batches of the job that have been onboarded, or have failed to be.')),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='LicenseOnboardingBatch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('index', models.PositiveIntegerField()),
+                ('license_uuids', models.JSONField(help_text="The uuids of the batch's licenses.")),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('queued', 'Queued'), ('complete', 'Complete'), ('failed', 'Failed')], default='pending', max_length=25)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batches', to='api.licenseonboardingjob')),
+            ],
+            options={
+                'unique_together': {('job', 'index')},
+            },
+        ),
+    ]
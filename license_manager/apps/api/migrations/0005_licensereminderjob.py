@@ -0,0 +1,33 @@
+# Generated by Django 5.2.14 on 2026-10-16 23:40
+
+import django.utils.timezone
+import model_utils.fields
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_licenseonboardingjob_licenseonboardingbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LicenseReminderJob',
+            fields=[
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('subscription_plan_uuid', models.UUIDField()),
+                ('custom_template_text', models.JSONField(default=dict, help_text='The greeting and closing of the reminder email.')),
+                ('num_licenses', models.PositiveIntegerField(default=0, help_text='The number of pending licenses of the plan when the job started.')),
+                ('num_licenses_reminded', models.PositiveIntegerField(default=0, help_text='The number of pending licenses whose learners have been reminded so far.')),
+                ('last_license_uuid', models.UUIDField(blank=True, help_text="The uuid of the last license reminded, from which the job resumes if it's retried.", null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
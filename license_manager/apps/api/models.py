@@ -54,6 +54,25 @@ class BulkEnrollmentJob(TimeStampedModel):
         unique=False,
     )
 
+    num_chunks = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of (learners, course runs) chunks the job was split into.",
+    )
+
+    num_chunks_completed = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of chunks of the job that have been enrolled.",
+    )
+
+    @property
+    def percent_complete(self):
+        """
+        Percentage of the job's chunks that have been enrolled, or None if the job hasn't been split up yet.
+        """
+        if not self.num_chunks:
+            return None
+        return round(100 * self.num_chunks_completed / self.num_chunks)
+
     @classmethod
     def create_bulk_enrollment_job(
         cls,
@@ -133,3 +152,269 @@ class BulkEnrollmentJob(TimeStampedModel):
             return create_presigned_url(settings.BULK_ENROLL_JOB_AWS_BUCKET, self.results_s3_object_name)
         else:
             return None
+
+
+class LicenseExportJob(TimeStampedModel):
+    """
+    An object to track async exports of a subscription plan's licenses to CSV
+     .. no_pii:
+    """
+    uuid = models.UUIDField(
+        primary_key=True,
+        default=uuid4,
+        editable=False,
+        unique=True,
+    )
+
+    enterprise_customer_uuid = models.UUIDField(
+        null=False,
+        blank=False,
+        unique=False,
+    )
+
+    subscription_plan_uuid = models.UUIDField(
+        null=False,
+        blank=False,
+        unique=False,
+    )
+
+    lms_user_id = models.IntegerField(
+        blank=True,
+        null=True,
+    )
+
+    results_s3_object_name = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        unique=False,
+    )
+
+    @classmethod
+    def create_license_export_job(cls, enqueuing_user_id, subscription_plan):
+        """
+        Creates an asynchronous ``export_licenses_csv_task`` for the given subscription plan.
+        """
+        license_export_job = cls(
+            enterprise_customer_uuid=subscription_plan.customer_agreement.enterprise_customer_uuid,
+            subscription_plan_uuid=subscription_plan.uuid,
+            lms_user_id=enqueuing_user_id,
+            uuid=uuid4()
+        )
+        license_export_job.save()
+        logger.info(
+            'enqueuing export_licenses_csv_task '
+            f'for license_export_job_uuid={str(license_export_job.uuid)}'
+        )
+        # avoid circular dependency
+        # https://stackoverflow.com/a/26382812
+        current_app.send_task(
+            'license_manager.apps.api.tasks.export_licenses_csv_task',
+            (str(license_export_job.uuid),),
+        )
+        return license_export_job
+
+    def upload_results(self, file_name):
+        """
+        Upload results in the given file_name to an S3 bucket.
+        """
+        if hasattr(settings, "LICENSE_EXPORT_JOB_AWS_BUCKET") and settings.LICENSE_EXPORT_JOB_AWS_BUCKET:
+            self.results_s3_object_name = (
+                f'{self.enterprise_customer_uuid}/{self.uuid}/Licenses-{self.subscription_plan_uuid}-'
+                f'{datetime.datetime.utcnow().isoformat()}.csv'
+            )
+            results_object_uri = upload_file_to_s3(
+                file_name,
+                settings.LICENSE_EXPORT_JOB_AWS_BUCKET,
+                object_name=self.results_s3_object_name,
+            )
+            self.save()
+            return results_object_uri
+        else:
+            return None
+
+    def generate_download_url(self):
+        """
+        Generates an S3 download link for the results of this job.
+        """
+        if self.results_s3_object_name:
+            return create_presigned_url(settings.LICENSE_EXPORT_JOB_AWS_BUCKET, self.results_s3_object_name)
+        else:
+            return None
+
+
+class LicenseOnboardingJob(TimeStampedModel):
+    """
+    An object to track the async onboarding of the learners a subscription plan's licenses were just assigned to:
+    linking them to the enterprise, creating their Braze aliases and sending their assignment emails.
+    The job is split into LicenseOnboardingBatches by ``onboard_licenses_task``.
+     .. no_pii:
+    """
+    uuid = models.UUIDField(
+        primary_key=True,
+        default=uuid4,
+        editable=False,
+        unique=True,
+    )
+
+    subscription_plan_uuid = models.UUIDField(
+        null=False,
+        blank=False,
+        unique=False,
+    )
+
+    license_uuids = models.JSONField(
+        help_text="The uuids of the assigned licenses whose learners are onboarded.",
+    )
+
+    notify_users = models.BooleanField(
+        default=True,
+        help_text="Whether the learners are sent a license assignment email.",
+    )
+
+    custom_template_text = models.JSONField(
+        default=dict,
+        help_text="The greeting and closing of the license assignment email.",
+    )
+
+    num_batches = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of batches the job was split into.",
+    )
+
+    num_batches_completed = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of batches of the job that have been onboarded, or have failed to be.",
+    )
+
+    completed_at = models.DateTimeField(
+        blank=True,
+        null=True,
+    )
+
+    @property
+    def percent_complete(self):
+        """
+        Percentage of the job's batches that have been completed, or None if the job hasn't been split up yet.
+        """
+        if not self.num_batches:
+            return None
+        return round(100 * self.num_batches_completed / self.num_batches)
+
+
+class LicenseOnboardingBatch(TimeStampedModel):
+    """
+    A batch of a LicenseOnboardingJob's licenses, whose learners are onboarded together by a chain of tasks.
+     .. no_pii:
+    """
+    PENDING = 'pending'
+    QUEUED = 'queued'
+    COMPLETE = 'complete'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (QUEUED, 'Queued'),
+        (COMPLETE, 'Complete'),
+        (FAILED, 'Failed'),
+    )
+
+    job = models.ForeignKey(
+        LicenseOnboardingJob,
+        related_name='batches',
+        on_delete=models.CASCADE,
+    )
+
+    index = models.PositiveIntegerField()
+
+    license_uuids = models.JSONField(
+        help_text="The uuids of the batch's licenses.",
+    )
+
+    status = models.CharField(
+        max_length=25,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+
+    class Meta:
+        unique_together = (
+            ('job', 'index'),
+        )
+
+
+class LicenseReminderJob(TimeStampedModel):
+    """
+    An object to track the async sending of activation reminders to every learner
+    with a pending license in a subscription plan.
+     .. no_pii:
+    """
+    uuid = models.UUIDField(
+        primary_key=True,
+        default=uuid4,
+        editable=False,
+        unique=True,
+    )
+
+    subscription_plan_uuid = models.UUIDField(
+        null=False,
+        blank=False,
+        unique=False,
+    )
+
+    custom_template_text = models.JSONField(
+        default=dict,
+        help_text="The greeting and closing of the reminder email.",
+    )
+
+    num_licenses = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of pending licenses of the plan when the job started.",
+    )
+
+    num_licenses_reminded = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of pending licenses whose learners have been reminded so far.",
+    )
+
+    last_license_uuid = models.UUIDField(
+        blank=True,
+        null=True,
+        help_text="The uuid of the last license reminded, from which the job resumes if it's retried.",
+    )
+
+    completed_at = models.DateTimeField(
+        blank=True,
+        null=True,
+    )
+
+    @classmethod
+    def create_license_reminder_job(cls, subscription_plan, custom_template_text):
+        """
+        Creates an asynchronous ``remind_all_licenses_task`` for the given subscription plan.
+        """
+        license_reminder_job = cls.objects.create(
+            subscription_plan_uuid=subscription_plan.uuid,
+            custom_template_text=custom_template_text,
+        )
+        logger.info(
+            'enqueuing remind_all_licenses_task '
+            f'for license_reminder_job_uuid={str(license_reminder_job.uuid)}'
+        )
+        # avoid circular dependency
+        # https://stackoverflow.com/a/26382812
+        current_app.send_task(
+            'license_manager.apps.api.tasks.remind_all_licenses_task',
+            (str(license_reminder_job.uuid),),
+        )
+        return license_reminder_job
+
+    @property
+    def percent_complete(self):
+        """
+        Percentage of the job's licenses that have been reminded, or None if the job hasn't started yet.
+        """
+        if self.completed_at:
+            return 100
+        if not self.num_licenses:
+            return None
+        return min(round(100 * self.num_licenses_reminded / self.num_licenses), 100)
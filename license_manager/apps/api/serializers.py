@@ -18,6 +18,7 @@ from license_manager.apps.subscriptions.exceptions import (
 from license_manager.apps.subscriptions.models import (
     CustomerAgreement,
     License,
+    LicenseProvisioningJob,
     SubscriptionPlan,
     SubscriptionPlanRenewal,
 )
@@ -85,6 +86,7 @@ class SubscriptionPlanSerializer(MinimalSubscriptionPlanSerializer):
     licenses = serializers.SerializerMethodField()
     revocations = serializers.SerializerMethodField()
     prior_renewals = SubscriptionPlanRenewalSerializer(many=True)
+    provisioning = serializers.SerializerMethodField()
 
     class Meta:
         model = SubscriptionPlan
@@ -92,6 +94,7 @@ class SubscriptionPlanSerializer(MinimalSubscriptionPlanSerializer):
             'licenses',
             'revocations',
             'prior_renewals',
+            'provisioning',
         ]
 
     def get_licenses(self, obj):
@@ -132,6 +135,24 @@ class SubscriptionPlanSerializer(MinimalSubscriptionPlanSerializer):
             'remaining': obj.num_revocations_remaining,
         }
 
+    def get_provisioning(self, obj):
+        """
+        If licenses are still being provisioned for the plan (obj),
+        returns how many licenses are being provisioned and how many
+        of them have been provisioned so far.
+
+        If no licenses are being provisioned for the plan, returns null.
+        """
+        job = LicenseProvisioningJob.get_unfinished_job(obj)
+        if not job:
+            return None
+
+        return {
+            'num_licenses': job.num_licenses,
+            'num_licenses_provisioned': job.num_licenses_provisioned,
+            'percent_complete': job.percent_complete,
+        }
+
 
 class SubscriptionPlanCreateSerializer(SubscriptionPlanSerializer):
     """
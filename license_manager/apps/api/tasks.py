@@ -1,15 +1,20 @@
 import csv
 import logging
+import os
 import uuid
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
 from tempfile import NamedTemporaryFile
 
 from braze.exceptions import BrazeClientError
-from celery import shared_task
+from celery import chain, chord, group, shared_task
 from celery_utils.logged_task import LoggedTask
 from django.conf import settings
+from django.core.cache import cache
 from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.db.utils import OperationalError
+from edx_django_utils.monitoring import accumulate
 from requests.exceptions import ConnectionError as RequestsConnectionError
 from requests.exceptions import HTTPError
 from requests.exceptions import JSONDecodeError as RequestsJSONDecodeError
@@ -17,11 +22,18 @@ from requests.exceptions import Timeout as RequestsTimeoutError
 
 import license_manager.apps.subscriptions.api as subscriptions_api
 from license_manager.apps.api import utils
-from license_manager.apps.api.models import BulkEnrollmentJob
+from license_manager.apps.api.models import (
+    BulkEnrollmentJob,
+    LicenseExportJob,
+    LicenseOnboardingBatch,
+    LicenseOnboardingJob,
+    LicenseReminderJob,
+)
 from license_manager.apps.api_client.braze import BrazeApiClient
 from license_manager.apps.api_client.enterprise import EnterpriseApiClient
 from license_manager.apps.subscriptions.constants import (
     ACTIVATED,
+    ASSIGNED,
     ASSIGNMENT_EMAIL_BATCH_SIZE,
     DAYS_BEFORE_INITIAL_UTILIZATION_EMAIL_SENT,
     ENTERPRISE_BRAZE_ALIAS_LABEL,
@@ -32,14 +44,16 @@ from license_manager.apps.subscriptions.constants import (
     REVOCABLE_LICENSE_STATUSES,
     TRACK_LICENSE_CHANGES_BATCH_SIZE,
     NotificationChoices,
+    SegmentEvents,
 )
 from license_manager.apps.subscriptions.event_utils import (
-    get_license_tracking_properties,
+    get_license_tracking_properties_by_uuid,
     track_license_changes,
 )
 from license_manager.apps.subscriptions.models import (
     CustomerAgreement,
     License,
+    LicenseEnrollmentExpirationBatch,
     Notification,
     SubscriptionPlan,
 )
@@ -57,6 +71,30 @@ logger = logging.getLogger(__name__)
 SOFT_TIME_LIMIT = 900
 MAX_TIME_LIMIT = 960
 
+# The most learners, and the most course runs, enrolled by a single request to the enterprise enroll api
+BULK_ENROLLMENT_CHUNK_SIZE = 25
+
+# The most users whose course enrollments are revoked by a single revoke_course_enrollments_for_users_task
+REVOKE_COURSE_ENROLLMENTS_BATCH_SIZE = 100
+
+# The most batches of a license onboarding job whose task chains are queued at the same time
+LICENSE_ONBOARDING_MAX_CONCURRENT_BATCHES = 4
+
+# The most batches of reminder emails sent by a single remind_all_licenses_task, which queues another
+# task to send the rest, so that no task of a large plan's reminder job runs into its time limit
+REMIND_ALL_LICENSES_MAX_BATCHES_PER_TASK = 20
+
+# The most license enrollment expiration batches whose enrollments are expired at the same time
+LICENSE_ENROLLMENT_EXPIRATION_MAX_CONCURRENT_BATCHES = 8
+
+# Utilization threshold evaluations of a plan enqueued within this many seconds of each other are coalesced
+# into a single evaluation, which runs once the period is over
+UTILIZATION_THRESHOLD_EVALUATION_DEBOUNCE_SECONDS = 60
+# How long to remember that a plan's admins were notified that its highest utilization threshold was reached.
+# No utilization threshold evaluation of the plan is enqueued until then; evaluations resume afterwards, and
+# the Notification records keep them from sending an email that was already sent
+UTILIZATION_THRESHOLD_NOTIFIED_CACHE_TIMEOUT = 60 * 60 * 24
+
 LICENSE_DEBUG_PREFIX = '[LICENSE DEBUGGING]'
 
 # Magic strings for logging in notify/remind email tasks
@@ -134,61 +172,150 @@ def link_learners_to_enterprise_task(learner_emails, enterprise_customer_uuid):
         )
 
 
-def _batch_notify_or_remind_assigned_emails(
-    custom_template_text,
-    email_recipient_list,
-    subscription_uuid,
-    allowed_batch_size,
-    campaign_uuid,
-    action_type,
-):
+def _queue_next_license_onboarding_batch(onboarding_job):
     """
-    Does the work of sending notification and reminder emails
-    for assigned licenses.
+    Queues the chain of tasks that onboards the learners of the next pending batch of a LicenseOnboardingJob:
+    linking them to the enterprise, then, if the job notifies users, creating their Braze aliases
+    and sending their assignment emails. The task signatures are immutable, hence the `si()` -
+    we don't want the result of each task passed to the next task in the chain.
+
+    Returns:
+        bool: Whether a batch was queued, i.e. whether the job had any pending batch left.
+    """
+    with transaction.atomic():
+        batch = LicenseOnboardingBatch.objects.select_for_update(skip_locked=True).filter(
+            job=onboarding_job,
+            status=LicenseOnboardingBatch.PENDING,
+        ).order_by('index').first()
+        if not batch:
+            return False
+        batch.status = LicenseOnboardingBatch.QUEUED
+        batch.save(update_fields=['status', 'modified'])
+
+    # Licenses revoked since they were assigned no longer need to be onboarded
+    user_emails = list(License.objects.filter(
+        uuid__in=batch.license_uuids,
+        status=ASSIGNED,
+    ).values_list('user_email', flat=True))
+    subscription_plan = SubscriptionPlan.objects.get(uuid=onboarding_job.subscription_plan_uuid)
+
+    tasks = link_learners_to_enterprise_task.si(user_emails, subscription_plan.enterprise_customer_uuid)
+    if onboarding_job.notify_users:
+        # Braze aliases must be created before we attempt to send assignment emails.
+        tasks = tasks | create_braze_aliases_task.si(user_emails) | send_assignment_email_task.si(
+            onboarding_job.custom_template_text,
+            user_emails,
+            str(onboarding_job.subscription_plan_uuid),
+        )
+    tasks = tasks | finish_license_onboarding_batch_task.si(batch.id, LicenseOnboardingBatch.COMPLETE)
+    tasks.link_error(finish_license_onboarding_batch_task.si(batch.id, LicenseOnboardingBatch.FAILED))
+    tasks.apply_async()
+    return True
+
+
+@shared_task(base=LoggedTaskWithRetry, soft_time_limit=SOFT_TIME_LIMIT, time_limit=MAX_TIME_LIMIT)
+def onboard_licenses_task(license_onboarding_job_uuid):
+    """
+    Tracks the assignment of a LicenseOnboardingJob's licenses, splits the job into batches of
+    ``PENDING_ACCOUNT_CREATION_BATCH_SIZE`` licenses, and queues the onboarding of the first
+    ``LICENSE_ONBOARDING_MAX_CONCURRENT_BATCHES`` of them. Each batch queues the next pending one
+    once it's done, see ``finish_license_onboarding_batch_task``.
+
+    Arguments:
+        license_onboarding_job_uuid (str): UUID (string representation) for a LicenseOnboardingJob created
+            by the enqueuing process.
+    """
+    with transaction.atomic():
+        onboarding_job = LicenseOnboardingJob.objects.select_for_update().get(uuid=license_onboarding_job_uuid)
+        is_new_job = not onboarding_job.num_batches and bool(onboarding_job.license_uuids)
+        if is_new_job:
+            batches = LicenseOnboardingBatch.objects.bulk_create([
+                LicenseOnboardingBatch(job=onboarding_job, index=index, license_uuids=license_uuid_batch)
+                for index, license_uuid_batch in enumerate(
+                    chunks(onboarding_job.license_uuids, PENDING_ACCOUNT_CREATION_BATCH_SIZE)
+                )
+            ])
+            onboarding_job.num_batches = len(batches)
+            onboarding_job.save(update_fields=['num_batches', 'modified'])
+
+    logger.info(
+        f'starting onboard_licenses_task for license_onboarding_job_uuid={license_onboarding_job_uuid} '
+        f'with {onboarding_job.num_batches} batches'
+    )
+    if is_new_job:
+        track_license_changes_task.delay(
+            onboarding_job.license_uuids,
+            SegmentEvents.LICENSE_ASSIGNED,
+            is_batch_assignment=True,
+        )
+
+    num_queued_batches = onboarding_job.batches.filter(status=LicenseOnboardingBatch.QUEUED).count()
+    for _ in range(LICENSE_ONBOARDING_MAX_CONCURRENT_BATCHES - num_queued_batches):
+        if not _queue_next_license_onboarding_batch(onboarding_job):
+            break
+
+
+@shared_task(base=LoggedTask, soft_time_limit=SOFT_TIME_LIMIT, time_limit=MAX_TIME_LIMIT)
+def finish_license_onboarding_batch_task(license_onboarding_batch_id, batch_status):
+    """
+    Records the outcome of the onboarding of a LicenseOnboardingBatch on the batch and its job,
+    then queues the next pending batch of the job.
+
+    Arguments:
+        license_onboarding_batch_id (int): id of the LicenseOnboardingBatch that was onboarded.
+        batch_status (str): ``LicenseOnboardingBatch.COMPLETE``, or ``LicenseOnboardingBatch.FAILED``
+            if any task of the batch's chain failed.
+    """
+    with transaction.atomic():
+        batch = LicenseOnboardingBatch.objects.select_for_update().select_related('job').get(
+            id=license_onboarding_batch_id,
+        )
+        if batch.status != LicenseOnboardingBatch.QUEUED:
+            return
+        batch.status = batch_status
+        batch.save(update_fields=['status', 'modified'])
+        LicenseOnboardingJob.objects.filter(uuid=batch.job_id).update(
+            num_batches_completed=F('num_batches_completed') + 1,
+        )
+        LicenseOnboardingJob.objects.filter(
+            uuid=batch.job_id,
+            num_batches_completed__gte=F('num_batches'),
+            completed_at__isnull=True,
+        ).update(completed_at=localized_utcnow())
+
+    if batch_status == LicenseOnboardingBatch.FAILED:
+        logger.error(
+            f'failed to onboard batch {batch.index} of license_onboarding_job_uuid={batch.job_id}'
+        )
+    _queue_next_license_onboarding_batch(batch.job)
+
+
+def _send_license_emails(pending_licenses, enterprise_customer, custom_template_text, campaign_uuid, action_type):
+    """
+    Creates the Braze aliases of the learners of the given assigned licenses, and sends each of them
+    a message of the given Braze campaign, in as few requests as the Braze API allows.
 
     Params:
+      pending_licenses (list of License): The assigned licenses whose learners are sent the message.
+      enterprise_customer (dict): The data of the enterprise customer the licenses belong to.
       custom_template_text (dict): Dictionary containing `greeting` and `closing` keys
         to be used for customizing the email template.
-      email_recipient_list (list of str): List of recipients to send the emails to.
-      subscription_uuid (str): UUID string of the subscription plan that the
-        recipients are (or will be) associated with.
-      allowed_batch_size (int): Maximum number of recipients (really their associated assigned licenses)
-        which can be processed in a single call to this method.
       campaign_uuid (str): The identifier of the Braze email campaign via which users are notified.
       action_type (str): A string used in logging messages to indicate which type of notification
         is being sent.
     """
-    subscription_plan = SubscriptionPlan.objects.get(uuid=subscription_uuid)
-    pending_licenses = subscription_plan.assigned_licenses.filter(
-        user_email__in=email_recipient_list,
-    ).order_by('uuid')
-
-    if len(pending_licenses) > allowed_batch_size:
-        raise Exception(f'Found more than {allowed_batch_size} licenses, no email sent to {action_type}')
-
-    if len(pending_licenses) == 0:
-        logger.warning(
-            f'{LICENSE_DEBUG_PREFIX} No pending licenses found for given emails, no email sent to {action_type}.'
-        )
-        return pending_licenses
-
-    enterprise_api_client = EnterpriseApiClient()
-    enterprise_customer = enterprise_api_client.get_enterprise_customer_data(
-        subscription_plan.enterprise_customer_uuid,
-    )
     enterprise_slug = enterprise_customer.get('slug')
     enterprise_name = enterprise_customer.get('name')
     enterprise_sender_alias = get_enterprise_sender_alias(enterprise_customer)
     enterprise_contact_email = enterprise_customer.get('contact_email')
 
-    pending_license_by_email = {}
     emails_for_aliasing = []
     recipients = []
+    tracking_properties_by_uuid = get_license_tracking_properties_by_uuid(pending_licenses)
 
     for pending_license in pending_licenses:
         user_email = pending_license.user_email
         emails_for_aliasing.append(user_email)
-        pending_license_by_email[user_email] = pending_license
         license_activation_key = str(pending_license.activation_key)
         trigger_properties = {
             'TEMPLATE_GREETING': custom_template_text['greeting'],
@@ -200,7 +327,7 @@ def _batch_notify_or_remind_assigned_emails(
             'enterprise_contact_email': enterprise_contact_email,
         }
         recipient = _aliased_recipient_object_from_email(user_email)
-        recipient['attributes'].update(get_license_tracking_properties(pending_license))
+        recipient['attributes'].update(tracking_properties_by_uuid[pending_license.uuid])
         recipient['trigger_properties'] = trigger_properties
         recipients.append(recipient)
 
@@ -214,7 +341,7 @@ def _batch_notify_or_remind_assigned_emails(
         braze_client_instance.send_campaign_message(campaign_uuid, recipients=recipients)
         logger.info(
             f'{LICENSE_DEBUG_PREFIX} Sent license {action_type} emails '
-            f'braze campaign {campaign_uuid} to {email_recipient_list}'
+            f'braze campaign {campaign_uuid} to {emails_for_aliasing}'
         )
     except BrazeClientError as exc:
         message = (
@@ -224,6 +351,51 @@ def _batch_notify_or_remind_assigned_emails(
         logger.exception(message)
         raise exc
 
+
+def _batch_notify_or_remind_assigned_emails(
+    custom_template_text,
+    email_recipient_list,
+    subscription_uuid,
+    allowed_batch_size,
+    campaign_uuid,
+    action_type,
+):
+    """
+    Does the work of sending notification and reminder emails
+    for assigned licenses.
+
+    Params:
+      custom_template_text (dict): Dictionary containing `greeting` and `closing` keys
+        to be used for customizing the email template.
+      email_recipient_list (list of str): List of recipients to send the emails to.
+      subscription_uuid (str): UUID string of the subscription plan that the
+        recipients are (or will be) associated with.
+      allowed_batch_size (int): Maximum number of recipients (really their associated assigned licenses)
+        which can be processed in a single call to this method.
+      campaign_uuid (str): The identifier of the Braze email campaign via which users are notified.
+      action_type (str): A string used in logging messages to indicate which type of notification
+        is being sent.
+    """
+    subscription_plan = SubscriptionPlan.objects.get(uuid=subscription_uuid)
+    pending_licenses = subscription_plan.assigned_licenses.filter(
+        user_email__in=email_recipient_list,
+    ).order_by('uuid')
+
+    if len(pending_licenses) > allowed_batch_size:
+        raise Exception(f'Found more than {allowed_batch_size} licenses, no email sent to {action_type}')
+
+    if len(pending_licenses) == 0:
+        logger.warning(
+            f'{LICENSE_DEBUG_PREFIX} No pending licenses found for given emails, no email sent to {action_type}.'
+        )
+        return pending_licenses
+
+    enterprise_customer = EnterpriseApiClient().get_enterprise_customer_data(
+        subscription_plan.enterprise_customer_uuid,
+    )
+    _send_license_emails(pending_licenses, enterprise_customer, custom_template_text, campaign_uuid, action_type)
+    pending_license_by_email = {pending_license.user_email: pending_license for pending_license in pending_licenses}
+
     emails_with_no_assignments = [
         _email for _email in email_recipient_list
         if _email not in pending_license_by_email
@@ -282,6 +454,68 @@ def send_reminder_email_task(custom_template_text, email_recipient_list, subscri
     License.set_date_fields_to_now(pending_licenses, ['last_remind_date'])
 
 
+@shared_task(base=LoggedTaskWithRetry, soft_time_limit=SOFT_TIME_LIMIT, time_limit=MAX_TIME_LIMIT)
+def remind_all_licenses_task(license_reminder_job_uuid):
+    """
+    Sends license activation reminder emails to the learners of every assigned license of a subscription plan,
+    reading the licenses in batches of ``REMINDER_EMAIL_BATCH_SIZE`` ordered by uuid. The progress of the job
+    is recorded after each batch, so that a retried job resumes after the last batch it reminded.
+
+    Once it has sent ``REMIND_ALL_LICENSES_MAX_BATCHES_PER_TASK`` batches, the task queues another
+    ``remind_all_licenses_task`` that resumes the job after the last batch it reminded.
+
+    Arguments:
+        license_reminder_job_uuid (str): UUID (string representation) for a LicenseReminderJob created
+            by the enqueuing process.
+    """
+    reminder_job = LicenseReminderJob.objects.get(uuid=license_reminder_job_uuid)
+    subscription_plan = SubscriptionPlan.objects.get(uuid=reminder_job.subscription_plan_uuid)
+    assigned_licenses = subscription_plan.licenses.filter(status=ASSIGNED).order_by('uuid')
+    if not reminder_job.last_license_uuid:
+        reminder_job.num_licenses = assigned_licenses.count()
+        reminder_job.save(update_fields=['num_licenses', 'modified'])
+    logger.info(
+        f'starting remind_all_licenses_task for license_reminder_job_uuid={license_reminder_job_uuid} '
+        f'with {reminder_job.num_licenses} licenses'
+    )
+
+    enterprise_customer = EnterpriseApiClient().get_enterprise_customer_data(
+        subscription_plan.enterprise_customer_uuid,
+    )
+    for _ in range(REMIND_ALL_LICENSES_MAX_BATCHES_PER_TASK):
+        pending_licenses = assigned_licenses
+        if reminder_job.last_license_uuid:
+            pending_licenses = pending_licenses.filter(uuid__gt=reminder_job.last_license_uuid)
+        pending_licenses = list(pending_licenses[:REMINDER_EMAIL_BATCH_SIZE])
+        if not pending_licenses:
+            LicenseReminderJob.objects.filter(uuid=reminder_job.uuid).update(completed_at=localized_utcnow())
+            logger.info(
+                f'finished remind_all_licenses_task for license_reminder_job_uuid={license_reminder_job_uuid}'
+            )
+            return
+
+        _send_license_emails(
+            pending_licenses,
+            enterprise_customer,
+            reminder_job.custom_template_text,
+            settings.BRAZE_REMIND_EMAIL_CAMPAIGN,
+            REMIND_EMAIL_ACTION_TYPE,
+        )
+        License.set_date_fields_to_now(pending_licenses, ['last_remind_date'])
+
+        reminder_job.last_license_uuid = pending_licenses[-1].uuid
+        LicenseReminderJob.objects.filter(uuid=reminder_job.uuid).update(
+            num_licenses_reminded=F('num_licenses_reminded') + len(pending_licenses),
+            last_license_uuid=reminder_job.last_license_uuid,
+        )
+
+    logger.info(
+        f'queueing remind_all_licenses_task for license_reminder_job_uuid={license_reminder_job_uuid} '
+        f'to resume after license {reminder_job.last_license_uuid}'
+    )
+    remind_all_licenses_task.delay(license_reminder_job_uuid)
+
+
 @shared_task(base=LoggedTaskWithRetry)
 def send_post_activation_email_task(enterprise_customer_uuid, user_email):
     """
@@ -410,30 +644,94 @@ def revoke_course_enrollments_for_user_task(user_id, enterprise_id):
         )
 
 
-def execute_post_revocation_tasks(revoked_license, original_status):
+@shared_task(base=LoggedTask, soft_time_limit=SOFT_TIME_LIMIT, time_limit=MAX_TIME_LIMIT)
+def revoke_course_enrollments_for_users_task(user_ids, enterprise_id):
     """
-    Executes a set of tasks after a license has been revoked.
+    Sends revoking the enterprise licensed course enrollments of a batch of users asynchronously
+
+    Arguments:
+        user_ids (list of str): The IDs of the users who had an enterprise license revoked
+        enterprise_id (str): The ID of the enterprise to revoke course enrollments for
+    """
+    revocation_results = EnterpriseApiClient().revoke_course_enrollments_for_users(user_ids, enterprise_id)
+    succeeded_user_ids = []
+    for user_id, exc in revocation_results.items():
+        if exc is None:
+            succeeded_user_ids.append(user_id)
+            continue
+        logger.error(
+            'Revocation of course enrollments FAILED for user [{user_id}], enterprise [{enterprise_id}]'.format(
+                user_id=user_id,
+                enterprise_id=enterprise_id,
+            ),
+            exc_info=exc,
+        )
+    logger.info(
+        'Revocation of course enrollments SUCCEEDED for users {user_ids}, enterprise [{enterprise_id}]'.format(
+            user_ids=succeeded_user_ids,
+            enterprise_id=enterprise_id,
+        )
+    )
+
+
+def execute_bulk_post_revocation_tasks(revocation_results):
+    """
+    Executes a set of tasks after licenses have been revoked.
 
     Tasks:
-        - Revoke enrollments if the License has an original status of ACTIVATED.
-        - Send email notification to ECS if the Subscription Plan has reached its revocation cap.
+        - Revoke enrollments of the Licenses with an original status of ACTIVATED,
+          in batches of ``REVOKE_COURSE_ENROLLMENTS_BATCH_SIZE`` users per enterprise.
+        - Send email notification to ECS for each Subscription Plan that has reached its revocation cap.
+
+    Arguments:
+        revocation_results (list of dict): The ``{'revoked_license', 'original_status'}`` of each revoked license.
     """
+    revoked_licenses = [result['revoked_license'] for result in revocation_results]
+    if not revoked_licenses:
+        return
+
+    # Read the plans after the revocations, so that their revocation counts are up to date
+    subscription_plans = SubscriptionPlan.objects.select_related('customer_agreement').filter(
+        uuid__in={revoked_license.subscription_plan_id for revoked_license in revoked_licenses},
+    )
+    subscription_plan_by_uuid = {plan.uuid: plan for plan in subscription_plans}
 
     # We should only need to revoke enrollments if the License has an original
     # status of ACTIVATED, pending users shouldn't have any enrollments.
-    if original_status == ACTIVATED:
-        revoke_course_enrollments_for_user_task.delay(
-            user_id=revoked_license.lms_user_id,
-            enterprise_id=str(revoked_license.subscription_plan.enterprise_customer_uuid),
-        )
+    user_ids_by_enterprise_id = defaultdict(list)
+    for result in revocation_results:
+        if result['original_status'] == ACTIVATED:
+            revoked_license = result['revoked_license']
+            subscription_plan = subscription_plan_by_uuid[revoked_license.subscription_plan_id]
+            user_ids_by_enterprise_id[str(subscription_plan.enterprise_customer_uuid)].append(
+                revoked_license.lms_user_id,
+            )
 
-    if not revoked_license.subscription_plan.has_revocations_remaining:
-        # Send email notification to ECS that the Subscription Plan has reached its revocation cap
-        send_revocation_cap_notification_email_task.delay(
-            subscription_uuid=revoked_license.subscription_plan.uuid,
-        )
+    for enterprise_id, user_ids in user_ids_by_enterprise_id.items():
+        for user_id_batch in chunks(user_ids, REVOKE_COURSE_ENROLLMENTS_BATCH_SIZE):
+            revoke_course_enrollments_for_users_task.delay(
+                user_ids=user_id_batch,
+                enterprise_id=enterprise_id,
+            )
 
-    logger.info('License {} has been revoked'.format(revoked_license.uuid))
+    for subscription_plan in subscription_plans:
+        if not subscription_plan.has_revocations_remaining:
+            # Send email notification to ECS that the Subscription Plan has reached its revocation cap
+            send_revocation_cap_notification_email_task.delay(
+                subscription_uuid=subscription_plan.uuid,
+            )
+
+    logger.info('Licenses {} have been revoked'.format([str(lcs.uuid) for lcs in revoked_licenses]))
+
+
+def execute_post_revocation_tasks(revoked_license, original_status):
+    """
+    Executes a set of tasks after a license has been revoked, see ``execute_bulk_post_revocation_tasks``.
+    """
+    execute_bulk_post_revocation_tasks([{
+        'revoked_license': revoked_license,
+        'original_status': original_status,
+    }])
 
 
 @shared_task(base=LoggedTaskWithRetry, soft_time_limit=SOFT_TIME_LIMIT, time_limit=MAX_TIME_LIMIT)
@@ -465,6 +763,72 @@ def license_expiration_task(license_uuids, ignore_enrollments_modified_after=Non
         raise exc
 
 
+def get_ignore_enrollments_modified_after(subscription_plan):
+    """
+    Returns the date after which modified course enrollments of the given expired plan's licenses are left alone,
+    as an isoformat string, or None if every enrollment should be expired.
+    """
+    # We might be running the expiration of a plan that expired further in the past to fix bad data. We don't
+    # want to modify a course enrollment if it's been modified after the plan expiration because a user might
+    # have upgraded the course.
+    if subscription_plan.expiration_date < localized_utcnow() - timedelta(days=1):
+        return subscription_plan.expiration_date.isoformat()
+    return None
+
+
+@shared_task(base=LoggedTask, soft_time_limit=SOFT_TIME_LIMIT, time_limit=MAX_TIME_LIMIT)
+def expire_license_enrollment_batch_task(batch_id):
+    """
+    Expires the licensed course enrollments of a LicenseEnrollmentExpirationBatch, unless they were already
+    expired, and marks the batch's plan expiration processed once all of its batches are completed.
+
+    A batch that fails is logged and left incomplete instead of failing the task, so that the batches queued
+    after it still run, and running the plan's expiration again only retries the batches that failed.
+
+    Arguments:
+        batch_id (int): ID of the LicenseEnrollmentExpirationBatch object to expire enrollments for.
+    """
+    batch = LicenseEnrollmentExpirationBatch.objects.select_related('subscription_plan').get(id=batch_id)
+    if batch.completed_at:
+        logger.info(f'Skipping license enrollment expiration batch {batch_id}, which was already completed.')
+        return
+
+    subscription_plan = batch.subscription_plan
+    license_uuids = [str(license_uuid) for license_uuid in batch.get_license_uuids()]
+    if license_uuids:
+        try:
+            license_expiration_task(
+                license_uuids,
+                ignore_enrollments_modified_after=get_ignore_enrollments_modified_after(subscription_plan),
+            )
+        except Exception:  # pylint: disable=broad-except
+            logger.exception(
+                f'Failed to terminate course enrollments for learners in subscription: {subscription_plan.uuid}, '
+                f'license enrollment expiration batch {batch_id}'
+            )
+            return
+
+    if LicenseEnrollmentExpirationBatch.complete_batch(batch_id):
+        logger.info(f'Terminated course enrollments for learners in subscription: {subscription_plan.uuid}')
+
+
+def expire_license_enrollment_batches(batch_ids):
+    """
+    Queues the given license enrollment expiration batches in ``LICENSE_ENROLLMENT_EXPIRATION_MAX_CONCURRENT_BATCHES``
+    chains of ``expire_license_enrollment_batch_task`` that run in parallel, so that no more than that many
+    requests to expire enrollments are made at the same time.
+    """
+    lanes = [
+        batch_ids[lane_index::LICENSE_ENROLLMENT_EXPIRATION_MAX_CONCURRENT_BATCHES]
+        for lane_index in range(min(len(batch_ids), LICENSE_ENROLLMENT_EXPIRATION_MAX_CONCURRENT_BATCHES))
+    ]
+    if lanes:
+        group([
+            chain([expire_license_enrollment_batch_task.si(batch_id) for batch_id in lane])
+            for lane in lanes
+        ]).apply_async()
+
+
 @shared_task(base=LoggedTaskWithRetry)
 def send_revocation_cap_notification_email_task(subscription_uuid):
     """
@@ -535,20 +899,23 @@ def revoke_all_licenses_task(subscription_uuid):
     with transaction.atomic():
         subscription_licenses = subscription_plan.licenses.filter(
             status__in=REVOCABLE_LICENSE_STATUSES,
-        )
-
-        revocation_results = []
+        ).order_by('uuid')
 
-        for sl in subscription_licenses:
-            try:
-                revocation_results.append(subscriptions_api.revoke_license(sl))
-            except Exception:
-                logger.error('Could not revoke license with uuid {} during revoke_all_licenses_task'.format(sl.uuid),
-                             exc_info=True)
-                raise
+        revocation_results, revocation_failures = subscriptions_api.revoke_licenses(
+            subscription_plan,
+            subscription_licenses,
+        )
+        if revocation_failures:
+            for failed_license, exc in revocation_failures:
+                logger.error(
+                    'Could not revoke license with uuid {} during revoke_all_licenses_task: {}'.format(
+                        failed_license.uuid, exc,
+                    )
+                )
+            # Roll back every revocation made by this task
+            raise revocation_failures[0][1]
 
-    for result in revocation_results:
-        execute_post_revocation_tasks(**result)
+    execute_bulk_post_revocation_tasks(revocation_results)
 
 
 def _send_bulk_enrollment_results_email(
@@ -626,6 +993,10 @@ def enterprise_enrollment_license_subsidy_task(
     Enroll a list of enterprise learners into a list of course runs with or without notifying them.
     Optionally, filter license check by a specific subscription.
 
+    The job is split into chunks of learners and course runs that are enrolled in parallel by
+    ``enterprise_enrollment_license_subsidy_chunk_task``, after which
+    ``merge_enterprise_enrollment_license_subsidy_results_task`` writes the results CSV.
+
     Arguments:
         bulk_enrollment_job_uuid (str): UUID (string representation) for a BulkEnrollmentJob created
             by the enqueuing process for logging and progress tracking table updates.
@@ -636,84 +1007,144 @@ def enterprise_enrollment_license_subsidy_task(
         subscription_uuid (str): UUID (string representation) of the specific enterprise subscription to use when
             validating learner licenses
     """
-    # AED 2022-01-24 - I don't have enough context to unwind this sanely.
-    # Declaring bankruptcy for now.
-    # pylint: disable=too-many-nested-blocks
-    try:
-        logger.info(
-            'starting enterprise_enrollment_license_subsidy_task for '
-            f'bulk_enrollment_job_uuid={bulk_enrollment_job_uuid} '
-            f'enterprise_customer_uuid={enterprise_customer_uuid}'
+    logger.info(
+        'starting enterprise_enrollment_license_subsidy_task for '
+        f'bulk_enrollment_job_uuid={bulk_enrollment_job_uuid} '
+        f'enterprise_customer_uuid={enterprise_customer_uuid}'
+    )
+
+    # this is to avoid hitting timeouts on the enterprise enroll api
+    # take course keys 25 at a time, for each course key chunk, take learners 25 at a time
+    chunk_tasks = [
+        enterprise_enrollment_license_subsidy_chunk_task.s(
+            bulk_enrollment_job_uuid,
+            enterprise_customer_uuid,
+            learner_enrollment_batch,
+            course_run_key_batch,
+            notify_learners,
+            subscription_uuid,
         )
+        for course_run_key_batch in chunks(course_run_keys, BULK_ENROLLMENT_CHUNK_SIZE)
+        for learner_enrollment_batch in chunks(learner_emails, BULK_ENROLLMENT_CHUNK_SIZE)
+    ]
+    BulkEnrollmentJob.objects.filter(uuid=bulk_enrollment_job_uuid).update(
+        num_chunks=len(chunk_tasks),
+        num_chunks_completed=0,
+    )
+    logger.info(
+        f'enqueuing {len(chunk_tasks)} enterprise_enrollment_license_subsidy_chunk_tasks for '
+        f'bulk_enrollment_job_uuid={bulk_enrollment_job_uuid}'
+    )
+
+    if not chunk_tasks:
+        merge_enterprise_enrollment_license_subsidy_results_task.delay([], bulk_enrollment_job_uuid)
+        return
+    chord(chunk_tasks)(merge_enterprise_enrollment_license_subsidy_results_task.s(bulk_enrollment_job_uuid))
+
+
+@shared_task(base=LoggedTask, soft_time_limit=SOFT_TIME_LIMIT, time_limit=MAX_TIME_LIMIT)
+def enterprise_enrollment_license_subsidy_chunk_task(
+    bulk_enrollment_job_uuid,
+    enterprise_customer_uuid,
+    learner_emails,
+    course_run_keys,
+    notify_learners,
+    subscription_uuid,
+):
+    """
+    Enroll one chunk of a bulk enrollment job's learners into one chunk of its course runs, and record the
+    chunk as completed on the job.
 
+    Arguments are the same as ``enterprise_enrollment_license_subsidy_task``, but ``learner_emails`` and
+    ``course_run_keys`` hold at most ``BULK_ENROLLMENT_CHUNK_SIZE`` items each.
+
+    Returns:
+        list(list(str)): rows of [email address, course key, enrollment status, notes] for the results CSV.
+    """
+    try:
         # collect/return results (rather than just write to the CSV) to help testability
         results = []
 
-        bulk_enrollment_job = BulkEnrollmentJob.objects.get(uuid=bulk_enrollment_job_uuid)
         customer_agreement = CustomerAgreement.objects.get(enterprise_customer_uuid=enterprise_customer_uuid)
+        missing_subscriptions, licensed_enrollment_info = utils.check_missing_licenses(
+            customer_agreement,
+            learner_emails,
+            course_run_keys,
+            subscription_uuid=subscription_uuid,
+        )
+
+        for failed_email, course_keys in missing_subscriptions.items():
+            for course_key in course_keys:
+                results.append([failed_email, course_key, 'failed', 'missing subscription'])
 
-        # this is to avoid hitting timeouts on the enterprise enroll api
-        # take course keys 25 at a time, for each course key chunk, take learners 25 at a time
-        for course_run_key_batch in chunks(course_run_keys, 25):
-            logger.debug("enterprise_customer_uuid={} course_run_key_batch size: {}".format(
-                enterprise_customer_uuid, len(course_run_key_batch)
-            ))
-            for learner_enrollment_batch in chunks(learner_emails, 25):
-                logger.debug("enterprise_customer_uuid={} learner_enrollment_batch size: {}".format(
-                    enterprise_customer_uuid, len(learner_enrollment_batch)
-                ))
-
-                missing_subscriptions, licensed_enrollment_info = utils.check_missing_licenses(
-                    customer_agreement,
-                    learner_enrollment_batch,
-                    course_run_key_batch,
-                    subscription_uuid=subscription_uuid,
+        if licensed_enrollment_info:
+            options = {
+                'licenses_info': licensed_enrollment_info,
+                'notify': notify_learners
+            }
+            enrollment_response = EnterpriseApiClient().bulk_enroll_enterprise_learners(
+                str(enterprise_customer_uuid), options
+            )
+            try:
+                enrollment_result = enrollment_response.json()
+            except RequestsJSONDecodeError:
+                logger.error(
+                    f'Error in bulk license enrollment for {enterprise_customer_uuid}, '
+                    f'response payload = {enrollment_response.content}'
                 )
+                raise
 
-                if missing_subscriptions:
-                    for failed_email, course_keys in missing_subscriptions.items():
-                        for course_key in course_keys:
-                            results.append([failed_email, course_key, 'failed', 'missing subscription'])
-
-                if licensed_enrollment_info:
-                    options = {
-                        'licenses_info': licensed_enrollment_info,
-                        'notify': notify_learners
-                    }
-                    enrollment_response = EnterpriseApiClient().bulk_enroll_enterprise_learners(
-                        str(enterprise_customer_uuid), options
-                    )
-                    try:
-                        enrollment_result = enrollment_response.json()
-                    except RequestsJSONDecodeError:
-                        logger.error(
-                            f'Error in bulk license enrollment for {enterprise_customer_uuid}, '
-                            f'response payload = {enrollment_response.content}'
-                        )
-                        raise
-
-                    for success in enrollment_result['successes']:
-                        results.append([success.get('email'), success.get('course_run_key'), 'success', ''])
-
-                    for pending in enrollment_result['pending']:
-                        results.append([
-                            pending.get('email'), pending.get('course_run_key'),
-                            'pending', 'pending license activation'
-                        ])
-
-                    for failure in enrollment_result['failures']:
-                        results.append([failure.get('email'), failure.get('course_run_key'), 'failed', ''])
-
-                    if enrollment_result.get('invalid_email_addresses'):
-                        for result_email in enrollment_result['invalid_email_addresses']:
-                            for course_key in course_run_key_batch:
-                                results.append([result_email, course_key, 'failed', 'invalid email address'])
+            for success in enrollment_result['successes']:
+                results.append([success.get('email'), success.get('course_run_key'), 'success', ''])
+
+            for pending in enrollment_result['pending']:
+                results.append([
+                    pending.get('email'), pending.get('course_run_key'),
+                    'pending', 'pending license activation'
+                ])
+
+            for failure in enrollment_result['failures']:
+                results.append([failure.get('email'), failure.get('course_run_key'), 'failed', ''])
+
+            for result_email in enrollment_result.get('invalid_email_addresses') or []:
+                for course_key in course_run_keys:
+                    results.append([result_email, course_key, 'failed', 'invalid email address'])
+
+        BulkEnrollmentJob.objects.filter(uuid=bulk_enrollment_job_uuid).update(
+            num_chunks_completed=F('num_chunks_completed') + 1,
+        )
+        return results
+    except Exception as ex:
+        msg = (
+            'failed enterprise_enrollment_license_subsidy_chunk_task for '
+            f'bulk_enrollment_job_uuid={bulk_enrollment_job_uuid} '
+            f'enterprise_customer_uuid={enterprise_customer_uuid}'
+        )
+        logger.error(msg, exc_info=True)
+        raise ex
+
+
+@shared_task(base=LoggedTask, soft_time_limit=SOFT_TIME_LIMIT, time_limit=MAX_TIME_LIMIT)
+def merge_enterprise_enrollment_license_subsidy_results_task(chunk_results, bulk_enrollment_job_uuid):
+    """
+    Write the results of every chunk of a bulk enrollment job to a CSV, upload it and notify the job's enqueuer.
+
+    Arguments:
+        chunk_results (list(list(list(str)))): results of each ``enterprise_enrollment_license_subsidy_chunk_task``
+        bulk_enrollment_job_uuid (str): UUID (string representation) for a BulkEnrollmentJob created
+            by the enqueuing process.
+
+    Returns:
+        list(list(str)): all rows written to the results CSV.
+    """
+    try:
+        bulk_enrollment_job = BulkEnrollmentJob.objects.get(uuid=bulk_enrollment_job_uuid)
+        results = [result for results in chunk_results for result in results]
 
         with NamedTemporaryFile(mode='w', delete=False) as result_file:
             result_writer = csv.writer(result_file)
             result_writer.writerow(['email address', 'course key', 'enrollment status', 'notes'])
-            for result in results:
-                result_writer.writerow(result)
+            result_writer.writerows(results)
 
             result_file.close()
 
@@ -726,17 +1157,47 @@ def enterprise_enrollment_license_subsidy_task(
                     campaign_id=settings.BULK_ENROLL_RESULT_CAMPAIGN,
                 )
 
+        logger.info(
+            'finished enterprise_enrollment_license_subsidy_task for '
+            f'bulk_enrollment_job_uuid={bulk_enrollment_job_uuid} with {len(results)} results'
+        )
         return results
     except Exception as ex:
         msg = (
-            'failed enterprise_enrollment_license_subsidy_task for '
-            f'bulk_enrollment_job_uuid={bulk_enrollment_job_uuid} '
-            f'enterprise_customer_uuid={enterprise_customer_uuid}'
+            'failed merge_enterprise_enrollment_license_subsidy_results_task for '
+            f'bulk_enrollment_job_uuid={bulk_enrollment_job_uuid}'
         )
         logger.error(msg, exc_info=True)
         raise ex
 
 
+@shared_task(base=LoggedTask, soft_time_limit=SOFT_TIME_LIMIT, time_limit=MAX_TIME_LIMIT)
+def export_licenses_csv_task(license_export_job_uuid):
+    """
+    Writes the licenses CSV export of a subscription plan to a file and uploads it to S3.
+
+    Arguments:
+        license_export_job_uuid (str): UUID (string representation) for a LicenseExportJob created
+            by the enqueuing process.
+    """
+    logger.info(f'starting export_licenses_csv_task for license_export_job_uuid={license_export_job_uuid}')
+    license_export_job = LicenseExportJob.objects.get(uuid=license_export_job_uuid)
+    subscription_plan = SubscriptionPlan.objects.select_related('customer_agreement').get(
+        uuid=license_export_job.subscription_plan_uuid,
+    )
+
+    with NamedTemporaryFile(mode='w', delete=False) as result_file:
+        result_file.writelines(utils.iter_license_csv_lines(subscription_plan))
+        result_file.close()
+
+        try:
+            license_export_job.upload_results(result_file.name)
+        finally:
+            os.remove(result_file.name)
+
+    logger.info(f'finished export_licenses_csv_task for license_export_job_uuid={license_export_job_uuid}')
+
+
 def _get_admin_users_for_enterprise(enterprise_customer_uuid):
     api_client = EnterpriseApiClient()
     admin_users = api_client.get_enterprise_admin_users(enterprise_customer_uuid)
@@ -863,6 +1324,44 @@ def send_initial_utilization_email_task(subscription_uuid):
         )
 
 
+def _get_utilization_threshold_evaluation_cache_key(subscription_uuid):
+    return f'utilization_threshold_evaluation:{subscription_uuid}'
+
+
+def _get_highest_utilization_threshold_notified_cache_key(subscription_uuid):
+    return f'utilization_threshold_evaluation:{subscription_uuid}:highest_notified'
+
+
+def enqueue_utilization_threshold_evaluation(subscription_uuid):
+    """
+    Enqueues a ``send_utilization_threshold_reached_email_task`` for a subscription plan whose utilization changed.
+
+    The evaluation runs ``UTILIZATION_THRESHOLD_EVALUATION_DEBOUNCE_SECONDS`` later, and every other evaluation of
+    the plan requested until it runs is coalesced into it. No evaluation is enqueued at all once the plan's admins
+    have been notified that its highest threshold was reached.
+
+    Arguments:
+        subscription_uuid (str): The subscription plan's uuid
+    """
+    if cache.get(_get_highest_utilization_threshold_notified_cache_key(subscription_uuid)):
+        accumulate('utilization_threshold_evaluation_skipped', 1)
+        return
+
+    if not cache.add(
+        _get_utilization_threshold_evaluation_cache_key(subscription_uuid),
+        True,
+        UTILIZATION_THRESHOLD_EVALUATION_DEBOUNCE_SECONDS,
+    ):
+        accumulate('utilization_threshold_evaluation_coalesced', 1)
+        return
+
+    accumulate('utilization_threshold_evaluation_enqueued', 1)
+    send_utilization_threshold_reached_email_task.apply_async(
+        (subscription_uuid,),
+        countdown=UTILIZATION_THRESHOLD_EVALUATION_DEBOUNCE_SECONDS,
+    )
+
+
 @shared_task(base=LoggedTaskWithRetry, soft_time_limit=SOFT_TIME_LIMIT, time_limit=MAX_TIME_LIMIT)
 def send_utilization_threshold_reached_email_task(subscription_uuid):
     """
@@ -871,7 +1370,11 @@ def send_utilization_threshold_reached_email_task(subscription_uuid):
     Arguments:
         subscription_uuid (str): The subscription plan's uuid
     """
-    subscription = SubscriptionPlan.objects.get(uuid=subscription_uuid)
+    # Changes of the plan's utilization from now on need another evaluation
+    cache.delete(_get_utilization_threshold_evaluation_cache_key(subscription_uuid))
+    accumulate('utilization_threshold_evaluation_executed', 1)
+
+    subscription = SubscriptionPlan.objects.select_related('customer_agreement').get(uuid=subscription_uuid)
 
     # only send email for the highest threshold reached
     highest_utilization_threshold_reached = subscription.highest_utilization_threshold_reached
@@ -880,6 +1383,9 @@ def send_utilization_threshold_reached_email_task(subscription_uuid):
         notification_type, campaign = NOTIFICATION_CHOICE_AND_CAMPAIGN_BY_THRESHOLD[
             highest_utilization_threshold_reached
         ]
+        highest_threshold_notification_type = NOTIFICATION_CHOICE_AND_CAMPAIGN_BY_THRESHOLD[
+            max(LICENSE_UTILIZATION_THRESHOLDS)
+        ][0]
 
         # check if we have already sent an email for the current threshold or any higher thresholds
         # if we sent an email for 100% utilization reached and a license was revoked, we don't want to send an email
@@ -892,13 +1398,15 @@ def send_utilization_threshold_reached_email_task(subscription_uuid):
             NOTIFICATION_CHOICE_AND_CAMPAIGN_BY_THRESHOLD[threshold][0] for threshold in current_and_higher_thresholds
         ]
 
-        has_email_been_sent_before = Notification.objects.filter(
+        sent_notification_types = set(Notification.objects.filter(
             enterprise_customer_uuid=subscription.customer_agreement.enterprise_customer_uuid,
             subscripton_plan_id=subscription.uuid,
             notification_type__in=current_and_higher_thresholds_notification_choices
-        ).count() > 0
+        ).values_list('notification_type', flat=True).distinct())
 
-        if has_email_been_sent_before:
+        if sent_notification_types:
+            if highest_threshold_notification_type in sent_notification_types:
+                _remember_highest_utilization_threshold_notified(subscription_uuid)
             message = (
                 'Not sending utilization threshold reached email for {subscription.uuid}, '
                 'email has already been sent previously.'
@@ -923,6 +1431,17 @@ def send_utilization_threshold_reached_email_task(subscription_uuid):
                 users=admin_users
             )
 
+        if admin_users and notification_type == highest_threshold_notification_type:
+            _remember_highest_utilization_threshold_notified(subscription_uuid)
+
+
+def _remember_highest_utilization_threshold_notified(subscription_uuid):
+    cache.set(
+        _get_highest_utilization_threshold_notified_cache_key(subscription_uuid),
+        True,
+        UTILIZATION_THRESHOLD_NOTIFIED_CACHE_TIMEOUT,
+    )
+
 
 @shared_task(base=LoggedTaskWithRetry, soft_time_limit=SOFT_TIME_LIMIT, time_limit=MAX_TIME_LIMIT, bind=True)
 def track_license_changes_task(self, license_uuids, event_name, properties=None, is_batch_assignment=False):
@@ -940,8 +1459,7 @@ def track_license_changes_task(self, license_uuids, event_name, properties=None,
     """
     properties = properties or {}
     # We chunk these up as to not fetch too many license records from the DB in a single query.
-    # We're also limited in `track_license_changes` by the number of records
-    # this braze endpoint allows us to request at a time:
+    # The braze client splits each chunk into as many requests as its endpoints need, see
     # https://www.braze.com/docs/api/endpoints/export/user_data/post_users_identifier/
     for uuid_str_chunk in chunks(license_uuids, TRACK_LICENSE_CHANGES_BATCH_SIZE):
         license_uuid_chunk = [uuid.UUID(uuid_str) for uuid_str in uuid_str_chunk]
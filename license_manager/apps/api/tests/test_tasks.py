@@ -10,15 +10,26 @@ import freezegun
 import pytest
 from braze.exceptions import BrazeClientError
 from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
 from django.test.utils import override_settings
 from freezegun import freeze_time
 from requests import models
+from requests.exceptions import HTTPError
 
 from license_manager.apps.api import tasks
+from license_manager.apps.api.models import (
+    LicenseExportJob,
+    LicenseOnboardingBatch,
+    LicenseOnboardingJob,
+    LicenseReminderJob,
+)
 from license_manager.apps.api.tests.factories import BulkEnrollmentJobFactory
 from license_manager.apps.subscriptions import constants
-from license_manager.apps.subscriptions.api import revoke_license
+from license_manager.apps.subscriptions.api import (
+    revoke_license,
+    revoke_licenses,
+)
 from license_manager.apps.subscriptions.constants import (
     ASSIGNED,
     DAYS_BEFORE_INITIAL_UTILIZATION_EMAIL_SENT,
@@ -44,6 +55,7 @@ from license_manager.apps.subscriptions.tests.factories import (
 )
 from license_manager.apps.subscriptions.tests.utils import (
     assert_date_fields_correct,
+    catalog_contains_all,
     make_test_email_data,
 )
 from license_manager.apps.subscriptions.utils import (
@@ -297,6 +309,75 @@ class EmailTaskTests(TestCase):
             False
         )
 
+    @mock.patch('license_manager.apps.api.tasks.REMINDER_EMAIL_BATCH_SIZE', 2)
+    @mock.patch('license_manager.apps.api.tasks.BrazeApiClient', autospec=True, return_value=mock.MagicMock())
+    @mock.patch('license_manager.apps.api.tasks.EnterpriseApiClient', return_value=mock.MagicMock())
+    def test_remind_all_licenses_task(self, mock_enterprise_client, mock_braze_client):
+        """
+        Assert remind_all_licenses_task reminds every assigned license in batches and records its progress.
+        """
+        mock_enterprise_client().get_enterprise_customer_data.return_value = {
+            'slug': self.enterprise_slug,
+            'name': self.enterprise_name,
+            'sender_alias': self.enterprise_sender_alias,
+            'contact_email': self.contact_email,
+        }
+        license_reminder_job = LicenseReminderJob.objects.create(
+            subscription_plan_uuid=self.subscription_plan.uuid,
+            custom_template_text=self.custom_template_text,
+        )
+
+        with freeze_time(localized_utcnow()):
+            tasks.remind_all_licenses_task(str(license_reminder_job.uuid))
+            assert_date_fields_correct(self.assigned_licenses, ['last_remind_date'], True)
+
+        mock_enterprise_client().get_enterprise_customer_data.assert_called_once_with(
+            self.subscription_plan.enterprise_customer_uuid
+        )
+        reminded_emails = [
+            [recipient['attributes']['email'] for recipient in _call.kwargs['recipients']]
+            for _call in mock_braze_client().send_campaign_message.call_args_list
+        ]
+        assert [len(batch_emails) for batch_emails in reminded_emails] == [2, 1]
+        assert sorted(email for batch_emails in reminded_emails for email in batch_emails) == sorted(
+            self.email_recipient_list
+        )
+
+        license_reminder_job.refresh_from_db()
+        assert license_reminder_job.num_licenses == 3
+        assert license_reminder_job.num_licenses_reminded == 3
+        assert license_reminder_job.last_license_uuid == self.assigned_licenses.last().uuid
+        assert license_reminder_job.percent_complete == 100
+        assert license_reminder_job.completed_at is not None
+
+    @mock.patch('license_manager.apps.api.tasks.REMIND_ALL_LICENSES_MAX_BATCHES_PER_TASK', 1)
+    @mock.patch('license_manager.apps.api.tasks.REMINDER_EMAIL_BATCH_SIZE', 2)
+    @mock.patch('license_manager.apps.api.tasks.BrazeApiClient', autospec=True, return_value=mock.MagicMock())
+    @mock.patch('license_manager.apps.api.tasks.EnterpriseApiClient', return_value=mock.MagicMock())
+    def test_remind_all_licenses_task_queues_remaining_batches(self, mock_enterprise_client, mock_braze_client):
+        """
+        Assert remind_all_licenses_task queues another task to remind the licenses left once it has sent its
+        most batches, and that the queued task resumes the job after the last batch reminded.
+        """
+        license_reminder_job = LicenseReminderJob.objects.create(
+            subscription_plan_uuid=self.subscription_plan.uuid,
+            custom_template_text=self.custom_template_text,
+        )
+
+        with mock.patch(
+            'license_manager.apps.api.tasks.remind_all_licenses_task.delay',
+            side_effect=tasks.remind_all_licenses_task,
+        ) as mock_remind_all_licenses_task:
+            tasks.remind_all_licenses_task(str(license_reminder_job.uuid))
+
+        # The second task reminds the last license, and the third finds none left
+        assert mock_remind_all_licenses_task.call_args_list == [mock.call(str(license_reminder_job.uuid))] * 2
+        assert mock_braze_client().send_campaign_message.call_count == 2
+        license_reminder_job.refresh_from_db()
+        assert license_reminder_job.num_licenses == 3
+        assert license_reminder_job.num_licenses_reminded == 3
+        assert license_reminder_job.completed_at is not None
+
     def _verify_mock_send_email_arguments(self, send_email_args):
         """
         Verifies that the arguments passed into send_activation_emails is correct
@@ -565,34 +646,39 @@ class RevokeAllLicensesTaskTests(TestCase):
         License.objects.all().delete()
         SubscriptionPlan.objects.all().delete()
 
-    @mock.patch('license_manager.apps.api.tasks.execute_post_revocation_tasks')
-    @mock.patch('license_manager.apps.subscriptions.api.revoke_license')
-    def test_revoke_all_licenses_task(self, mock_revoke_license, mock_execute_post_revocation_tasks):
+    @mock.patch('license_manager.apps.api.tasks.execute_bulk_post_revocation_tasks')
+    def test_revoke_all_licenses_task(self, mock_execute_post_revocation_tasks):
         """
-        Verify that revoke_license and execute_post_revocation_tasks is called for each revocable license
+        Verify that every revocable license is revoked and execute_bulk_post_revocation_tasks is called once for them
         """
         tasks.revoke_all_licenses_task(self.subscription_plan.uuid)
-        expected_calls = [mock.call(self.activated_license), mock.call(self.assigned_license)]
-        mock_revoke_license.assert_has_calls(expected_calls, any_order=True)
-        assert mock_execute_post_revocation_tasks.call_count == 2
 
-    @mock.patch('license_manager.apps.api.tasks.execute_post_revocation_tasks')
-    @mock.patch('license_manager.apps.subscriptions.api.revoke_license')
-    def test_revoke_all_licenses_task_error(self, mock_revoke_license, mock_execute_post_revocation_tasks):
+        mock_execute_post_revocation_tasks.assert_called_once()
+        revoked_license_uuids = {
+            result['revoked_license'].uuid
+            for result in mock_execute_post_revocation_tasks.call_args.args[0]
+        }
+        assert revoked_license_uuids == {self.activated_license.uuid, self.assigned_license.uuid}
+        assert self.subscription_plan.license_count_by_status() == {
+            constants.ACTIVATED: 0,
+            constants.ASSIGNED: 0,
+            constants.UNASSIGNED: 3,
+            constants.REVOKED: 2,
+        }
+
+    @mock.patch('license_manager.apps.api.tasks.execute_bulk_post_revocation_tasks')
+    def test_revoke_all_licenses_task_error(self, mock_execute_post_revocation_tasks):
         """
-        Verify that revoke_license handles any errors
+        Verify that no license is revoked if any of them can't be
         """
-        mock_revoke_license.side_effect = [
-            LicenseRevocationError(self.assigned_license.uuid, 'something terrible went wrong'),
-            None
-        ]
+        self.subscription_plan.is_revocation_cap_enabled = True
+        self.subscription_plan.revoke_max_percentage = 0
+        self.subscription_plan.save()
 
         with pytest.raises(LicenseRevocationError):
             tasks.revoke_all_licenses_task(self.subscription_plan.uuid)
 
-        assert len(mock_revoke_license.call_args_list) == 1
-        revokable_licenses = [self.activated_license.uuid, self.assigned_license.uuid]
-        assert mock_revoke_license.call_args_list[0][0][0].uuid in revokable_licenses
+        assert self.subscription_plan.revoked_licenses.count() == 0
         assert mock_execute_post_revocation_tasks.call_count == 0
 
     @ddt.data(
@@ -601,7 +687,7 @@ class RevokeAllLicensesTaskTests(TestCase):
         {'original_status': constants.ASSIGNED, 'revoke_max_percentage': 100}
     )
     @ddt.unpack
-    @mock.patch('license_manager.apps.api.tasks.revoke_course_enrollments_for_user_task.delay')
+    @mock.patch('license_manager.apps.api.tasks.revoke_course_enrollments_for_users_task.delay')
     @mock.patch('license_manager.apps.api.tasks.send_revocation_cap_notification_email_task.delay')
     def test_execute_post_revocation_tasks(
         self,
@@ -637,6 +723,56 @@ class RevokeAllLicensesTaskTests(TestCase):
         self.assertEqual(mock_revoke_enrollments_delay.called, is_license_revoked)
         self.assertEqual(mock_cap_email_delay.called, revoke_limit_reached)
 
+    @mock.patch('license_manager.apps.api.tasks.REVOKE_COURSE_ENROLLMENTS_BATCH_SIZE', 2)
+    @mock.patch('license_manager.apps.api.tasks.revoke_course_enrollments_for_users_task.delay')
+    @mock.patch('license_manager.apps.api.tasks.send_revocation_cap_notification_email_task.delay')
+    def test_execute_bulk_post_revocation_tasks(self, mock_cap_email_delay, mock_revoke_enrollments_delay):
+        """
+        Verify that enrollments are revoked in batches of users, and the revocation cap is checked once per plan.
+        """
+        subscription_plan = SubscriptionPlanFactory.create(
+            is_revocation_cap_enabled=True,
+            num_revocations_applied=0,
+            revoke_max_percentage=75,
+        )
+        activated_licenses = [
+            LicenseFactory.create(status=constants.ACTIVATED, subscription_plan=subscription_plan, lms_user_id=user_id)
+            for user_id in range(3)
+        ]
+        assigned_license = LicenseFactory.create(status=constants.ASSIGNED, subscription_plan=subscription_plan)
+
+        with freezegun.freeze_time(self.now):
+            revocation_results, _ = revoke_licenses(
+                subscription_plan,
+                activated_licenses + [assigned_license],
+            )
+            tasks.execute_bulk_post_revocation_tasks(revocation_results)
+
+        enterprise_id = str(subscription_plan.enterprise_customer_uuid)
+        assert mock_revoke_enrollments_delay.call_args_list == [
+            mock.call(user_ids=[0, 1], enterprise_id=enterprise_id),
+            mock.call(user_ids=[2], enterprise_id=enterprise_id),
+        ]
+        mock_cap_email_delay.assert_called_once_with(subscription_uuid=subscription_plan.uuid)
+
+    @mock.patch('license_manager.apps.api.tasks.logger')
+    @mock.patch('license_manager.apps.api.tasks.EnterpriseApiClient')
+    def test_revoke_course_enrollments_for_users_task(self, mock_enterprise_client, mock_logger):
+        """
+        Verify that each user's failed revocation is logged.
+        """
+        enterprise_id = str(uuid4())
+        mock_enterprise_client().revoke_course_enrollments_for_users.return_value = {
+            1: None,
+            2: HTTPError('Bad Request'),
+        }
+
+        tasks.revoke_course_enrollments_for_users_task([1, 2], enterprise_id)
+
+        mock_enterprise_client().revoke_course_enrollments_for_users.assert_called_once_with([1, 2], enterprise_id)
+        mock_logger.error.assert_called_once()
+        assert '[2]' in mock_logger.error.call_args.args[0]
+
 
 class EnterpriseEnrollmentLicenseSubsidyTaskTests(TestCase):
     @classmethod
@@ -681,9 +817,11 @@ class EnterpriseEnrollmentLicenseSubsidyTaskTests(TestCase):
     @mock.patch(
         'license_manager.apps.api.tasks.BulkEnrollmentJob.upload_results', return_value="https://example.com/download"
     )
-    @mock.patch('license_manager.apps.api.v1.views.SubscriptionPlan.contains_content')
+    @mock.patch('license_manager.apps.api.utils.get_catalog_content_membership', side_effect=catalog_contains_all)
     @mock.patch('license_manager.apps.api_client.enterprise.EnterpriseApiClient.bulk_enroll_enterprise_learners')
-    def test_bulk_enroll(self, mock_bulk_enroll_enterprise_learners, mock_contains_content, mock_upload_results):
+    def test_bulk_enroll(
+        self, mock_bulk_enroll_enterprise_learners, mock_get_catalog_content_membership, mock_upload_results
+    ):
 
         mock_enrollment_response = mock.Mock(spec=models.Response)
         mock_enrollment_response.json.return_value = {
@@ -705,7 +843,7 @@ class EnterpriseEnrollmentLicenseSubsidyTaskTests(TestCase):
             'notify': True
         }
 
-        results = tasks.enterprise_enrollment_license_subsidy_task(
+        results = tasks.enterprise_enrollment_license_subsidy_chunk_task(
             str(self.bulk_enrollment_job.uuid),
             self.enterprise_customer_uuid,
             [self.user.email],
@@ -718,21 +856,20 @@ class EnterpriseEnrollmentLicenseSubsidyTaskTests(TestCase):
             str(self.enterprise_customer_uuid),
             expected_enterprise_enrollment_request_options
         )
-        mock_contains_content.assert_called_with([self.course_key])
-        assert mock_contains_content.call_count == 1
+        mock_get_catalog_content_membership.assert_called_once_with(self.enterprise_catalog_uuid, [self.course_key])
         assert len(results) == 1
         assert results[0][2] == 'success'
 
     @mock.patch(
         'license_manager.apps.api.tasks.BulkEnrollmentJob.upload_results', return_value="https://example.com/download"
     )
-    @mock.patch('license_manager.apps.api.v1.views.SubscriptionPlan.contains_content')
+    @mock.patch('license_manager.apps.api.utils.get_catalog_content_membership', side_effect=catalog_contains_all)
     @mock.patch('license_manager.apps.api_client.enterprise.EnterpriseApiClient.bulk_enroll_enterprise_learners')
     def test_bulk_enroll_revoked_license(
-        self, mock_bulk_enroll_enterprise_learners, mock_contains_content, mock_upload_results
+        self, mock_bulk_enroll_enterprise_learners, mock_get_catalog_content_membership, mock_upload_results
     ):
         # random, non-existant subscription uuid
-        results = tasks.enterprise_enrollment_license_subsidy_task(
+        results = tasks.enterprise_enrollment_license_subsidy_chunk_task(
             str(self.bulk_enrollment_job.uuid),
             self.enterprise_customer_uuid,
             [self.user2.email],
@@ -748,10 +885,10 @@ class EnterpriseEnrollmentLicenseSubsidyTaskTests(TestCase):
     @mock.patch(
         'license_manager.apps.api.tasks.BulkEnrollmentJob.upload_results', return_value="https://example.com/download"
     )
-    @mock.patch('license_manager.apps.api.v1.views.SubscriptionPlan.contains_content')
+    @mock.patch('license_manager.apps.api.utils.get_catalog_content_membership', side_effect=catalog_contains_all)
     @mock.patch('license_manager.apps.api_client.enterprise.EnterpriseApiClient.bulk_enroll_enterprise_learners')
     def test_bulk_enroll_invalid_email_addresses(
-        self, mock_bulk_enroll_enterprise_learners, mock_contains_content, mock_upload_results
+        self, mock_bulk_enroll_enterprise_learners, mock_get_catalog_content_membership, mock_upload_results
     ):
         mock_enrollment_response = mock.Mock(spec=models.Response)
         mock_enrollment_response.json.return_value = {
@@ -763,7 +900,7 @@ class EnterpriseEnrollmentLicenseSubsidyTaskTests(TestCase):
         mock_enrollment_response.status_code = 201
         mock_bulk_enroll_enterprise_learners.return_value = mock_enrollment_response
 
-        results = tasks.enterprise_enrollment_license_subsidy_task(
+        results = tasks.enterprise_enrollment_license_subsidy_chunk_task(
             str(self.bulk_enrollment_job.uuid),
             self.enterprise_customer_uuid,
             [self.user.email],
@@ -779,10 +916,10 @@ class EnterpriseEnrollmentLicenseSubsidyTaskTests(TestCase):
     @mock.patch(
         'license_manager.apps.api.tasks.BulkEnrollmentJob.upload_results', return_value="https://example.com/download"
     )
-    @mock.patch('license_manager.apps.api.v1.views.SubscriptionPlan.contains_content')
+    @mock.patch('license_manager.apps.api.utils.get_catalog_content_membership', side_effect=catalog_contains_all)
     @mock.patch('license_manager.apps.api_client.enterprise.EnterpriseApiClient.bulk_enroll_enterprise_learners')
     def test_bulk_enroll_pending(
-        self, mock_bulk_enroll_enterprise_learners, mock_contains_content, mock_upload_results
+        self, mock_bulk_enroll_enterprise_learners, mock_get_catalog_content_membership, mock_upload_results
     ):
         mock_enrollment_response = mock.Mock(spec=models.Response)
         mock_enrollment_response.json.return_value = {
@@ -793,7 +930,7 @@ class EnterpriseEnrollmentLicenseSubsidyTaskTests(TestCase):
         mock_enrollment_response.status_code = 202
         mock_bulk_enroll_enterprise_learners.return_value = mock_enrollment_response
 
-        results = tasks.enterprise_enrollment_license_subsidy_task(
+        results = tasks.enterprise_enrollment_license_subsidy_chunk_task(
             str(self.bulk_enrollment_job.uuid), self.enterprise_customer_uuid,
             [self.user.email], [self.course_key],
             True, self.active_subscription_for_customer.uuid,
@@ -805,10 +942,10 @@ class EnterpriseEnrollmentLicenseSubsidyTaskTests(TestCase):
     @mock.patch(
         'license_manager.apps.api.tasks.BulkEnrollmentJob.upload_results', return_value="https://example.com/download"
     )
-    @mock.patch('license_manager.apps.api.v1.views.SubscriptionPlan.contains_content')
+    @mock.patch('license_manager.apps.api.utils.get_catalog_content_membership', side_effect=catalog_contains_all)
     @mock.patch('license_manager.apps.api_client.enterprise.EnterpriseApiClient.bulk_enroll_enterprise_learners')
     def test_bulk_enroll_failures(
-        self, mock_bulk_enroll_enterprise_learners, mock_contains_content, mock_upload_results
+        self, mock_bulk_enroll_enterprise_learners, mock_get_catalog_content_membership, mock_upload_results
     ):
         mock_enrollment_response = mock.Mock(spec=models.Response)
         mock_enrollment_response.json.return_value = {
@@ -819,7 +956,7 @@ class EnterpriseEnrollmentLicenseSubsidyTaskTests(TestCase):
         mock_enrollment_response.status_code = 201
         mock_bulk_enroll_enterprise_learners.return_value = mock_enrollment_response
 
-        results = tasks.enterprise_enrollment_license_subsidy_task(
+        results = tasks.enterprise_enrollment_license_subsidy_chunk_task(
             str(self.bulk_enrollment_job.uuid), self.enterprise_customer_uuid,
             [self.user.email], [self.course_key],
             True, self.active_subscription_for_customer.uuid,
@@ -828,6 +965,207 @@ class EnterpriseEnrollmentLicenseSubsidyTaskTests(TestCase):
         assert len(results) == 1
         assert results[0][2] == 'failed'
 
+    @override_settings(BULK_ENROLL_JOB_AWS_BUCKET='test-bucket')
+    @mock.patch('license_manager.apps.api.tasks.BulkEnrollmentJob.upload_results')
+    @mock.patch('license_manager.apps.api.utils.get_catalog_content_membership', side_effect=catalog_contains_all)
+    @mock.patch('license_manager.apps.api_client.enterprise.EnterpriseApiClient.bulk_enroll_enterprise_learners')
+    def test_bulk_enroll_fans_out_chunks(
+        self, mock_bulk_enroll_enterprise_learners, mock_get_catalog_content_membership, mock_upload_results
+    ):
+        """
+        Verify the job is enrolled in chunks of learners whose results are merged into one CSV.
+        """
+        learner_emails = [self.user.email] + [f'unlicensed-{index}@example.com' for index in range(29)]
+        mock_enrollment_response = mock.Mock(spec=models.Response)
+        mock_enrollment_response.json.return_value = {
+            'successes': [{'email': self.user.email, 'course_run_key': self.course_key}],
+            'pending': [],
+            'failures': []
+        }
+        mock_bulk_enroll_enterprise_learners.return_value = mock_enrollment_response
+        written_results = []
+
+        def read_results_file(file_name):
+            with open(file_name, encoding='utf-8') as results_file:
+                written_results.extend(results_file.read().splitlines())
+
+        mock_upload_results.side_effect = read_results_file
+
+        tasks.enterprise_enrollment_license_subsidy_task(
+            str(self.bulk_enrollment_job.uuid),
+            self.enterprise_customer_uuid,
+            learner_emails,
+            [self.course_key],
+            True,
+            self.active_subscription_for_customer.uuid,
+        )
+
+        # Only the first chunk of 25 learners holds a licensed learner
+        mock_bulk_enroll_enterprise_learners.assert_called_once()
+        assert written_results[0] == 'email address,course key,enrollment status,notes'
+        assert len(written_results) == len(learner_emails) + 1
+        assert f'{self.user.email},{self.course_key},success,' in written_results
+
+        self.bulk_enrollment_job.refresh_from_db()
+        assert self.bulk_enrollment_job.num_chunks == 2
+        assert self.bulk_enrollment_job.num_chunks_completed == 2
+        assert self.bulk_enrollment_job.percent_complete == 100
+
+    @mock.patch('license_manager.apps.api.tasks.merge_enterprise_enrollment_license_subsidy_results_task.delay')
+    def test_bulk_enroll_no_learners(self, mock_merge_delay):
+        tasks.enterprise_enrollment_license_subsidy_task(
+            str(self.bulk_enrollment_job.uuid),
+            self.enterprise_customer_uuid,
+            [],
+            [self.course_key],
+            True,
+            self.active_subscription_for_customer.uuid,
+        )
+
+        mock_merge_delay.assert_called_once_with([], str(self.bulk_enrollment_job.uuid))
+        self.bulk_enrollment_job.refresh_from_db()
+        assert self.bulk_enrollment_job.num_chunks == 0
+
+
+@mock.patch('license_manager.apps.api.tasks.track_license_changes_task.delay')
+class OnboardLicensesTaskTests(TestCase):
+    """
+    Tests for onboard_licenses_task and finish_license_onboarding_batch_task.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.subscription_plan = SubscriptionPlanFactory()
+        cls.assigned_licenses = LicenseFactory.create_batch(
+            120,
+            status=constants.ASSIGNED,
+            subscription_plan=cls.subscription_plan,
+        )
+
+    def _create_onboarding_job(self):
+        return LicenseOnboardingJob.objects.create(
+            subscription_plan_uuid=self.subscription_plan.uuid,
+            license_uuids=[str(_license.uuid) for _license in self.assigned_licenses],
+            notify_users=False,
+        )
+
+    @mock.patch('license_manager.apps.api.tasks.EnterpriseApiClient')
+    def test_onboard_licenses_in_batches(self, mock_enterprise_client, mock_track_license_changes):
+        onboarding_job = self._create_onboarding_job()
+
+        tasks.onboard_licenses_task(str(onboarding_job.uuid))
+
+        mock_track_license_changes.assert_called_once_with(
+            onboarding_job.license_uuids,
+            constants.SegmentEvents.LICENSE_ASSIGNED,
+            is_batch_assignment=True,
+        )
+        linked_email_batches = [
+            call.args[1] for call in mock_enterprise_client().create_pending_enterprise_users.call_args_list
+        ]
+        assert [len(email_batch) for email_batch in linked_email_batches] == [50, 50, 20]
+        assert sorted(email for batch in linked_email_batches for email in batch) == sorted(
+            _license.user_email for _license in self.assigned_licenses
+        )
+
+        onboarding_job.refresh_from_db()
+        assert onboarding_job.num_batches == 3
+        assert onboarding_job.num_batches_completed == 3
+        assert onboarding_job.percent_complete == 100
+        assert onboarding_job.completed_at is not None
+        assert set(onboarding_job.batches.values_list('status', flat=True)) == {LicenseOnboardingBatch.COMPLETE}
+
+    @mock.patch('license_manager.apps.api.tasks.LICENSE_ONBOARDING_MAX_CONCURRENT_BATCHES', 2)
+    @mock.patch('license_manager.apps.api.tasks.finish_license_onboarding_batch_task.si')
+    @mock.patch('license_manager.apps.api.tasks.link_learners_to_enterprise_task.si')
+    def test_onboard_licenses_bounds_queued_batches(self, _, __, mock_track_license_changes):
+        onboarding_job = self._create_onboarding_job()
+
+        tasks.onboard_licenses_task(str(onboarding_job.uuid))
+        # Running the task again doesn't queue more batches than the bound, nor tracks the assignments again
+        tasks.onboard_licenses_task(str(onboarding_job.uuid))
+
+        mock_track_license_changes.assert_called_once()
+        assert list(onboarding_job.batches.order_by('index').values_list('status', flat=True)) == [
+            LicenseOnboardingBatch.QUEUED,
+            LicenseOnboardingBatch.QUEUED,
+            LicenseOnboardingBatch.PENDING,
+        ]
+
+    @mock.patch('license_manager.apps.api.tasks.finish_license_onboarding_batch_task.si')
+    @mock.patch('license_manager.apps.api.tasks.send_assignment_email_task.si')
+    @mock.patch('license_manager.apps.api.tasks.create_braze_aliases_task.si')
+    @mock.patch('license_manager.apps.api.tasks.link_learners_to_enterprise_task.si')
+    def test_onboard_licenses_notifies_users(
+        self, mock_link_learners_task, mock_create_braze_aliases_task, mock_send_assignment_email_task, _, __,
+    ):
+        custom_template_text = {'greeting': 'Hello', 'closing': 'Goodbye'}
+        assigned_licenses = self.assigned_licenses[:2]
+        revoked_license = self.assigned_licenses[2]
+        revoked_license.status = constants.REVOKED
+        revoked_license.save()
+        onboarding_job = LicenseOnboardingJob.objects.create(
+            subscription_plan_uuid=self.subscription_plan.uuid,
+            license_uuids=[str(_license.uuid) for _license in assigned_licenses + [revoked_license]],
+            custom_template_text=custom_template_text,
+        )
+
+        tasks.onboard_licenses_task(str(onboarding_job.uuid))
+
+        # The learner whose license was revoked since it was assigned isn't onboarded
+        user_emails = [_license.user_email for _license in assigned_licenses]
+        (linked_emails, enterprise_customer_uuid), _ = mock_link_learners_task.call_args
+        assert sorted(linked_emails) == sorted(user_emails)
+        assert enterprise_customer_uuid == self.subscription_plan.enterprise_customer_uuid
+        mock_create_braze_aliases_task.assert_called_once_with(linked_emails)
+        mock_send_assignment_email_task.assert_called_once_with(
+            custom_template_text,
+            linked_emails,
+            str(self.subscription_plan.uuid),
+        )
+
+    @mock.patch('license_manager.apps.api.tasks.LICENSE_ONBOARDING_MAX_CONCURRENT_BATCHES', 1)
+    @mock.patch('license_manager.apps.api.tasks.finish_license_onboarding_batch_task.si')
+    @mock.patch('license_manager.apps.api.tasks.link_learners_to_enterprise_task.si')
+    def test_finish_license_onboarding_batch_queues_next_batch(self, _, __, ___):
+        onboarding_job = self._create_onboarding_job()
+        tasks.onboard_licenses_task(str(onboarding_job.uuid))
+        first_batch = onboarding_job.batches.get(index=0)
+
+        tasks.finish_license_onboarding_batch_task(first_batch.id, LicenseOnboardingBatch.COMPLETE)
+
+        assert list(onboarding_job.batches.order_by('index').values_list('status', flat=True)) == [
+            LicenseOnboardingBatch.COMPLETE,
+            LicenseOnboardingBatch.QUEUED,
+            LicenseOnboardingBatch.PENDING,
+        ]
+        onboarding_job.refresh_from_db()
+        assert onboarding_job.num_batches_completed == 1
+        assert onboarding_job.completed_at is None
+
+    @mock.patch('license_manager.apps.api.tasks._queue_next_license_onboarding_batch')
+    def test_finish_license_onboarding_batch_failed(self, mock_queue_next_batch, _):
+        onboarding_job = self._create_onboarding_job()
+        onboarding_job.num_batches = 1
+        onboarding_job.save()
+        batch = LicenseOnboardingBatch.objects.create(
+            job=onboarding_job,
+            index=0,
+            license_uuids=onboarding_job.license_uuids,
+            status=LicenseOnboardingBatch.QUEUED,
+        )
+
+        tasks.finish_license_onboarding_batch_task(batch.id, LicenseOnboardingBatch.FAILED)
+        # A batch is only finished once
+        tasks.finish_license_onboarding_batch_task(batch.id, LicenseOnboardingBatch.COMPLETE)
+
+        batch.refresh_from_db()
+        onboarding_job.refresh_from_db()
+        assert batch.status == LicenseOnboardingBatch.FAILED
+        assert onboarding_job.num_batches_completed == 1
+        assert onboarding_job.completed_at is not None
+        mock_queue_next_batch.assert_called_once_with(batch.job)
+
 
 class BaseLicenseUtilizationEmailTaskTests(TestCase):
     now = localized_utcnow()
@@ -973,8 +1311,50 @@ class SendInitialUtilizationEmailTaskTests(BaseLicenseUtilizationEmailTaskTests)
             assert notification is None
 
 
+class ExportLicensesCsvTaskTests(TestCase):
+    """
+    Tests for the export_licenses_csv_task.
+    """
+    def setUp(self):
+        super().setUp()
+        self.subscription_plan = SubscriptionPlanFactory()
+        self.assigned_license = LicenseFactory.create(
+            status=constants.ASSIGNED, subscription_plan=self.subscription_plan,
+        )
+        LicenseFactory.create(status=constants.UNASSIGNED, subscription_plan=self.subscription_plan)
+        self.license_export_job = LicenseExportJob.objects.create(
+            enterprise_customer_uuid=self.subscription_plan.customer_agreement.enterprise_customer_uuid,
+            subscription_plan_uuid=self.subscription_plan.uuid,
+            lms_user_id=1,
+        )
+
+    @override_settings(LICENSE_EXPORT_JOB_AWS_BUCKET='test-bucket')
+    @mock.patch('license_manager.apps.api.models.upload_file_to_s3')
+    def test_export_licenses_csv_task(self, mock_upload_file_to_s3):
+        uploaded_contents = []
+
+        def read_uploaded_file(file_name, *args, **kwargs):
+            with open(file_name, encoding='utf-8') as uploaded_file:
+                uploaded_contents.append(uploaded_file.read())
+
+        mock_upload_file_to_s3.side_effect = read_uploaded_file
+
+        tasks.export_licenses_csv_task(str(self.license_export_job.uuid))
+
+        lines = uploaded_contents[0].splitlines()
+        assert lines[0] == 'activation_date,activation_link,last_remind_date,status,user_email'
+        assert len(lines) == 2
+        assert self.assigned_license.user_email in lines[1]
+        self.license_export_job.refresh_from_db()
+        assert self.license_export_job.results_s3_object_name
+
+
 @ddt.ddt
 class SendUtilizationThresholdReachedEmailTaskTests(BaseLicenseUtilizationEmailTaskTests):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
     def _create_licenses(self, num_allocated_licenses, num_licenses):
         """
         Create licenses to reach a utilization threshold.
@@ -1080,6 +1460,42 @@ class SendUtilizationThresholdReachedEmailTaskTests(BaseLicenseUtilizationEmailT
             notification_type=notification_type,
         )
 
+    @mock.patch('license_manager.apps.api.tasks.accumulate')
+    @mock.patch('license_manager.apps.api.tasks.send_utilization_threshold_reached_email_task.apply_async')
+    def test_enqueue_utilization_threshold_evaluation_coalesces(self, mock_apply_async, mock_accumulate):
+        """
+        Tests that the evaluations of a plan requested until its pending evaluation runs are coalesced into it.
+        """
+        for _ in range(3):
+            tasks.enqueue_utilization_threshold_evaluation(self.subscription_plan.uuid)
+
+        mock_apply_async.assert_called_once_with(
+            (self.subscription_plan.uuid,),
+            countdown=tasks.UTILIZATION_THRESHOLD_EVALUATION_DEBOUNCE_SECONDS,
+        )
+        mock_accumulate.assert_any_call('utilization_threshold_evaluation_enqueued', 1)
+        assert mock_accumulate.call_args_list.count(mock.call('utilization_threshold_evaluation_coalesced', 1)) == 2
+
+    @mock.patch('license_manager.apps.api.tasks.EnterpriseApiClient', return_value=mock.MagicMock())
+    @mock.patch('license_manager.apps.api.tasks.BrazeApiClient', return_value=mock.MagicMock())
+    def test_enqueue_utilization_threshold_evaluation_after_highest_threshold_notified(
+        self, mock_braze_api_client, mock_enterprise_api_client
+    ):
+        """
+        Tests that no evaluation is enqueued once the highest threshold email has been sent.
+        """
+        self._create_licenses(1, 1)
+        mock_enterprise_api_client().get_enterprise_admin_users.return_value = [self.test_admin_user]
+
+        tasks.send_utilization_threshold_reached_email_task(self.subscription_plan.uuid)
+        mock_braze_api_client.return_value.send_campaign_message.assert_called_once()
+
+        with mock.patch(
+            'license_manager.apps.api.tasks.send_utilization_threshold_reached_email_task.apply_async'
+        ) as mock_apply_async:
+            tasks.enqueue_utilization_threshold_evaluation(self.subscription_plan.uuid)
+        mock_apply_async.assert_not_called()
+
     @mock.patch('license_manager.apps.api.tasks.EnterpriseApiClient', return_value=mock.MagicMock())
     @mock.patch('license_manager.apps.api.tasks.BrazeApiClient', return_value=mock.MagicMock())
     def test_send_utilization_threshold_reached_email_task_failure(
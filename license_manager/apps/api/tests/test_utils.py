@@ -2,11 +2,13 @@
 Tests for the license-manager API utility functions
 """
 import logging
+import time
+from datetime import timedelta
 from unittest import mock
 from uuid import uuid4
 
 from django.test import TestCase
-from edx_django_utils.cache.utils import TieredCache
+from freezegun import freeze_time
 
 from license_manager.apps.api import utils
 from license_manager.apps.subscriptions import constants
@@ -14,6 +16,7 @@ from license_manager.apps.subscriptions.models import (
     CustomerAgreement,
     License,
     SubscriptionPlan,
+    SubscriptionPlanLock,
 )
 from license_manager.apps.subscriptions.tests.factories import (
     CustomerAgreementFactory,
@@ -21,6 +24,11 @@ from license_manager.apps.subscriptions.tests.factories import (
     SubscriptionPlanFactory,
     UserFactory,
 )
+from license_manager.apps.subscriptions.tests.utils import catalog_contains_all
+from license_manager.apps.subscriptions.utils import (
+    get_license_activation_link,
+    localized_utcnow,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -65,8 +73,8 @@ class CheckMissingLicenseTests(TestCase):
         SubscriptionPlan.objects.all().delete()
         CustomerAgreement.objects.all().delete()
 
-    @mock.patch('license_manager.apps.api.v1.views.SubscriptionPlan.contains_content')
-    def test_assigned(self, mock_contains_content):
+    @mock.patch('license_manager.apps.api.utils.get_catalog_content_membership', side_effect=catalog_contains_all)
+    def test_assigned(self, mock_get_catalog_content_membership):
         _, licensed_enrollment_info = utils.check_missing_licenses(
             self.customer_agreement,
             [self.assigned_user.email],
@@ -78,8 +86,8 @@ class CheckMissingLicenseTests(TestCase):
         assert licensed_enrollment_info[0]['activation_link'] is not None
         assert str(self.assigned_license.activation_key) in licensed_enrollment_info[0]['activation_link']
 
-    @mock.patch('license_manager.apps.api.v1.views.SubscriptionPlan.contains_content')
-    def test_active(self, mock_contains_content):
+    @mock.patch('license_manager.apps.api.utils.get_catalog_content_membership', side_effect=catalog_contains_all)
+    def test_active(self, mock_get_catalog_content_membership):
         _, licensed_enrollment_info = utils.check_missing_licenses(
             self.customer_agreement,
             [self.activated_user.email],
@@ -90,8 +98,8 @@ class CheckMissingLicenseTests(TestCase):
         assert licensed_enrollment_info[0]['email'] == self.activated_license.user_email
         assert licensed_enrollment_info[0].get('activation_link') is None
 
-    @mock.patch('license_manager.apps.api.v1.views.SubscriptionPlan.contains_content')
-    def test_missing(self, mock_contains_content):
+    @mock.patch('license_manager.apps.api.utils.get_catalog_content_membership', side_effect=catalog_contains_all)
+    def test_missing(self, mock_get_catalog_content_membership):
         missing_subscriptions, licensed_enrollment_info = utils.check_missing_licenses(
             self.customer_agreement,
             [self.unlicensed_user.email],
@@ -101,6 +109,94 @@ class CheckMissingLicenseTests(TestCase):
         assert len(licensed_enrollment_info) == 0
         assert missing_subscriptions.get(self.unlicensed_user.email) is not None
 
+    def test_multiple_plans(self):
+        """
+        Each course is covered by every license whose plan's catalog contains it, latest-expiring plan first.
+        """
+        later_catalog_uuid = uuid4()
+        later_subscription = SubscriptionPlanFactory.create(
+            customer_agreement=self.customer_agreement,
+            enterprise_catalog_uuid=later_catalog_uuid,
+            expiration_date=self.active_subscription_for_customer.expiration_date + timedelta(days=30),
+            is_active=True,
+        )
+        later_license = LicenseFactory.create(
+            status=constants.ACTIVATED,
+            user_email=self.activated_user.email,
+            subscription_plan=later_subscription,
+        )
+        catalog_course_keys = {
+            self.enterprise_catalog_uuid: {'course-a', 'course-b'},
+            later_catalog_uuid: {'course-a'},
+        }
+
+        def get_catalog_content_membership(enterprise_catalog_uuid, content_ids):
+            return {
+                content_id: content_id in catalog_course_keys[enterprise_catalog_uuid]
+                for content_id in content_ids
+            }
+
+        with mock.patch(
+            'license_manager.apps.api.utils.get_catalog_content_membership',
+            side_effect=get_catalog_content_membership,
+        ) as mock_get_catalog_content_membership:
+            missing_subscriptions, licensed_enrollment_info = utils.check_missing_licenses(
+                self.customer_agreement,
+                [self.activated_user.email],
+                ['course-a', 'course-b', 'course-c', 'course-a'],
+            )
+
+        assert mock_get_catalog_content_membership.call_count == 2
+        assert missing_subscriptions == {self.activated_user.email: ['course-c']}
+        assert [
+            (enrollment['course_run_key'], enrollment['license_uuid']) for enrollment in licensed_enrollment_info
+        ] == [
+            ('course-a', str(later_license.uuid)),
+            ('course-a', str(self.activated_license.uuid)),
+            ('course-b', str(self.activated_license.uuid)),
+        ]
+
+
+class CheckMissingLicensesBenchmarkTests(TestCase):
+    """
+    Benchmarks check_missing_licenses for 500 learners x 25 courses across 5 plans.
+    """
+    NUM_PLANS = 5
+    NUM_LEARNERS_PER_PLAN = 100
+    NUM_COURSES = 25
+
+    def setUp(self):
+        super().setUp()
+        self.customer_agreement = CustomerAgreementFactory()
+        self.user_emails = []
+        for plan_index in range(self.NUM_PLANS):
+            subscription_plan = SubscriptionPlanFactory.create(customer_agreement=self.customer_agreement)
+            plan_emails = [f'learner-{plan_index}-{index}@example.com' for index in range(self.NUM_LEARNERS_PER_PLAN)]
+            License.objects.bulk_create([
+                License(subscription_plan=subscription_plan, user_email=email, status=constants.ACTIVATED)
+                for email in plan_emails
+            ])
+            self.user_emails.extend(plan_emails)
+        self.course_run_keys = [f'course-v1:edX+Bench+{index}' for index in range(self.NUM_COURSES)]
+
+    @mock.patch('license_manager.apps.api.utils.get_catalog_content_membership', side_effect=catalog_contains_all)
+    def test_check_missing_licenses_benchmark(self, mock_get_catalog_content_membership):
+        start = time.perf_counter()
+        with self.assertNumQueries(1):
+            missing_subscriptions, licensed_enrollment_info = utils.check_missing_licenses(
+                self.customer_agreement,
+                self.user_emails,
+                self.course_run_keys,
+            )
+        elapsed = time.perf_counter() - start
+        logger.info('check_missing_licenses for %s emails x %s courses took %.3fs',
+                    len(self.user_emails), len(self.course_run_keys), elapsed)
+
+        assert missing_subscriptions == {}
+        assert len(licensed_enrollment_info) == len(self.user_emails) * len(self.course_run_keys)
+        # One catalog lookup per plan, since each has its own catalog
+        assert mock_get_catalog_content_membership.call_count == self.NUM_PLANS
+
 
 # pylint: disable=protected-access
 class FileUploadTests(TestCase):
@@ -114,6 +210,39 @@ class FileUploadTests(TestCase):
         assert utils._get_short_file_name(full_path_file_name) == file_name
 
 
+class LicenseCsvExportTests(TestCase):
+    """
+    Tests for streaming the licenses CSV export.
+    """
+    def setUp(self):
+        super().setUp()
+        self.subscription_plan = SubscriptionPlanFactory()
+        self.exported_licenses = [
+            LicenseFactory(subscription_plan=self.subscription_plan, status=status)
+            for status in (constants.ASSIGNED, constants.ACTIVATED, constants.REVOKED, constants.ASSIGNED)
+        ]
+        LicenseFactory(subscription_plan=self.subscription_plan, status=constants.UNASSIGNED)
+
+    def test_iter_license_csv_rows_in_batches(self):
+        # One query per batch of 3; the short second batch ends the scan
+        with self.assertNumQueries(2):
+            rows = list(utils.iter_license_csv_rows(self.subscription_plan, batch_size=3))
+
+        expected_licenses = sorted(self.exported_licenses, key=lambda lic: lic.uuid)
+        assert [row[4] for row in rows] == [lic.user_email for lic in expected_licenses]
+        assert [row[3] for row in rows] == [lic.status for lic in expected_licenses]
+        assert rows[0][1] == get_license_activation_link(
+            self.subscription_plan.customer_agreement.enterprise_customer_slug,
+            expected_licenses[0].activation_key,
+        )
+
+    def test_iter_license_csv_lines(self):
+        lines = list(utils.iter_license_csv_lines(self.subscription_plan, batch_size=2))
+
+        assert lines[0] == 'activation_date,activation_link,last_remind_date,status,user_email\r\n'
+        assert len(lines) == len(self.exported_licenses) + 1
+
+
 class PlanLockTests(TestCase):
     """
     Tests for acquiring and releasing plan-level locks.
@@ -131,14 +260,6 @@ class PlanLockTests(TestCase):
             is_active=True,
         )
 
-    def tearDown(self):
-        """
-        Ensures there are no unexpected locks sitting in the cache
-        between sequential test runs.
-        """
-        super().tearDown()
-        TieredCache.dangerous_clear_all_tiers()
-
     def test_lock_available(self):
         lock_acquired = utils.acquire_subscription_plan_lock(self.plan)
         assert lock_acquired
@@ -159,6 +280,63 @@ class PlanLockTests(TestCase):
         released = utils.release_subscription_plan_lock(self.plan)
         assert released
 
+    def test_lock_holder(self):
+        holder = utils.acquire_subscription_plan_lock(self.plan, holder='task-1')
+        assert holder == 'task-1'
+        lock = SubscriptionPlanLock.objects.get(subscription_plan=self.plan)
+        assert lock.holder == 'task-1'
+
+        # The holder may renew its own lease, but nobody else may release it
+        assert utils.acquire_subscription_plan_lock(self.plan, holder='task-1') == 'task-1'
+        utils.release_subscription_plan_lock(self.plan, holder='task-2')
+        assert utils.acquire_subscription_plan_lock(self.plan) is False
+
+        utils.release_subscription_plan_lock(self.plan, holder='task-1')
+        assert utils.acquire_subscription_plan_lock(self.plan)
+
+    def test_expired_lease_is_taken_over(self):
+        with freeze_time(localized_utcnow() - timedelta(seconds=11)):
+            utils.acquire_subscription_plan_lock(self.plan, lease_seconds=10, holder='crashed-worker')
+
+        assert utils.acquire_subscription_plan_lock(self.plan, holder='task-1') == 'task-1'
+        assert SubscriptionPlanLock.objects.get(subscription_plan=self.plan).holder == 'task-1'
+
+    @mock.patch('license_manager.apps.subscriptions.models.time.sleep')
+    def test_wait_for_lock(self, mock_sleep):
+        utils.acquire_subscription_plan_lock(self.plan, holder='task-1')
+        mock_sleep.side_effect = lambda _: utils.release_subscription_plan_lock(self.plan)
+
+        assert utils.acquire_subscription_plan_lock(self.plan, holder='task-2', wait_seconds=5) == 'task-2'
+        mock_sleep.assert_called_once()
+
+    def test_user_email_locks(self):
+        holder = utils.acquire_subscription_plan_user_email_locks(self.plan, ['a@example.com', 'b@example.com'])
+        assert holder
+
+        # None of the locks are acquired if any of them is held
+        assert utils.acquire_subscription_plan_user_email_locks(self.plan, ['b@example.com', 'c@example.com']) is False
+        assert utils.acquire_subscription_plan_user_email_locks(self.plan, ['c@example.com'])
+        assert utils.acquire_subscription_plan_user_email_locks(self.plan, ['a@example.com']) is False
+
+        utils.release_subscription_plan_user_email_locks(self.plan, ['a@example.com', 'b@example.com'], holder=holder)
+        assert utils.acquire_subscription_plan_user_email_locks(self.plan, ['a@example.com', 'b@example.com'])
+
+    def test_user_email_locks_bounded(self):
+        user_emails = [f'learner-{index}@example.com' for index in range(1000)]
+
+        holder = utils.acquire_subscription_plan_user_email_locks(self.plan, user_emails)
+
+        assert holder
+        assert SubscriptionPlanLock.objects.filter(subscription_plan=self.plan).count() == utils.USER_EMAIL_LOCK_BUCKETS
+        assert utils.acquire_subscription_plan_user_email_locks(self.plan, ['learner-0@example.com']) is False
+        utils.release_subscription_plan_user_email_locks(self.plan, user_emails, holder=holder)
+        assert not SubscriptionPlanLock.objects.filter(subscription_plan=self.plan).exists()
+
+    def test_wait_for_lock_times_out(self):
+        utils.acquire_subscription_plan_lock(self.plan)
+
+        assert utils.acquire_subscription_plan_lock(self.plan, wait_seconds=0.2) is False
+
 
 class TestUtils(TestCase):
     """
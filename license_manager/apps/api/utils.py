@@ -1,19 +1,17 @@
 """ Utility functions. """
+import csv
 import logging
 import os
 import urllib
 import uuid
+import zlib
 from collections import defaultdict
 
 import boto3
 from botocore.client import Config
 from django.http import Http404
 from django.shortcuts import get_object_or_404
-from edx_django_utils.cache.utils import (
-    DEFAULT_TIMEOUT,
-    TieredCache,
-    get_cache_key,
-)
+from edx_django_utils.cache.utils import get_cache_key
 from edx_django_utils.monitoring import set_custom_attribute
 from edx_rbac.utils import get_decoded_jwt
 from rest_framework.exceptions import ParseError, status
@@ -24,12 +22,27 @@ from license_manager.apps.subscriptions.exceptions import (
     LicenseNotFoundError,
     LicenseRevocationError,
 )
-from license_manager.apps.subscriptions.models import CustomerAgreement, License
-from license_manager.apps.subscriptions.utils import get_license_activation_link
+from license_manager.apps.subscriptions.models import (
+    CustomerAgreement,
+    License,
+    SubscriptionPlanLock,
+)
+from license_manager.apps.subscriptions.utils import (
+    get_catalog_content_membership,
+    get_license_activation_link,
+)
 
 
 logger = logging.getLogger(__name__)
 
+# Columns of the licenses CSV export, in the (alphabetical) order they've always been rendered in
+LICENSE_CSV_FIELDS = ['activation_date', 'activation_link', 'last_remind_date', 'status', 'user_email']
+LICENSE_CSV_STATUSES = [constants.ACTIVATED, constants.ASSIGNED, constants.REVOKED]
+LICENSE_CSV_EXPORT_BATCH_SIZE = 1000
+# The user emails of a plan are locked through this many locks, so that locking any number of emails
+# writes at most this many lock rows
+USER_EMAIL_LOCK_BUCKETS = 64
+
 
 def get_requested_enterprise_uuid(request):
     """
@@ -137,92 +150,84 @@ def check_missing_licenses(customer_agreement, user_emails, course_run_keys, sub
     Helper function to check that each of the provided learners has a valid subscriptions license for the provided
     courses.
 
-    Uses a map to track:
-        <plan_key>: <plan_contains_course>
-    where, plan_key = {subscription_plan.uuid}_{course_key}
-    This will help us memoize the value of the subscription_plan.contains_content([course_key])
-    to avoid repeated requests to the enterprise catalog endpoint for the same information
-    """
-    missing_subscriptions = {}
-    licensed_enrollment_info = []
-
-    subscription_plan_course_map = {}
+    Every relevant license (and its plan) is fetched in one query, ordered by plan expiration date, and the catalog
+    membership of every course is looked up once per enterprise catalog of those plans. Each learner's licenses are
+    then matched against the courses their plans' catalogs contain.
 
+    Returns:
+        tuple: ``(missing_subscriptions, licensed_enrollment_info)``, where ``missing_subscriptions`` maps each
+        learner email to the course keys none of their licenses cover, and ``licensed_enrollment_info`` holds an
+        enrollment dict for every (learner, course, covering license), latest-expiring license first.
+    """
     enterprise_slug = customer_agreement.enterprise_customer_slug
-
     subscription_plan_filter = [subscription_uuid] if subscription_uuid else customer_agreement.subscriptions.all()
+    course_keys = list(dict.fromkeys(course_run_keys))
 
-    logger.info('[check_missing_licenses] Starting to iterate over all `user_emails`...')
-
-    # Map licenses by email across all user_emails in a single DB query.
-    # Also, join the plans into the queryset, so that we don't do
-    # one query per license down in the loops below.
-    license_queryset = License.objects.filter(
+    # Map licenses by email across all user_emails in a single DB query, already in the order
+    # they should be used in. Also, join the plans into the queryset, so that we don't do
+    # one query per license below.
+    licenses_by_email = defaultdict(list)
+    subscription_plans_by_uuid = {}
+    for license_record in License.objects.filter(
         subscription_plan__in=subscription_plan_filter,
         user_email__in=user_emails,
     ).select_related(
         'subscription_plan',
-    )
-    licenses_by_email = defaultdict(list)
-    for license_record in license_queryset:
+    ).order_by(
+        '-subscription_plan__expiration_date',
+    ):
         licenses_by_email[license_record.user_email].append(license_record)
+        subscription_plans_by_uuid[license_record.subscription_plan_id] = license_record.subscription_plan
 
-    for email in set(user_emails):
-        logger.info(f'[check_missing_licenses] handling user email {email}')
-        filtered_licenses = licenses_by_email.get(email, [])
-
-        logger.info('[check_missing_licenses] user licenses for email %s: %s', email, filtered_licenses)
-
-        # order licenses by their associated subscription plan expiration date
-        ordered_licenses_by_expiration = sorted(
-            filtered_licenses,
-            key=lambda user_license: user_license.subscription_plan.expiration_date,
-            reverse=True,
-        )
-
-        for course_key in set(course_run_keys):
-            plan_found = False
-            for user_license in ordered_licenses_by_expiration:
-                logger.info('[check_missing_licenses] handling user license %s', str(user_license.uuid))
-                subscription_plan = user_license.subscription_plan
-                plan_key = f'{subscription_plan.uuid}_{course_key}'
-
-                # TODO AED 2024-02-09: I think this chunk of code is defective.
-                # It's only mapping plan ids to booleans, but what we really want
-                # to know is, for each plan *and course*, if the plan's associated catalog
-                # contains the course.
-                if plan_key in subscription_plan_course_map:
-                    plan_contains_content = subscription_plan_course_map.get(plan_key)
-                else:
-                    plan_contains_content = subscription_plan.contains_content([course_key])
-                    subscription_plan_course_map[plan_key] = plan_contains_content
-
-                logger.info(
-                    '[check_missing_licenses] does plan (%s) contain content?: %s',
-                    str(subscription_plan.uuid),
-                    plan_contains_content,
-                )
-                if plan_contains_content:
-                    this_enrollment = {
-                        'email': email,
-                        'course_run_key': course_key,
-                        'license_uuid': str(user_license.uuid)
-                    }
-                    # assigned, not yet activated, include activation URL
-                    if user_license.status == constants.ASSIGNED:
-                        this_enrollment['activation_link'] = get_license_activation_link(
-                            enterprise_slug,
-                            user_license.activation_key,
-                        )
-                    licensed_enrollment_info.append(this_enrollment)
-                    plan_found = True
-            if not plan_found:
-                logger.info('[check_missing_licenses] subscription plan not found plan')
-                if missing_subscriptions.get(email):
-                    missing_subscriptions[email].append(course_key)
-                else:
-                    missing_subscriptions[email] = [course_key]
+    content_membership_by_catalog = {
+        catalog_uuid: get_catalog_content_membership(catalog_uuid, course_keys)
+        for catalog_uuid in {plan.enterprise_catalog_uuid for plan in subscription_plans_by_uuid.values()}
+    }
+    contained_course_keys_by_plan = {
+        plan_uuid: {
+            course_key
+            for course_key, in_catalog in content_membership_by_catalog[plan.enterprise_catalog_uuid].items()
+            if in_catalog
+        }
+        for plan_uuid, plan in subscription_plans_by_uuid.items()
+    }
 
+    missing_subscriptions = {}
+    licensed_enrollment_info = []
+    for email in set(user_emails):
+        user_licenses = licenses_by_email.get(email, [])
+        for course_key in course_keys:
+            covering_licenses = [
+                user_license for user_license in user_licenses
+                if course_key in contained_course_keys_by_plan[user_license.subscription_plan_id]
+            ]
+            if not covering_licenses:
+                missing_subscriptions.setdefault(email, []).append(course_key)
+                continue
+
+            for user_license in covering_licenses:
+                this_enrollment = {
+                    'email': email,
+                    'course_run_key': course_key,
+                    'license_uuid': str(user_license.uuid)
+                }
+                # assigned, not yet activated, include activation URL
+                if user_license.status == constants.ASSIGNED:
+                    this_enrollment['activation_link'] = get_license_activation_link(
+                        enterprise_slug,
+                        user_license.activation_key,
+                    )
+                licensed_enrollment_info.append(this_enrollment)
+
+    logger.info(
+        '[check_missing_licenses] checked %s emails against %s courses in %s plans: '
+        '%s licensed enrollments, %s emails missing a subscription',
+        len(user_emails),
+        len(course_keys),
+        len(subscription_plans_by_uuid),
+        len(licensed_enrollment_info),
+        len(missing_subscriptions),
+    )
     return missing_subscriptions, licensed_enrollment_info
 
 
@@ -310,26 +315,135 @@ def create_presigned_url(bucket_name, object_name, expiration=300):
     return response
 
 
-def acquire_subscription_plan_lock(subscription_plan, django_cache_timeout=DEFAULT_TIMEOUT, **cache_key_kwargs):
+class _EchoBuffer:
     """
-    Acquires a lock for the provided subscription plan.  Returns True if the lock was
-    acquired, False otherwise.
+    A file-like object that returns what is written to it instead of storing it,
+    so ``csv.writer`` can produce one line at a time.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_license_csv_rows(subscription_plan, batch_size=LICENSE_CSV_EXPORT_BATCH_SIZE):
+    """
+    Yields one list of ``LICENSE_CSV_FIELDS`` values per ACTIVATED, ASSIGNED or REVOKED license in the plan.
+
+    Licenses are read ``batch_size`` at a time, ordered by uuid and seeking past the last uuid of
+    the previous batch, so that memory use doesn't grow with the size of the plan.
+    """
+    enterprise_slug = subscription_plan.customer_agreement.enterprise_customer_slug
+    queryset = License.objects.filter(
+        subscription_plan=subscription_plan,
+        status__in=LICENSE_CSV_STATUSES,
+    ).order_by('uuid').values('uuid', 'status', 'user_email', 'activation_date', 'last_remind_date', 'activation_key')
+
+    last_uuid = None
+    while True:
+        batch_queryset = queryset if last_uuid is None else queryset.filter(uuid__gt=last_uuid)
+        batch = list(batch_queryset[:batch_size])
+        for lic in batch:
+            yield [
+                lic['activation_date'],
+                # We want to expose the full activation link rather than just the activation key
+                get_license_activation_link(enterprise_slug, lic['activation_key']),
+                lic['last_remind_date'],
+                lic['status'],
+                lic['user_email'],
+            ]
+        if len(batch) < batch_size:
+            return
+        last_uuid = batch[-1]['uuid']
+
+
+def iter_license_csv_lines(subscription_plan, batch_size=LICENSE_CSV_EXPORT_BATCH_SIZE):
+    """
+    Yields the licenses CSV export of the given plan one line at a time, starting with the header.
+    """
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(LICENSE_CSV_FIELDS)
+    for row in iter_license_csv_rows(subscription_plan, batch_size=batch_size):
+        yield writer.writerow(row)
+
+
+def acquire_subscription_plan_lock(
+    subscription_plan,
+    lease_seconds=SubscriptionPlanLock.DEFAULT_LEASE_SECONDS,
+    holder=None,
+    wait_seconds=0,
+    **cache_key_kwargs
+):
+    """
+    Acquires a lock for the provided subscription plan, waiting up to ``wait_seconds`` for it to become available.
+
+    The lock is a lease that expires after ``lease_seconds``, so that it can be taken over if its holder never
+    releases it. Returns the holder identity the lock was acquired for (which should be passed on to
+    ``release_subscription_plan_lock``), or False if it couldn't be acquired.
     """
     cache_key = get_cache_key(resource='subscription_plan', plan_uuid=subscription_plan.uuid, **cache_key_kwargs)
-    cached_response = TieredCache.get_cached_response(cache_key)
-    if cached_response.is_found:
-        return False
-    TieredCache.set_all_tiers(cache_key, 'ACQUIRED', django_cache_timeout)
-    return True
+    holder = holder or SubscriptionPlanLock.default_holder()
+    lock_acquired = SubscriptionPlanLock.acquire(
+        cache_key,
+        subscription_plan,
+        holder,
+        lease_seconds=lease_seconds,
+        wait_seconds=wait_seconds,
+    )
+    return holder if lock_acquired else False
 
 
-def release_subscription_plan_lock(subscription_plan, **cache_key_kwargs):
+def release_subscription_plan_lock(subscription_plan, holder=None, **cache_key_kwargs):
     """
-    Releases a lock for the provided subscription plan.
+    Releases a lock for the provided subscription plan, only if it's held by ``holder`` when one is given.
     Returns True unless an exception is raised.
     """
     cache_key = get_cache_key(resource='subscription_plan', plan_uuid=subscription_plan.uuid, **cache_key_kwargs)
-    TieredCache.delete_all_tiers(cache_key)
+    SubscriptionPlanLock.release(cache_key, holder=holder)
+    return True
+
+
+def _get_user_email_lock_keys(subscription_plan, user_emails):
+    # A stable hash, unlike hash(), so that every worker locks an email through the same bucket
+    buckets = {zlib.crc32(user_email.encode()) % USER_EMAIL_LOCK_BUCKETS for user_email in user_emails}
+    return [
+        get_cache_key(resource='subscription_plan', plan_uuid=subscription_plan.uuid, user_email_lock_bucket=bucket)
+        for bucket in sorted(buckets)
+    ]
+
+
+def acquire_subscription_plan_user_email_locks(
+    subscription_plan,
+    user_emails,
+    lease_seconds=SubscriptionPlanLock.DEFAULT_LEASE_SECONDS,
+    holder=None,
+    wait_seconds=0,
+):
+    """
+    Acquires a lock on each of the given user emails in the provided subscription plan, or none of them, waiting up to
+    ``wait_seconds`` for them to become available.
+
+    Each email is locked through one of the plan's ``USER_EMAIL_LOCK_BUCKETS`` locks, picked by a hash of the
+    email, so that any number of emails is locked with at most that many lock rows. Concurrent callers whose
+    emails share a bucket wait on each other even if the emails differ.
+
+    Returns the holder identity the locks were acquired for, or False if they couldn't be acquired.
+    """
+    holder = holder or SubscriptionPlanLock.default_holder()
+    locks_acquired = SubscriptionPlanLock.acquire_all(
+        _get_user_email_lock_keys(subscription_plan, user_emails),
+        subscription_plan,
+        holder,
+        lease_seconds=lease_seconds,
+        wait_seconds=wait_seconds,
+    )
+    return holder if locks_acquired else False
+
+
+def release_subscription_plan_user_email_locks(subscription_plan, user_emails, holder=None):
+    """
+    Releases the locks on the given user emails in the provided subscription plan, only those held by ``holder``
+    when one is given. Returns True unless an exception is raised.
+    """
+    SubscriptionPlanLock.release_all(_get_user_email_lock_keys(subscription_plan, user_emails), holder=holder)
     return True
 
 
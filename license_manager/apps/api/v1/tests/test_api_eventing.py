@@ -39,7 +39,7 @@ class EventTestCaseBase(TestCase):
     def setUp(self):
         super().setUp()
         self.mock_track_license_changes_mocker = mock.patch(
-            'license_manager.apps.api.v1.views.track_license_changes_task.delay',
+            'license_manager.apps.api.tasks.track_license_changes_task.delay',
             wraps=tasks.track_license_changes_task,
         )
         self.mock_track_license_changes_mocker.start()
@@ -67,8 +67,8 @@ class LicenseViewSetActionEventTests(LicenseViewSetActionMixin, EventTestCaseBas
         """
         Basic test to make sure batch creates trigger create event.
         """
-        # Mock the calls to track_event specifically imported in the models file.
-        with mock.patch('license_manager.apps.subscriptions.models.track_event') as mock_track_event:
+        # Mock the calls to enqueue_event specifically imported in the models file.
+        with mock.patch('license_manager.apps.subscriptions.models.enqueue_event') as mock_track_event:
             num_licenses = 5
             LicenseFactory.create_batch(
                 num_licenses,
@@ -80,9 +80,10 @@ class LicenseViewSetActionEventTests(LicenseViewSetActionMixin, EventTestCaseBas
                 # We should have events all called with the created event:
                 assert call[0][1] == constants.SegmentEvents.LICENSE_CREATED
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
-    def test_assign_dedupe_eventing(self, _, __):
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay', wraps=tasks.onboard_licenses_task)
+    @mock.patch('license_manager.apps.api.tasks.link_learners_to_enterprise_task.si')
+    @mock.patch('license_manager.apps.api.tasks.send_assignment_email_task.si')
+    def test_assign_dedupe_eventing(self, _, __, ___):
         """
         Verify the assign endpoint deduplicates submitted emails.
         """
@@ -107,12 +108,13 @@ class LicenseViewSetActionEventTests(LicenseViewSetActionMixin, EventTestCaseBas
             self._assert_licenses_assigned([self.test_email])
 
     @ddt.data(True, False)
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
-    def test_assign_eventing(self, use_superuser, _, __):
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay', wraps=tasks.onboard_licenses_task)
+    @mock.patch('license_manager.apps.api.tasks.link_learners_to_enterprise_task.si')
+    @mock.patch('license_manager.apps.api.tasks.send_assignment_email_task.si')
+    def test_assign_eventing(self, use_superuser, _, __, ___):
         """ Verify that assignment events are generated by the view action."""
-        # Mock the calls to track_event specifically imported in the models file.
-        with mock.patch('license_manager.apps.subscriptions.models.track_event') as mock_create_track_event:
+        # Mock the calls to enqueue_event specifically imported in the models file.
+        with mock.patch('license_manager.apps.subscriptions.models.enqueue_event') as mock_create_track_event:
             self._setup_request_jwt(user=self.super_user if use_superuser else self.user)
             self._create_available_licenses(num_licenses=5)
             assert mock_create_track_event.call_count == 5
@@ -133,9 +135,9 @@ class LicenseViewSetActionEventTests(LicenseViewSetActionMixin, EventTestCaseBas
             self.assertEqual(actual_event_name, constants.SegmentEvents.LICENSE_ASSIGNED)
             self.assertCountEqual(list(actual_properties_by_email.keys()), user_emails)
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
-    @mock.patch('license_manager.apps.api.tasks.revoke_course_enrollments_for_user_task.delay')
+    @mock.patch('license_manager.apps.api.tasks.link_learners_to_enterprise_task.si')
+    @mock.patch('license_manager.apps.api.tasks.send_assignment_email_task.si')
+    @mock.patch('license_manager.apps.api.tasks.revoke_course_enrollments_for_users_task.delay')
     @mock.patch('license_manager.apps.api.tasks.send_revocation_cap_notification_email_task.delay')
     def test_bulk_revoked_event(self, *_):
         """
@@ -155,30 +157,27 @@ class LicenseViewSetActionEventTests(LicenseViewSetActionMixin, EventTestCaseBas
             ],
         }
 
-        # Patch differently because the modules import track_event differently:
-        with mock.patch('license_manager.apps.subscriptions.models.track_event') as mock_revoke_track_event, \
-                mock.patch('license_manager.apps.subscriptions.event_utils.track_event') as mock_create_track_event:
+        # Revocations are tracked in bulk, along with the creation of the replacement licenses.
+        with mock.patch('license_manager.apps.subscriptions.event_utils.track_event') as mock_track_event:
             response = self.api_client.post(self.bulk_revoke_license_url, request_payload)
             assert response.status_code == status.HTTP_200_OK
 
-            assert mock_revoke_track_event.call_count == 2
-            assert mock_create_track_event.call_count == 2
-
-            assert (mock_revoke_track_event.call_args_list[0][0][1]
-                    == constants.SegmentEvents.LICENSE_REVOKED)
-            assert (mock_revoke_track_event.call_args_list[0][0][2]['assigned_email']
-                    == 'alice@example.com')
-            assert (mock_create_track_event.call_args_list[0][0][1]
-                    == constants.SegmentEvents.LICENSE_CREATED)
-            assert mock_create_track_event.call_args_list[0][0][2]['assigned_email'] == ''
-
-            assert (mock_revoke_track_event.call_args_list[1][0][1]
-                    == constants.SegmentEvents.LICENSE_REVOKED)
-            assert (mock_revoke_track_event.call_args_list[1][0][2]['assigned_email']
-                    == 'bob@example.com')
-            assert (mock_create_track_event.call_args_list[1][0][1]
-                    == constants.SegmentEvents.LICENSE_CREATED)
-            assert mock_create_track_event.call_args_list[1][0][2]['assigned_email'] == ''
+            revoke_calls = [
+                call_args for call_args in mock_track_event.call_args_list
+                if call_args[0][1] == constants.SegmentEvents.LICENSE_REVOKED
+            ]
+            create_calls = [
+                call_args for call_args in mock_track_event.call_args_list
+                if call_args[0][1] == constants.SegmentEvents.LICENSE_CREATED
+            ]
+            assert mock_track_event.call_count == 4
+            assert len(revoke_calls) == 2
+            assert len(create_calls) == 2
+
+            assert revoke_calls[0][0][2]['assigned_email'] == 'alice@example.com'
+            assert revoke_calls[1][0][2]['assigned_email'] == 'bob@example.com'
+            assert create_calls[0][0][2]['assigned_email'] == ''
+            assert create_calls[1][0][2]['assigned_email'] == ''
 
     def test_license_renewed_events(self):
         """ Test that our standard renewal routine triggers the right set of events
@@ -238,7 +237,7 @@ class LicenseLearnerActionsEventTests(LicenseViewTestMixin, TestCase):
             }
         )
         license_to_be_activated = self._create_license()
-        with mock.patch('license_manager.apps.subscriptions.event_utils.track_event') as mock_activated_track_event:
+        with mock.patch('license_manager.apps.subscriptions.event_utils.enqueue_event') as mock_activated_track_event:
 
             with freeze_time(self.now):
                 query_params = QueryDict(mutable=True)
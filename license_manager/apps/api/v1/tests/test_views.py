@@ -27,10 +27,18 @@ from edx_rest_framework_extensions.auth.jwt.tests.utils import (
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from license_manager.apps.api.models import (
+    LicenseExportJob,
+    LicenseOnboardingJob,
+    LicenseReminderJob,
+)
+from license_manager.apps.api.tasks import (
+    UTILIZATION_THRESHOLD_EVALUATION_DEBOUNCE_SECONDS,
+)
 from license_manager.apps.api.tests.factories import BulkEnrollmentJobFactory
 from license_manager.apps.api.utils import (
-    acquire_subscription_plan_lock,
-    release_subscription_plan_lock,
+    acquire_subscription_plan_user_email_locks,
+    release_subscription_plan_user_email_locks,
 )
 from license_manager.apps.api.v1.tests.constants import (
     ADMIN_ROLES,
@@ -46,6 +54,9 @@ from license_manager.apps.subscriptions.exceptions import LicenseRevocationError
 from license_manager.apps.subscriptions.models import (
     CustomerAgreement,
     License,
+    LicenseProvisioningJob,
+    LicenseProvisioningShard,
+    PendingTrackingEvent,
     SubscriptionLicenseSource,
     SubscriptionsFeatureRole,
     SubscriptionsRoleAssignment,
@@ -444,6 +455,7 @@ def _assert_subscription_response_correct(response, subscription, expected_days_
     assert response['prior_renewals'] == subscription.prior_renewals
     assert response['is_locked_for_renewal_processing'] == subscription.is_locked_for_renewal_processing
     assert response['salesforce_opportunity_line_item'] == subscription.salesforce_opportunity_line_item
+    assert response['provisioning'] is None
 
 
 def _assert_license_response_correct(response, subscription_license):
@@ -813,6 +825,28 @@ def test_subscription_plan_list_staff_user_200(api_client, staff_user, boolean_t
     )
 
 
+@pytest.mark.django_db
+def test_subscription_plan_detail_provisioning_in_progress(api_client, staff_user, boolean_toggle):
+    """
+    Verify that the subscription detail view reports how many licenses have been provisioned so far
+    while the plan's licenses are being provisioned.
+    """
+    enterprise_customer_uuid = uuid4()
+    subscription, _, __ = _create_subscription_plans(enterprise_customer_uuid)
+    _assign_role_via_jwt_or_db(api_client, staff_user, enterprise_customer_uuid, boolean_toggle)
+    job = LicenseProvisioningJob.create_job(subscription, 10, shard_size=5)
+    LicenseProvisioningShard.provision_batch(job.shards.get(index=0).id, batch_size=3)
+
+    response = _subscriptions_detail_request(api_client, staff_user, subscription.uuid)
+
+    assert status.HTTP_200_OK == response.status_code
+    assert response.data['provisioning'] == {
+        'num_licenses': 10,
+        'num_licenses_provisioned': 3,
+        'percent_complete': 30,
+    }
+
+
 @pytest.mark.django_db
 def test_subscription_plan_list_staff_user_200_with_current_param(api_client, staff_user, boolean_toggle):
     """
@@ -1034,7 +1068,7 @@ def test_subscription_plan_provisioning_admins_list_non_staff_user_200(api_clien
         'is_active', 'is_revocation_cap_enabled', 'days_until_expiration',
         'days_until_expiration_including_renewals',
         'is_locked_for_renewal_processing', 'should_auto_apply_licenses',
-        'licenses', 'revocations', 'prior_renewals', 'created',
+        'licenses', 'revocations', 'prior_renewals', 'provisioning', 'created',
     }
     for result in response.json()['results']:
         assert expected_result_keys.issubset(result.keys())
@@ -1880,6 +1914,22 @@ class LicenseViewSetActionMixin:
             assigned_licenses = self.subscription_plan.licenses.filter(user_email=email, status=constants.ASSIGNED)
             assert assigned_licenses.count() == 1
 
+    def _assert_onboarding_job_enqueued(self, mock_onboard_licenses_task, user_emails, notify_users=True):
+        """
+        Helper that verifies a single LicenseOnboardingJob was enqueued for the licenses assigned to `user_emails`.
+        """
+        onboarding_job = LicenseOnboardingJob.objects.get()
+        mock_onboard_licenses_task.assert_called_once_with(str(onboarding_job.uuid))
+        assert onboarding_job.subscription_plan_uuid == self.subscription_plan.uuid
+        assigned_license_uuids = self.subscription_plan.licenses.filter(
+            user_email__in=user_emails,
+            status=constants.ASSIGNED,
+        ).values_list('uuid', flat=True)
+        assert sorted(onboarding_job.license_uuids) == sorted(str(uuid) for uuid in assigned_license_uuids)
+        assert len(onboarding_job.license_uuids) == len(user_emails)
+        assert onboarding_job.notify_users == notify_users
+        return onboarding_job
+
     def _test_and_assert_forbidden_user(self, url, user_is_staff, mock_task):
         """
         Helper to login an unauthorized user, request an action URL, and assert that 403 response is returned.
@@ -2065,7 +2115,7 @@ class CustomerAgreementViewSetTests(LicenseViewSetActionMixin, TestCase):
         # Check whether tasks were run
         mock_send_assignment_email_task.assert_not_called()
 
-    @mock.patch('license_manager.apps.api.tasks.send_utilization_threshold_reached_email_task.delay')
+    @mock.patch('license_manager.apps.api.tasks.send_utilization_threshold_reached_email_task.apply_async')
     @mock.patch('license_manager.apps.api.v1.views.send_auto_applied_license_email_task.apply_async')
     def test_auto_apply_endpoint_idempotent(
             self, mock_send_assignment_email_task, mock_send_utilization_threshold_reached_email_task
@@ -2099,7 +2149,8 @@ class CustomerAgreementViewSetTests(LicenseViewSetActionMixin, TestCase):
         )
 
         mock_send_utilization_threshold_reached_email_task.assert_called_once_with(
-            plan.uuid
+            (plan.uuid,),
+            countdown=UTILIZATION_THRESHOLD_EVALUATION_DEBOUNCE_SECONDS,
         )
 
     @mock.patch('license_manager.apps.api.v1.views.send_auto_applied_license_email_task.apply_async')
@@ -2132,7 +2183,7 @@ class CustomerAgreementViewSetTests(LicenseViewSetActionMixin, TestCase):
         # Check whether tasks were run
         mock_send_assignment_email_task.assert_not_called()
 
-    @mock.patch('license_manager.apps.api.tasks.send_utilization_threshold_reached_email_task.delay')
+    @mock.patch('license_manager.apps.api.tasks.send_utilization_threshold_reached_email_task.apply_async')
     @mock.patch('license_manager.apps.api.v1.views.send_auto_applied_license_email_task.apply_async')
     def test_auto_apply_200_if_successful(
         self,
@@ -2182,7 +2233,8 @@ class CustomerAgreementViewSetTests(LicenseViewSetActionMixin, TestCase):
         )
 
         mock_send_utilization_threshold_reached_email_task.assert_called_once_with(
-            plan.uuid
+            (plan.uuid,),
+            countdown=UTILIZATION_THRESHOLD_EVALUATION_DEBOUNCE_SECONDS,
         )
 
 
@@ -2210,63 +2262,58 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
             'api:v1:licenses-csv',
             kwargs={'subscription_uuid': cls.subscription_plan.uuid},
         )
+        cls.licenses_csv_export_url = reverse(
+            'api:v1:licenses-csv-export',
+            kwargs={'subscription_uuid': cls.subscription_plan.uuid},
+        )
 
     def setUp(self):
         super().setUp()
-        self.mock_track_test_mocker = mock.patch('license_manager.apps.api.v1.views.track_license_changes_task')
+        self.mock_track_test_mocker = mock.patch('license_manager.apps.api.tasks.track_license_changes_task')
         self.mock_track_test_mocker.start()
 
     def tearDown(self):
         super().tearDown()
         self.mock_track_test_mocker.stop()
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
-    def test_assign_no_emails(self, mock_send_assignment_email_task, mock_link_learners_task):
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
+    def test_assign_no_emails(self, mock_onboard_licenses_task):
         """
         Verify the assign endpoint returns a 400 if no user emails are provided.
         """
         response = self.api_client.post(self.assign_url)
         assert response.status_code == status.HTTP_400_BAD_REQUEST
-        mock_send_assignment_email_task.assert_not_called()
-        mock_link_learners_task.assert_not_called()
+        mock_onboard_licenses_task.assert_not_called()
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
     @ddt.data(True, False)
-    def test_assign_non_admin_user(self, user_is_staff, mock_send_assignment_email_task, mock_link_learners_task):
+    def test_assign_non_admin_user(self, user_is_staff, mock_onboard_licenses_task):
         """
         Verify the assign endpoint returns a 403 if a non-superuser with no
         admin roles makes the request, even if they're staff (for good measure).
         """
-        self._test_and_assert_forbidden_user(self.assign_url, user_is_staff, mock_send_assignment_email_task)
-        mock_link_learners_task.assert_not_called()
+        self._test_and_assert_forbidden_user(self.assign_url, user_is_staff, mock_onboard_licenses_task)
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
-    def test_assign_empty_emails(self, mock_send_assignment_email_task, mock_link_learners_task):
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
+    def test_assign_empty_emails(self, mock_onboard_licenses_task):
         """
         Verify the assign endpoint returns a 400 if the list of emails provided is empty.
         """
         response = self.api_client.post(self.assign_url, {'user_emails': []})
         assert response.status_code == status.HTTP_400_BAD_REQUEST
-        mock_send_assignment_email_task.assert_not_called()
-        mock_link_learners_task.assert_not_called()
+        mock_onboard_licenses_task.assert_not_called()
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
-    def test_assign_invalid_emails(self, mock_send_assignment_email_task, mock_link_learners_task):
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
+    def test_assign_invalid_emails(self, mock_onboard_licenses_task):
         """
         Verify the assign endpoint returns a 400 if the list contains an invalid email.
         """
         response = self.api_client.post(self.assign_url, {'user_emails': ['lkajsdf']})
         assert response.status_code == status.HTTP_400_BAD_REQUEST
-        mock_send_assignment_email_task.assert_not_called()
-        mock_link_learners_task.assert_not_called()
+        mock_onboard_licenses_task.assert_not_called()
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
-    def test_assign_insufficient_licenses(self, mock_send_assignment_email_task, mock_link_learners_task):
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
+    def test_assign_insufficient_licenses(self, mock_onboard_licenses_task):
         """
         Verify the assign endpoint returns a 400 if there are not enough unassigned licenses to assign to.
         """
@@ -2275,12 +2322,10 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         self.subscription_plan.licenses.set(assigned_licenses)
         response = self.api_client.post(self.assign_url, {'user_emails': [self.test_email]})
         assert response.status_code == status.HTTP_400_BAD_REQUEST
-        mock_send_assignment_email_task.assert_not_called()
-        mock_link_learners_task.assert_not_called()
+        mock_onboard_licenses_task.assert_not_called()
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
-    def test_assign_insufficient_licenses_revoked(self, mock_send_assignment_email_task, mock_link_learners_task):
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
+    def test_assign_insufficient_licenses_revoked(self, mock_onboard_licenses_task):
         """
         Verify the endpoint returns a 400 if there are not enough licenses to assign to considering revoked licenses
         """
@@ -2289,12 +2334,10 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         self.subscription_plan.licenses.set([revoked_license])
         response = self.api_client.post(self.assign_url, {'user_emails': [self.test_email]})
         assert response.status_code == status.HTTP_400_BAD_REQUEST
-        mock_send_assignment_email_task.assert_not_called()
-        mock_link_learners_task.assert_not_called()
+        mock_onboard_licenses_task.assert_not_called()
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
-    def test_assign_already_associated_email(self, mock_send_assignment_email_task, mock_link_learners_task):
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
+    def test_assign_already_associated_email(self, mock_onboard_licenses_task):
         """
         Verify the assign endpoint returns a 200 if there is already a license associated with a provided email.
 
@@ -2311,21 +2354,12 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         assert response.status_code == status.HTTP_200_OK
         assert response.data['num_successful_assignments'] == 1
         assert response.data['num_already_associated'] == 1
-        mock_send_assignment_email_task.assert_called_with(
-            {'greeting': self.greeting, 'closing': self.closing},
-            ['unassigned@example.com'],
-            str(self.subscription_plan.uuid),
-        )
+        onboarding_job = self._assert_onboarding_job_enqueued(mock_onboard_licenses_task, ['unassigned@example.com'])
+        assert onboarding_job.custom_template_text == {'greeting': self.greeting, 'closing': self.closing}
 
-        mock_link_learners_task.assert_called_with(
-            ['unassigned@example.com'],
-            self.subscription_plan.customer_agreement.enterprise_customer_uuid
-        )
-
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
     @ddt.data(True, False)
-    def test_assign(self, use_superuser, mock_send_assignment_email_task, mock_link_learners_task):
+    def test_assign(self, use_superuser, mock_onboard_licenses_task):
         """
         Verify the assign endpoint assigns licenses to the provided emails and sends activation emails.
 
@@ -2341,29 +2375,18 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         assert response.status_code == status.HTTP_200_OK
         self._assert_licenses_assigned(user_emails)
 
-        # Verify the activation email task was called with the correct args
-        task_args, _ = mock_send_assignment_email_task.call_args
-        actual_template_text, actual_emails, actual_subscription_uuid = task_args
-        assert ['bb8@mit.edu', self.test_email] == sorted(actual_emails)
-        assert str(self.subscription_plan.uuid) == actual_subscription_uuid
-        assert self.greeting == actual_template_text['greeting']
-        assert self.closing == actual_template_text['closing']
-
-        mock_link_learners_task.assert_called_with(
-            actual_emails,
-            self.subscription_plan.customer_agreement.enterprise_customer_uuid
-        )
+        # Verify a single job was enqueued to onboard the learners, with the given greeting and closing
+        onboarding_job = self._assert_onboarding_job_enqueued(mock_onboard_licenses_task, user_emails)
+        assert onboarding_job.custom_template_text == {'greeting': self.greeting, 'closing': self.closing}
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
     @mock.patch('license_manager.apps.api.utils.set_datadog_tags')
     @ddt.data(True, False)
     def test_assign_set_custom_tags(
             self,
             use_superuser,
             mock_set_tags_util,
-            mock_send_assignment_email_task, # pylint: disable=unused-argument
-            mock_link_learners_task # pylint: disable=unused-argument
+            mock_onboard_licenses_task,  # pylint: disable=unused-argument
     ):
         """
         Verify the assign endpoint sets tags 'enterprise_customer_uuid' and 'external_request' on the request.
@@ -2382,8 +2405,7 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         mock_set_tags_util.assert_called_with(tags_dict)
         assert response.status_code == status.HTTP_200_OK
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
     @ddt.data(True, False)
     def test_assign_with_salesforce_ids(self, use_superuser, *arge, **kwargs):  # pylint: disable=unused-argument
         """
@@ -2447,40 +2469,62 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         assert response.json() == {'user_sfids': ['No Salesforce Ids provided.']}
         assert SubscriptionLicenseSource.objects.count() == 0
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
+    @mock.patch('license_manager.apps.api.v1.views.ASSIGNMENT_LOCK_WAIT_SECONDS', 0)
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
     @ddt.data(True, False)
-    def test_assign_is_locked(self, use_superuser, mock_send_assignment_email_task, mock_link_learners_task):
+    def test_assign_is_locked(self, use_superuser, mock_onboard_licenses_task):
         """
-        Verify the assign endpoint respects any existing locks for the requested plan.
+        Verify the assign endpoint respects any existing locks on the requested emails in the plan.
         """
         self._setup_request_jwt(user=self.super_user if use_superuser else self.user)
         self._create_available_licenses()
         user_emails = ['bb8@mit.edu', self.test_email]
 
-        # lock the subscription plan, as if another concurrent request
-        # is also trying to assign licenses.
+        # lock one of the emails in the subscription plan, as if another concurrent request
+        # is also trying to assign it a license.
         try:
-            acquire_subscription_plan_lock(
+            acquire_subscription_plan_user_email_locks(
                 self.subscription_plan,
-                django_cache_timeout=10,
+                [self.test_email],
+                lease_seconds=10,
             )
             response = self.api_client.post(
                 self.assign_url,
                 {'greeting': self.greeting, 'closing': self.closing, 'user_emails': user_emails},
             )
         finally:
-            release_subscription_plan_lock(self.subscription_plan)
+            release_subscription_plan_user_email_locks(self.subscription_plan, [self.test_email])
 
         assert response.status_code == status.HTTP_423_LOCKED
         assert self.subscription_plan.licenses.filter(status=constants.ASSIGNED).count() == 0
-        self.assertFalse(mock_send_assignment_email_task.called)
-        self.assertFalse(mock_link_learners_task.called)
+        self.assertFalse(mock_onboard_licenses_task.called)
+
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
+    def test_assign_concurrently_with_other_emails(self, mock_onboard_licenses_task):
+        """
+        Verify an assignment into the plan isn't held up by a concurrent assignment of other emails.
+        """
+        self._setup_request_jwt(user=self.user)
+        self._create_available_licenses()
+        user_emails = ['bb8@mit.edu', self.test_email]
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
+        try:
+            acquire_subscription_plan_user_email_locks(self.subscription_plan, ['r2d2@mit.edu'])
+            response = self.api_client.post(
+                self.assign_url,
+                {'greeting': self.greeting, 'closing': self.closing, 'user_emails': user_emails},
+            )
+        finally:
+            release_subscription_plan_user_email_locks(self.subscription_plan, ['r2d2@mit.edu'])
+
+        assert response.status_code == status.HTTP_200_OK
+        assert self.subscription_plan.licenses.filter(status=constants.ASSIGNED).count() == 2
+        # The emails' locks are released once they're assigned
+        assert not self.subscription_plan.locks.exists()
+
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
     @mock.patch('license_manager.apps.api.v1.views.License.bulk_update')
-    def test_assign_is_atomic(self, mock_bulk_update, mock_send_assignment_email_task, mock_link_learners_task):
+    def test_assign_is_atomic(self, mock_bulk_update, mock_onboard_licenses_task):
         """
         Verify that license assignment is atomic and no updates
         are made if an error occurs.
@@ -2502,14 +2546,12 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
             'Database error occurred while assigning licenses, no assignments were completed',
             response.json(),
         )
-        self.assertFalse(mock_send_assignment_email_task.called)
-        self.assertFalse(mock_link_learners_task.called)
+        self.assertFalse(mock_onboard_licenses_task.called)
         for _license in self.subscription_plan.licenses.all():
             self.assertEqual(constants.UNASSIGNED, _license.status)
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
-    def test_assign_dedupe_input(self, mock_send_assignment_email_task, mock_link_learners_task):
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
+    def test_assign_dedupe_input(self, mock_onboard_licenses_task):
         """
         Verify the assign endpoint deduplicates submitted emails.
         """
@@ -2521,19 +2563,10 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         )
         assert response.status_code == status.HTTP_200_OK
         self._assert_licenses_assigned([self.test_email])
-        mock_send_assignment_email_task.assert_called_with(
-            {'greeting': self.greeting, 'closing': self.closing},
-            [self.test_email],
-            str(self.subscription_plan.uuid),
-        )
-        mock_link_learners_task.assert_called_with(
-            [self.test_email],
-            self.subscription_plan.customer_agreement.enterprise_customer_uuid
-        )
+        self._assert_onboarding_job_enqueued(mock_onboard_licenses_task, [self.test_email])
 
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
-    def test_assign_dedupe_casing_input(self, mock_send_assignment_email_task, mock_link_learners_task):
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
+    def test_assign_dedupe_casing_input(self, mock_onboard_licenses_task):
         """
         Verify the assign endpoint deduplicates submitted emails with different casing.
         """
@@ -2545,15 +2578,7 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         )
         assert response.status_code == status.HTTP_200_OK
         self._assert_licenses_assigned([self.test_email])
-        mock_send_assignment_email_task.assert_called_with(
-            {'greeting': self.greeting, 'closing': self.closing},
-            [self.test_email.lower()],
-            str(self.subscription_plan.uuid),
-        )
-        mock_link_learners_task.assert_called_with(
-            [self.test_email.lower()],
-            self.subscription_plan.customer_agreement.enterprise_customer_uuid
-        )
+        self._assert_onboarding_job_enqueued(mock_onboard_licenses_task, [self.test_email.lower()])
 
     @ddt.data(
         (True, False, True),
@@ -2562,17 +2587,13 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         (False, True, False),
     )
     @ddt.unpack
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.create_braze_aliases_task.si')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
     def test_assign_notify_users(
         self,
         notify_users,
         disable_onboarding_notifications,
         should_send_assignment_email,
-        mock_send_assignment_email_task,
-        _,
-        __,
+        mock_onboard_licenses_task,
     ):
         """
         Verify that users are not sent a license assignment email if notify_users=False
@@ -2591,8 +2612,11 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         )
         assert response.status_code == status.HTTP_200_OK
         self._assert_licenses_assigned([self.test_email])
-
-        assert mock_send_assignment_email_task.called == should_send_assignment_email
+        self._assert_onboarding_job_enqueued(
+            mock_onboard_licenses_task,
+            [self.test_email],
+            notify_users=should_send_assignment_email,
+        )
 
     @mock.patch('license_manager.apps.api.v1.views.send_reminder_email_task.delay')
     def test_remind_no_emails(self, mock_send_reminder_emails_task):
@@ -2645,8 +2669,8 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         assert response.status_code == status.HTTP_403_FORBIDDEN
         mock_send_reminder_emails_task.assert_not_called()
 
-    @mock.patch('license_manager.apps.api.v1.views.revoke_license')
-    def test_remind_no_valid_subscription_plan_superuser(self, mock_revoke_license):
+    @mock.patch('license_manager.apps.api.v1.views.revoke_licenses_by_email')
+    def test_remind_no_valid_subscription_plan_superuser(self, mock_revoke_licenses_by_email):
         """
         Test that calls to bulk_revoke fail with a 404 if no valid subscription plan uuid
         is provided, for requests made by a superuser.
@@ -2658,7 +2682,7 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
             {'user_emails': ['edx@example.com']}
         )
         assert response.status_code == status.HTTP_404_NOT_FOUND
-        self.assertFalse(mock_revoke_license.called)
+        self.assertFalse(mock_revoke_licenses_by_email.called)
 
     @mock.patch('license_manager.apps.api.v1.views.send_reminder_email_task.delay')
     def test_remind_no_license_for_user(self, mock_send_reminder_emails_task):
@@ -2755,8 +2779,8 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         else:
             self.assertFalse(mock_send_reminder_emails_task.called)
 
-    @mock.patch('license_manager.apps.api.v1.views.send_reminder_email_task.delay')
-    def test_remind_all_no_pending_licenses(self, mock_send_reminder_emails_task):
+    @mock.patch('license_manager.apps.api.models.current_app.send_task')
+    def test_remind_all_no_pending_licenses(self, mock_send_task):
         """
         Verify that the remind all endpoint returns a 404 if there are no pending licenses.
         """
@@ -2765,12 +2789,12 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
 
         response = self.api_client.post(self.remind_all_url)
         assert response.status_code == status.HTTP_404_NOT_FOUND
-        mock_send_reminder_emails_task.assert_not_called()
+        mock_send_task.assert_not_called()
 
-    @mock.patch('license_manager.apps.api.v1.views.send_reminder_email_task.delay')
-    def test_remind_all(self, mock_send_reminder_emails_task):
+    @mock.patch('license_manager.apps.api.models.current_app.send_task')
+    def test_remind_all(self, mock_send_task):
         """
-        Verify that the remind all endpoint sends an email to each user with a pending license.
+        Verify that the remind all endpoint enqueues a job to remind each user with a pending license.
         Also verifies that a custom greeting and closing can be sent to the endpoint.
         """
         # Create some pending and non-pending licenses for the subscription
@@ -2778,30 +2802,46 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         pending_licenses = LicenseFactory.create_batch(3, status=constants.ASSIGNED)
         self.subscription_plan.licenses.set(unassigned_licenses + pending_licenses)
 
-        with mock.patch('license_manager.apps.subscriptions.constants.REMINDER_EMAIL_BATCH_SIZE', new=2):
-            response = self.api_client.post(self.remind_all_url, {'greeting': self.greeting, 'closing': self.closing})
+        response = self.api_client.post(self.remind_all_url, {'greeting': self.greeting, 'closing': self.closing})
 
-        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        license_reminder_job = LicenseReminderJob.objects.get(uuid=response.json()['job_id'])
+        assert license_reminder_job.subscription_plan_uuid == self.subscription_plan.uuid
+        assert license_reminder_job.custom_template_text == {'greeting': self.greeting, 'closing': self.closing}
+        mock_send_task.assert_called_once_with(
+            'license_manager.apps.api.tasks.remind_all_licenses_task',
+            (str(license_reminder_job.uuid),),
+        )
 
-        # Verify emails sent to only the pending licenses
-        mock_send_reminder_emails_task.assert_has_calls([
-            mock.call(
-                {'greeting': self.greeting, 'closing': self.closing},
-                mock.ANY,
-                str(self.subscription_plan.uuid),
-            ),
-            mock.call(
-                {'greeting': self.greeting, 'closing': self.closing},
-                mock.ANY,
-                str(self.subscription_plan.uuid),
-            ),
-        ])
-        pending_emails = [license.user_email for license in pending_licenses]
-        actually_called_emails = []
-        for call in mock_send_reminder_emails_task.call_args_list:
-            actually_called_emails.extend(call.args[1])
+    def test_remind_all_status(self):
+        """
+        Verify that the remind all endpoint returns the progress of a reminder job.
+        """
+        license_reminder_job = LicenseReminderJob.objects.create(
+            subscription_plan_uuid=self.subscription_plan.uuid,
+            num_licenses=4,
+            num_licenses_reminded=1,
+        )
 
-        assert set(pending_emails) == set(actually_called_emails)
+        response = self.api_client.get(self.remind_all_url, {'job_id': str(license_reminder_job.uuid)})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            'job_id': str(license_reminder_job.uuid),
+            'num_licenses': 4,
+            'num_licenses_reminded': 1,
+            'percent_complete': 25,
+        }
+
+    def test_remind_all_status_invalid_job(self):
+        """
+        Verify that the remind all endpoint returns a 400 for a job_id that is not a uuid.
+        """
+        response = self.api_client.get(self.remind_all_url, {'job_id': 'not-a-uuid'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = self.api_client.get(self.remind_all_url, {'job_id': str(uuid4())})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
 
     @ddt.data(True, False)
     def test_license_overview(self, ignore_null_emails):
@@ -2841,7 +2881,7 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         returned from the licenses CSV endpoint. As is expected, each
         column in a given row is comma separated.
         """
-        return str(response.data)[2:].split('\\r\\n')[:-1]
+        return b''.join(response.streaming_content).decode().split('\r\n')[:-1]
 
     def test_csv_action_license_fields(self):
         """
@@ -2899,6 +2939,62 @@ class LicenseViewSetActionTests(LicenseViewSetActionMixin, TestCase):
         ).count()
         assert num_allocated_licenses == len(rows) - 1
 
+    def test_csv_action_streams_response(self):
+        """
+        Tests that the CSV action streams a header row and one row per license.
+        """
+        licenses = LicenseFactory.create_batch(5, status=constants.ASSIGNED)
+        self.subscription_plan.licenses.set(licenses)
+
+        response = self.api_client.get(self.licenses_csv_url)
+
+        assert response.streaming
+        assert response['Content-Type'] == 'text/csv'
+        rows = self._get_csv_data_rows(response)
+        assert rows[0] == 'activation_date,activation_link,last_remind_date,status,user_email'
+        assert sorted(row.split(',')[4] for row in rows[1:]) == sorted(lic.user_email for lic in licenses)
+
+    @mock.patch('license_manager.apps.api.models.current_app.send_task')
+    def test_csv_export_action_creates_job(self, mock_send_task):
+        response = self.api_client.post(self.licenses_csv_export_url)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        license_export_job = LicenseExportJob.objects.get(uuid=response.json()['job_id'])
+        assert license_export_job.subscription_plan_uuid == self.subscription_plan.uuid
+        mock_send_task.assert_called_once_with(
+            'license_manager.apps.api.tasks.export_licenses_csv_task',
+            (str(license_export_job.uuid),),
+        )
+
+    @mock.patch(
+        'license_manager.apps.api.v1.views.LicenseExportJob.generate_download_url',
+        return_value='https://example.com/download'
+    )
+    def test_csv_export_action_status(self, mock_generate_download_url):
+        license_export_job = LicenseExportJob.objects.create(
+            enterprise_customer_uuid=self.subscription_plan.customer_agreement.enterprise_customer_uuid,
+            subscription_plan_uuid=self.subscription_plan.uuid,
+        )
+
+        response = self.api_client.get(self.licenses_csv_export_url, {'job_id': str(license_export_job.uuid)})
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_generate_download_url.assert_called()
+        assert response.json() == {
+            'job_id': str(license_export_job.uuid),
+            'download_url': 'https://example.com/download',
+        }
+
+    def test_csv_export_action_status_missing_job(self):
+        response = self.api_client.get(self.licenses_csv_export_url)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = self.api_client.get(self.licenses_csv_export_url, {'job_id': 'not-a-uuid'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = self.api_client.get(self.licenses_csv_export_url, {'job_id': str(uuid4())})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
 
 @ddt.ddt
 class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
@@ -2924,16 +3020,28 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
 
     def setUp(self):
         super().setUp()
-        self.mock_track_test_mocker = mock.patch('license_manager.apps.api.v1.views.track_license_changes_task')
+        self.mock_track_test_mocker = mock.patch('license_manager.apps.api.tasks.track_license_changes_task')
         self.mock_track_test_mocker.start()
 
     def tearDown(self):
         super().tearDown()
         self.mock_track_test_mocker.stop()
 
-    @mock.patch('license_manager.apps.api.v1.views.execute_post_revocation_tasks')
-    @mock.patch('license_manager.apps.api.v1.views.revoke_license')
-    def test_bulk_revoke_happy_path(self, mock_revoke_license, mock_execute_post_revocation_tasks):
+    def _assert_revocation_calls(self, mock_execute_post_revocation_tasks, expected_licenses):
+        """
+        Helper to assert that the given licenses were revoked, in order, and their post-revocation tasks executed.
+        """
+        mock_execute_post_revocation_tasks.assert_called_once()
+        actual_results = mock_execute_post_revocation_tasks.call_args.args[0]
+        assert [result['revoked_license'].uuid for result in actual_results] == [lcs.uuid for lcs in expected_licenses]
+        assert [result['original_status'] for result in actual_results] == [lcs.status for lcs in expected_licenses]
+        for expected_license in expected_licenses:
+            expected_license.refresh_from_db()
+            assert expected_license.status == constants.REVOKED
+            assert expected_license.revoked_date is not None
+
+    @mock.patch('license_manager.apps.api.v1.views.execute_bulk_post_revocation_tasks')
+    def test_bulk_revoke_happy_path(self, mock_execute_post_revocation_tasks):
         """
         Test that we can revoke multiple licenses from the bulk_revoke action.
         """
@@ -2950,33 +3058,36 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
             ],
         }
 
-        revoke_alice_license_result = {
-            'revoked_license': alice_assigned_license, 'original_status': alice_assigned_license.status,
-        }
-        revoke_bob_license_result = {'revoked_license': bob_license, 'original_status': bob_license.status}
-        mock_revoke_license.side_effect = [revoke_alice_license_result, revoke_bob_license_result]
-
         response = self.api_client.post(self.bulk_revoke_license_url, request_payload)
 
         assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            'successful_revocations': [
+                {
+                    'license_uuid': str(alice_assigned_license.uuid),
+                    'original_status': constants.ASSIGNED,
+                    'user_email': 'alice@example.com',
+                },
+                {
+                    'license_uuid': str(bob_license.uuid),
+                    'original_status': constants.ACTIVATED,
+                    'user_email': 'bob@example.com',
+                },
+            ],
+            'unsuccessful_revocations': [],
+        }
         # Since alice has multiple licenses, we should only revoke her assigned one.
-        mock_revoke_license.assert_has_calls([
-            mock.call(alice_assigned_license),
-            mock.call(bob_license),
-        ])
+        self._assert_revocation_calls(mock_execute_post_revocation_tasks, [alice_assigned_license, bob_license])
+        alice_license.refresh_from_db()
+        assert alice_license.status == constants.ACTIVATED
+        # A new, unassigned license replaces each revoked one.
+        assert self.subscription_plan.unassigned_licenses.count() == 2
 
-        mock_execute_post_revocation_tasks.assert_has_calls([
-            mock.call(**revoke_alice_license_result),
-            mock.call(**revoke_bob_license_result),
-        ])
-
-    @mock.patch('license_manager.apps.api.v1.views.execute_post_revocation_tasks')
-    @mock.patch('license_manager.apps.api.v1.views.revoke_license')
+    @mock.patch('license_manager.apps.api.v1.views.execute_bulk_post_revocation_tasks')
     @mock.patch('license_manager.apps.api.utils.set_datadog_tags')
     def test_bulk_revoke_set_custom_tags(
         self,
         mock_set_tags_util,
-        mock_revoke_license,
         mock_execute_post_revocation_tasks # pylint: disable=unused-argument
     ):
         """
@@ -2995,12 +3106,6 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
             ],
         }
 
-        revoke_alice_license_result = {
-            'revoked_license': alice_assigned_license, 'original_status': alice_assigned_license.status,
-        }
-        revoke_bob_license_result = {'revoked_license': bob_license, 'original_status': bob_license.status}
-        mock_revoke_license.side_effect = [revoke_alice_license_result, revoke_bob_license_result]
-
         response = self.api_client.post(self.bulk_revoke_license_url, request_payload)
         tags_dict = {
             'enterprise_customer_uuid': self.subscription_plan.customer_agreement.enterprise_customer_uuid,
@@ -3009,9 +3114,8 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
         mock_set_tags_util.assert_called_with(tags_dict)
         assert response.status_code == status.HTTP_200_OK
 
-    @mock.patch('license_manager.apps.api.v1.views.execute_post_revocation_tasks')
-    @mock.patch('license_manager.apps.api.v1.views.revoke_license')
-    def test_bulk_revoke_multiple_activated_same_email(self, mock_revoke_license, mock_execute_post_revocation_tasks):
+    @mock.patch('license_manager.apps.api.v1.views.execute_bulk_post_revocation_tasks')
+    def test_bulk_revoke_multiple_activated_same_email(self, mock_execute_post_revocation_tasks):
         """
         Test the edge condition where one email in a single plan has multiple activated licenses.
         """
@@ -3020,7 +3124,7 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
             uuid='00000000-0000-0000-0000-000000000000',
             user_email='alice@example.com', status=constants.ACTIVATED,
         )
-        alice_license_2 = alice_license_1 = LicenseFactory.create(
+        alice_license_2 = LicenseFactory.create(
             uuid='00000000-0000-0000-0000-000000000001',
             user_email='alice@example.com', status=constants.ACTIVATED,
         )
@@ -3032,23 +3136,14 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
             ],
         }
 
-        revoke_alice_license_result = {
-            'revoked_license': alice_license_1, 'original_status': alice_license_1.status,
-        }
-        mock_revoke_license.side_effect = [revoke_alice_license_result]
-
         response = self.api_client.post(self.bulk_revoke_license_url, request_payload)
 
         assert response.status_code == status.HTTP_200_OK
         # Since alice has multiple licenses, we should only revoke the first one (which is arbitrarily
         # the one with the smallest uuid).
-        mock_revoke_license.assert_has_calls([
-            mock.call(alice_license_1),
-        ])
-
-        mock_execute_post_revocation_tasks.assert_has_calls([
-            mock.call(**revoke_alice_license_result),
-        ])
+        self._assert_revocation_calls(mock_execute_post_revocation_tasks, [alice_license_1])
+        alice_license_2.refresh_from_db()
+        assert alice_license_2.status == constants.ACTIVATED
 
     @ddt.data(
         ([{'name': 'user_email', 'filter_value': 'al'}], ['alice@example.com']),
@@ -3064,10 +3159,9 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
           {'name': 'status_in', 'filter_value': [constants.ASSIGNED]}], [])
     )
     @ddt.unpack
-    @mock.patch('license_manager.apps.api.v1.views.execute_post_revocation_tasks')
-    @mock.patch('license_manager.apps.api.v1.views.revoke_license')
+    @mock.patch('license_manager.apps.api.v1.views.execute_bulk_post_revocation_tasks')
     def test_bulk_revoke_with_filters_happy_path(
-            self, filters, expected_revoked_emails, mock_revoke_license, mock_execute_post_revocation_tasks
+            self, filters, expected_revoked_emails, mock_execute_post_revocation_tasks
     ):
         """
         Test that we can revoke multiple licenses from the bulk_revoke action using filters.
@@ -3085,13 +3179,19 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
         response = self.api_client.post(self.bulk_revoke_license_url, request_payload)
         assert response.status_code == status.HTTP_200_OK
 
-        revoked_emails = [call_arg[0][0].user_email for call_arg in mock_revoke_license.call_args_list]
+        revoked_emails = [
+            result['revoked_license'].user_email
+            for result in mock_execute_post_revocation_tasks.call_args.args[0]
+        ]
         assert sorted(revoked_emails) == expected_revoked_emails
+        assert sorted(
+            self.subscription_plan.revoked_licenses.exclude(
+                uuid=revoked_license.uuid,
+            ).values_list('user_email', flat=True)
+        ) == expected_revoked_emails
 
-        assert mock_execute_post_revocation_tasks.call_count == len(expected_revoked_emails)
-
-    @mock.patch('license_manager.apps.api.v1.views.revoke_license')
-    def test_bulk_revoke_no_valid_subscription_plan(self, mock_revoke_license):
+    @mock.patch('license_manager.apps.api.v1.views.revoke_licenses_by_email')
+    def test_bulk_revoke_no_valid_subscription_plan(self, mock_revoke_licenses_by_email):
         """
         Test that calls to bulk_revoke fail with a 403 if no valid subscription plan uuid
         is provided, for requests made by a regular user.  A 403 is expected because our
@@ -3114,10 +3214,10 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
         response = self.api_client.post(request_url, request_payload)
 
         assert response.status_code == status.HTTP_403_FORBIDDEN
-        self.assertFalse(mock_revoke_license.called)
+        self.assertFalse(mock_revoke_licenses_by_email.called)
 
-    @mock.patch('license_manager.apps.api.v1.views.revoke_license')
-    def test_bulk_revoke_no_valid_subscription_plan_superuser(self, mock_revoke_license):
+    @mock.patch('license_manager.apps.api.v1.views.revoke_licenses_by_email')
+    def test_bulk_revoke_no_valid_subscription_plan_superuser(self, mock_revoke_licenses_by_email):
         """
         Test that calls to bulk_revoke fail with a 404 if no valid subscription plan uuid
         is provided, for requests made by a superuser.
@@ -3141,10 +3241,10 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
         expected_response_message = {'unsuccessful_revocations': [
             {'error': 'No SubscriptionPlan identified by {} exists'.format(non_existent_uuid)}]}
         self.assertEqual(expected_response_message, response.json())
-        self.assertFalse(mock_revoke_license.called)
+        self.assertFalse(mock_revoke_licenses_by_email.called)
 
-    @mock.patch('license_manager.apps.api.v1.views.revoke_license')
-    def test_bulk_revoke_not_enough_revocations_remaining(self, mock_revoke_license):
+    @mock.patch('license_manager.apps.api.v1.views.revoke_licenses_by_email')
+    def test_bulk_revoke_not_enough_revocations_remaining(self, mock_revoke_licenses_by_email):
         """
         Test that calls to bulk_revoke fail with a 400 if the plan does not have enough
         revocations remaining.
@@ -3173,11 +3273,10 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
         expected_response_message = {'unsuccessful_revocations': [
             {'error': 'Plan does not have enough revocations remaining.'}]}
         self.assertEqual(expected_response_message, response.json())
-        self.assertFalse(mock_revoke_license.called)
+        self.assertFalse(mock_revoke_licenses_by_email.called)
 
-    @mock.patch('license_manager.apps.api.v1.views.execute_post_revocation_tasks')
-    @mock.patch('license_manager.apps.api.v1.views.revoke_license')
-    def test_bulk_revoke_license_not_found(self, mock_revoke_license, mock_execute_post_revocation_tasks):  # pylint: disable=unused-argument
+    @mock.patch('license_manager.apps.api.v1.views.execute_bulk_post_revocation_tasks')
+    def test_bulk_revoke_license_not_found(self, mock_execute_post_revocation_tasks):
         """
         Test that calls to bulk_revoke fail with a 404 if the plan does not have enough
         revocations remaining.
@@ -3214,10 +3313,10 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
         self.assertEqual(len(response_data['unsuccessful_revocations']), 1)
         self.assertIsInstance(response_data['unsuccessful_revocations'][0]['user_email'], str)
         self.assertEqual(response_data['unsuccessful_revocations'][0]['error'], expected_error_msg)
-        mock_revoke_license.assert_called_once_with(alice_license)
+        self._assert_revocation_calls(mock_execute_post_revocation_tasks, [alice_license])
 
-    @mock.patch('license_manager.apps.api.v1.views.revoke_license')
-    def test_bulk_revoke_license_revocation_error(self, mock_revoke_license):
+    @mock.patch('license_manager.apps.api.v1.views.revoke_licenses_by_email')
+    def test_bulk_revoke_license_revocation_error(self, mock_revoke_licenses_by_email):
         """
         Test that calls to bulk_revoke fail with a 400 if some error occurred during
         the actual revocation process.
@@ -3230,7 +3329,10 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
             status=constants.ACTIVATED,
         )
 
-        mock_revoke_license.side_effect = LicenseRevocationError(alice_license.uuid, 'floor is lava')
+        mock_revoke_licenses_by_email.return_value = (
+            [],
+            [('alice@example.com', LicenseRevocationError(alice_license.uuid, 'floor is lava'))],
+        )
 
         request_payload = {
             'user_emails': [
@@ -3249,7 +3351,7 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
             'user_email': 'alice@example.com'
         }]}
         self.assertEqual(expected_error_msg, response.json())
-        mock_revoke_license.assert_called_once_with(alice_license)
+        mock_revoke_licenses_by_email.assert_called_once_with(self.subscription_plan, ['alice@example.com'])
 
     def test_revoke_all_no_valid_subscription_plan_superuser(self):
         """
@@ -3303,16 +3405,14 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
         {'is_revocation_cap_enabled': False},
     )
     @ddt.unpack
-    @mock.patch('license_manager.apps.api.v1.views.link_learners_to_enterprise_task.si')
-    @mock.patch('license_manager.apps.api.tasks.revoke_course_enrollments_for_user_task.delay')
+    @mock.patch('license_manager.apps.api.v1.views.onboard_licenses_task.delay')
+    @mock.patch('license_manager.apps.api.tasks.revoke_course_enrollments_for_users_task.delay')
     @mock.patch('license_manager.apps.api.tasks.send_revocation_cap_notification_email_task.delay')
-    @mock.patch('license_manager.apps.api.v1.views.send_assignment_email_task.si')
     def test_assign_after_license_revoke_end_to_end(
         self,
-        mock_send_assignment_email_task,
         mock_send_revocation_cap_notification_email_task,
-        mock_revoke_course_enrollments_for_user_task,
-        mock_link_learners_task,
+        mock_revoke_course_enrollments_for_users_task,
+        mock_onboard_licenses_task,
         is_revocation_cap_enabled,
     ):
         """
@@ -3325,7 +3425,7 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
 
         response = self.api_client.post(self.bulk_revoke_license_url, {'user_emails': [self.test_email]})
         assert response.status_code == status.HTTP_200_OK
-        mock_revoke_course_enrollments_for_user_task.assert_called()
+        mock_revoke_course_enrollments_for_users_task.assert_called()
         if is_revocation_cap_enabled:
             mock_send_revocation_cap_notification_email_task.assert_called_with(
                 subscription_uuid=self.subscription_plan.uuid,
@@ -3342,23 +3442,14 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
         assert response.status_code == status.HTTP_200_OK
         self._assert_licenses_assigned(user_emails)
 
-        # Verify the activation email task was called with the correct args
-        task_args, _ = mock_send_assignment_email_task.call_args
-        actual_template_text, actual_emails, actual_subscription_uuid = task_args
-        assert ['bb8@mit.edu', self.test_email] == sorted(actual_emails)
-        assert str(self.subscription_plan.uuid) == actual_subscription_uuid
-        assert self.greeting == actual_template_text['greeting']
-        assert self.closing == actual_template_text['closing']
-
-        mock_link_learners_task.assert_called_with(
-            actual_emails,
-            self.subscription_plan.customer_agreement.enterprise_customer_uuid
-        )
+        # Verify a single job was enqueued to onboard the learners, with the given greeting and closing
+        onboarding_job = self._assert_onboarding_job_enqueued(mock_onboard_licenses_task, user_emails)
+        assert onboarding_job.custom_template_text == {'greeting': self.greeting, 'closing': self.closing}
 
-    @mock.patch('license_manager.apps.api.tasks.revoke_course_enrollments_for_user_task.delay')
+    @mock.patch('license_manager.apps.api.tasks.revoke_course_enrollments_for_users_task.delay')
     def test_revoke_total_and_allocated_count_end_to_end(
         self,
-        mock_revoke_course_enrollments_for_user_task,
+        mock_revoke_course_enrollments_for_users_task,
     ):
         """
         Verifies revoking a license keeps the `total` license count the same, and the `allocated` count decreases by 1.
@@ -3386,7 +3477,7 @@ class LicenseViewSetRevokeActionTests(LicenseViewSetActionMixin, TestCase):
         # Revoke the activated license and verify the counts change appropriately
         revoke_response = self.api_client.post(self.bulk_revoke_license_url, {'user_emails': [self.test_email]})
         assert revoke_response.status_code == status.HTTP_200_OK
-        mock_revoke_course_enrollments_for_user_task.assert_called()
+        mock_revoke_course_enrollments_for_users_task.assert_called()
 
         second_detail_response = _subscriptions_detail_request(
             self.api_client,
@@ -4184,6 +4275,19 @@ class EnterpriseEnrollmentWithLicenseSubsidyViewTests(LicenseViewTestMixin, Test
         mock_generate_download_url.assert_called()
         assert response.json().get('job_id') == str(self.bulk_enrollment_job.uuid)
         assert response.json().get('download_url') == 'https://example.com/download'
+        assert response.json().get('percent_complete') is None
+
+    def test_bulk_enroll_status_percent_complete(self):
+        self._assign_learner_roles()
+        self.bulk_enrollment_job.num_chunks = 3
+        self.bulk_enrollment_job.num_chunks_completed = 2
+        self.bulk_enrollment_job.save()
+
+        url = self._get_url_with_params(bulk_enrollment_job_uuid=self.bulk_enrollment_job.uuid)
+        response = self.api_client.get(url)
+
+        assert response.status_code == 200
+        assert response.json().get('percent_complete') == 67
 
 
 @ddt.ddt
@@ -4552,6 +4656,39 @@ class UserRetirementViewTests(TestCase):
             with self.assertRaises(SubscriptionLicenseSource.DoesNotExist):
                 _license.source  # pylint: disable=pointless-statement
 
+    def test_retirement_deletes_pending_tracking_events(self):
+        """
+        Unsent tracking events about the user being retired, by lms_user_id or email, should be deleted.
+        """
+        PendingTrackingEvent.objects.create(
+            lms_user_id=self.lms_user_id,
+            event_name=constants.SegmentEvents.LICENSE_ACTIVATED,
+            properties={'assigned_email': self.user_email},
+        )
+        PendingTrackingEvent.objects.create(
+            lms_user_id=None,
+            event_name=constants.SegmentEvents.LICENSE_ASSIGNED,
+            properties={'assigned_email': self.user_email},
+        )
+        PendingTrackingEvent.objects.create(
+            lms_user_id=None,
+            event_name=constants.SegmentEvents.LICENSE_ASSIGNED,
+            properties={'user_email': self.user_email},
+        )
+        other_event = PendingTrackingEvent.objects.create(
+            lms_user_id=self.lms_user_id + 1,
+            event_name=constants.SegmentEvents.LICENSE_ASSIGNED,
+            properties={'assigned_email': 'someone-else@example.com'},
+        )
+
+        response = self._post_request(self.lms_user_id, self.original_username)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        assert PendingTrackingEvent.objects.filter(pk=other_event.pk).exists()
+        assert not PendingTrackingEvent.objects.filter(lms_user_id=self.lms_user_id).exists()
+        assert not PendingTrackingEvent.objects.filter(properties__assigned_email=self.user_email).exists()
+        assert not PendingTrackingEvent.objects.filter(properties__user_email=self.user_email).exists()
+
 
 class StaffLicenseLookupViewTests(LicenseViewTestMixin, TestCase):
     """
@@ -2,14 +2,14 @@ import logging
 from collections import OrderedDict
 from contextlib import suppress
 from typing import Literal
-from uuid import uuid4
+from uuid import UUID, uuid4
 
-from celery import chain
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import DatabaseError, transaction
 from django.db.models import Count
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view
@@ -29,42 +29,42 @@ from rest_framework.mixins import ListModelMixin
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_csv.renderers import CSVRenderer
 
 from license_manager.apps.api import serializers, utils
 from license_manager.apps.api.filters import LicenseFilter
 from license_manager.apps.api.mixins import UserDetailsFromJwtMixin
-from license_manager.apps.api.models import BulkEnrollmentJob
+from license_manager.apps.api.models import (
+    BulkEnrollmentJob,
+    LicenseExportJob,
+    LicenseOnboardingJob,
+    LicenseReminderJob,
+)
 from license_manager.apps.api.permissions import CanRetireUser
 from license_manager.apps.api.tasks import (
-    create_braze_aliases_task,
-    execute_post_revocation_tasks,
-    link_learners_to_enterprise_task,
+    enqueue_utilization_threshold_evaluation,
+    execute_bulk_post_revocation_tasks,
+    onboard_licenses_task,
     revoke_all_licenses_task,
-    send_assignment_email_task,
     send_auto_applied_license_email_task,
     send_post_activation_email_task,
     send_reminder_email_task,
-    send_utilization_threshold_reached_email_task,
-    track_license_changes_task,
     update_user_email_for_licenses_task,
 )
 from license_manager.apps.subscriptions import constants, event_utils
 from license_manager.apps.subscriptions.api import (
     renew_subscription,
-    revoke_license,
+    revoke_licenses_by_email,
 )
 from license_manager.apps.subscriptions.exceptions import (
     InvalidSubscriptionPlanPayloadError,
     LicenseActivationMissingError,
-    LicenseNotFoundError,
-    LicenseRevocationError,
     LicenseToActivateIsRevokedError,
     RenewalProcessingError,
 )
 from license_manager.apps.subscriptions.models import (
     CustomerAgreement,
     License,
+    PendingTrackingEvent,
     SubscriptionLicenseSource,
     SubscriptionLicenseSourceType,
     SubscriptionPlan,
@@ -73,7 +73,6 @@ from license_manager.apps.subscriptions.models import (
 )
 from license_manager.apps.subscriptions.utils import (
     chunks,
-    get_license_activation_link,
     get_subsidy_checksum,
     localized_utcnow,
 )
@@ -88,6 +87,7 @@ from ..pagination import (
 logger = logging.getLogger(__name__)
 
 ASSIGNMENT_LOCK_TIMEOUT_SECONDS = 300
+ASSIGNMENT_LOCK_WAIT_SECONDS = 10
 
 ESTIMATED_COUNT_PAGINATOR_THRESHOLD = 10000
 
@@ -204,7 +204,7 @@ class CustomerAgreementViewSet(
         auto_applied_license.save()
         event_utils.track_license_changes([auto_applied_license], constants.SegmentEvents.LICENSE_ACTIVATED)
         event_utils.identify_braze_alias(lms_user_id, user_email)
-        send_utilization_threshold_reached_email_task.delay(subscription_plan.uuid)
+        enqueue_utilization_threshold_evaluation(subscription_plan.uuid)
 
         return auto_applied_license
 
@@ -868,6 +868,9 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
     POST /api/v1/subscriptions/{subscription_plan_uuid}/licenses/revoke/
     POST /api/v1/subscriptions/{subscription_plan_uuid}/licenses/bulk-revoke/
     POST /api/v1/subscriptions/{subscription_plan_uuid}/licenses/revoke-all/
+    GET /api/v1/subscriptions/{subscription_plan_uuid}/licenses/csv/
+    POST /api/v1/subscriptions/{subscription_plan_uuid}/licenses/csv-export/
+    GET /api/v1/subscriptions/{subscription_plan_uuid}/licenses/csv-export/?job_id={job_id}
     """
     lookup_field = 'uuid'
     lookup_url_kwarg = 'license_uuid'
@@ -971,55 +974,47 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
 
         return trimmed_emails, already_associated_emails
 
-    def _link_and_notify_assigned_emails(
+    def _onboard_assigned_licenses(
         self,
-        user_emails,
+        assigned_licenses,
         subscription_plan,
         notify_users,
         custom_template_text,
     ):
         """
-        Helper to create async chains of link_learners_to_enterprise_task, create_braze_aliases_task,
-        and send_assignment_email_task for each batch of users. The task signatures are immutable,
-        hence the `si()` - we don't want the result of each task passed to the next task in the chain.
+        Helper to enqueue a single LicenseOnboardingJob for the learners of the assigned licenses.
+        ``onboard_licenses_task`` tracks the assignments, then links the learners to the enterprise,
+        creates their Braze aliases and sends their assignment emails in batches.
 
         If disable_onboarding_notifications is set to true on the CustomerAgreement or notify_users=False,
-        Braze aliases will be created but no license assignment email will be sent.
+        no license assignment email will be sent.
         """
-
         customer_agreement = subscription_plan.customer_agreement
-        disable_onboarding_notifications = customer_agreement.disable_onboarding_notifications
-
-        for pending_learner_batch in chunks(user_emails, constants.PENDING_ACCOUNT_CREATION_BATCH_SIZE):
-            tasks = chain(
-                link_learners_to_enterprise_task.si(
-                    pending_learner_batch,
-                    subscription_plan.enterprise_customer_uuid,
-                ),
-            )
+        onboarding_job = LicenseOnboardingJob.objects.create(
+            subscription_plan_uuid=subscription_plan.uuid,
+            license_uuids=[str(_license.uuid) for _license in assigned_licenses],
+            notify_users=bool(notify_users) and not customer_agreement.disable_onboarding_notifications,
+            custom_template_text=custom_template_text,
+        )
+        onboard_licenses_task.delay(str(onboarding_job.uuid))
 
-            if notify_users and not disable_onboarding_notifications:
-                # Braze aliases must be created before we attempt to send assignment emails.
-                tasks.link(
-                    create_braze_aliases_task.si(pending_learner_batch),
-                )
-                tasks.link(
-                    send_assignment_email_task.si(
-                        custom_template_text,
-                        pending_learner_batch,
-                        str(subscription_plan.uuid),
-                    )
-                )
+    def _claim_unassigned_licenses(self, subscription_plan, num_licenses):
+        """
+        Claims up to ``num_licenses`` of the plan's unassigned licenses for the current transaction.
 
-            tasks.apply_async()
+        Rows already claimed by a concurrent assignment into the same plan are skipped rather than waited on,
+        so concurrent assignments never pick the same license.
+        """
+        return list(
+            subscription_plan.unassigned_licenses.select_for_update(skip_locked=True)[:num_licenses]
+        )
 
-    def _assign_new_licenses(self, subscription_plan, user_emails):
+    def _assign_new_licenses(self, licenses, user_emails):
         """
-        Assign licenses for the given user_emails (that have not already been revoked).
+        Assign the given (claimed, unassigned) licenses to the given user_emails.
 
-        Returns a QuerySet of licenses that are assigned.
+        Returns the list of licenses that are assigned.
         """
-        licenses = subscription_plan.unassigned_licenses[:len(user_emails)]
         now = localized_utcnow()
         for unassigned_license, email in zip(licenses, user_emails):
             # Assign each email to a license and mark the license as assigned
@@ -1029,10 +1024,10 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
             unassigned_license.assigned_date = now
             unassigned_license.last_remind_date = now
 
+        # A set-based UPDATE per batch of licenses, sized to fit the database's max packet
         License.bulk_update(
             licenses,
             ['user_email', 'status', 'activation_key', 'assigned_date', 'last_remind_date'],
-            batch_size=10,
         )
 
         return licenses
@@ -1067,9 +1062,10 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
         for each assigned license a source object will be created to later identify the source of a
         license assignment.
 
-        Assignment is intended to be a fully atomic and linearizable operation.  We utilize
-        a cache-based lock to ensure that only one assignment operation can be executed at a
-        time for the given subscription plan.
+        Assignment is intended to be a fully atomic operation.  Concurrent assignments into the same
+        subscription plan only wait on each other when their emails share one of the plan's email locks,
+        which are held for the duration of the assignment; unassigned licenses are claimed with
+        ``SELECT ... FOR UPDATE SKIP LOCKED`` so that concurrent assignments never pick the same license.
 
         Example request:
           POST /api/v1/subscriptions/{subscription_plan_uuid}/licenses/assign/
@@ -1093,20 +1089,7 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
         utils.set_datadog_tags(custom_tags)
 
         subscription_plan = self._get_subscription_plan()
-        try:
-            lock_acquired = utils.acquire_subscription_plan_lock(
-                subscription_plan,
-                django_cache_timeout=ASSIGNMENT_LOCK_TIMEOUT_SECONDS,
-            )
-            if not lock_acquired:
-                return Response(
-                    data='Assignment currently locked for this subscription plan.',
-                    status=status.HTTP_423_LOCKED,
-                )
-            return self._assign(request, subscription_plan)
-        finally:
-            if lock_acquired:
-                utils.release_subscription_plan_lock(subscription_plan)
+        return self._assign(request, subscription_plan)
 
     def _assign(self, request, subscription_plan):
         """
@@ -1129,6 +1112,27 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
             # Dedupe all lowercase emails before turning back into a list for indexing
             user_emails = list({email.lower() for email in request.data.get('user_emails', [])})
 
+        # Queue briefly behind any concurrent assignment of the same emails in this plan before giving up
+        lock_holder = utils.acquire_subscription_plan_user_email_locks(
+            subscription_plan,
+            user_emails,
+            lease_seconds=ASSIGNMENT_LOCK_TIMEOUT_SECONDS,
+            wait_seconds=ASSIGNMENT_LOCK_WAIT_SECONDS,
+        )
+        if not lock_holder:
+            return Response(
+                data='Assignment currently locked for this subscription plan.',
+                status=status.HTTP_423_LOCKED,
+            )
+        try:
+            return self._assign_emails(request, subscription_plan, user_emails, emails_and_sfids)
+        finally:
+            utils.release_subscription_plan_user_email_locks(subscription_plan, user_emails, holder=lock_holder)
+
+    def _assign_emails(self, request, subscription_plan, user_emails, emails_and_sfids):
+        """
+        Helper that assigns licenses to the given (deduped and locked) user_emails.
+        """
         user_emails, already_associated_emails = self._trim_already_associated_emails(
             subscription_plan,
             user_emails,
@@ -1139,8 +1143,9 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
         if user_emails:
             try:
                 with transaction.atomic():
-                    available_licenses_count = subscription_plan.unassigned_licenses.count()
                     required_licenses_count = len(user_emails)
+                    unassigned_licenses = self._claim_unassigned_licenses(subscription_plan, required_licenses_count)
+                    available_licenses_count = len(unassigned_licenses)
 
                     if available_licenses_count < required_licenses_count:
                         response_message = (
@@ -1150,7 +1155,7 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
                         return Response(response_message, status=status.HTTP_400_BAD_REQUEST)
 
                     assigned_licenses = self._assign_new_licenses(
-                        subscription_plan, user_emails,
+                        unassigned_licenses, user_emails,
                     )
                     if emails_and_sfids:
                         self._set_source_for_assigned_licenses(assigned_licenses, emails_and_sfids)
@@ -1163,14 +1168,8 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
                 # read from the License DB table outside of the transaction.atomic() block,
                 # so that they can read the committed and updated versions
                 # of the now-assigned license records.
-                track_license_changes_task.delay(
-                    [str(_license.uuid) for _license in assigned_licenses],
-                    constants.SegmentEvents.LICENSE_ASSIGNED,
-                    is_batch_assignment=True,
-                )
-
-                self._link_and_notify_assigned_emails(
-                    user_emails=user_emails,
+                self._onboard_assigned_licenses(
+                    assigned_licenses=assigned_licenses,
                     subscription_plan=subscription_plan,
                     notify_users=request.data.get('notify_users', True),
                     custom_template_text=utils.get_custom_text(request.data),
@@ -1245,71 +1244,55 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @action(detail=False, methods=['post'], url_path='remind-all')
+    @action(detail=False, methods=['get', 'post'], url_path='remind-all')
     def remind_all(self, request, subscription_uuid=None):
         """
         Reminds all users in the subscription who have a pending license that their license is awaiting activation.
 
         Additionally, updates all pending licenses to reflect that a reminder was just sent.
-        """
-        # Validate the text sent in the data
-        self._validate_data(request.data)
 
+        POST /api/v1/subscriptions/{subscription_uuid}/licenses/remind-all/
+            Enqueues the reminders and returns the ``job_id`` of the job sending them, with a 202 status.
+
+        GET /api/v1/subscriptions/{subscription_uuid}/licenses/remind-all/?job_id={job_id}
+            Returns the progress of the job.
+        """
         subscription_plan = self._get_subscription_plan()
-        assigned_license_emails = list(
-            subscription_plan.licenses.filter(
-                status=constants.ASSIGNED,
-            ).values_list('user_email', flat=True)
-        )
-        if not assigned_license_emails:
-            return Response('Could not find any licenses pending activation', status=status.HTTP_404_NOT_FOUND)
 
-        # Send reminder emails in batches.
-        chunked_lists = chunks(assigned_license_emails, constants.REMINDER_EMAIL_BATCH_SIZE)
-        for assigned_license_email_chunk in chunked_lists:
-            send_reminder_email_task.delay(
-                utils.get_custom_text(request.data),
-                sorted(assigned_license_email_chunk),
-                subscription_uuid,
+        if request.method == 'GET':
+            job_id = request.query_params.get('job_id')
+            if not job_id:
+                return Response('You must supply the job_id query parameter', status=status.HTTP_400_BAD_REQUEST)
+            try:
+                UUID(job_id)
+            except ValueError:
+                return Response('The job_id query parameter must be a valid UUID', status=status.HTTP_400_BAD_REQUEST)
+
+            license_reminder_job = get_object_or_404(
+                LicenseReminderJob,
+                uuid=job_id,
+                subscription_plan_uuid=subscription_plan.uuid,
             )
+            response_object = {
+                'job_id': str(license_reminder_job.uuid),
+                'num_licenses': license_reminder_job.num_licenses,
+                'num_licenses_reminded': license_reminder_job.num_licenses_reminded,
+                'percent_complete': license_reminder_job.percent_complete,
+            }
+            return Response(response_object, status=status.HTTP_200_OK)
 
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        # Validate the text sent in the data
+        self._validate_data(request.data)
 
-    def _revoke_by_email_and_plan(self, user_email, subscription_plan):
-        """
-        Helper method to revoke a single license.
-        """
-        user_license = None
-        try:
-            user_licenses = subscription_plan.licenses.filter(
-                user_email=user_email,
-                status__in=constants.REVOCABLE_LICENSE_STATUSES,
-            ).order_by('uuid')
-            if len(user_licenses) == 0:
-                raise LicenseNotFoundError(user_email, subscription_plan, constants.REVOCABLE_LICENSE_STATUSES)
-            if len(user_licenses) == 1:
-                user_license = user_licenses[0]
-            else:
-                # if this email address has multiple licenses, prefer to revoke the assigned one.
-                assigned_licenses = [record for record in user_licenses if record.status == constants.ASSIGNED]
-                if assigned_licenses:
-                    user_license = assigned_licenses[0]
-                else:
-                    # Otherwise, we're in a super weird, maybe-impossible edge case where this email
-                    # address is associated with multiple activated licenses in the same plan.
-                    # So we'll just revoke the first one in the result set, which
-                    # *must* be an activated one, because the revocable states are only (assigned, activated),
-                    # and we know from the `if` conditional that there are no assigned licenses.
-                    user_license = user_licenses[0]
-        except License.DoesNotExist as exc:
-            logger.error(exc)
-            raise LicenseNotFoundError(user_email, subscription_plan, constants.REVOCABLE_LICENSE_STATUSES) from exc
+        if not subscription_plan.licenses.filter(status=constants.ASSIGNED).exists():
+            return Response('Could not find any licenses pending activation', status=status.HTTP_404_NOT_FOUND)
 
-        try:
-            return revoke_license(user_license)
-        except LicenseRevocationError as exc:
-            logger.error(exc)
-            raise
+        # The pending licenses are read and reminded in batches by remind_all_licenses_task
+        license_reminder_job = LicenseReminderJob.create_license_reminder_job(
+            subscription_plan,
+            utils.get_custom_text(request.data),
+        )
+        return Response({'job_id': str(license_reminder_job.uuid)}, status=status.HTTP_202_ACCEPTED)
 
     def _get_licenses_from_payload_filters(self, request, subscription_plan):
         """
@@ -1433,27 +1416,21 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
                 ]
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        revocation_results = []
         error_messages = []
 
         with transaction.atomic():
-            for user_email in user_emails:
-                try:
-                    revocation_result = self._revoke_by_email_and_plan(
-                        user_email, subscription_plan)
-                    revocation_result['user_email'] = user_email
-                    revocation_results.append(revocation_result)
-                except (LicenseNotFoundError, LicenseRevocationError) as exc:
-                    error_message = f'{str(exc)}. user_email: {user_email}'
-                    error_response_status = utils.get_http_status_for_exception(
-                        exc)
-                    error_object = {
-                        'error': error_message,
-                        'error_response_status': error_response_status,
-                        'user_email': user_email,
-                    }
-                    logger.error(error_object)
-                    error_messages.append(error_object)
+            revocation_results, revocation_errors = revoke_licenses_by_email(subscription_plan, user_emails)
+
+        for user_email, exc in revocation_errors:
+            error_message = f'{str(exc)}. user_email: {user_email}'
+            error_response_status = utils.get_http_status_for_exception(exc)
+            error_object = {
+                'error': error_message,
+                'error_response_status': error_response_status,
+                'user_email': user_email,
+            }
+            logger.error(error_object)
+            error_messages.append(error_object)
 
         # Case 1: if all revocations failed; return only the error messages list
         if error_response_status and not revocation_results:
@@ -1467,12 +1444,12 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
         revocation_succeeded = []
         for revocation_result in revocation_results:
             user_email = revocation_result.pop('user_email', None)
-            execute_post_revocation_tasks(**revocation_result)
             revocation_succeeded.append({
                 'license_uuid': str(revocation_result['revoked_license'].uuid),
                 'original_status': str(revocation_result['original_status']),
                 'user_email': str(user_email)
             })
+        execute_bulk_post_revocation_tasks(revocation_results)
         results = {
             'successful_revocations': revocation_succeeded,
             'unsuccessful_revocations': error_messages
@@ -1530,18 +1507,61 @@ class LicenseAdminViewSet(BaseLicenseViewSet):
         Returns license data for a given subscription in CSV format.
 
         Only includes licenses with a status of ACTIVATED, ASSIGNED, or REVOKED.
+        The CSV is streamed as licenses are read in batches, so memory use stays
+        flat regardless of the size of the plan.
         """
         subscription = self._get_subscription_plan()
-        enterprise_slug = subscription.customer_agreement.enterprise_customer_slug
-        licenses = subscription.licenses.filter(
-            status__in=[constants.ACTIVATED, constants.ASSIGNED, constants.REVOKED],
-        ).values('status', 'user_email', 'activation_date', 'last_remind_date', 'activation_key')
-        for lic in licenses:
-            # We want to expose the full activation link rather than just the activation key
-            lic['activation_link'] = get_license_activation_link(enterprise_slug, lic['activation_key'])
-            lic.pop('activation_key', None)
-        csv_data = CSVRenderer().render(list(licenses))
-        return Response(csv_data, status=status.HTTP_200_OK, content_type='text/csv')
+        return StreamingHttpResponse(
+            utils.iter_license_csv_lines(subscription),
+            status=status.HTTP_200_OK,
+            content_type='text/csv',
+        )
+
+    @action(detail=False, methods=['get', 'post'], url_path='csv-export')
+    def csv_export(self, request, subscription_uuid):  # pylint: disable=unused-argument
+        """
+        Asynchronously exports license data for a given subscription in CSV format,
+        for plans that are too large to download from the ``csv`` action.
+
+        POST /api/v1/subscriptions/{subscription_uuid}/licenses/csv-export/
+            Enqueues the export and returns its ``job_id``.
+
+        GET /api/v1/subscriptions/{subscription_uuid}/licenses/csv-export/?job_id={job_id}
+            Returns the ``job_id`` and, once the export has been uploaded, a ``download_url`` for it.
+        """
+        subscription_plan = self._get_subscription_plan()
+        if not subscription_plan:
+            return Response(
+                'No SubscriptionPlan identified by {} exists'.format(subscription_uuid),
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        if request.method == 'POST':
+            decoded_jwt = utils.get_decoded_jwt(request) or {}
+            license_export_job = LicenseExportJob.create_license_export_job(
+                decoded_jwt.get('user_id'),
+                subscription_plan,
+            )
+            return Response({'job_id': str(license_export_job.uuid)}, status=status.HTTP_201_CREATED)
+
+        job_id = request.query_params.get('job_id')
+        if not job_id:
+            return Response('You must supply the job_id query parameter', status=status.HTTP_400_BAD_REQUEST)
+        try:
+            UUID(job_id)
+        except ValueError:
+            return Response('The job_id query parameter must be a valid UUID', status=status.HTTP_400_BAD_REQUEST)
+
+        license_export_job = get_object_or_404(
+            LicenseExportJob,
+            uuid=job_id,
+            subscription_plan_uuid=subscription_plan.uuid,
+        )
+        response_object = {
+            'job_id': str(license_export_job.uuid),
+            'download_url': license_export_job.generate_download_url(),
+        }
+        return Response(response_object, status=status.HTTP_200_OK)
 
 
 class LicenseBaseView(UserDetailsFromJwtMixin, APIView):
@@ -1710,7 +1730,7 @@ class EnterpriseEnrollmentWithLicenseSubsidyView(LicenseBaseView):
     )
     def get(self, request):
         """
-        Returns the status of a given bulk enrollment job id.
+        Returns the status of a given bulk enrollment job id, including the percentage of its chunks enrolled so far.
         """
         param_validation_error_message = self._validate_status_request_params()
         if param_validation_error_message:
@@ -1724,6 +1744,7 @@ class EnterpriseEnrollmentWithLicenseSubsidyView(LicenseBaseView):
         response_object = {
             'job_id': str(bulk_enrollment_job.uuid),
             'download_url': bulk_enrollment_job.generate_download_url(),
+            'percent_complete': bulk_enrollment_job.percent_complete,
         }
 
         return Response(response_object, status=status.HTTP_200_OK)
@@ -1844,8 +1865,9 @@ class LicenseActivationView(LicenseBaseView):
             return Response(str(exc), status=status.HTTP_422_UNPROCESSABLE_ENTITY)
 
         if user_license.status == constants.ASSIGNED:
-            user_license.activate(self.lms_user_id)
-            self._track_and_notify(user_license)
+            with transaction.atomic():
+                user_license.activate(self.lms_user_id)
+                self._track_and_notify(user_license)
 
         # There's an implied logical branch where the license is already activated
         # in which case we also return as if the activation action was successful.
@@ -1858,7 +1880,7 @@ class LicenseActivationView(LicenseBaseView):
         invoke a post-activation notification task.
         """
         event_properties = event_utils.get_license_tracking_properties(user_license)
-        event_utils.track_event(
+        event_utils.enqueue_event(
             self.lms_user_id,
             constants.SegmentEvents.LICENSE_ACTIVATED,
             event_properties
@@ -1913,6 +1935,7 @@ class UserRetirementView(APIView):
 
         # Scrub all pii on licenses associated with the user
         associated_licenses = License.objects.filter(lms_user_id=lms_user_id)
+        user_emails = {associated_license.user_email for associated_license in associated_licenses}
         for associated_license in associated_licenses:
             # Scrub all pii on the revoked licenses, but they should stay revoked and keep their other info as we
             # currently add an unassigned license to the subscription's license pool whenever one is revoked.
@@ -1933,6 +1956,10 @@ class UserRetirementView(APIView):
         )
         logger.info(message)
 
+        # Drop any tracking events about the user that haven't been sent yet, since they hold the user's pii
+        num_deleted_events = PendingTrackingEvent.delete_for_user(lms_user_id, user_emails)
+        logger.info('Deleted %s pending tracking events for user with lms_user_id %r', num_deleted_events, lms_user_id)
+
         try:
             User = get_user_model()
             user = User.objects.get(username=original_username)
@@ -1,11 +1,126 @@
+import datetime
 import logging
+import os
+import threading
+from collections import Counter
 
 from django.conf import settings
-from edx_rest_api_client.client import OAuthAPIClient
+from django.core.cache import cache
+from edx_django_utils.monitoring import accumulate
+from edx_rest_api_client.client import OAuthAPIClient, get_oauth_access_token
 
 
 logger = logging.getLogger(__name__)
 
+# Access tokens are refreshed this long before they expire, or halfway through their lifetime if that's sooner
+OAUTH_ACCESS_TOKEN_REFRESH_MARGIN_SECONDS = 300
+
+# Process-wide counts of the access tokens fetched or read from the django cache,
+# and of the oauth clients created or reused, see ``record_oauth_client_event``
+OAUTH_CLIENT_COUNTERS = Counter()
+
+
+def record_oauth_client_event(event_name):
+    """
+    Counts an access token fetch or cache hit, or an oauth client creation or reuse, in this process'
+    counters and in the monitoring totals of the current transaction.
+    """
+    OAUTH_CLIENT_COUNTERS[event_name] += 1
+    accumulate(f'oauth_client_{event_name}', 1)
+
+
+class PooledOAuthAPIClient(OAuthAPIClient):
+    """
+    OAuthAPIClient that keeps its access token in memory until shortly before the token expires,
+    and shares its tokens with the other worker processes through the django cache,
+    so that tokens are fetched from the LMS as rarely as possible.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._access_token_refresh_at = None
+
+    @property
+    def access_token_cache_key(self):
+        return f'license_manager.oauth_access_token.{self._client_id}.{self._base_url}'
+
+    def _fetch_access_token(self):
+        """
+        Fetches a new access token from the LMS, and caches it until it's due to be refreshed.
+
+        Returns:
+            tuple: The access token and the (naive, UTC) datetime at which it should be refreshed.
+        """
+        now = datetime.datetime.utcnow()
+        access_token, expires_at = get_oauth_access_token(
+            self._base_url,
+            self._client_id,
+            self._client_secret,
+            grant_type='client_credentials',
+            timeout=self._timeout,
+        )
+        record_oauth_client_event('access_token_fetched')
+
+        refresh_margin = min(
+            datetime.timedelta(seconds=OAUTH_ACCESS_TOKEN_REFRESH_MARGIN_SECONDS),
+            (expires_at - now) / 2,
+        )
+        refresh_at = expires_at - refresh_margin
+        cache.set(
+            self.access_token_cache_key,
+            (access_token, refresh_at),
+            max(int((refresh_at - now).total_seconds()), 1),
+        )
+        return access_token, refresh_at
+
+    def _ensure_authentication(self):
+        now = datetime.datetime.utcnow()
+        if self.auth.token and now < self._access_token_refresh_at:
+            return
+
+        cached_value = cache.get(self.access_token_cache_key)
+        if cached_value and now < cached_value[1]:
+            record_oauth_client_event('access_token_cache_hit')
+            self.auth.token, self._access_token_refresh_at = cached_value
+        else:
+            self.auth.token, self._access_token_refresh_at = self._fetch_access_token()
+
+
+class OAuthClientRegistry:
+    """
+    The oauth clients of a worker process, one per oauth provider and client id, so that every
+    api client in the process reuses the same connection pool and access token.
+    """
+    _clients = {}
+    _pid = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls, base_url, client_id, client_secret):
+        """
+        Returns the process' oauth client for the given provider and credentials, creating it if needed.
+        Clients created before the process was forked are discarded, since connections can't be shared
+        across processes.
+        """
+        # The client class is part of the key so that patching it (e.g. in tests) yields new clients
+        key = (PooledOAuthAPIClient, base_url, client_id, client_secret)
+        with cls._lock:
+            if cls._pid != os.getpid():
+                cls._clients = {}
+                cls._pid = os.getpid()
+            client = cls._clients.get(key)
+            if client is None:
+                record_oauth_client_event('created')
+                client = cls._clients[key] = PooledOAuthAPIClient(base_url, client_id, client_secret)
+            else:
+                record_oauth_client_event('reused')
+            return client
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._clients = {}
+
 
 class BaseOAuthClient:
     """
@@ -13,7 +128,7 @@ class BaseOAuthClient:
     """
 
     def __init__(self):
-        self.client = OAuthAPIClient(
+        self.client = OAuthClientRegistry.get_client(
             settings.SOCIAL_AUTH_EDX_OAUTH2_URL_ROOT.strip('/'),
             self.oauth2_client_id,
             self.oauth2_client_secret
@@ -1,13 +1,119 @@
+import json
 import logging
+import os
+import threading
+import time
 
+import requests
 from braze.client import BrazeClient
+from braze.constants import MAX_NUM_IDENTIFY_USERS_ALIASES
+from braze.exceptions import BrazeClientError, BrazeRateLimitError
 from django.conf import settings
+from edx_django_utils.monitoring import accumulate
+from requests.adapters import HTTPAdapter
 
 
 logger = logging.getLogger(__name__)
 
 
+class TokenBucket:
+    """
+    Thread-safe token bucket that allows ``rate`` acquisitions per second, in bursts of up to ``capacity``.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """
+        Blocks until a token is available, then takes it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Holds back every acquisition for ``seconds``, e.g. once the server has told us we're rate limited.
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class BrazeTransport:
+    """
+    The pooled HTTP session and rate limiter shared by every Braze client in a worker process,
+    so that connections are kept alive across calls and the process stays within its share of Braze's rate limits.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.BRAZE_HTTP_POOL_MAXSIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.rate_limiter = TokenBucket(settings.BRAZE_REQUESTS_PER_SECOND, settings.BRAZE_REQUEST_BURST)
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Returns the transport of the current process, creating it the first time it's used in the process
+        (sessions must not be shared with processes forked from it).
+        """
+        with cls._instance_lock:
+            if cls._instance is None or cls._instance.pid != os.getpid():
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def reset(cls):
+        """
+        Discards the transport of the current process, e.g. after its settings have changed.
+        """
+        with cls._instance_lock:
+            if cls._instance is not None:
+                cls._instance.session.close()
+            cls._instance = None
+
+
+def record_braze_request_metrics(endpoint, payload_bytes, latency_seconds, status):
+    """
+    Logs the payload size and latency of a single Braze request, and adds them to the monitoring
+    totals of the current transaction.
+    """
+    latency_ms = round(latency_seconds * 1000)
+    logger.info(
+        'Braze request to %s sent %s bytes in %s ms with status %s',
+        endpoint, payload_bytes, latency_ms, status,
+    )
+    accumulate('braze_request_count', 1)
+    accumulate('braze_request_payload_bytes', payload_bytes)
+    accumulate('braze_request_latency_ms', latency_ms)
+
+
 class BrazeApiClient(BrazeClient):
+    """
+    Braze client that sends its requests through the process' ``BrazeTransport``, and that backs off
+    and retries requests that Braze rejects for exceeding its rate limits.
+    """
+
     def __init__(self):
 
         required_settings = ['BRAZE_API_KEY', 'BRAZE_API_URL', 'BRAZE_APP_ID']
@@ -23,3 +129,48 @@ class BrazeApiClient(BrazeClient):
             api_url=settings.BRAZE_API_URL,
             app_id=settings.BRAZE_APP_ID
         )
+        self.transport = BrazeTransport.get_instance()
+        self.session = self.transport.session
+
+    def _get_rate_limit_backoff(self, exc, attempt):
+        """
+        Returns how many seconds to wait before retrying a rate limited request: until the reset time
+        Braze gave us if there is one, or exponentially longer on each attempt otherwise.
+        """
+        backoff = exc.reset_epoch_s - time.time() if exc.reset_epoch_s else 2 ** attempt
+        return min(max(backoff, 1), settings.BRAZE_RATE_LIMIT_MAX_BACKOFF_SECONDS)
+
+    def _make_request(self, data, endpoint, request_type):
+        payload_bytes = len(json.dumps(data))
+        attempt = 0
+        while True:
+            self.transport.rate_limiter.acquire()
+            started_at = time.monotonic()
+            status = 'ok'
+            try:
+                return super()._make_request(data, endpoint, request_type)
+            except BrazeRateLimitError as exc:
+                status = 'rate_limited'
+                if attempt >= settings.BRAZE_RATE_LIMIT_MAX_RETRIES:
+                    raise
+                backoff = self._get_rate_limit_backoff(exc, attempt)
+                logger.warning('Braze request to %s was rate limited, retrying in %s seconds', endpoint, backoff)
+                self.transport.rate_limiter.pause(backoff)
+                attempt += 1
+            except Exception:
+                status = 'error'
+                raise
+            finally:
+                record_braze_request_metrics(endpoint, payload_bytes, time.monotonic() - started_at, status)
+
+    def identify_users(self, aliases_to_identify):
+        """
+        Identifies the given aliases, in as few requests as the identify endpoint allows.
+        """
+        if not aliases_to_identify:
+            raise BrazeClientError('Bad arguments, aliases_to_identify is required.')
+
+        response = None
+        for aliases_chunk in self._chunks(aliases_to_identify, MAX_NUM_IDENTIFY_USERS_ALIASES):
+            response = super().identify_users(aliases_chunk)
+        return response
@@ -1,13 +1,100 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
 
 from license_manager.apps.api_client.base_oauth import BaseOAuthClient
 
 
 logger = logging.getLogger(__name__)
 
+# Cached enterprise customer data and admin users are refreshed once they're older than this,
+# and served stale while they're being refreshed until they're older than the cache timeout.
+ENTERPRISE_DIRECTORY_FRESH_SECONDS = 60 * 5
+ENTERPRISE_DIRECTORY_CACHE_TIMEOUT = 60 * 60
+# How long a reader may hold the lock to fetch an entry, and how long other readers wait for it
+ENTERPRISE_DIRECTORY_FETCH_LOCK_TIMEOUT = 30
+ENTERPRISE_DIRECTORY_FETCH_WAIT_SECONDS = 10
+ENTERPRISE_DIRECTORY_FETCH_POLL_SECONDS = 0.1
+
+# The most course enrollment revocation requests sent at the same time by ``revoke_course_enrollments_for_users``,
+# which stays below the size of the oauth client's connection pool
+REVOKE_COURSE_ENROLLMENTS_MAX_WORKERS = 8
+
+
+def get_enterprise_customer_cache_key(enterprise_customer_uuid):
+    return f'enterprise_directory:customer:{enterprise_customer_uuid}'
+
+
+def get_enterprise_admin_users_cache_key(enterprise_customer_uuid):
+    return f'enterprise_directory:admin_users:{enterprise_customer_uuid}'
+
+
+def invalidate_enterprise_directory(enterprise_customer_uuid):
+    """
+    Drops the cached customer data and admin users of an enterprise customer,
+    so that they're fetched from the enterprise service the next time they're read.
+    """
+    cache.delete_many([
+        get_enterprise_customer_cache_key(enterprise_customer_uuid),
+        get_enterprise_admin_users_cache_key(enterprise_customer_uuid),
+    ])
+
+
+def _fetch_directory_entry(cache_key, fetch):
+    value = fetch()
+    cache.set(
+        cache_key,
+        {'value': value, 'fresh_until': time.time() + ENTERPRISE_DIRECTORY_FRESH_SECONDS},
+        ENTERPRISE_DIRECTORY_CACHE_TIMEOUT,
+    )
+    return value
+
+
+def get_directory_entry(cache_key, fetch):
+    """
+    Returns the enterprise directory entry cached under ``cache_key``, calling ``fetch`` to get it if needed.
+
+    Fresh entries are returned as is. The first reader of a stale entry refreshes it, while concurrent readers
+    keep getting the stale entry, which is also returned if the refresh fails. Only one reader fetches a missing
+    entry at a time, through a lock held in the cache, and the others wait for its result.
+    """
+    lock_key = f'{cache_key}:lock'
+    entry = cache.get(cache_key)
+    if entry is not None:
+        is_fresh = time.time() < entry['fresh_until']
+        if is_fresh or not cache.add(lock_key, True, ENTERPRISE_DIRECTORY_FETCH_LOCK_TIMEOUT):
+            return entry['value']
+        try:
+            return _fetch_directory_entry(cache_key, fetch)
+        except requests.exceptions.RequestException:
+            logger.exception('Failed to refresh %s, returning its stale value', cache_key)
+            return entry['value']
+        finally:
+            cache.delete(lock_key)
+
+    wait_until = time.monotonic() + ENTERPRISE_DIRECTORY_FETCH_WAIT_SECONDS
+    while not cache.add(lock_key, True, ENTERPRISE_DIRECTORY_FETCH_LOCK_TIMEOUT):
+        if time.monotonic() >= wait_until:
+            logger.warning('Timed out waiting for another reader to fetch %s, fetching it', cache_key)
+            return fetch()
+        time.sleep(ENTERPRISE_DIRECTORY_FETCH_POLL_SECONDS)
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return entry['value']
+
+    try:
+        # Another reader may have fetched the entry while we were taking the lock
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return entry['value']
+        return _fetch_directory_entry(cache_key, fetch)
+    finally:
+        cache.delete(lock_key)
+
 
 class EnterpriseApiClient(BaseOAuthClient):
     """
@@ -24,13 +111,20 @@ class EnterpriseApiClient(BaseOAuthClient):
 
     def get_enterprise_customer_data(self, enterprise_customer_uuid):
         """
-        Gets the data for an EnterpriseCustomer with a given UUID.
+        Gets the data for an EnterpriseCustomer with a given UUID, from the cached enterprise directory
+        if it's there, see ``get_directory_entry``.
 
         Arguments:
             enterprise_customer_uuid (UUID): UUID of the enterprise customer associated with an enterprise
         Returns:
             response (dict): JSON response data
         """
+        return get_directory_entry(
+            get_enterprise_customer_cache_key(enterprise_customer_uuid),
+            lambda: self._fetch_enterprise_customer_data(enterprise_customer_uuid),
+        )
+
+    def _fetch_enterprise_customer_data(self, enterprise_customer_uuid):
         endpoint = '{}{}/'.format(self.enterprise_customer_endpoint, str(enterprise_customer_uuid))
         try:
             response = self.client.get(endpoint)
@@ -46,7 +140,8 @@ class EnterpriseApiClient(BaseOAuthClient):
 
     def get_enterprise_admin_users(self, enterprise_customer_uuid):
         """
-        Gets a list of admin users for a given enterprise customer.
+        Gets a list of admin users for a given enterprise customer, from the cached enterprise directory
+        if it's there, see ``get_directory_entry``.
 
         Arguments:
             enterprise_customer_uuid (UUID): UUID of the enterprise customer associated with an enterprise
@@ -65,7 +160,12 @@ class EnterpriseApiClient(BaseOAuthClient):
                     'created': str
                 }
         """
+        return get_directory_entry(
+            get_enterprise_admin_users_cache_key(enterprise_customer_uuid),
+            lambda: self._fetch_enterprise_admin_users(enterprise_customer_uuid),
+        )
 
+    def _fetch_enterprise_admin_users(self, enterprise_customer_uuid):
         query_params = f'?enterprise_customer_uuid={str(enterprise_customer_uuid)}&role=enterprise_admin'
 
         try:
@@ -158,6 +258,34 @@ class EnterpriseApiClient(BaseOAuthClient):
             logger.error(msg)
             raise exc
 
+    def revoke_course_enrollments_for_users(self, user_ids, enterprise_id):
+        """
+        Revokes the enterprise licensed course enrollments of each of the given users, sending up to
+        ``REVOKE_COURSE_ENROLLMENTS_MAX_WORKERS`` requests at the same time over the client's pooled connections.
+
+        Arguments:
+            user_ids (list of str): The IDs of the users who had an enterprise license revoked
+            enterprise_id (str): The ID of the enterprise to revoke course enrollments for
+        Returns:
+            dict: The result of each user's revocation, keyed by user id: None if it succeeded,
+                or the ``requests.exceptions.RequestException`` it failed with.
+        """
+        if not user_ids:
+            return {}
+
+        # Authenticate once, rather than in each of the concurrent requests
+        self.client._ensure_authentication()  # pylint: disable=protected-access
+
+        def revoke(user_id):
+            try:
+                self.revoke_course_enrollments_for_user(user_id=user_id, enterprise_id=enterprise_id)
+                return None
+            except requests.exceptions.RequestException as exc:
+                return exc
+
+        with ThreadPoolExecutor(max_workers=min(REVOKE_COURSE_ENROLLMENTS_MAX_WORKERS, len(user_ids))) as executor:
+            return dict(zip(user_ids, executor.map(revoke, user_ids)))
+
     def bulk_licensed_enrollments_expiration(self, expired_license_uuids, ignore_enrollments_modified_after=None):
         """
         Calls the Enterprise API Client to terminate expired course enrollments for the provided license uuids
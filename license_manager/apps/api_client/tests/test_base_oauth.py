@@ -0,0 +1,84 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from license_manager.apps.api_client.base_oauth import (
+    OAUTH_CLIENT_COUNTERS,
+    OAuthClientRegistry,
+    PooledOAuthAPIClient,
+)
+from license_manager.apps.api_client.enterprise import EnterpriseApiClient
+from license_manager.apps.api_client.lms import LMSApiClient
+
+
+class OAuthClientRegistryTests(TestCase):
+    """
+    Tests for the process-wide registry of oauth clients.
+    """
+
+    def setUp(self):
+        super().setUp()
+        OAuthClientRegistry.clear()
+        self.addCleanup(OAuthClientRegistry.clear)
+        OAUTH_CLIENT_COUNTERS.clear()
+
+    def test_api_clients_share_oauth_client(self):
+        assert EnterpriseApiClient().client is LMSApiClient().client
+        assert OAUTH_CLIENT_COUNTERS['created'] == 1
+        assert OAUTH_CLIENT_COUNTERS['reused'] == 1
+
+    def test_registry_is_per_process(self):
+        client = OAuthClientRegistry.get_client('http://lms', 'client-id', 'secret')
+        with mock.patch('license_manager.apps.api_client.base_oauth.os.getpid', return_value=-1):
+            assert OAuthClientRegistry.get_client('http://lms', 'client-id', 'secret') is not client
+
+
+@mock.patch('license_manager.apps.api_client.base_oauth.get_oauth_access_token')
+class PooledOAuthAPIClientTests(TestCase):
+    """
+    Tests for the access token caching of the pooled oauth client.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        OAUTH_CLIENT_COUNTERS.clear()
+
+    def _mock_token(self, mock_get_token, token, expires_in_seconds):
+        mock_get_token.return_value = (
+            token,
+            datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in_seconds),
+        )
+
+    def test_token_is_reused_across_requests(self, mock_get_token):
+        self._mock_token(mock_get_token, 'token-1', 3600)
+        client = PooledOAuthAPIClient('http://lms', 'client-id', 'secret')
+        client.get_jwt_access_token()
+        assert client.get_jwt_access_token() == 'token-1'
+        assert mock_get_token.call_count == 1
+
+    def test_token_is_shared_through_django_cache(self, mock_get_token):
+        self._mock_token(mock_get_token, 'token-1', 3600)
+        PooledOAuthAPIClient('http://lms', 'client-id', 'secret').get_jwt_access_token()
+
+        # A client in another process starts without a token in memory, and reads it from the cache
+        assert PooledOAuthAPIClient('http://lms', 'client-id', 'secret').get_jwt_access_token() == 'token-1'
+        assert mock_get_token.call_count == 1
+        assert OAUTH_CLIENT_COUNTERS['access_token_fetched'] == 1
+        assert OAUTH_CLIENT_COUNTERS['access_token_cache_hit'] == 1
+
+    def test_token_is_refreshed_before_expiry(self, mock_get_token):
+        self._mock_token(mock_get_token, 'token-1', 3600)
+        client = PooledOAuthAPIClient('http://lms', 'client-id', 'secret')
+        client.get_jwt_access_token()
+
+        self._mock_token(mock_get_token, 'token-2', 3600)
+        # Within the refresh margin of the first token's expiry
+        in_59_minutes = datetime.datetime.utcnow() + datetime.timedelta(minutes=59)
+        with mock.patch('license_manager.apps.api_client.base_oauth.datetime') as mock_datetime:
+            mock_datetime.datetime.utcnow.return_value = in_59_minutes
+            mock_datetime.timedelta = datetime.timedelta
+            assert client.get_jwt_access_token() == 'token-2'
+        assert mock_get_token.call_count == 2
@@ -0,0 +1,130 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from braze.exceptions import BrazeRateLimitError
+from django.test import TestCase, override_settings
+
+from license_manager.apps.api_client.braze import (
+    BrazeApiClient,
+    BrazeTransport,
+    TokenBucket,
+)
+
+
+class StubBrazeRequestHandler(BaseHTTPRequestHandler):
+    """
+    Records the requests sent to the stub Braze server, and answers them with the server's queued responses,
+    or with an empty success response once there are none left.
+    """
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received_requests.append((self.path, json.loads(body)))
+        status, headers = self.server.queued_responses.pop(0) if self.server.queued_responses else (200, {})
+        response_body = json.dumps({'message': 'success', 'users': []}).encode()
+        self.send_response(status)
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response_body)))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class BrazeApiClientTests(TestCase):
+    """
+    Tests for the braze api client, against a stub Braze server.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubBrazeRequestHandler)
+        self.server.received_requests = []
+        self.server.queued_responses = []
+        server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        server_thread.start()
+        self.addCleanup(server_thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings_override = override_settings(
+            BRAZE_API_URL=f'http://127.0.0.1:{self.server.server_port}',
+            BRAZE_API_KEY='test-key',
+            BRAZE_APP_ID='test-app',
+            BRAZE_REQUESTS_PER_SECOND=1000,
+            BRAZE_REQUEST_BURST=1000,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        BrazeTransport.reset()
+        self.addCleanup(BrazeTransport.reset)
+
+    def test_clients_share_the_process_session(self):
+        assert BrazeApiClient().session is BrazeApiClient().session
+
+    def test_track_user_coalesces_into_full_requests(self):
+        attributes = [{'external_id': str(i), 'is_enterprise_learner': True} for i in range(150)]
+        BrazeApiClient().track_user(attributes=attributes)
+
+        assert [path for path, _ in self.server.received_requests] == ['/users/track', '/users/track']
+        assert [len(body['attributes']) for _, body in self.server.received_requests] == [75, 75]
+
+    def test_identify_users_chunks_aliases(self):
+        aliases = [
+            {'external_id': str(i), 'user_alias': {'alias_label': 'Enterprise', 'alias_name': f'{i}@example.com'}}
+            for i in range(60)
+        ]
+        BrazeApiClient().identify_users(aliases)
+
+        assert [len(body['aliases_to_identify']) for _, body in self.server.received_requests] == [50, 10]
+
+    @mock.patch('license_manager.apps.api_client.braze.accumulate')
+    def test_records_request_metrics(self, mock_accumulate):
+        BrazeApiClient().track_user(attributes=[{'external_id': '1'}])
+
+        mock_accumulate.assert_any_call('braze_request_count', 1)
+        mock_accumulate.assert_any_call('braze_request_payload_bytes', len(json.dumps({
+            'attributes': [{'external_id': '1'}],
+        })))
+        assert 'braze_request_latency_ms' in [call.args[0] for call in mock_accumulate.call_args_list]
+
+    @mock.patch('license_manager.apps.api_client.braze.TokenBucket.pause')
+    def test_rate_limited_request_is_retried(self, mock_pause):
+        self.server.queued_responses = [(429, {'X-RateLimit-Reset': '0'})]
+        BrazeApiClient().track_user(attributes=[{'external_id': '1'}])
+
+        assert len(self.server.received_requests) == 2
+        mock_pause.assert_called_once_with(1)
+
+    @override_settings(BRAZE_RATE_LIMIT_MAX_RETRIES=1)
+    @mock.patch('license_manager.apps.api_client.braze.TokenBucket.pause')
+    def test_rate_limited_request_gives_up(self, _):
+        self.server.queued_responses = [(429, {})] * 2
+        with self.assertRaises(BrazeRateLimitError):
+            BrazeApiClient().track_user(attributes=[{'external_id': '1'}])
+
+        assert len(self.server.received_requests) == 2
+
+
+class TokenBucketTests(TestCase):
+    """
+    Tests for the token bucket that rate limits Braze requests.
+    """
+
+    @mock.patch('license_manager.apps.api_client.braze.time.sleep')
+    def test_acquire_waits_once_bucket_is_empty(self, mock_sleep):
+        bucket = TokenBucket(rate=10, capacity=2)
+        bucket.acquire()
+        bucket.acquire()
+        mock_sleep.assert_not_called()
+
+        # Pretend the sleep lets enough time pass to refill the bucket
+        mock_sleep.side_effect = lambda seconds: setattr(bucket, 'updated_at', bucket.updated_at - 2 * seconds)
+        bucket.acquire()
+        assert mock_sleep.call_count == 1
+        assert 0 < mock_sleep.call_args.args[0] <= 0.1
@@ -22,7 +22,7 @@ class EnterpriseCatalogApiClientTests(TestCase):
         cls.uuid = uuid4()
         cls.content_ids = ['demoX', 'testX']
 
-    @mock.patch('license_manager.apps.api_client.base_oauth.OAuthAPIClient', return_value=mock.MagicMock())
+    @mock.patch('license_manager.apps.api_client.base_oauth.PooledOAuthAPIClient', return_value=mock.MagicMock())
     def test_contains_content_items_defaults_false(self, mock_oauth_client):
         """
         Verify the `contains_content_items` method returns False if the response does not contain the expected key.
@@ -32,7 +32,7 @@ class EnterpriseCatalogApiClientTests(TestCase):
         client = EnterpriseCatalogApiClient()
         assert client.contains_content_items(self.uuid, self.content_ids) is False
 
-    @mock.patch('license_manager.apps.api_client.base_oauth.OAuthAPIClient', return_value=mock.MagicMock())
+    @mock.patch('license_manager.apps.api_client.base_oauth.PooledOAuthAPIClient', return_value=mock.MagicMock())
     @ddt.data(True, False)
     def test_contains_content_items(self, contains_content, mock_oauth_client):
         """
@@ -43,7 +43,7 @@ class EnterpriseCatalogApiClientTests(TestCase):
         client = EnterpriseCatalogApiClient()
         assert client.contains_content_items(self.uuid, self.content_ids) is contains_content
 
-    @mock.patch('license_manager.apps.api_client.base_oauth.OAuthAPIClient', return_value=mock.MagicMock())
+    @mock.patch('license_manager.apps.api_client.base_oauth.PooledOAuthAPIClient', return_value=mock.MagicMock())
     def test_get_enterprise_catalog(self, mock_oauth_client):
         """
         Verify the `test_get_enterprise_catalog` method returns the value given by the response.
@@ -1,12 +1,24 @@
 
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import mock
 from uuid import uuid4
 
 import ddt
 import requests
+from django.core.cache import cache
 from django.test import TestCase
 
-from license_manager.apps.api_client.enterprise import EnterpriseApiClient
+from license_manager.apps.api_client.base_oauth import OAuthClientRegistry
+from license_manager.apps.api_client.enterprise import (
+    REVOKE_COURSE_ENROLLMENTS_MAX_WORKERS,
+    EnterpriseApiClient,
+    get_enterprise_customer_cache_key,
+    invalidate_enterprise_directory,
+)
 from license_manager.apps.subscriptions import constants
 from license_manager.test_utils import MockResponse
 
@@ -25,7 +37,11 @@ class EnterpriseApiClientTests(TestCase):
         cls.user_id = 3
         cls.content_ids = ['demoX', 'testX']
 
-    @mock.patch('license_manager.apps.api_client.base_oauth.OAuthAPIClient', return_value=mock.MagicMock())
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    @mock.patch('license_manager.apps.api_client.base_oauth.PooledOAuthAPIClient', return_value=mock.MagicMock())
     def test_create_pending_enterprise_users_successful(self, mock_oauth_client):
         """
         Verify the ``create_pending_enterprise_users`` method does not raise an exception for successful requests.
@@ -52,7 +68,7 @@ class EnterpriseApiClientTests(TestCase):
         )
         assert response.status_code == 201
 
-    @mock.patch('license_manager.apps.api_client.base_oauth.OAuthAPIClient', return_value=mock.MagicMock())
+    @mock.patch('license_manager.apps.api_client.base_oauth.PooledOAuthAPIClient', return_value=mock.MagicMock())
     def test_create_pending_enterprise_users_http_error(self, mock_oauth_client):
         """
         Verify the ``create_pending_enterprise_users`` method does not raise an exception for successful requests.
@@ -83,7 +99,7 @@ class EnterpriseApiClientTests(TestCase):
             assert response.content == 'error response'
 
     @mock.patch('license_manager.apps.api_client.enterprise.logger', return_value=mock.MagicMock())
-    @mock.patch('license_manager.apps.api_client.base_oauth.OAuthAPIClient', return_value=mock.MagicMock())
+    @mock.patch('license_manager.apps.api_client.base_oauth.PooledOAuthAPIClient', return_value=mock.MagicMock())
     def test_revoke_course_enrollments_for_user_with_error(self, mock_oauth_client, mock_logger):
         """
         Verify the ``update_course_enrollment_mode_for_user`` method logs an error for a status code of >=400.
@@ -97,3 +113,137 @@ class EnterpriseApiClientTests(TestCase):
                 enterprise_id=self.uuid,
             )
             mock_logger.error.assert_called_once()
+
+    @mock.patch('license_manager.apps.api_client.base_oauth.PooledOAuthAPIClient', return_value=mock.MagicMock())
+    def test_get_enterprise_customer_data_is_cached(self, mock_oauth_client):
+        """
+        Verify the ``get_enterprise_customer_data`` method only fetches the customer data once,
+        until it's invalidated.
+        """
+        mock_oauth_client().get.return_value = MockResponse({'slug': 'test-slug'}, 200)
+
+        assert EnterpriseApiClient().get_enterprise_customer_data(self.uuid) == {'slug': 'test-slug'}
+        assert EnterpriseApiClient().get_enterprise_customer_data(self.uuid) == {'slug': 'test-slug'}
+        assert mock_oauth_client().get.call_count == 1
+
+        invalidate_enterprise_directory(self.uuid)
+        EnterpriseApiClient().get_enterprise_customer_data(self.uuid)
+        assert mock_oauth_client().get.call_count == 2
+
+    @mock.patch('license_manager.apps.api_client.base_oauth.PooledOAuthAPIClient', return_value=mock.MagicMock())
+    def test_get_enterprise_customer_data_serves_stale_data(self, mock_oauth_client):
+        """
+        Verify a stale entry is refreshed by its first reader, and returned as is while another reader refreshes it
+        or if the refresh fails.
+        """
+        cache_key = get_enterprise_customer_cache_key(self.uuid)
+        cache.set(cache_key, {'value': {'slug': 'old-slug'}, 'fresh_until': 0})
+
+        # Another reader is already refreshing the entry
+        cache.add(f'{cache_key}:lock', True)
+        assert EnterpriseApiClient().get_enterprise_customer_data(self.uuid) == {'slug': 'old-slug'}
+        assert not mock_oauth_client().get.called
+        cache.delete(f'{cache_key}:lock')
+
+        mock_oauth_client().get.return_value = MockResponse({'detail': 'Bad Request'}, 500)
+        assert EnterpriseApiClient().get_enterprise_customer_data(self.uuid) == {'slug': 'old-slug'}
+
+        mock_oauth_client().get.return_value = MockResponse({'slug': 'new-slug'}, 200)
+        assert EnterpriseApiClient().get_enterprise_customer_data(self.uuid) == {'slug': 'new-slug'}
+        assert cache.get(cache_key)['value'] == {'slug': 'new-slug'}
+
+    @mock.patch('license_manager.apps.api_client.enterprise.ENTERPRISE_DIRECTORY_FETCH_WAIT_SECONDS', 0)
+    @mock.patch('license_manager.apps.api_client.base_oauth.PooledOAuthAPIClient', return_value=mock.MagicMock())
+    def test_get_enterprise_admin_users_waits_for_concurrent_fetch(self, mock_oauth_client):
+        """
+        Verify a reader of a missing entry that's being fetched by another reader doesn't fetch it too,
+        unless it times out waiting for it.
+        """
+        mock_oauth_client().get.return_value = MockResponse({
+            'next': None,
+            'results': [{'id': 1, 'created': 'today', 'user': {'email': 'admin@example.com'}}],
+        }, 200)
+        cache.add('enterprise_directory:admin_users:{}:lock'.format(self.uuid), True)
+
+        admin_users = EnterpriseApiClient().get_enterprise_admin_users(self.uuid)
+
+        assert admin_users == [{'email': 'admin@example.com', 'ecu_id': 1, 'created': 'today'}]
+        assert mock_oauth_client().get.call_count == 1
+
+
+class StubEnterpriseRequestHandler(BaseHTTPRequestHandler):
+    """
+    Records the course enrollment revocations sent to the stub enterprise service, and how many of them
+    were in flight at the same time, failing those of the server's ``failing_user_ids``.
+    """
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            self.server.num_in_flight += 1
+            self.server.max_num_in_flight = max(self.server.max_num_in_flight, self.server.num_in_flight)
+        # Give the other requests time to be sent
+        time.sleep(0.05)
+        with self.server.lock:
+            self.server.num_in_flight -= 1
+            self.server.received_requests.append(body)
+
+        status = 400 if body['user_id'] in self.server.failing_user_ids else 200
+        response_body = b'{}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response_body)))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+@mock.patch('license_manager.apps.api_client.base_oauth.get_oauth_access_token')
+class EnterpriseApiClientRevocationTests(TestCase):
+    """
+    Tests for the bulk course enrollment revocation of the enterprise api client, against a stub enterprise service.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubEnterpriseRequestHandler)
+        self.server.lock = threading.Lock()
+        self.server.num_in_flight = 0
+        self.server.max_num_in_flight = 0
+        self.server.received_requests = []
+        self.server.failing_user_ids = set()
+        server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        server_thread.start()
+        self.addCleanup(server_thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        cache.clear()
+        OAuthClientRegistry.clear()
+        self.addCleanup(OAuthClientRegistry.clear)
+        self.enterprise_client = EnterpriseApiClient()
+        self.enterprise_client.course_enrollments_revoke_endpoint = (
+            f'http://127.0.0.1:{self.server.server_port}/license_revoke/'
+        )
+
+    def test_revoke_course_enrollments_for_users(self, mock_get_token):
+        mock_get_token.return_value = ('token', datetime.datetime.utcnow() + datetime.timedelta(hours=1))
+        user_ids = list(range(20))
+        self.server.failing_user_ids = {3}
+        enterprise_id = str(uuid4())
+
+        results = self.enterprise_client.revoke_course_enrollments_for_users(user_ids, enterprise_id)
+
+        assert sorted(request['user_id'] for request in self.server.received_requests) == user_ids
+        assert {request['enterprise_id'] for request in self.server.received_requests} == {enterprise_id}
+        assert 1 < self.server.max_num_in_flight <= REVOKE_COURSE_ENROLLMENTS_MAX_WORKERS
+        assert isinstance(results.pop(3), requests.exceptions.HTTPError)
+        assert results == {user_id: None for user_id in user_ids if user_id != 3}
+        # The access token is fetched once for all of the requests
+        assert mock_get_token.call_count == 1
+
+    def test_revoke_course_enrollments_for_no_users(self, _):
+        assert not self.enterprise_client.revoke_course_enrollments_for_users([], str(uuid4()))
+        assert not self.server.received_requests
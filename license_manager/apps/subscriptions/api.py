@@ -2,23 +2,29 @@
 Python APIs exposed by the Subscriptions app to other in-process apps.
 """
 import logging
+from collections import defaultdict
 
 from django.db import transaction
 from requests.exceptions import HTTPError
 
-from license_manager.apps.api_client.enterprise import EnterpriseApiClient
+from license_manager.apps.api_client.enterprise import (
+    EnterpriseApiClient,
+    invalidate_enterprise_directory,
+)
 from license_manager.apps.subscriptions import event_utils
 
 from .constants import (
     ACTIVATED,
     ASSIGNED,
     REVOCABLE_LICENSE_STATUSES,
+    REVOKED,
     UNASSIGNED,
     LicenseTypesToRenew,
     SegmentEvents,
 )
 from .exceptions import (
     CustomerAgreementError,
+    LicenseNotFoundError,
     LicenseRevocationError,
     RenewalProcessingError,
     UnprocessableSubscriptionPlanFreezeError,
@@ -71,6 +77,144 @@ def revoke_license(user_license):
     }
 
 
+def revoke_licenses(subscription_plan, user_licenses):
+    """
+    Revoke many Licenses of a single SubscriptionPlan with set-based writes.
+
+    This is the bulk equivalent of calling ``revoke_license()`` on each license in order: licenses
+    that ``revoke_license()`` would reject are reported as failures and left untouched, while the rest are
+    revoked with one bulk update, replaced with one bulk create of unassigned licenses, and counted
+    against the plan's revocation cap with a single save of the plan.
+
+    Arguments:
+        subscription_plan (SubscriptionPlan): The plan that all of ``user_licenses`` belong to.
+        user_licenses (iterable of License): The Licenses to be revoked.
+
+    Returns:
+        tuple: A list of ``{'revoked_license', 'original_status'}`` dicts, in the order the licenses were given,
+        and a list of ``(License, LicenseRevocationError)`` tuples for the licenses that could not be revoked.
+    """
+    revocations_remaining = subscription_plan.num_revocations_remaining
+    revocation_results = []
+    revocation_failures = []
+
+    for user_license in user_licenses:
+        # Revocation of ASSIGNED licenses is not limited
+        if revocations_remaining <= 0 and user_license.status == ACTIVATED:
+            revocation_failures.append((
+                user_license,
+                LicenseRevocationError(user_license.uuid, "License revocation limit has been reached."),
+            ))
+            continue
+
+        if user_license.status not in REVOCABLE_LICENSE_STATUSES:
+            revocation_failures.append((
+                user_license,
+                LicenseRevocationError(
+                    user_license.uuid,
+                    "License with status of {license_status} cannot be revoked.".format(
+                        license_status=user_license.status
+                    ),
+                ),
+            ))
+            continue
+
+        if user_license.status == ACTIVATED:
+            # Revocation only counts against the limit for ACTIVATED licenses
+            revocations_remaining -= 1
+
+        revocation_results.append({
+            'revoked_license': user_license,
+            'original_status': user_license.status,
+        })
+
+    if not revocation_results:
+        return revocation_results, revocation_failures
+
+    revoked_licenses = [result['revoked_license'] for result in revocation_results]
+    num_activated_revoked = sum(1 for result in revocation_results if result['original_status'] == ACTIVATED)
+    revoked_date = localized_utcnow()
+
+    with transaction.atomic():
+        if subscription_plan.is_revocation_cap_enabled and num_activated_revoked:
+            subscription_plan.num_revocations_applied += num_activated_revoked
+            subscription_plan.save()
+
+        for user_license in revoked_licenses:
+            user_license.status = REVOKED
+            user_license.revoked_date = revoked_date
+        License.bulk_update(revoked_licenses, ['status', 'revoked_date'])
+
+        # Create new licenses to add to the unassigned license pool
+        subscription_plan.increase_num_licenses(len(revoked_licenses))
+
+    event_utils.track_license_changes(revoked_licenses, SegmentEvents.LICENSE_REVOKED)
+
+    return revocation_results, revocation_failures
+
+
+def revoke_licenses_by_email(subscription_plan, user_emails):
+    """
+    Revoke the License associated with each of the given emails in a SubscriptionPlan.
+
+    All candidate licenses are fetched with one query. If an email has multiple revocable licenses
+    in the plan, its assigned license is preferred, otherwise the one with the smallest uuid is chosen.
+
+    Arguments:
+        subscription_plan (SubscriptionPlan): The plan in which to revoke licenses.
+        user_emails (iterable of str): The emails whose licenses should be revoked.
+
+    Returns:
+        tuple: A list of ``{'revoked_license', 'original_status', 'user_email'}`` dicts and a list of
+        ``(user_email, exception)`` tuples, where the exception is a ``LicenseNotFoundError``
+        or ``LicenseRevocationError``. Both lists follow the order of ``user_emails``.
+    """
+    user_emails = list(user_emails)
+
+    candidate_licenses_by_email = defaultdict(list)
+    candidate_licenses = subscription_plan.licenses.filter(
+        user_email__in=set(user_emails),
+        status__in=REVOCABLE_LICENSE_STATUSES,
+    ).order_by('uuid')
+    for candidate_license in candidate_licenses:
+        candidate_licenses_by_email[candidate_license.user_email].append(candidate_license)
+
+    licenses_to_revoke = []
+    email_positions_by_license_uuid = {}
+    errors_by_position = {}
+    for position, user_email in enumerate(user_emails):
+        candidates = candidate_licenses_by_email.get(user_email)
+        if not candidates:
+            errors_by_position[position] = (
+                user_email,
+                LicenseNotFoundError(user_email, subscription_plan, REVOCABLE_LICENSE_STATUSES),
+            )
+            continue
+
+        # If this email address has multiple licenses, prefer to revoke the assigned one.
+        # Otherwise, this email address has multiple activated licenses in the same plan,
+        # so we revoke the first one in the result set.
+        user_license = next(
+            (candidate for candidate in candidates if candidate.status == ASSIGNED),
+            candidates[0],
+        )
+        candidates.remove(user_license)
+        licenses_to_revoke.append(user_license)
+        email_positions_by_license_uuid[user_license.uuid] = (user_email, position)
+
+    revocation_results, revocation_failures = revoke_licenses(subscription_plan, licenses_to_revoke)
+
+    for user_license, exc in revocation_failures:
+        user_email, position = email_positions_by_license_uuid[user_license.uuid]
+        errors_by_position[position] = (user_email, exc)
+    for revocation_result in revocation_results:
+        user_email, _ = email_positions_by_license_uuid[revocation_result['revoked_license'].uuid]
+        revocation_result['user_email'] = user_email
+
+    revocation_errors = [errors_by_position[position] for position in sorted(errors_by_position)]
+    return revocation_results, revocation_errors
+
+
 def renew_subscription(subscription_plan_renewal, is_auto_renewed=False):
     """
     Renew the subscription plan.
@@ -217,6 +361,8 @@ def sync_agreement_with_enterprise_customer(customer_agreement):
     Syncs any updates made to the enterprise customer slug or name as returned by the
     ``EnterpriseApiClient`` with the specified ``CustomerAgreement``.
     """
+    # Read the latest data rather than the cached enterprise directory's
+    invalidate_enterprise_directory(customer_agreement.enterprise_customer_uuid)
     try:
         customer_data = EnterpriseApiClient().get_enterprise_customer_data(
             customer_agreement.enterprise_customer_uuid,
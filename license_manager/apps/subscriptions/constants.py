@@ -120,10 +120,17 @@ MAX_NUM_LICENSES = 1000000 # Set a reasonably high max to prevent us from crashi
 LICENSE_EXPIRATION_BATCH_SIZE = 100
 
 # Bulk operation constants
-LICENSE_BULK_OPERATION_BATCH_SIZE = 100
 PENDING_ACCOUNT_CREATION_BATCH_SIZE = 50
 LICENSE_SOURCE_BULK_OPERATION_BATCH_SIZE = 100
-TRACK_LICENSE_CHANGES_BATCH_SIZE = 25
+# A multiple of the braze alias/export (50) and track (75) request sizes, so every request of a batch is full
+TRACK_LICENSE_CHANGES_BATCH_SIZE = 150
+
+# Tracking event outbox constants
+TRACKING_EVENT_OUTBOX_BATCH_SIZE = 1000
+TRACKING_EVENT_MAX_ATTEMPTS = 5
+TRACKING_EVENT_RETRY_BACKOFF_SECONDS = 60
+# How long the events claimed by a send are leased to it, after which they're sent again if it never finished
+TRACKING_EVENT_CLAIM_LEASE_SECONDS = 15 * 60
 ASSIGNMENT_EMAIL_BATCH_SIZE = 50
 REMINDER_EMAIL_BATCH_SIZE = 50
 
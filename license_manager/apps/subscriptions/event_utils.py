@@ -3,18 +3,23 @@ Utility methods for sending events to Braze or Segment.
 """
 import logging
 import uuid
+from datetime import timedelta
 
 import analytics
-import requests
 from braze.exceptions import BrazeClientError
 from django.conf import settings
-from django.db.models import prefetch_related_objects
+from django.db import transaction
 
 from license_manager.apps.api_client.braze import BrazeApiClient
 from license_manager.apps.subscriptions.constants import (
     ENTERPRISE_BRAZE_ALIAS_LABEL,
+    TRACK_LICENSE_CHANGES_BATCH_SIZE,
+    TRACKING_EVENT_CLAIM_LEASE_SECONDS,
+    TRACKING_EVENT_MAX_ATTEMPTS,
+    TRACKING_EVENT_OUTBOX_BATCH_SIZE,
+    TRACKING_EVENT_RETRY_BACKOFF_SECONDS,
 )
-from license_manager.apps.subscriptions.utils import localized_utcnow
+from license_manager.apps.subscriptions.utils import chunks, localized_utcnow
 
 
 logger = logging.getLogger(__name__)
@@ -81,26 +86,27 @@ def _profile_attributes_from_properties(properties):
     return profile_attributes
 
 
-def _track_batch_events_via_braze_alias(event_name, properties_by_email):
+def _track_events_via_braze_alias(events):
     """
     Allows batch tracking of users without an lms user id.
+
+    Coalesces the given ``(email, event_name, properties)`` events, which may be for several event names and
+    several events per email, into one alias and one attribute record per email, so they're sent in as few
+    requests as the braze alias and track endpoints allow.
     """
-    braze_alias_emails = []
-    braze_attributes = []
+    attributes_by_email = {}
     braze_events = []
 
     # synthetic batch id to help us correlate log messages
     batch_id = uuid.uuid4()
 
-    for email, properties in properties_by_email.items():
-        # Create an alias and stash the email in a list we'll send as a batch to braze via `create_braze_alias()`
-        braze_alias_emails.append(email)
+    for email, event_name, properties in events:
         user_alias = _get_braze_alias(email)
 
-        # Create an attribute record and stash in a list we'll send to braze via `track_user()`.
-        attribute_record = _get_braze_attributes(email, user_alias)
+        # Create an attribute record per email and stash it, we'll send them as a batch to braze via `track_user()`.
+        # The aliases of these emails are sent as a batch to braze via `create_braze_alias()`.
+        attribute_record = attributes_by_email.setdefault(email, _get_braze_attributes(email, user_alias))
         attribute_record.update(_profile_attributes_from_properties(properties))
-        braze_attributes.append(attribute_record)
 
         # Create an event record and stash in a list we'll send to braze via `track_user()`.
         event_record = _get_braze_event(user_alias, event_name, properties)
@@ -112,23 +118,32 @@ def _track_batch_events_via_braze_alias(event_name, properties_by_email):
     # Now send the data to braze
     braze_client_instance = BrazeApiClient()
     try:
-        braze_client_instance.create_braze_alias(braze_alias_emails, ENTERPRISE_BRAZE_ALIAS_LABEL)
+        braze_client_instance.create_braze_alias(list(attributes_by_email), ENTERPRISE_BRAZE_ALIAS_LABEL)
         logger.info('Sent batch of braze aliases with batch id %s', batch_id)
     except BrazeClientError as exc:
-        logger.exception()
+        logger.exception('Failed to send batch of braze aliases with batch id %s', batch_id)
         raise exc
 
     try:
         braze_client_instance.track_user(
-            attributes=braze_attributes,
+            attributes=list(attributes_by_email.values()),
             events=braze_events,
         )
         logger.info('Sent batch of braze attribute/events to track_user endpoint with batch id %s', batch_id)
     except BrazeClientError as exc:
-        logger.exception()
+        logger.exception('Failed to send batch of braze attribute/events with batch id %s', batch_id)
         raise exc
 
 
+def _track_batch_events_via_braze_alias(event_name, properties_by_email):
+    """
+    Allows batch tracking of users without an lms user id, for a single event per email.
+    """
+    _track_events_via_braze_alias([
+        (email, event_name, properties) for email, properties in properties_by_email.items()
+    ])
+
+
 def identify_braze_alias(lms_user_id, email_address):
     """
     Send `identify` event to Braze to link aliased Braze profiles.
@@ -137,43 +152,32 @@ def identify_braze_alias(lms_user_id, email_address):
         lms_user_id (str): LMS User ID of the user we want to identify.
         email_address (str): LMS User Email of the user we want to identify.
     """
-    if not (hasattr(settings, "BRAZE_API_KEY") and hasattr(settings, "BRAZE_URL")
-            and settings.BRAZE_API_KEY and settings.BRAZE_URL):
-        logger.warning("Alias {} not identified because BRAZE_API_KEY and BRAZE_URL not set".format(email_address))
+    try:
+        braze_client_instance = BrazeApiClient()
+    except ValueError:
+        logger.warning("Alias {} not identified because the Braze API client is not configured".format(email_address))
         return
 
     try:  # We should never raise an exception when not able to send a tracking data
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': 'Bearer {}'.format(settings.BRAZE_API_KEY),
-            'Accept-Encoding': 'identity'
-        }
-        response = requests.post(
-            url=f'{settings.BRAZE_URL}/users/identify',
-            headers=headers,
-            json={
-                'aliases_to_identify': [
-                    # This hubspot alias is defined in 'hubspot_leads.py' in the edx-prefectutils repo
-                    {
-                        'external_id': str(lms_user_id),
-                        'user_alias': {
-                            'alias_label': 'hubspot',
-                            'alias_name': email_address,
-                        },
-                    },
-                    # This enterprise alias is used for Pending Learners before they activate their accounts,
-                    # see the license-manager repo event_utils.py file and the ecommerce Braze client files
-                    {
-                        'external_id': str(lms_user_id),
-                        'user_alias': {
-                            'alias_label': 'Enterprise',
-                            'alias_name': email_address,
-                        },
-                    },
-                ],
+        return braze_client_instance.identify_users([
+            # This hubspot alias is defined in 'hubspot_leads.py' in the edx-prefectutils repo
+            {
+                'external_id': str(lms_user_id),
+                'user_alias': {
+                    'alias_label': 'hubspot',
+                    'alias_name': email_address,
+                },
             },
-        )
-        return response
+            # This enterprise alias is used for Pending Learners before they activate their accounts,
+            # see the license-manager repo event_utils.py file and the ecommerce Braze client files
+            {
+                'external_id': str(lms_user_id),
+                'user_alias': {
+                    'alias_label': ENTERPRISE_BRAZE_ALIAS_LABEL,
+                    'alias_name': email_address,
+                },
+            },
+        ])
     except Exception as exc:  # pylint: disable=broad-except
         logger.exception(exc)
         return
@@ -214,13 +218,134 @@ def track_event(lms_user_id, event_name, properties):
         )
 
 
-def get_license_tracking_properties(license_obj):
-    """ Uses a License object to build necessary license-related properties to send with a license event.
-        See See docs/segment_events.rst.
+def enqueue_event(lms_user_id, event_name, properties):
+    """
+    Write a tracking event to the outbox of pending events, to be sent to segment by ``send_pending_tracking_events``.
+
+    The event is written in the current transaction, so it's only sent if the change it describes is committed.
+    Takes the same arguments as ``track_event``.
+    """
+    # pylint: disable=import-outside-toplevel
+    from license_manager.apps.subscriptions.models import PendingTrackingEvent
+
+    PendingTrackingEvent.objects.create(
+        lms_user_id=lms_user_id,
+        event_name=event_name,
+        properties=properties,
+    )
+
+
+def enqueue_events(events):
+    """
+    Write many tracking events to the outbox of pending events with a single multi-row INSERT,
+    in the current transaction like ``enqueue_event``.
 
     Args:
-        license: License object to use for data population.
+        events (iterable): ``(lms_user_id, event_name, properties)`` tuples, one per event.
+    """
+    # pylint: disable=import-outside-toplevel
+    from license_manager.apps.subscriptions.models import PendingTrackingEvent
+
+    PendingTrackingEvent.objects.bulk_create([
+        PendingTrackingEvent(lms_user_id=lms_user_id, event_name=event_name, properties=properties)
+        for lms_user_id, event_name, properties in events
+    ])
+
 
+def send_pending_tracking_events(batch_size=TRACKING_EVENT_OUTBOX_BATCH_SIZE):
+    """
+    Send up to ``batch_size`` of the tracking events in the outbox of pending events that are due to be sent.
+
+    Events with an lms user id are sent to segment, and the rest are sent to braze, via an alias of
+    their assigned email, in batches of ``TRACK_LICENSE_CHANGES_BATCH_SIZE`` events of any name. Events that
+    fail to send are retried later with exponential backoff, and dropped after ``TRACKING_EVENT_MAX_ATTEMPTS``
+    attempts. Events claimed by a concurrent call are skipped.
+
+    The events are claimed in a short transaction that leases them for ``TRACKING_EVENT_CLAIM_LEASE_SECONDS``, so
+    that no row lock is held while they're sent, and the results are recorded in a second one. Events whose send
+    never finished are sent again once their lease is over.
+
+    Returns:
+        (int, int): The number of events sent, and the number that failed to send.
+    """
+    # pylint: disable=import-outside-toplevel
+    from license_manager.apps.subscriptions.models import PendingTrackingEvent
+
+    now = localized_utcnow()
+    with transaction.atomic():
+        events = list(
+            PendingTrackingEvent.objects.select_for_update(skip_locked=True).filter(
+                next_attempt_at__lte=now,
+            ).order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not events:
+            return 0, 0
+
+        if not (hasattr(settings, "SEGMENT_KEY") and settings.SEGMENT_KEY):
+            logger.warning('%s pending tracking events dropped because SEGMENT_KEY not set', len(events))
+            PendingTrackingEvent.objects.filter(id__in=[event.id for event in events]).delete()
+            return 0, 0
+
+        PendingTrackingEvent.objects.filter(id__in=[event.id for event in events]).update(
+            next_attempt_at=now + timedelta(seconds=TRACKING_EVENT_CLAIM_LEASE_SECONDS),
+        )
+
+    failed_events = []
+    alias_events = []
+    for event in events:
+        if event.lms_user_id:
+            try:
+                analytics.track(user_id=event.lms_user_id, event=event.event_name, properties=event.properties)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.exception(exc)
+                failed_events.append(event)
+        elif event.properties.get('assigned_email'):
+            alias_events.append(event)
+        else:
+            logger.warning(
+                "Event {} for License Manager not tracked without LMS User Id or email: {}".format(
+                    event.event_name, event.properties,
+                )
+            )
+
+    for alias_events_chunk in chunks(alias_events, TRACK_LICENSE_CHANGES_BATCH_SIZE):
+        try:
+            _track_events_via_braze_alias([
+                (event.properties['assigned_email'], event.event_name, event.properties)
+                for event in alias_events_chunk
+            ])
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception(exc)
+            failed_events.extend(alias_events_chunk)
+
+    events_to_retry = []
+    for event in failed_events:
+        event.num_attempts += 1
+        if event.num_attempts >= TRACKING_EVENT_MAX_ATTEMPTS:
+            logger.error(
+                'Dropping tracking event %s %s after %s failed attempts',
+                event.id, event.event_name, event.num_attempts,
+            )
+            continue
+        event.next_attempt_at = now + timedelta(
+            seconds=TRACKING_EVENT_RETRY_BACKOFF_SECONDS * 2 ** (event.num_attempts - 1),
+        )
+        events_to_retry.append(event)
+
+    retried_event_ids = {event.id for event in events_to_retry}
+    with transaction.atomic():
+        PendingTrackingEvent.objects.bulk_update(events_to_retry, ['num_attempts', 'next_attempt_at'])
+        PendingTrackingEvent.objects.filter(
+            id__in=[event.id for event in events if event.id not in retried_event_ids],
+        ).delete()
+
+    return len(events) - len(failed_events), len(failed_events)
+
+
+def _get_license_tracking_properties(license_obj, previous_license_uuid, expiration_processed):
+    """
+    Builds the properties of a license event from the license's own fields, the uuid of the license it was renewed
+    from (or an empty string) and whether its subscription plan's expiration has been processed.
     """
     assigned_date_formatted = ''
     if license_obj.assigned_date:
@@ -230,21 +355,38 @@ def get_license_tracking_properties(license_obj):
     if license_obj.activation_date:
         activation_date_formatted = _iso_8601_format_string(license_obj.activation_date)
 
-    renewed_from_formatted = ''
-    if license_obj.renewed_from:
-        renewed_from_formatted = str(license_obj.renewed_from.uuid)
-    license_data = {
+    return {
         "license_uuid": str(license_obj.uuid),
         "license_activation_key": str(license_obj.activation_key),
-        "previous_license_uuid": renewed_from_formatted,
+        "previous_license_uuid": previous_license_uuid,
         "assigned_date": assigned_date_formatted,
         "activation_date": activation_date_formatted,
         "assigned_lms_user_id": (license_obj.lms_user_id or ''),
         "assigned_email": (license_obj.user_email or ''),
-        "expiration_processed": license_obj.subscription_plan.expiration_processed,
+        "expiration_processed": expiration_processed,
         "auto_applied": (license_obj.auto_applied or False),
     }
 
+
+def get_license_tracking_properties(license_obj):
+    """ Uses a License object to build necessary license-related properties to send with a license event.
+        See See docs/segment_events.rst.
+
+    To build the properties of several licenses, use ``get_license_tracking_properties_by_uuid``.
+
+    Args:
+        license: License object to use for data population.
+
+    """
+    renewed_from_formatted = ''
+    if license_obj.renewed_from:
+        renewed_from_formatted = str(license_obj.renewed_from.uuid)
+    license_data = _get_license_tracking_properties(
+        license_obj,
+        renewed_from_formatted,
+        license_obj.subscription_plan.expiration_processed,
+    )
+
     if license_obj and license_obj.subscription_plan and license_obj.subscription_plan.customer_agreement:
         license_data.update(get_enterprise_tracking_properties(
             license_obj.subscription_plan.customer_agreement))
@@ -256,10 +398,70 @@ def get_license_tracking_properties(license_obj):
     return license_data
 
 
+def get_license_tracking_properties_by_uuid(licenses):
+    """
+    Builds the same properties as ``get_license_tracking_properties`` for each of the given licenses,
+    reading their subscription plans, customer agreements and the licenses they were renewed from
+    in a single query for the whole batch.
+
+    Licenses that no longer exist in the database (e.g. that were just deleted) fall back to
+    ``get_license_tracking_properties``.
+
+    Args:
+        licenses (list or QuerySet): The licenses to build properties for.
+
+    Returns:
+        dict: The properties of each license, keyed by the license's uuid.
+    """
+    # pylint: disable=import-outside-toplevel
+    from license_manager.apps.subscriptions.models import License
+
+    licenses = list(licenses)
+    if not licenses:
+        return {}
+
+    related_fields_by_uuid = {
+        row['uuid']: row
+        for row in License.objects.filter(uuid__in=[license_obj.uuid for license_obj in licenses]).values(
+            'uuid',
+            '_renewed_from__uuid',
+            'subscription_plan__expiration_processed',
+            'subscription_plan__customer_agreement__uuid',
+            'subscription_plan__customer_agreement__enterprise_customer_uuid',
+            'subscription_plan__customer_agreement__enterprise_customer_slug',
+            'subscription_plan__customer_agreement__enterprise_customer_name',
+        )
+    }
+
+    properties_by_uuid = {}
+    for license_obj in licenses:
+        related_fields = related_fields_by_uuid.get(license_obj.uuid)
+        if related_fields is None:
+            properties_by_uuid[license_obj.uuid] = get_license_tracking_properties(license_obj)
+            continue
+
+        renewed_from_uuid = related_fields['_renewed_from__uuid']
+        license_data = _get_license_tracking_properties(
+            license_obj,
+            str(renewed_from_uuid) if renewed_from_uuid else '',
+            related_fields['subscription_plan__expiration_processed'],
+        )
+        agreement_prefix = 'subscription_plan__customer_agreement__'
+        license_data.update({
+            'enterprise_customer_uuid': str(related_fields[f'{agreement_prefix}enterprise_customer_uuid']),
+            'customer_agreement_uuid': str(related_fields[f'{agreement_prefix}uuid']),
+            'enterprise_customer_slug': related_fields[f'{agreement_prefix}enterprise_customer_slug'],
+            'enterprise_customer_name': related_fields[f'{agreement_prefix}enterprise_customer_name'],
+        })
+        properties_by_uuid[license_obj.uuid] = license_data
+
+    return properties_by_uuid
+
+
 def track_license_changes(licenses, event_name, properties=None, is_batch_assignment=False):
     """
     Send tracking events for changes to a list of licenses, useful when bulk changes are made.
-    Prefetches related objects for licenses to prevent additional queries
+    Reads the licenses' related objects in a single query, see ``get_license_tracking_properties_by_uuid``.
 
     Args:
         licenses (list): List of licenses
@@ -274,18 +476,18 @@ def track_license_changes(licenses, event_name, properties=None, is_batch_assign
     over the normal `track_event()` call.
     """
     properties = properties or {}
-    # prefetch related objects used in get_license_tracking_properties
-    prefetch_related_objects(licenses, '_renewed_from', 'subscription_plan', 'subscription_plan__customer_agreement')
+    licenses = list(licenses)
+    tracking_properties_by_uuid = get_license_tracking_properties_by_uuid(licenses)
 
     if is_batch_assignment:
         properties_by_email = {
-            lcs.user_email: {**get_license_tracking_properties(lcs), **properties}
+            lcs.user_email: {**tracking_properties_by_uuid[lcs.uuid], **properties}
             for lcs in licenses
         }
         _track_batch_events_via_braze_alias(event_name, properties_by_email)
     else:
         for lcs in licenses:
-            event_properties = {**get_license_tracking_properties(lcs), **properties}
+            event_properties = {**tracking_properties_by_uuid[lcs.uuid], **properties}
             track_event(lcs.lms_user_id, event_name, event_properties)
 
 
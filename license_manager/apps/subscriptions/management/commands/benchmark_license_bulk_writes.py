@@ -0,0 +1,102 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from simple_history.utils import bulk_create_with_history
+
+from license_manager.apps.subscriptions.models import License, SubscriptionPlan
+from license_manager.apps.subscriptions.tasks import (
+    PROVISION_LICENSES_BATCH_SIZE,
+)
+from license_manager.apps.subscriptions.utils import batch_counts
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Rollback(Exception):
+    """
+    Raised to roll back everything a benchmark run wrote.
+    """
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks provisioning licenses, along with their history records, on a subscription plan the way '
+        'provision_licenses_task does, comparing adaptive bulk write batches against fixed ones. '
+        'Everything written is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--subscription-plan-uuid',
+            dest='subscription_plan_uuid',
+            help='The subscription plan to (temporarily) provision licenses on.',
+            required=True,
+        )
+        parser.add_argument(
+            '--num-licenses',
+            type=int,
+            dest='num_licenses',
+            help='The number of licenses to provision in each run.',
+            default=1000000,
+        )
+        parser.add_argument(
+            '--compare-provisioning-batch-size',
+            type=int,
+            dest='compare_provisioning_batch_size',
+            help='The number of licenses provisioned per batch in the fixed run.',
+            default=300,
+        )
+        parser.add_argument(
+            '--compare-batch-size',
+            type=int,
+            dest='compare_batch_size',
+            help='The number of rows written per statement in the fixed run.',
+            default=100,
+        )
+
+    def _run(self, subscription_plan, num_licenses, provisioning_batch_size, batch_size=None):
+        """
+        Provisions ``num_licenses`` licenses in batches of ``provisioning_batch_size``, writing ``batch_size``
+        rows per statement (or an adaptive number if None), then rolls them back.
+
+        Returns the number of statements issued and the elapsed seconds.
+        """
+        num_statements = 0
+
+        def count_statements(execute, sql, params, many, context):
+            nonlocal num_statements
+            num_statements += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_statements), transaction.atomic():
+                for batch_count in batch_counts(num_licenses, batch_size=provisioning_batch_size):
+                    licenses = [License(subscription_plan=subscription_plan) for _ in range(batch_count)]
+                    bulk_create_with_history(
+                        licenses,
+                        License,
+                        batch_size=batch_size or License.get_bulk_write_batch_size(licenses),
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+        return num_statements, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        subscription_plan = SubscriptionPlan.objects.get(uuid=options['subscription_plan_uuid'])
+        num_licenses = options['num_licenses']
+
+        runs = (
+            ('fixed', options['compare_provisioning_batch_size'], options['compare_batch_size']),
+            ('adaptive', PROVISION_LICENSES_BATCH_SIZE, None),
+        )
+        for label, provisioning_batch_size, batch_size in runs:
+            num_statements, elapsed = self._run(subscription_plan, num_licenses, provisioning_batch_size, batch_size)
+            logger.info(
+                'Provisioned %s licenses in %s batches of %s with %s statements in %.2fs (%.0f licenses/s).',
+                num_licenses, label, provisioning_batch_size, num_statements, elapsed, num_licenses / elapsed,
+            )
@@ -3,15 +3,15 @@ from datetime import datetime, timedelta
 
 from django.core.management.base import BaseCommand
 
-from license_manager.apps.api.tasks import license_expiration_task
+from license_manager.apps.api.tasks import expire_license_enrollment_batches
 from license_manager.apps.subscriptions.constants import (
-    ACTIVATED,
-    ASSIGNED,
     LICENSE_EXPIRATION_BATCH_SIZE,
 )
-from license_manager.apps.subscriptions.models import SubscriptionPlan
+from license_manager.apps.subscriptions.models import (
+    LicenseEnrollmentExpirationBatch,
+    SubscriptionPlan,
+)
 from license_manager.apps.subscriptions.utils import (
-    chunks,
     localized_datetime_from_datetime,
     localized_utcnow,
 )
@@ -24,8 +24,8 @@ DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
 
 class Command(BaseCommand):
     help = (
-        'Gets all subscriptions that have expired within a time range (default range is the last 24 hours) and sends an'
-        ' task to terminate the enrollments any licensed users have.'
+        'Gets all subscriptions that have expired within a time range (default range is the last 24 hours) and sends'
+        ' tasks to terminate the enrollments any licensed users have, in parallel batches of licenses.'
     )
 
     def add_arguments(self, parser):
@@ -70,46 +70,27 @@ class Command(BaseCommand):
             default=False,
         )
 
-    def _expire_subscription_plan(self, expired_subscription_plan):
+    def _get_unexpired_batch_ids(self, expired_subscription_plan):
         """
-        Expires a single subscription plan.
+        Records the license enrollment expiration batches of a single subscription plan, and returns
+        the ids of the ones whose course enrollments haven't been expired yet.
         """
-        expired_licenses = []
-
-        for lcs in expired_subscription_plan.licenses.iterator():
-            if lcs.status in [ASSIGNED, ACTIVATED]:
-                expired_licenses.append(lcs)
-
-        any_failures = False
-
-        # Terminate the licensed course enrollments
-        for license_chunk in chunks(expired_licenses, LICENSE_EXPIRATION_BATCH_SIZE):
-            try:
-                license_chunk_uuids = [str(lcs.uuid) for lcs in license_chunk]
-
-                # We might be running this command against a plan that expired further in the past to fix bad data. We don't
-                # want to modify a course enrollment if it's been modified after the plan expiration because a user might have upgraded
-                # the course.
-                ignore_enrollments_modified_after = expired_subscription_plan.expiration_date.isoformat() \
-                    if expired_subscription_plan.expiration_date < localized_utcnow() - timedelta(days=1) else None
-
-                license_expiration_task(
-                    license_chunk_uuids,
-                    ignore_enrollments_modified_after=ignore_enrollments_modified_after
-                )
-            except Exception:  # pylint: disable=broad-except
-                any_failures = True
-                msg = 'Failed to terminate course enrollments for learners in subscription: {}'.format(
-                    expired_subscription_plan.uuid)
-                logger.exception(msg)
-
-        if not any_failures:
+        if expired_subscription_plan.expiration_processed:
+            # The plan's expiration is being processed again, so start over from its first license
+            expired_subscription_plan.enrollment_expiration_batches.all().delete()
+        LicenseEnrollmentExpirationBatch.create_batches(expired_subscription_plan, LICENSE_EXPIRATION_BATCH_SIZE)
+
+        unexpired_batch_ids = list(expired_subscription_plan.enrollment_expiration_batches.filter(
+            completed_at__isnull=True,
+        ).order_by('first_license_uuid').values_list('id', flat=True))
+        if not unexpired_batch_ids:
             message = 'Terminated course enrollments for learners in subscription: {}'.format(
                 expired_subscription_plan.uuid)
             logger.info(message)
 
             expired_subscription_plan.expiration_processed = True
             expired_subscription_plan.save(update_fields=['expiration_processed'])
+        return unexpired_batch_ids
 
     def handle(self, *args, **options):
         expired_after_date = localized_datetime_from_datetime(
@@ -138,7 +119,7 @@ class Command(BaseCommand):
 
         expired_subscription_plans = SubscriptionPlan.objects.filter(
             **filters
-        ).select_related('customer_agreement').prefetch_related('licenses')
+        ).select_related('customer_agreement')
 
         if not expired_subscription_plans:
             if options['subscription_uuids']:
@@ -153,6 +134,7 @@ class Command(BaseCommand):
                 return
 
         if not options['dry_run']:
+            unexpired_batch_ids = []
             for expired_subscription_plan in expired_subscription_plans:
                 renewal_for_plan = expired_subscription_plan.get_renewal()
 
@@ -164,13 +146,17 @@ class Command(BaseCommand):
                     logger.info(msg)
                     continue
 
-                self._expire_subscription_plan(expired_subscription_plan)
+                unexpired_batch_ids += self._get_unexpired_batch_ids(expired_subscription_plan)
 
                 prior_renewals = expired_subscription_plan.prior_renewals
 
                 # revoke licensed course enrollments for all previous plans
                 for prior_renewal in prior_renewals:
-                    self._expire_subscription_plan(prior_renewal.prior_subscription_plan)
+                    unexpired_batch_ids += self._get_unexpired_batch_ids(prior_renewal.prior_subscription_plan)
+
+            # The batches of every plan are expired in parallel, and each plan's expiration is marked processed
+            # once all of its batches are completed
+            expire_license_enrollment_batches(unexpired_batch_ids)
         else:
             message = 'Dry-run result subscriptions that would be processed: {}'.format(
                 [str(sub.uuid) for sub in expired_subscription_plans])
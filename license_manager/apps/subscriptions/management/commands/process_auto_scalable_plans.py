@@ -1,10 +1,17 @@
+import json
 import logging
+import time
 
-from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
 from django.utils import timezone
 
-from license_manager.apps.subscriptions.models import CustomerAgreement
+from license_manager.apps.subscriptions.models import (
+    CustomerAgreement,
+    SubscriptionPlan,
+    SubscriptionPlanLicenseCounts,
+)
+from license_manager.apps.subscriptions.tasks import auto_scale_plan_task
 
 
 logger = logging.getLogger(__name__)
@@ -12,7 +19,7 @@ logger = logging.getLogger(__name__)
 
 class Command(BaseCommand):
     help = (
-        'Executes auto-scaling on any eligible subscription plans.'
+        'Executes auto-scaling on any eligible subscription plans, and writes a JSON report of the run to stdout.'
     )
 
     def add_arguments(self, parser):
@@ -24,57 +31,114 @@ class Command(BaseCommand):
             default=False
         )
 
+    def _get_auto_scaling_agreements(self, now):
+        """
+        Returns the agreements with auto-scaling enabled, with their current, active plans (most recent first)
+        and the plans' license counts read along with them.
+        """
+        current_plans = SubscriptionPlan.objects.filter(
+            is_active=True,
+            start_date__lte=now,
+            expiration_date__gte=now
+        ).select_related('license_counts').order_by('-start_date')
+        return CustomerAgreement.objects.filter(enable_auto_scaling_of_current_plan=True).prefetch_related(
+            Prefetch('subscriptions', queryset=current_plans, to_attr='current_plans'),
+        )
+
+    def _get_license_counts(self, plan):
+        """
+        Returns the (total, allocated) license counts of the given plan.
+        """
+        try:
+            counts = plan.license_counts
+        except SubscriptionPlanLicenseCounts.DoesNotExist:
+            counts = SubscriptionPlanLicenseCounts.for_plan(plan)
+        num_allocated_licenses = counts.num_activated + counts.num_assigned
+        return num_allocated_licenses + counts.num_unassigned, num_allocated_licenses
+
+    def _get_num_licenses_to_add(self, agreement, plan):
+        """
+        Decides whether the given current plan of the agreement needs to be auto-scaled.
+
+        Returns:
+            tuple: The plan's license count, and the number of licenses to add to it (0 if it shouldn't be scaled).
+        """
+        num_licenses, num_allocated_licenses = self._get_license_counts(plan)
+        if not num_licenses:
+            logger.info('Current plan %s has no licenses, will not auto-scale', plan)
+            return num_licenses, 0
+
+        # What percentage of unallocated licenses requires us to auto-scale?
+        min_unallocated_license_required_percentage = 100.0 - agreement.auto_scaling_threshold_percentage
+
+        # What percentage of licenses in the plan are unallocated?
+        unallocated_licenses = num_licenses - num_allocated_licenses
+        unallocated_license_percentage = (unallocated_licenses / num_licenses) * 100.0
+
+        if unallocated_license_percentage >= min_unallocated_license_required_percentage:
+            logger.info(
+                '%s does not require auto-scaling, unallocated license count is %s, '
+                'unallocated license percentage is %s, and min unallocated requirement is %s',
+                plan, unallocated_licenses,
+                unallocated_license_percentage, min_unallocated_license_required_percentage,
+            )
+            return num_licenses, 0
+
+        logger.info(
+            'Preparing to auto-scale %s, unallocated license count is %s, '
+            'unallocated percentage is %s, and min unallocated requirement is %s',
+            plan, unallocated_licenses,
+            unallocated_license_percentage, min_unallocated_license_required_percentage,
+        )
+        # We're not allowed to auto-apply beyond this hard limit.
+        difference_from_upper_limit = agreement.auto_scaling_max_licenses - num_licenses
+
+        factor_to_increment_by = agreement.auto_scaling_increment_percentage / 100.0
+        number_licenses_to_add = int(min(
+            num_licenses * factor_to_increment_by,
+            difference_from_upper_limit
+        ))
+        return num_licenses, max(number_licenses_to_add, 0)
+
     def handle(self, *args, **options):
+        started_at = time.perf_counter()
         now = timezone.now()
+        report = {
+            'dry_run': options['dry_run'],
+            'num_agreements_evaluated': 0,
+            'plans_scaled': [],
+            'num_licenses_added': 0,
+        }
 
-        for agreement in CustomerAgreement.objects.filter(enable_auto_scaling_of_current_plan=True):
+        for agreement in self._get_auto_scaling_agreements(now):
+            report['num_agreements_evaluated'] += 1
             logger.info('%s has auto-scaling enabled, checking if current plan needs auto-scaling executed', agreement)
-            plan = agreement.subscriptions.filter(
-                is_active=True,
-                start_date__lte=now,
-                expiration_date__gte=now
-            ).order_by('-start_date').first()
+            plan = agreement.current_plans[0] if agreement.current_plans else None
 
             if not plan:
                 logger.info('No current, active plan exists for %s', agreement)
                 continue
 
-            if not plan.num_licenses:
-                logger.info('Current plan %s has no licenses, will not auto-scale', plan)
+            num_licenses, number_licenses_to_add = self._get_num_licenses_to_add(agreement, plan)
+            if not number_licenses_to_add:
                 continue
 
-            # What percentage of unallocated licenses requires us to auto-scale?
-            min_unallocated_license_required_percentage = 100.0 - agreement.auto_scaling_threshold_percentage
-
-            # What percentage of licenses in the plan are unallocated?
-            unallocated_licenses = plan.num_licenses - plan.num_allocated_licenses
-            unallocated_license_percentage = (unallocated_licenses / plan.num_licenses) * 100.0
-
-            if unallocated_license_percentage < min_unallocated_license_required_percentage:
-                logger.info(
-                    'Preparing to auto-scale %s, unallocated license count is %s, '
-                    'unallocated percentage is %s, and min unallocated requirement is %s',
-                    plan, unallocated_licenses,
-                    unallocated_license_percentage, min_unallocated_license_required_percentage,
+            if not options['dry_run']:
+                # Each plan is scaled up by a task of its own, so the plans' licenses are provisioned in parallel
+                auto_scale_plan_task.delay(
+                    subscription_plan_uuid=str(plan.uuid),
+                    num_licenses=num_licenses,
+                    num_new_licenses=number_licenses_to_add,
                 )
-                # We're not allowed to auto-apply beyond this hard limit.
-                difference_from_upper_limit = agreement.auto_scaling_max_licenses - plan.num_licenses
-
-                factor_to_increment_by = agreement.auto_scaling_increment_percentage / 100.0
-                number_licenses_to_add = int(min(
-                    plan.num_licenses * factor_to_increment_by,
-                    difference_from_upper_limit
-                ))
-                if not options['dry_run']:
-                    logger.info('Auto-scaling %s by %s licenses', plan, number_licenses_to_add)
-                    plan.increase_num_licenses(number_licenses_to_add)
-                    logger.info('Auto-scaling completed for %s', plan)
-                else:
-                    logger.info('Dry run; would auto-scale %s by %s licenses', plan, number_licenses_to_add)
             else:
-                logger.info(
-                    '%s does not require auto-scaling, unallocated license count is %s, '
-                    'unallocated license percentage is %s, and min unallocated requirement is %s',
-                    plan, unallocated_licenses,
-                    unallocated_license_percentage, min_unallocated_license_required_percentage,
-                )
+                logger.info('Dry run; would auto-scale %s by %s licenses', plan, number_licenses_to_add)
+            report['plans_scaled'].append({
+                'subscription_plan_uuid': str(plan.uuid),
+                'num_licenses': num_licenses,
+                'num_licenses_added': number_licenses_to_add,
+            })
+            report['num_licenses_added'] += number_licenses_to_add
+
+        report['elapsed_seconds'] = round(time.perf_counter() - started_at, 3)
+        logger.info('Auto-scaling run report: %s', json.dumps(report))
+        self.stdout.write(json.dumps(report))
@@ -0,0 +1,67 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from license_manager.apps.subscriptions.models import (
+    SubscriptionPlan,
+    SubscriptionPlanLicenseCounts,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the denormalized per-status license counts of subscription plans from the license table, '
+        'repairing any counts that have drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--subscription-plan-uuids',
+            nargs='+',
+            dest='subscription_plan_uuids',
+            help='Only reconcile the license counts of these subscription plans.',
+            default=None,
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            dest='dry_run',
+            help='Report which subscription plans have drifted license counts without repairing them.',
+            default=False,
+        )
+
+    def handle(self, *args, **options):
+        plans = SubscriptionPlan.objects.all().order_by('uuid')
+        if options['subscription_plan_uuids']:
+            plans = plans.filter(uuid__in=options['subscription_plan_uuids'])
+
+        stored_counts_by_plan_uuid = {
+            counts.subscription_plan_id: counts.count_by_status()
+            for counts in SubscriptionPlanLicenseCounts.objects.filter(subscription_plan__in=plans)
+        }
+
+        num_drifted = 0
+        for plan in plans.iterator():
+            stored_count_by_status = stored_counts_by_plan_uuid.get(plan.uuid)
+            actual_count_by_status = SubscriptionPlanLicenseCounts.count_licenses_by_status(plan)
+            if stored_count_by_status == actual_count_by_status:
+                continue
+
+            num_drifted += 1
+            if options['dry_run']:
+                logger.info(
+                    'Dry run; would reconcile license counts of plan %s from %s to %s',
+                    plan.uuid, stored_count_by_status, actual_count_by_status,
+                )
+                continue
+
+            logger.info(
+                'Reconciling license counts of plan %s from %s to %s',
+                plan.uuid, stored_count_by_status, actual_count_by_status,
+            )
+            SubscriptionPlanLicenseCounts.reconcile(plan)
+
+        logger.info('Found %s subscription plans with drifted license counts.', num_drifted)
@@ -1,8 +1,8 @@
 import logging
 from datetime import timedelta
-from itertools import chain
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
 from license_manager.apps.subscriptions.constants import (
     ASSIGNED,
@@ -11,8 +11,8 @@ from license_manager.apps.subscriptions.constants import (
     SegmentEvents,
 )
 from license_manager.apps.subscriptions.event_utils import (
-    get_license_tracking_properties,
-    track_event,
+    enqueue_events,
+    get_license_tracking_properties_by_uuid,
 )
 from license_manager.apps.subscriptions.models import License
 from license_manager.apps.subscriptions.utils import localized_utcnow
@@ -38,24 +38,20 @@ class Command(BaseCommand):
         )
         expired_license_uuids = []
         # Scrub all pii on licenses whose subscription expired over 90 days ago, and mark the licenses as revoked
-        for expired_license in chain(*expired_licenses_for_retirement):
-            # record event data BEFORE we clear the license data:
-            event_properties = get_license_tracking_properties(expired_license)
-
-            expired_license.clear_pii()
-            expired_license.status = REVOKED
-            expired_license.revoked_date = localized_utcnow()
-            expired_license.save()
-
-            event_properties = get_license_tracking_properties(expired_license)
-            track_event(expired_license.lms_user_id,
+        for expired_licenses in expired_licenses_for_retirement:
+            with transaction.atomic():
+                License.bulk_retire_pii(expired_licenses, status=REVOKED, revoked_date=localized_utcnow())
+
+                tracking_properties_by_uuid = get_license_tracking_properties_by_uuid(expired_licenses)
+                enqueue_events(
+                    (
+                        expired_license.lms_user_id,
                         SegmentEvents.LICENSE_REVOKED,
-                        event_properties)
-
-            # Clear historical pii after removing pii from the license itself
-            expired_license.clear_historical_pii()
-            expired_license.delete_source()
-            expired_license_uuids.append(expired_license.uuid)
+                        tracking_properties_by_uuid[expired_license.uuid],
+                    )
+                    for expired_license in expired_licenses
+                )
+            expired_license_uuids.extend(expired_license.uuid for expired_license in expired_licenses)
 
         message = 'Retired {} expired licenses with uuids: {}'.format(len(expired_license_uuids), expired_license_uuids)
         logger.info(message)
@@ -69,13 +65,9 @@ class Command(BaseCommand):
         revoked_license_uuids = []
         # Scrub all pii on the revoked licenses, but they should stay revoked and keep their other info as we currently
         # add an unassigned license to the subscription's license pool whenever one is revoked.
-        for revoked_license in chain(*revoked_licenses_for_retirement):
-            revoked_license.clear_pii()
-            revoked_license.save()
-            # Clear historical pii after removing pii from the license itself
-            revoked_license.clear_historical_pii()
-            revoked_license.delete_source()
-            revoked_license_uuids.append(revoked_license.uuid)
+        for revoked_licenses in revoked_licenses_for_retirement:
+            License.bulk_retire_pii(revoked_licenses)
+            revoked_license_uuids.extend(revoked_license.uuid for revoked_license in revoked_licenses)
 
         message = 'Retired {} revoked licenses with uuids: {}'.format(len(revoked_license_uuids), revoked_license_uuids)
         logger.info(message)
@@ -91,13 +83,11 @@ class Command(BaseCommand):
         assigned_license_uuids = []
         # We place previously assigned licenses that are now retired back into the unassigned license pool, so we scrub
         # all data on them.
-        for assigned_license in chain(*assigned_licenses_for_retirement):
-            assigned_license.reset_to_unassigned()
-            assigned_license.save()
-            # Clear historical pii after removing pii from the license itself
-            assigned_license.clear_historical_pii()
-            assigned_license.delete_source()
-            assigned_license_uuids.append(assigned_license.uuid)
+        for assigned_licenses in assigned_licenses_for_retirement:
+            for assigned_license in assigned_licenses:
+                reset_field_values = assigned_license.reset_to_unassigned()
+            License.bulk_retire_pii(assigned_licenses, **reset_field_values)
+            assigned_license_uuids.extend(assigned_license.uuid for assigned_license in assigned_licenses)
 
         message = 'Retired {} assigned licenses that exceeded their inactivation duration with uuids: {}'.format(
             len(assigned_license_uuids),
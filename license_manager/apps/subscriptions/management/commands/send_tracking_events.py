@@ -0,0 +1,57 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from license_manager.apps.subscriptions.constants import (
+    TRACKING_EVENT_OUTBOX_BATCH_SIZE,
+)
+from license_manager.apps.subscriptions.event_utils import (
+    send_pending_tracking_events,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Sends the tracking events waiting in the outbox of pending events to Segment and Braze, in batches, '
+        'until no more events are due to be sent.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            dest='batch_size',
+            help='The number of events to send per batch.',
+            default=TRACKING_EVENT_OUTBOX_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            dest='max_batches',
+            help='Stop after sending this many batches, even if more events are due to be sent.',
+            default=None,
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        max_batches = options['max_batches']
+
+        num_batches = 0
+        total_sent = 0
+        total_failed = 0
+        while max_batches is None or num_batches < max_batches:
+            num_sent, num_failed = send_pending_tracking_events(batch_size=batch_size)
+            num_batches += 1
+            total_sent += num_sent
+            total_failed += num_failed
+            # Events that fail are held back for a while, so a short batch means no more are due
+            if num_sent + num_failed < batch_size:
+                break
+
+        logger.info(
+            'Sent %s tracking events in %s batches, %s failed to send.',
+            total_sent, num_batches, total_failed,
+        )
@@ -0,0 +1,28 @@
+from django.core.management import call_command
+from django.test import TestCase
+
+from license_manager.apps.subscriptions.models import License
+from license_manager.apps.subscriptions.tests.factories import (
+    SubscriptionPlanFactory,
+)
+
+
+class BenchmarkLicenseBulkWritesCommandTests(TestCase):
+    command_name = 'benchmark_license_bulk_writes'
+
+    def test_benchmark_rolls_back(self):
+        plan = SubscriptionPlanFactory()
+
+        with self.assertLogs(level='INFO') as log:
+            call_command(
+                self.command_name,
+                subscription_plan_uuid=str(plan.uuid),
+                num_licenses=25,
+                compare_provisioning_batch_size=10,
+                compare_batch_size=5,
+            )
+
+        assert 'Provisioned 25 licenses in fixed batches of 10' in log.output[0]
+        assert 'Provisioned 25 licenses in adaptive batches of' in log.output[1]
+        assert not License.objects.filter(subscription_plan=plan).exists()
+        assert not License.history.filter(subscription_plan=plan).exists()
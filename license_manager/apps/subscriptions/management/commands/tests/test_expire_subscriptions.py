@@ -6,6 +6,8 @@ import pytest
 from django.core.management import call_command
 from django.test import TestCase
 
+from license_manager.apps.api.tasks import expire_license_enrollment_batch_task
+from license_manager.apps.subscriptions import tasks as subscriptions_tasks
 from license_manager.apps.subscriptions.constants import (
     ACTIVATED,
     ASSIGNED,
@@ -25,6 +27,14 @@ from license_manager.apps.subscriptions.utils import (
 )
 
 
+def _expire_license_enrollment_batches_in_place(batch_ids):
+    """
+    Expires the given license enrollment expiration batches one after another, in place of queueing them.
+    """
+    for batch_id in batch_ids:
+        expire_license_enrollment_batch_task(batch_id)
+
+
 @pytest.mark.django_db
 class ExpireSubscriptionsCommandTests(TestCase):
     command_name = 'expire_subscriptions'
@@ -59,11 +69,22 @@ class ExpireSubscriptionsCommandTests(TestCase):
     def _get_allocated_license_uuids(self, subscription_plan):
         return [str(license.uuid) for license in subscription_plan.licenses.filter(status__in=[ASSIGNED, ACTIVATED])]
 
+    def setUp(self):
+        super().setUp()
+        # Expire the enrollment batches in place, as there is no broker in tests.
+        self.expire_batches_patcher = mock.patch(
+            'license_manager.apps.subscriptions.management.commands.expire_subscriptions.'
+            'expire_license_enrollment_batches',
+            side_effect=_expire_license_enrollment_batches_in_place,
+        )
+        self.mock_expire_batches = self.expire_batches_patcher.start()
+
     def tearDown(self):
         """
         Deletes all licenses and subscriptions after each test method is run.
         """
         super().tearDown()
+        self.expire_batches_patcher.stop()
         License.objects.all().delete()
         SubscriptionPlan.objects.all().delete()
 
@@ -77,9 +98,7 @@ class ExpireSubscriptionsCommandTests(TestCase):
             assert len(log.output) == 1
 
     @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
-    @mock.patch(
-        'license_manager.apps.subscriptions.management.commands.expire_subscriptions.license_expiration_task'
-    )
+    @mock.patch('license_manager.apps.api.tasks.license_expiration_task')
     def test_1_subscription_expiring_today(self, mock_license_expiration_task, mock_track_event):
         """
         When there is a subscription expiring verify only the assigned and activated licenses are sent to edx-enterprise
@@ -96,9 +115,7 @@ class ExpireSubscriptionsCommandTests(TestCase):
         self.assertTrue(expired_subscription.expiration_processed)
 
     @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
-    @mock.patch(
-        'license_manager.apps.subscriptions.management.commands.expire_subscriptions.license_expiration_task'
-    )
+    @mock.patch('license_manager.apps.api.tasks.license_expiration_task')
     def test_1_subscription_expiring_outside_date_range(self, mock_license_expiration_task, mock_track_event):
         """
         Verifies that only expired subscriptions within the expired range
@@ -123,9 +140,7 @@ class ExpireSubscriptionsCommandTests(TestCase):
         self.assertTrue(expired_subscription.expiration_processed)
 
     @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
-    @mock.patch(
-        'license_manager.apps.subscriptions.management.commands.expire_subscriptions.license_expiration_task'
-    )
+    @mock.patch('license_manager.apps.api.tasks.license_expiration_task')
     def test_subscriptions_expiring_within_range(self, mock_license_expiration_task, mock_track_event):
         """
         Verifies that all expired and unprocessed subscriptions within the expired range have their license uuids sent to edx-enterprise.
@@ -175,9 +190,7 @@ class ExpireSubscriptionsCommandTests(TestCase):
         self.assertTrue(expired_subscription_2.expiration_processed)
 
     @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
-    @mock.patch(
-        'license_manager.apps.subscriptions.management.commands.expire_subscriptions.license_expiration_task'
-    )
+    @mock.patch('license_manager.apps.api.tasks.license_expiration_task')
     def test_subscriptions_expiring_within_range_forced(self, mock_license_expiration_task, mock_track_event):
         """
         Verifies that all expired subscriptions within the expired range, including previously processed ones,
@@ -225,9 +238,7 @@ class ExpireSubscriptionsCommandTests(TestCase):
         self.assertTrue(expired_subscription_2.expiration_processed)
 
     @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
-    @mock.patch(
-        'license_manager.apps.subscriptions.management.commands.expire_subscriptions.license_expiration_task'
-    )
+    @mock.patch('license_manager.apps.api.tasks.license_expiration_task')
     def test_subscriptions_expiring_with_uuids(self, mock_license_expiration_task, mock_track_event):
         """
         Verifies that expired subscriptions with the given uuids, including previously processed ones,
@@ -267,9 +278,7 @@ class ExpireSubscriptionsCommandTests(TestCase):
         self.assertFalse(expired_subscription_2.expiration_processed)
 
     @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
-    @mock.patch(
-        'license_manager.apps.subscriptions.management.commands.expire_subscriptions.license_expiration_task'
-    )
+    @mock.patch('license_manager.apps.api.tasks.license_expiration_task')
     def test_expiring_10k_licenses_batched(self, mock_license_expiration_task, mock_track_event):
         """
         Verifies that all expired subscriptions within the expired range have their license uuids sent to edx-enterprise
@@ -288,9 +297,7 @@ class ExpireSubscriptionsCommandTests(TestCase):
         assert expected_call_count == mock_license_expiration_task.call_count
 
     @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
-    @mock.patch(
-        'license_manager.apps.subscriptions.management.commands.expire_subscriptions.license_expiration_task'
-    )
+    @mock.patch('license_manager.apps.api.tasks.license_expiration_task')
     def test_license_expiration_error(self, mock_license_expiration_task, mock_track_event):
         """
         Verifies that expiration_processed is not set to True and license expiration events are not tracked
@@ -307,21 +314,56 @@ class ExpireSubscriptionsCommandTests(TestCase):
         assert expired_subscription.expiration_processed is False
 
     @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
+    @mock.patch('license_manager.apps.api.tasks.license_expiration_task')
+    def test_failed_batches_retried(self, mock_license_expiration_task, mock_track_event):
+        """
+        Verifies that running the command again only expires the enrollments of the batches that failed,
+        and that the plan's expiration is processed once all of its batches are completed.
+        """
+        expired_subscription = self._create_expired_plan_with_licenses(activated_licenses_count=150)
+        mock_license_expiration_task.side_effect = [None, Exception('something terrible went wrong')]
+
+        call_command(self.command_name)
+
+        expired_subscription.refresh_from_db()
+        assert expired_subscription.expiration_processed is False
+        failed_batch = expired_subscription.enrollment_expiration_batches.get(completed_at__isnull=True)
+        failed_license_uuids = mock_license_expiration_task.call_args.args[0]
+
+        mock_license_expiration_task.reset_mock(side_effect=True)
+        self.mock_expire_batches.reset_mock()
+        call_command(self.command_name)
+
+        self.mock_expire_batches.assert_called_once_with([failed_batch.id])
+        mock_license_expiration_task.assert_called_once()
+        assert mock_license_expiration_task.call_args.args[0] == failed_license_uuids
+        failed_batch.refresh_from_db()
+        assert failed_batch.completed_at is not None
+        expired_subscription.refresh_from_db()
+        assert expired_subscription.expiration_processed is True
+
+    @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
+    @mock.patch('license_manager.apps.api.tasks.license_expiration_task')
+    @mock.patch(
+        'license_manager.apps.subscriptions.tasks.track_license_expiration_batch_task.delay',
+        side_effect=subscriptions_tasks.track_license_expiration_batch_task,
+    )
     @mock.patch(
-        'license_manager.apps.subscriptions.management.commands.expire_subscriptions.license_expiration_task'
+        'license_manager.apps.subscriptions.tasks.track_license_expirations_task.delay',
+        side_effect=subscriptions_tasks.track_license_expirations_task,
     )
-    def test_license_expiration_tracked(self, _, mock_track_event):
+    def test_license_expiration_tracked(self, mock_track_license_expirations_task, _, __, mock_track_event):
         """
         Verifies that license expiration events are tracked
         """
         expired_subscription = self._create_expired_plan_with_licenses()
-        call_command(self.command_name)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(self.command_name)
+        mock_track_license_expirations_task.assert_called_once_with(str(expired_subscription.uuid))
         assert mock_track_event.call_count == expired_subscription.licenses.count()
 
     @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
-    @mock.patch(
-        'license_manager.apps.subscriptions.management.commands.expire_subscriptions.license_expiration_task'
-    )
+    @mock.patch('license_manager.apps.api.tasks.license_expiration_task')
     def test_subscription_with_renewal_not_processed(self, mock_license_expiration_task, mock_track_event):
         """
         Verifies that a subscription plan's expiration will not be processed if it has a renewal.
@@ -336,9 +378,7 @@ class ExpireSubscriptionsCommandTests(TestCase):
         assert expired_subscription.expiration_processed is False
 
     @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
-    @mock.patch(
-        'license_manager.apps.subscriptions.management.commands.expire_subscriptions.license_expiration_task'
-    )
+    @mock.patch('license_manager.apps.api.tasks.license_expiration_task')
     def test_prior_plans_in_renewal_chain_processed(self, mock_license_expiration_task, mock_track_event):
         """
         Verifies that previous subscriptions in a chain of renewals will also be processed when the last plan expires.
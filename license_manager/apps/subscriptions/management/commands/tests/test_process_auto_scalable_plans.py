@@ -1,4 +1,6 @@
+import json
 from datetime import timedelta
+from io import StringIO
 from unittest import mock
 
 import ddt
@@ -8,6 +10,7 @@ from django.utils import timezone
 
 from license_manager.apps.subscriptions import constants
 from license_manager.apps.subscriptions.models import License, SubscriptionPlan
+from license_manager.apps.subscriptions.tasks import auto_scale_plan_task
 from license_manager.apps.subscriptions.tests.factories import (
     CustomerAgreementFactory,
     LicenseFactory,
@@ -25,6 +28,7 @@ class ProcessAutoScalingCommandTests(TestCase):
         Deletes all renewals, licenses, and subscription after each test method is run.
         """
         super().tearDown()
+        self.auto_scale_task_patcher.stop()
         License.objects.all().delete()
         SubscriptionPlan.objects.all().delete()
 
@@ -51,6 +55,13 @@ class ProcessAutoScalingCommandTests(TestCase):
             is_active=True,
         )
 
+        # Run each plan's auto-scaling task in place, as there is no broker in tests.
+        self.auto_scale_task_patcher = mock.patch(
+            'license_manager.apps.subscriptions.tasks.auto_scale_plan_task.delay',
+            side_effect=auto_scale_plan_task,
+        )
+        self.mock_auto_scale_task = self.auto_scale_task_patcher.start()
+
     @ddt.data(False, True)
     def test_auto_scale_happy_path(self, is_dry_run):
         """
@@ -93,6 +104,15 @@ class ProcessAutoScalingCommandTests(TestCase):
             # The older plan should not have had licenses added to it.
             self.assertEqual(10, self.older_plan.num_licenses)
 
+        if is_dry_run:
+            self.mock_auto_scale_task.assert_not_called()
+        else:
+            self.mock_auto_scale_task.assert_called_once_with(
+                subscription_plan_uuid=str(self.plan.uuid),
+                num_licenses=10,
+                num_new_licenses=5,
+            )
+
     def test_auto_scale_hard_cap(self):
         """
         Tests that auto-scaling is actually executed for an agreement's most recent active plan,
@@ -140,3 +160,34 @@ class ProcessAutoScalingCommandTests(TestCase):
         call_command(self.command_name)
 
         self.assertEqual(0, self.plan.num_licenses)
+
+    def test_run_report(self):
+        """
+        The command writes a machine-readable report of the plans it scaled to stdout.
+        """
+        LicenseFactory.create_batch(2, subscription_plan=self.plan, status=constants.UNASSIGNED)
+        LicenseFactory.create_batch(8, subscription_plan=self.plan, status=constants.ACTIVATED)
+        out = StringIO()
+
+        call_command(self.command_name, stdout=out)
+
+        report = json.loads(out.getvalue())
+        assert report['dry_run'] is False
+        assert report['num_agreements_evaluated'] == 1
+        assert report['plans_scaled'] == [{
+            'subscription_plan_uuid': str(self.plan.uuid),
+            'num_licenses': 10,
+            'num_licenses_added': 5,
+        }]
+        assert report['num_licenses_added'] == 5
+        assert report['elapsed_seconds'] >= 0
+
+    def test_stale_evaluation_not_scaled_again(self):
+        """
+        A plan whose license count changed since it was evaluated is not auto-scaled by the task.
+        """
+        LicenseFactory.create_batch(10, subscription_plan=self.plan, status=constants.ASSIGNED)
+
+        auto_scale_plan_task(subscription_plan_uuid=str(self.plan.uuid), num_licenses=5, num_new_licenses=5)
+
+        self.assertEqual(10, self.plan.num_licenses)
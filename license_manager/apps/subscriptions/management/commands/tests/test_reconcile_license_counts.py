@@ -0,0 +1,55 @@
+from django.core.management import call_command
+from django.test import TestCase
+
+from license_manager.apps.subscriptions.constants import (
+    ACTIVATED,
+    ASSIGNED,
+    REVOKED,
+    UNASSIGNED,
+)
+from license_manager.apps.subscriptions.models import (
+    SubscriptionPlanLicenseCounts,
+)
+from license_manager.apps.subscriptions.tests.factories import (
+    LicenseFactory,
+    SubscriptionPlanFactory,
+)
+
+
+class ReconcileLicenseCountsCommandTests(TestCase):
+    command_name = 'reconcile_license_counts'
+
+    def setUp(self):
+        super().setUp()
+        self.plan = SubscriptionPlanFactory()
+        LicenseFactory.create_batch(3, subscription_plan=self.plan)
+        LicenseFactory.create_batch(2, subscription_plan=self.plan, status=ACTIVATED)
+        # Simulate drift from a write that bypassed the ORM
+        SubscriptionPlanLicenseCounts.objects.filter(subscription_plan=self.plan).update(
+            num_unassigned=10,
+            num_activated=0,
+        )
+
+    def _stored_counts(self):
+        return SubscriptionPlanLicenseCounts.objects.get(subscription_plan=self.plan).count_by_status()
+
+    def test_reconcile(self):
+        with self.assertLogs(level='INFO') as log:
+            call_command(self.command_name)
+
+        assert self._stored_counts() == {ACTIVATED: 2, ASSIGNED: 0, UNASSIGNED: 3, REVOKED: 0}
+        assert any('Reconciling license counts of plan' in message for message in log.output)
+        assert 'Found 1 subscription plans with drifted license counts.' in log.output[-1]
+
+    def test_reconcile_dry_run(self):
+        with self.assertLogs(level='INFO') as log:
+            call_command(self.command_name, '--dry-run')
+
+        assert self._stored_counts() == {ACTIVATED: 0, ASSIGNED: 0, UNASSIGNED: 10, REVOKED: 0}
+        assert any('Dry run; would reconcile' in message for message in log.output)
+
+    def test_reconcile_only_given_plans(self):
+        other_plan = SubscriptionPlanFactory()
+        call_command(self.command_name, '--subscription-plan-uuids', str(other_plan.uuid))
+
+        assert self._stored_counts() == {ACTIVATED: 0, ASSIGNED: 0, UNASSIGNED: 10, REVOKED: 0}
@@ -0,0 +1,28 @@
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class SendTrackingEventsCommandTests(TestCase):
+    command_name = 'send_tracking_events'
+
+    @mock.patch(
+        'license_manager.apps.subscriptions.management.commands.send_tracking_events.send_pending_tracking_events',
+        side_effect=[(2, 0), (1, 1), (0, 0)],
+    )
+    def test_sends_batches_until_short_batch(self, mock_send_pending_tracking_events):
+        with self.assertLogs(level='INFO') as log:
+            call_command(self.command_name, batch_size=2)
+
+        assert mock_send_pending_tracking_events.call_count == 3
+        assert 'Sent 3 tracking events in 3 batches, 1 failed to send.' in log.output[-1]
+
+    @mock.patch(
+        'license_manager.apps.subscriptions.management.commands.send_tracking_events.send_pending_tracking_events',
+        return_value=(2, 0),
+    )
+    def test_max_batches(self, mock_send_pending_tracking_events):
+        call_command(self.command_name, batch_size=2, max_batches=2)
+
+        assert mock_send_pending_tracking_events.call_count == 2
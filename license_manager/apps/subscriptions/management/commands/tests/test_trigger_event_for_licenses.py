@@ -5,10 +5,13 @@ from unittest.mock import call
 import pytest
 from django.conf import settings
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-from license_manager.apps.subscriptions import constants
-from license_manager.apps.subscriptions.models import LicenseEvent
+from license_manager.apps.subscriptions import constants, tasks
+from license_manager.apps.subscriptions.models import (
+    LicenseEvent,
+    PendingTrackingEvent,
+)
 from license_manager.apps.subscriptions.tests.factories import (
     CustomerAgreementFactory,
     LicenseFactory,
@@ -64,34 +67,38 @@ class TriggerLicenseEventTests(TestCase):
         self.subscription_plan_1 = subscription_plan_1
         self.subscription_plan_2 = subscription_plan_2
 
-    @mock.patch('license_manager.apps.subscriptions.management.commands.trigger_event_for_licenses.track_event')
-    def test_dry_run(self, mock_track_event):
+        # Run each per-enterprise task in place, as there is no broker in tests.
+        self.task_delay_patcher = mock.patch(
+            'license_manager.apps.subscriptions.tasks.trigger_license_activated_180_days_ago_events_task.delay',
+            side_effect=tasks.trigger_license_activated_180_days_ago_events_task,
+        )
+        self.mock_task_delay = self.task_delay_patcher.start()
+
+    def tearDown(self):
+        super().tearDown()
+        self.task_delay_patcher.stop()
+
+    def _get_triggered_events(self):
+        return PendingTrackingEvent.objects.filter(event_name=constants.SegmentEvents.LICENSE_ACTIVATED_180_DAYS_AGO)
+
+    def test_dry_run(self):
         """
         Tests that no events were triggered in dry run.
         """
         call_command(self.command_name, '--dry-run')
-        assert mock_track_event.call_count == 0
+        assert not self._get_triggered_events().exists()
+        assert not LicenseEvent.objects.exists()
 
-    @mock.patch('license_manager.apps.subscriptions.management.commands.trigger_event_for_licenses.track_event')
-    def test_trigger_events(self, mock_track_event):
+    def test_trigger_events(self):
         """
         Tests that correct segment events were triggered.
         """
         call_command(self.command_name)
-        assert mock_track_event.call_count == 2
-        expected_calls = [
-            call(
-                self.activated_license_1.lms_user_id,
-                'edx.server.license-manager.license.activated.180.days.ago',
-                {'user_email': self.activated_license_1.user_email}
-            ),
-            call(
-                self.activated_license_3.lms_user_id,
-                'edx.server.license-manager.license.activated.180.days.ago',
-                {'user_email': self.activated_license_3.user_email}
-            ),
+        triggered_events = self._get_triggered_events()
+        assert sorted((event.lms_user_id, event.properties) for event in triggered_events) == [
+            (self.activated_license_1.lms_user_id, {'user_email': self.activated_license_1.user_email}),
+            (self.activated_license_3.lms_user_id, {'user_email': self.activated_license_3.user_email}),
         ]
-        mock_track_event.assert_has_calls(expected_calls, any_order=True)
         sent_events = LicenseEvent.objects.all()
         assert sent_events.count() == 2
         license_uuids = []
@@ -102,7 +109,18 @@ class TriggerLicenseEventTests(TestCase):
 
         assert sorted(license_uuids) == sorted([self.activated_license_1.uuid, self.activated_license_3.uuid])
 
-        mock_track_event.reset_mock()
         # call the command again to ensure that the same events are not triggered again
         call_command(self.command_name)
-        assert mock_track_event.call_count == 0
+        assert triggered_events.count() == 2
+
+    @mock.patch('license_manager.apps.subscriptions.tasks.trigger_license_activated_180_days_ago_events_task.delay')
+    def test_enterprises_processed_in_tasks(self, mock_task_delay):
+        """
+        Tests that each enterprise's licenses are processed by a task of its own.
+        """
+        with override_settings(CUSTOMERS_WITH_CUSTOM_LICENSE_EVENTS=['enterprise-1', 'enterprise-2']):
+            call_command(self.command_name)
+        mock_task_delay.assert_has_calls([
+            call('enterprise-1', '[SEND_LICENSE_ASSIGNED_180_DAYS_AGO_SEGMENT_EVENTS]', True),
+            call('enterprise-2', '[SEND_LICENSE_ASSIGNED_180_DAYS_AGO_SEGMENT_EVENTS]', True),
+        ])
@@ -6,6 +6,7 @@ from django.core.management import call_command
 from django.test import TestCase
 from django.test.utils import override_settings
 
+from license_manager.apps.subscriptions import tasks
 from license_manager.apps.subscriptions.constants import (
     ACTIVATED,
     ASSIGNED,
@@ -28,6 +29,19 @@ class UnlinkExpiredLicensesCommandTests(TestCase):
     today = localized_utcnow()
     customer_uuid = '76b933cb-bf2a-4c1e-bf44-4e8a58cc37ae'
 
+    def setUp(self):
+        super().setUp()
+        # Run each per-enterprise task in place, as there is no broker in tests.
+        self.task_delay_patcher = mock.patch(
+            'license_manager.apps.subscriptions.tasks.unlink_expired_licenses_task.delay',
+            side_effect=tasks.unlink_expired_licenses_task,
+        )
+        self.mock_task_delay = self.task_delay_patcher.start()
+
+    def tearDown(self):
+        super().tearDown()
+        self.task_delay_patcher.stop()
+
     def _create_expired_plan_with_licenses(
         self,
         unassigned_licenses_count=1,
@@ -62,10 +76,7 @@ class UnlinkExpiredLicensesCommandTests(TestCase):
     @override_settings(
         CUSTOMERS_WITH_EXPIRED_LICENSES_UNLINKING_ENABLED=['76b933cb-bf2a-4c1e-bf44-4e8a58cc37ae']
     )
-    @mock.patch(
-        'license_manager.apps.subscriptions.management.commands.unlink_expired_licenses.EnterpriseApiClient',
-        return_value=mock.MagicMock()
-    )
+    @mock.patch('license_manager.apps.subscriptions.tasks.EnterpriseApiClient', return_value=mock.MagicMock())
     def test_expired_licenses_unlinking(self, mock_enterprise_client):
         """
         Verify that expired licenses unlinking working as expected.
@@ -99,10 +110,7 @@ class UnlinkExpiredLicensesCommandTests(TestCase):
     @override_settings(
         CUSTOMERS_WITH_EXPIRED_LICENSES_UNLINKING_ENABLED=['76b933cb-bf2a-4c1e-bf44-4e8a58cc37ae']
     )
-    @mock.patch(
-        'license_manager.apps.subscriptions.management.commands.unlink_expired_licenses.EnterpriseApiClient',
-        return_value=mock.MagicMock()
-    )
+    @mock.patch('license_manager.apps.subscriptions.tasks.EnterpriseApiClient', return_value=mock.MagicMock())
     def test_expired_licenses_other_active_licenses(self, mock_enterprise_client):
         """
         Verify that no unlinking happens when all expired licenses has other active licenses.
@@ -138,3 +146,23 @@ class UnlinkExpiredLicensesCommandTests(TestCase):
 
         # verify that no calls have been made to the unlink_users endpoint.
         assert mock_enterprise_client().bulk_unlink_enterprise_users.call_count == 0
+
+    @override_settings(
+        CUSTOMERS_WITH_EXPIRED_LICENSES_UNLINKING_ENABLED=['76b933cb-bf2a-4c1e-bf44-4e8a58cc37ae']
+    )
+    @mock.patch('license_manager.apps.subscriptions.tasks.EnterpriseApiClient', return_value=mock.MagicMock())
+    def test_expired_licenses_unlinked_once(self, mock_enterprise_client):
+        """
+        Verify that running the command again doesn't unlink the learners of the same licenses again.
+        """
+        today = localized_utcnow()
+        self._create_expired_plan_with_licenses(
+            start_date=today - timedelta(days=150),
+            expiration_date=today - timedelta(days=90)
+        )
+
+        call_command(self.command_name)
+        call_command(self.command_name)
+
+        assert mock_enterprise_client().bulk_unlink_enterprise_users.call_count == 1
+        assert LicenseEvent.objects.count() == 5
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.14 on 2026-10-16 20:26
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0078_alter_subscriptionplanrenewal_salesforce_opportunity_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubscriptionPlanLicenseCounts',
+            fields=[
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('subscription_plan', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='license_counts', serialize=False, to='subscriptions.subscriptionplan')),
+                ('num_activated', models.IntegerField(default=0)),
+                ('num_assigned', models.IntegerField(default=0)),
+                ('num_unassigned', models.IntegerField(default=0)),
+                ('num_revoked', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Subscription Plan License Counts',
+                'verbose_name_plural': 'Subscription Plan License Counts',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='license',
+            options={'base_manager_name': 'objects'},
+        ),
+    ]
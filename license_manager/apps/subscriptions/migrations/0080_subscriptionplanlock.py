@@ -0,0 +1,31 @@
+# Generated by Django 5.2.14 on 2026-10-16 20:53
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0079_subscriptionplanlicensecounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubscriptionPlanLock',
+            fields=[
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('holder', models.CharField(help_text="Identifies who holds the lock, e.g. the celery task id or the web worker's host and process.", max_length=255)),
+                ('expires_at', models.DateTimeField(help_text="When the holder's lease on the lock runs out, after which anyone may take the lock over.")),
+                ('subscription_plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='locks', to='subscriptions.subscriptionplan')),
+            ],
+            options={
+                'verbose_name': 'Subscription Plan Lock',
+                'verbose_name_plural': 'Subscription Plan Locks',
+            },
+        ),
+    ]
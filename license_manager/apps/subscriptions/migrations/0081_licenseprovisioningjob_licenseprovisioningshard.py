@@ -0,0 +1,51 @@
+# Generated by Django 5.2.14 on 2026-10-16 21:20
+
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0080_subscriptionplanlock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LicenseProvisioningJob',
+            fields=[
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('num_licenses', models.PositiveIntegerField(help_text='The number of licenses the job provisions.')),
+                ('num_licenses_provisioned', models.PositiveIntegerField(default=0, help_text='The number of licenses the job has provisioned so far.')),
+                ('completed_at', models.DateTimeField(blank=True, help_text='The time at which every license of the job was provisioned.', null=True)),
+                ('subscription_plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='provisioning_jobs', to='subscriptions.subscriptionplan')),
+            ],
+            options={
+                'verbose_name': 'License Provisioning Job',
+                'verbose_name_plural': 'License Provisioning Jobs',
+            },
+        ),
+        migrations.CreateModel(
+            name='LicenseProvisioningShard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('index', models.PositiveIntegerField()),
+                ('num_licenses', models.PositiveIntegerField(help_text='The number of licenses the shard provisions.')),
+                ('num_licenses_provisioned', models.PositiveIntegerField(default=0, help_text='The number of licenses the shard has provisioned so far.')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='subscriptions.licenseprovisioningjob')),
+            ],
+            options={
+                'verbose_name': 'License Provisioning Shard',
+                'verbose_name_plural': 'License Provisioning Shards',
+                'unique_together': {('job', 'index')},
+            },
+        ),
+    ]
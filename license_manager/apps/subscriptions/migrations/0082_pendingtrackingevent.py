@@ -0,0 +1,33 @@
+# Generated by Django 5.2.14 on 2026-10-16 21:40
+
+import django.core.serializers.json
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0081_licenseprovisioningjob_licenseprovisioningshard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingTrackingEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('lms_user_id', models.IntegerField(blank=True, null=True)),
+                ('event_name', models.CharField(max_length=255)),
+                ('properties', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('num_attempts', models.PositiveSmallIntegerField(default=0, help_text='The number of times sending the event has failed.')),
+                ('next_attempt_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text="The event is not sent before this time, to back off from retrying failed events.")),
+            ],
+            options={
+                'verbose_name': 'Pending Tracking Event',
+                'verbose_name_plural': 'Pending Tracking Events',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.14 on 2026-10-16 22:05
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0082_pendingtrackingevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LicenseExpirationEventBatch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('first_license_uuid', models.UUIDField()),
+                ('last_license_uuid', models.UUIDField()),
+                ('sent_at', models.DateTimeField(blank=True, help_text="The time at which the expiration events of the batch's licenses were sent.", null=True)),
+                ('subscription_plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expiration_event_batches', to='subscriptions.subscriptionplan')),
+            ],
+            options={
+                'verbose_name': 'License Expiration Event Batch',
+                'verbose_name_plural': 'License Expiration Event Batches',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.14 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0084_licenseenrollmentexpirationbatch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='licenseevent',
+            index=models.Index(fields=['license', 'event_name'], name='license_event_name_idx'),
+        ),
+    ]
@@ -1,21 +1,24 @@
 """
 Models for the subscriptions app.
 """
+import os
+import socket
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 from logging import getLogger
 from math import ceil, inf
 from uuid import uuid4
 
 from django.conf import settings
-from django.core.cache import cache
 from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import (
     MaxValueValidator,
     MinLengthValidator,
     MinValueValidator,
 )
-from django.db import models, transaction
-from django.db.models import Q
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.forms import ValidationError
@@ -31,13 +34,9 @@ from simple_history.utils import (
     bulk_update_with_history,
 )
 
-from license_manager.apps.api_client.enterprise_catalog import (
-    EnterpriseCatalogApiClient,
-)
 from license_manager.apps.subscriptions.constants import (
     ACTIVATED,
     ASSIGNED,
-    LICENSE_BULK_OPERATION_BATCH_SIZE,
     LICENSE_STATUS_CHOICES,
     LICENSE_UTILIZATION_THRESHOLDS,
     REVOKED,
@@ -48,15 +47,21 @@ from license_manager.apps.subscriptions.constants import (
     SegmentEvents,
 )
 from license_manager.apps.subscriptions.event_utils import (
+    enqueue_event,
     get_license_tracking_properties,
     track_event,
     track_license_changes,
 )
 from license_manager.apps.subscriptions.sanitize import sanitize_html
 from license_manager.apps.subscriptions.utils import (
+    BULK_UPDATE_MAX_BATCH_SIZE,
+    catalog_contains_any_content,
     days_until,
+    estimate_row_bytes,
+    get_bulk_write_batch_size,
     get_license_activation_link,
     hours_until,
+    keyset_batches,
     localized_utcnow,
     provision_licenses,
 )
@@ -70,9 +75,8 @@ from .utils import chunks
 
 logger = getLogger(__name__)
 
-CONTAINS_CONTENT_CACHE_TIMEOUT = 60 * 60
-
-_CACHE_MISS = object()
+# Rough number of bytes a history record's own fields (id, date, type, user and change reason) add to its row
+HISTORY_ROW_OVERHEAD_BYTES = 128
 
 
 class CustomerAgreement(TimeStampedModel):
@@ -813,7 +817,8 @@ class SubscriptionPlan(TimeStampedModel):
         Returns:
             int
         """
-        return self.licenses.exclude(status=REVOKED).count()
+        counts = SubscriptionPlanLicenseCounts.for_plan(self)
+        return counts.num_activated + counts.num_assigned + counts.num_unassigned
 
     @property
     def num_allocated_licenses(self):
@@ -827,7 +832,8 @@ class SubscriptionPlan(TimeStampedModel):
         int: The count of how many licenses that are associated with the subscription plan are
             already allocated.
         """
-        return self.licenses.filter(status__in=(ACTIVATED, ASSIGNED)).count()
+        counts = SubscriptionPlanLicenseCounts.for_plan(self)
+        return counts.num_activated + counts.num_assigned
 
     @property
     def prior_renewals(self):
@@ -904,13 +910,15 @@ class SubscriptionPlan(TimeStampedModel):
         If no thresholds have been reached, return None.
         """
 
-        num_licenses = self.num_licenses
+        counts = SubscriptionPlanLicenseCounts.for_plan(self)
+        num_allocated_licenses = counts.num_activated + counts.num_assigned
+        num_licenses = num_allocated_licenses + counts.num_unassigned
 
         if num_licenses == 0:
             return None
 
         thresholds = LICENSE_UTILIZATION_THRESHOLDS
-        current_utilization = self.num_allocated_licenses / num_licenses
+        current_utilization = num_allocated_licenses / num_licenses
 
         for threshold in thresholds:
             if current_utilization >= threshold:
@@ -954,16 +962,7 @@ class SubscriptionPlan(TimeStampedModel):
         and valued by a count of the licenses with that status
         in this plan.
         """
-        count_by_status = {status_choice[0]: 0 for status_choice in LICENSE_STATUS_CHOICES}
-
-        queryset = self.licenses.all().values('status').annotate(
-            count=models.Count('status'),
-        ).order_by('status')
-
-        for item in queryset:
-            count_by_status[item['status']] = item['count']
-
-        return count_by_status
+        return SubscriptionPlanLicenseCounts.for_plan(self).count_by_status()
 
     def get_renewal(self):
         """
@@ -983,11 +982,17 @@ class SubscriptionPlan(TimeStampedModel):
         except SubscriptionPlanRenewal.DoesNotExist:
             return None
 
-    def increase_num_licenses(self, num_new_licenses):
+    def increase_num_licenses(self, num_new_licenses, count_licenses=True):
         """
         Method to increase the number of licenses associated with an instance of SubscriptionPlan by num_new_licenses.
+
+        Unless ``count_licenses`` is True, the new licenses aren't added to the plan's license counts,
+        which is then left to the caller.
         """
         new_licenses = [License(subscription_plan=self) for _ in range(num_new_licenses)]
+        if not count_licenses:
+            for new_license in new_licenses:
+                new_license._snapshot_count_key()  # pylint: disable=protected-access
         License.bulk_create(new_licenses)
 
     def provision_licenses(self):
@@ -1009,21 +1014,7 @@ class SubscriptionPlan(TimeStampedModel):
         Returns:
             bool: Whether the given content_ids are part of the subscription.
         """
-        cache_key = self.get_contains_content_cache_key(content_ids)
-        cached_value = cache.get(cache_key, _CACHE_MISS)
-        if cached_value is not _CACHE_MISS:
-            return cached_value
-
-        enterprise_catalog_client = EnterpriseCatalogApiClient()
-        content_in_catalog = enterprise_catalog_client.contains_content_items(
-            self.enterprise_catalog_uuid,
-            content_ids,
-        )
-        cache.set(cache_key, content_in_catalog, timeout=CONTAINS_CONTENT_CACHE_TIMEOUT)
-        return content_in_catalog
-
-    def get_contains_content_cache_key(self, content_ids):
-        return f'plan_contains_content:{self.uuid}:{content_ids}'
+        return catalog_contains_any_content(self.enterprise_catalog_uuid, content_ids)
 
     history = HistoricalRecords()
 
@@ -1189,6 +1180,68 @@ class SubscriptionPlanRenewal(TimeStampedModel):
         )
 
 
+class LicenseQuerySet(models.QuerySet):
+    """
+    QuerySet for licenses that keeps ``SubscriptionPlanLicenseCounts`` accurate across bulk writes.
+    """
+    _reconciles_license_counts = True
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._reconciles_license_counts = self._reconciles_license_counts  # pylint: disable=protected-access
+        return clone
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Override to count the created licenses against their plans.
+        """
+        with transaction.atomic():
+            created_objs = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # We can't tell which rows were actually written, so recount the affected plans.
+                self._reconcile_plans({obj.subscription_plan_id for obj in created_objs})
+            else:
+                SubscriptionPlanLicenseCounts.apply_license_changes(created_objs)
+        return created_objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """
+        Override to move the updated licenses between (plan, status) counts.
+        """
+        objs = tuple(objs)
+        queryset = self._chain()
+        # The per-object transitions are applied below, so the UPDATE issued by bulk_update()
+        # must not also recount the affected plans.
+        queryset._reconciles_license_counts = False  # pylint: disable=protected-access
+        with transaction.atomic():
+            num_updated = super(LicenseQuerySet, queryset).bulk_update(objs, fields, *args, **kwargs)
+            if {'status', 'subscription_plan'} & set(fields):
+                SubscriptionPlanLicenseCounts.apply_license_changes(objs)
+        return num_updated
+
+    def update(self, **kwargs):
+        """
+        Override to recompute the license counts of every affected plan when an update
+        moves licenses between statuses or plans.
+        """
+        counted_fields = {'status', 'subscription_plan', 'subscription_plan_id'}
+        if not self._reconciles_license_counts or not counted_fields & set(kwargs):
+            return super().update(**kwargs)
+
+        with transaction.atomic():
+            affected_plan_ids = set(self.values_list('subscription_plan_id', flat=True).distinct())
+            num_updated = super().update(**kwargs)
+            new_plan = kwargs.get('subscription_plan', kwargs.get('subscription_plan_id'))
+            if new_plan is not None:
+                affected_plan_ids.add(getattr(new_plan, 'pk', new_plan))
+            self._reconcile_plans(affected_plan_ids)
+        return num_updated
+
+    def _reconcile_plans(self, plan_ids):
+        for plan in SubscriptionPlan.objects.filter(uuid__in=plan_ids):
+            SubscriptionPlanLicenseCounts.reconcile(plan)
+
+
 class License(TimeStampedModel):
     """
     Stores information related to an individual subscriptions license.
@@ -1206,6 +1259,11 @@ class License(TimeStampedModel):
         indexes = [
             models.Index(fields=["subscription_plan", "status"], name="subscription_plan_status_idx"),
         ]
+        # Related managers (e.g. ``plan.licenses.add()``) update through the base manager,
+        # which must use ``LicenseQuerySet`` to keep license counts accurate.
+        base_manager_name = 'objects'
+
+    objects = LicenseQuerySet.as_manager()
 
     uuid = models.UUIDField(
         primary_key=True,
@@ -1325,12 +1383,45 @@ class License(TimeStampedModel):
                     f'User with email {self.user_email} already has an assigned or activated license.'
                 )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Override to remember the (plan, status) this license was counted under when it was read,
+        so that ``SubscriptionPlanLicenseCounts`` can be adjusted when the license is written back.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_count_key()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        """
+        Override to re-snapshot the counted (plan, status) after reloading fields.
+        """
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_count_key()
+
+    def _snapshot_count_key(self):
+        """
+        Records the (subscription plan id, status) pair this license is currently counted under.
+        """
+        # Avoid triggering deferred field loads just to take the snapshot.
+        deferred_fields = self.get_deferred_fields()
+        if 'status' in deferred_fields or 'subscription_plan_id' in deferred_fields:
+            self._counted_as = None
+        else:
+            self._counted_as = (self.subscription_plan_id, self.status)
+
     def save(self, *args, **kwargs):
         """
-        Override to ensure that full_clean()/clean() is always called.
+        Override to ensure that full_clean()/clean() is always called, and that the
+        plan's denormalized license counts are updated in the same transaction.
         """
         self.full_clean()
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if update_fields is None or {'status', 'subscription_plan'} & set(update_fields):
+                SubscriptionPlanLicenseCounts.apply_license_changes([self])
 
     @cached_property
     def activation_link(self):
@@ -1368,22 +1459,68 @@ class License(TimeStampedModel):
         """
         self.history.update(user_email=None)  # pylint: disable=no-member
 
+    @classmethod
+    def bulk_retire_pii(cls, licenses, **field_values):
+        """
+        Removes pii from the given licenses and their historical records, sets the given fields to the
+        same value on every license, and deletes their ``SubscriptionLicenseSource`` records.
+
+        The licenses are updated with a single UPDATE, their new history records are written with
+        a multi-row INSERT, and their historical pii and sources are each removed with one statement.
+
+        Args:
+            licenses (iterable): The licenses to retire.
+            field_values: The values of the other fields to set on the licenses, e.g. ``status=REVOKED``.
+        """
+        licenses = list(licenses)
+        if not licenses:
+            return
+        field_values = {'user_email': None, 'modified': localized_utcnow(), **field_values}
+        for license_obj in licenses:
+            for field_name, value in field_values.items():
+                setattr(license_obj, field_name, value)
+        license_uuids = [license_obj.uuid for license_obj in licenses]
+
+        with transaction.atomic():
+            cls.objects.filter(uuid__in=license_uuids).update(**field_values)
+            cls.history.bulk_history_create(  # pylint: disable=no-member
+                licenses,
+                update=True,
+                batch_size=cls.get_bulk_write_batch_size(licenses),
+            )
+            # Clear historical pii after removing pii from the licenses themselves
+            cls.history.filter(uuid__in=license_uuids).update(user_email=None)  # pylint: disable=no-member
+
+            sources = SubscriptionLicenseSource.objects.filter(license_id__in=license_uuids)
+            licenses_with_sources = set(sources.values_list('license_id', flat=True))
+            sources.delete()
+        for license_uuid in license_uuids:
+            if license_uuid not in licenses_with_sources:
+                logger.warning('Could not find related license source to delete for license %s', license_uuid)
+
     def reset_to_unassigned(self):
         """
         Resets a license to unassigned and clears the previously set fields on it that no longer apply.
 
         Note that this does NOT save the license. If you want the changes to persist you need to either explicitly save
         the license after calling this, or use something like bulk_update which saves each object as part of its updates
+
+        Returns the values the fields were reset to, by field name, e.g. to write them with ``bulk_retire_pii``.
         """
         logger.info(f'Reseting license {self.uuid} to unassigned.')
-        self.status = UNASSIGNED
-        self.user_email = None
-        self.lms_user_id = None
-        self.last_remind_date = None
-        self.activation_date = None
-        self.activation_key = None
-        self.assigned_date = None
-        self.revoked_date = None
+        reset_field_values = {
+            'status': UNASSIGNED,
+            'user_email': None,
+            'lms_user_id': None,
+            'last_remind_date': None,
+            'activation_date': None,
+            'activation_key': None,
+            'assigned_date': None,
+            'revoked_date': None,
+        }
+        for field_name, value in reset_field_values.items():
+            setattr(self, field_name, value)
+        return reset_field_values
 
     def revoke(self):
         """
@@ -1420,17 +1557,31 @@ class License(TimeStampedModel):
         """
         Helper function to bulk set the field given by `date_field_name` on a group of licenses to now.
 
+        The fields of every license are set with a single UPDATE, since they all get the same value,
+        and the licenses' history records are written with a multi-row INSERT.
+
         Args:
             licenses (iterable): The licenses to set the field to now on.
             date_field_name (list of str): The names of the date field to set to now.
         """
+        licenses = list(licenses)
+        now = localized_utcnow()
         for subscription_license in licenses:
             for field_name in date_field_names:
-                setattr(subscription_license, field_name, localized_utcnow())
-        License.bulk_update(licenses, date_field_names)
+                setattr(subscription_license, field_name, now)
+
+        with transaction.atomic():
+            License.objects.filter(
+                uuid__in=[subscription_license.uuid for subscription_license in licenses],
+            ).update(**{field_name: now for field_name in date_field_names})
+            License.history.bulk_history_create(  # pylint: disable=no-member
+                licenses,
+                update=True,
+                batch_size=License.get_bulk_write_batch_size(licenses),
+            )
 
     @classmethod
-    def bulk_create(cls, license_objects, batch_size=LICENSE_BULK_OPERATION_BATCH_SIZE):
+    def bulk_create(cls, license_objects, batch_size=None):
         """
         django-simple-history functions by saving history using a post_save signal every time that
         an object with history is saved. However, for certain bulk operations, such as bulk_create, bulk_update,
@@ -1438,14 +1589,18 @@ class License(TimeStampedModel):
         However, django-simple-history provides utility functions to work around this.
 
         https://django-simple-history.readthedocs.io/en/2.12.0/common_issues.html#bulk-creating-and-queryset-updating
+
+        The licenses and their history records are written with multi-row INSERTs of ``batch_size`` rows,
+        which defaults to a size fit to the number of licenses and the database's max packet size.
         """
+        batch_size = batch_size or cls.get_bulk_write_batch_size(license_objects)
         bulk_create_with_history(license_objects, cls, batch_size=batch_size)
 
         # Since bulk_create does not call post_save, handle tracking events manually:
         track_license_changes(license_objects, SegmentEvents.LICENSE_CREATED)
 
     @classmethod
-    def bulk_update(cls, license_objects, field_names, batch_size=LICENSE_BULK_OPERATION_BATCH_SIZE):
+    def bulk_update(cls, license_objects, field_names, batch_size=None):
         """
         django-simple-history functions by saving history using a post_save signal every time that
         an object with history is saved. However, for certain bulk operations, such as bulk_create, bulk_update,
@@ -1453,9 +1608,29 @@ class License(TimeStampedModel):
         However, django-simple-history provides utility functions to work around this.
 
         https://django-simple-history.readthedocs.io/en/2.12.0/common_issues.html#bulk-creating-and-queryset-updating
+
+        The licenses are written with a set-based UPDATE, and their history records with a multi-row INSERT,
+        per ``batch_size`` licenses, which defaults to a size fit to the number of licenses and the
+        database's max packet size, up to ``BULK_UPDATE_MAX_BATCH_SIZE``.
         """
+        batch_size = batch_size or cls.get_bulk_write_batch_size(license_objects, field_names)
         bulk_update_with_history(license_objects, cls, field_names, batch_size=batch_size)
 
+    @classmethod
+    def get_bulk_write_batch_size(cls, license_objects, update_field_names=None):
+        """
+        Returns how many of the given licenses to write per statement when bulk creating them (or bulk updating
+        the given fields of them) along with their history records.
+        """
+        license_objects = list(license_objects)
+        # Every history record copies all of the license's fields
+        history_row_bytes = estimate_row_bytes(license_objects, cls._meta.concrete_fields) + HISTORY_ROW_OVERHEAD_BYTES
+        if update_field_names:
+            update_fields = [cls._meta.get_field(field_name) for field_name in update_field_names]
+            row_bytes = max(history_row_bytes, estimate_row_bytes(license_objects, update_fields, for_update=True))
+            return get_bulk_write_batch_size(license_objects, row_bytes, max_batch_size=BULK_UPDATE_MAX_BATCH_SIZE)
+        return get_bulk_write_batch_size(license_objects, history_row_bytes)
+
     @classmethod
     def by_user_email_or_lms_user_id(cls, user_email, lms_user_id=None):
         """
@@ -1503,11 +1678,13 @@ class License(TimeStampedModel):
         return queryset.filter(**kwargs)
 
     @classmethod
-    def get_licenses_exceeding_purge_duration(cls, date_field_to_compare, batch_size=1000, **kwargs):
+    def get_licenses_exceeding_purge_duration(cls, date_field_to_compare, batch_size=1000, start_after=None, **kwargs):
         """
         Returns all licenses with non-null ``user_email`` values
         that have exceeded the purge duration specified by the related
-        plan's ``CustomerAgreement.license_duration_before_purge`` value.
+        plan's ``CustomerAgreement.license_duration_before_purge`` value,
+        as a generator of lists of up to ``batch_size`` licenses, see ``keyset_batches``.
+        Pass the pk of the last license of a batch as ``start_after`` to resume after it.
 
         The ``date_field_to_compare`` argument is compared to this value to determine
         if the duration has been exceeded.  It can be the name of any valid
@@ -1529,21 +1706,13 @@ class License(TimeStampedModel):
             date_field: localized_utcnow() - models.F(duration_before_purge_field),
         })
 
-        # ordered by primary key for stable pagination, which we'll rely on
-        # below to generate batches of result sets.
-        base_queryset = License.objects.filter(**kwargs).select_related(
+        queryset = License.objects.filter(**kwargs).select_related(
             'subscription_plan',
             'subscription_plan__customer_agreement',
-        ).order_by('pk')
-
-        queryset = base_queryset[:batch_size]
-        offset = 0
-        while queryset.exists():
-            yield queryset
-            # queryset.last() doesn't work here because we've already sliced it above.
-            # We have to loop through (by list-ing) it in order to grab the last one.
-            offset = list(queryset)[-1].pk
-            queryset = base_queryset.filter(pk__gt=offset)[:batch_size]
+        )
+        # Every batch is read once, after the caller is done with the previous one, and the keyset
+        # pagination doesn't skip licenses when the caller retires the ones it was given.
+        yield from keyset_batches(queryset, batch_size, start_after=start_after)
 
     @classmethod
     def get_licenses_by_email(cls, user_email):
@@ -1640,6 +1809,623 @@ class License(TimeStampedModel):
         return sorted_licenses[0]
 
 
+class SubscriptionPlanLicenseCounts(TimeStampedModel):
+    """
+    Denormalized count of a SubscriptionPlan's licenses in each status.
+
+    The counts are adjusted in the same transaction as every license save, delete, bulk create,
+    bulk update and queryset update, so that reading a plan's totals is a single primary-key lookup
+    instead of a COUNT over the license table. Writes that bypass the ORM (or races while a plan's counts
+    are first being computed) can still cause drift, which the ``reconcile_license_counts`` management
+    command repairs.
+
+    .. no_pii: This model has no PII
+    """
+    FIELD_NAME_BY_STATUS = {
+        ACTIVATED: 'num_activated',
+        ASSIGNED: 'num_assigned',
+        UNASSIGNED: 'num_unassigned',
+        REVOKED: 'num_revoked',
+    }
+
+    subscription_plan = models.OneToOneField(
+        SubscriptionPlan,
+        primary_key=True,
+        related_name='license_counts',
+        on_delete=models.CASCADE,
+    )
+    num_activated = models.IntegerField(default=0)
+    num_assigned = models.IntegerField(default=0)
+    num_unassigned = models.IntegerField(default=0)
+    num_revoked = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = _("Subscription Plan License Counts")
+        verbose_name_plural = _("Subscription Plan License Counts")
+
+    def __str__(self):
+        return f'<SubscriptionPlanLicenseCounts for plan {self.subscription_plan_id}>'
+
+    def count_by_status(self):
+        """
+        Returns a dictionary keyed by each license status and valued by the count of licenses with that status.
+        """
+        return {
+            status: getattr(self, field_name)
+            for status, field_name in self.FIELD_NAME_BY_STATUS.items()
+        }
+
+    @classmethod
+    def for_plan(cls, subscription_plan):
+        """
+        Returns the counts record for the given plan, computing it from the license table
+        if the plan does not have one yet.
+        """
+        counts = cls.objects.filter(subscription_plan=subscription_plan).first()
+        if counts is None:
+            counts = cls.reconcile(subscription_plan)
+        return counts
+
+    @classmethod
+    def count_licenses_by_status(cls, subscription_plan):
+        """
+        Counts the given plan's licenses in each status directly from the license table.
+        """
+        count_by_status = {status: 0 for status in cls.FIELD_NAME_BY_STATUS}
+        queryset = License.objects.filter(subscription_plan=subscription_plan).values('status').annotate(
+            count=models.Count('status'),
+        ).order_by('status')
+        for item in queryset:
+            count_by_status[item['status']] = item['count']
+        return count_by_status
+
+    @classmethod
+    def reconcile(cls, subscription_plan):
+        """
+        Recomputes the counts for the given plan from the license table and stores them.
+        """
+        count_by_status = cls.count_licenses_by_status(subscription_plan)
+        counts, _ = cls.objects.update_or_create(
+            subscription_plan=subscription_plan,
+            defaults={
+                cls.FIELD_NAME_BY_STATUS[status]: count
+                for status, count in count_by_status.items()
+            },
+        )
+        return counts
+
+    @classmethod
+    def apply_license_changes(cls, licenses):
+        """
+        Adjusts the counts for every (plan, status) transition among the given, already-written licenses.
+        Each license's snapshot is advanced so that writing it again only counts new transitions.
+        """
+        deltas = defaultdict(int)
+        for license_obj in licenses:
+            previous_key = getattr(license_obj, '_counted_as', None)
+            current_key = (license_obj.subscription_plan_id, license_obj.status)
+            if previous_key == current_key:
+                continue
+            if previous_key:
+                deltas[previous_key] -= 1
+            deltas[current_key] += 1
+            license_obj._counted_as = current_key  # pylint: disable=protected-access
+        cls.apply_deltas(deltas)
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """
+        Applies ``{(subscription_plan_id, status): delta}`` to the stored counts with one UPDATE per plan.
+
+        Plans without a counts record are skipped; their counts are computed from the
+        license table the next time they're read.
+        """
+        updates_by_plan = defaultdict(dict)
+        for (plan_id, status), delta in deltas.items():
+            if delta:
+                updates_by_plan[plan_id][cls.FIELD_NAME_BY_STATUS[status]] = delta
+
+        for plan_id, field_deltas in updates_by_plan.items():
+            cls.objects.filter(subscription_plan_id=plan_id).update(
+                modified=localized_utcnow(),
+                **{field_name: F(field_name) + delta for field_name, delta in field_deltas.items()},
+            )
+
+
+class SubscriptionPlanLock(TimeStampedModel):
+    """
+    A lease on a lock for some work on a SubscriptionPlan, like assigning its licenses or provisioning them.
+
+    Acquiring the lock inserts a row keyed by the lock's key, so the database's primary key constraint makes sure
+    only one holder at a time gets it, across every web and celery worker. The lease expires after a given number
+    of seconds, after which anyone may take the lock over, so a holder that crashed doesn't keep it forever.
+
+    .. no_pii: This model has no PII
+    """
+    DEFAULT_LEASE_SECONDS = 300
+    WAIT_POLL_INTERVAL_SECONDS = 0.1
+
+    key = models.CharField(
+        max_length=255,
+        primary_key=True,
+    )
+    subscription_plan = models.ForeignKey(
+        SubscriptionPlan,
+        related_name='locks',
+        on_delete=models.CASCADE,
+    )
+    holder = models.CharField(
+        max_length=255,
+        help_text=_("Identifies who holds the lock, e.g. the celery task id or the web worker's host and process."),
+    )
+    expires_at = models.DateTimeField(
+        help_text=_("When the holder's lease on the lock runs out, after which anyone may take the lock over."),
+    )
+
+    class Meta:
+        verbose_name = _("Subscription Plan Lock")
+        verbose_name_plural = _("Subscription Plan Locks")
+
+    def __str__(self):
+        return f'<SubscriptionPlanLock {self.key} held by {self.holder} until {self.expires_at}>'
+
+    @staticmethod
+    def default_holder():
+        """
+        Returns a holder identity unique to this call, which also tells which host and process it came from.
+        """
+        return f'{socket.gethostname()}:{os.getpid()}:{uuid4()}'
+
+    @classmethod
+    def acquire(cls, key, subscription_plan, holder, lease_seconds=DEFAULT_LEASE_SECONDS, wait_seconds=0):
+        """
+        Acquires the lock with the given key for the given holder, waiting up to ``wait_seconds`` for
+        its current holder to release it (or for their lease to expire).
+
+        A holder that acquires a lock it already holds renews its lease. Returns whether the lock was acquired.
+        """
+        deadline = time.monotonic() + wait_seconds
+        while not cls._try_acquire(key, subscription_plan, holder, lease_seconds):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(cls.WAIT_POLL_INTERVAL_SECONDS)
+        return True
+
+    @classmethod
+    def _try_acquire(cls, key, subscription_plan, holder, lease_seconds):
+        now = localized_utcnow()
+        expires_at = now + timedelta(seconds=lease_seconds)
+        # Take over an expired lease, or renew our own, with a single conditional update
+        if cls.objects.filter(key=key).filter(Q(expires_at__lte=now) | Q(holder=holder)).update(
+            holder=holder,
+            expires_at=expires_at,
+            modified=now,
+        ):
+            return True
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    key=key,
+                    subscription_plan=subscription_plan,
+                    holder=holder,
+                    expires_at=expires_at,
+                )
+        except IntegrityError:
+            return False
+        return True
+
+    @classmethod
+    def acquire_all(cls, keys, subscription_plan, holder, lease_seconds=DEFAULT_LEASE_SECONDS, wait_seconds=0):
+        """
+        Acquires every lock with the given keys for the given holder, or none of them, waiting up to
+        ``wait_seconds`` for their current holders to release them (or for their leases to expire).
+
+        Returns whether the locks were acquired.
+        """
+        deadline = time.monotonic() + wait_seconds
+        while not cls._try_acquire_all(keys, subscription_plan, holder, lease_seconds):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(cls.WAIT_POLL_INTERVAL_SECONDS)
+        return True
+
+    @classmethod
+    def _try_acquire_all(cls, keys, subscription_plan, holder, lease_seconds):
+        now = localized_utcnow()
+        cls.objects.filter(key__in=keys, expires_at__lte=now).delete()
+        try:
+            # A single INSERT, which fails as a whole if any of the locks is already held
+            with transaction.atomic():
+                cls.objects.bulk_create([
+                    cls(
+                        key=key,
+                        subscription_plan=subscription_plan,
+                        holder=holder,
+                        expires_at=now + timedelta(seconds=lease_seconds),
+                    )
+                    for key in keys
+                ])
+        except IntegrityError:
+            return False
+        return True
+
+    @classmethod
+    def release(cls, key, holder=None):
+        """
+        Releases the lock with the given key. If a holder is given, the lock is only released if they hold it,
+        so that a holder whose lease expired can't release the lock out from under whoever took it over.
+        """
+        cls.release_all([key], holder=holder)
+
+    @classmethod
+    def release_all(cls, keys, holder=None):
+        """
+        Releases every lock with the given keys, like ``release``.
+        """
+        locks = cls.objects.filter(key__in=keys)
+        if holder is not None:
+            locks = locks.filter(holder=holder)
+        locks.delete()
+
+
+class LicenseProvisioningJob(TimeStampedModel):
+    """
+    A record of provisioning a number of new licenses for a SubscriptionPlan, split into shards
+    that are provisioned independently of one another.
+
+    The job is sized once, while holding the plan's provisioning lock, to the gap between the plan's
+    ``desired_num_licenses`` and its number of licenses. Until the job completes, provisioning the plan
+    again resumes the job's unfinished shards instead of sizing a new job, so a plan is never provisioned
+    more licenses than it was short of. Once the job completes, the plan is provisioned again, which sizes
+    a new job if ``desired_num_licenses`` was raised in the meantime.
+
+    .. no_pii: This model has no PII
+    """
+    uuid = models.UUIDField(
+        primary_key=True,
+        default=uuid4,
+        editable=False,
+        unique=True,
+    )
+    subscription_plan = models.ForeignKey(
+        SubscriptionPlan,
+        related_name='provisioning_jobs',
+        on_delete=models.CASCADE,
+    )
+    num_licenses = models.PositiveIntegerField(
+        help_text=_("The number of licenses the job provisions."),
+    )
+    num_licenses_provisioned = models.PositiveIntegerField(
+        default=0,
+        help_text=_("The number of licenses the job has provisioned so far."),
+    )
+    completed_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text=_("The time at which every license of the job was provisioned."),
+    )
+
+    class Meta:
+        verbose_name = _("License Provisioning Job")
+        verbose_name_plural = _("License Provisioning Jobs")
+
+    def __str__(self):
+        return (
+            f'<LicenseProvisioningJob {self.uuid} for plan {self.subscription_plan_id}: '
+            f'{self.num_licenses_provisioned}/{self.num_licenses} licenses>'
+        )
+
+    @property
+    def percent_complete(self):
+        """
+        Percentage of the job's licenses that have been provisioned.
+        """
+        if not self.num_licenses:
+            return 100
+        return round(100 * self.num_licenses_provisioned / self.num_licenses)
+
+    @classmethod
+    def get_unfinished_job(cls, subscription_plan):
+        """
+        Returns the given plan's job that is still provisioning licenses, or None if it has none.
+        """
+        return cls.objects.filter(
+            subscription_plan=subscription_plan,
+            completed_at__isnull=True,
+        ).order_by('created').first()
+
+    @classmethod
+    def create_job(cls, subscription_plan, num_licenses, shard_size):
+        """
+        Creates a job to provision ``num_licenses`` licenses for the given plan, split into shards of at most
+        ``shard_size`` licenses each.
+        """
+        with transaction.atomic():
+            job = cls.objects.create(subscription_plan=subscription_plan, num_licenses=num_licenses)
+            LicenseProvisioningShard.objects.bulk_create([
+                LicenseProvisioningShard(job=job, index=index, num_licenses=min(shard_size, num_licenses - offset))
+                for index, offset in enumerate(range(0, num_licenses, shard_size))
+            ])
+        return job
+
+    def get_unfinished_shards(self):
+        """
+        Returns the job's shards that still have licenses left to provision.
+        """
+        return self.shards.filter(num_licenses_provisioned__lt=F('num_licenses')).order_by('index')
+
+
+class LicenseProvisioningShard(TimeStampedModel):
+    """
+    One independently provisioned part of a LicenseProvisioningJob.
+
+    Each batch of a shard's licenses is created in the same transaction that records it as provisioned,
+    under a row lock on the shard, so a shard that is retried (or run twice at once) picks up where it left
+    off without provisioning any of its licenses twice.
+
+    .. no_pii: This model has no PII
+    """
+    job = models.ForeignKey(
+        LicenseProvisioningJob,
+        related_name='shards',
+        on_delete=models.CASCADE,
+    )
+    index = models.PositiveIntegerField()
+    num_licenses = models.PositiveIntegerField(
+        help_text=_("The number of licenses the shard provisions."),
+    )
+    num_licenses_provisioned = models.PositiveIntegerField(
+        default=0,
+        help_text=_("The number of licenses the shard has provisioned so far."),
+    )
+
+    class Meta:
+        verbose_name = _("License Provisioning Shard")
+        verbose_name_plural = _("License Provisioning Shards")
+        unique_together = (
+            ('job', 'index'),
+        )
+
+    def __str__(self):
+        return (
+            f'<LicenseProvisioningShard {self.index} of job {self.job_id}: '
+            f'{self.num_licenses_provisioned}/{self.num_licenses} licenses>'
+        )
+
+    @classmethod
+    def provision_batch(cls, shard_id, batch_size):
+        """
+        Provisions up to ``batch_size`` more of the given shard's licenses, and records them as provisioned
+        on the shard and its job. Marks the job completed once its last license is provisioned.
+
+        Once the job is completed, the plan is provisioned again, in case its ``desired_num_licenses``
+        was raised while the job ran.
+
+        Returns the number of licenses provisioned, which is 0 once the shard is done.
+        """
+        with transaction.atomic():
+            # Only lock the shard, not the job and plan read along with it, which the job's other shards share.
+            shard = cls.objects.select_for_update(of=('self',)).select_related(
+                'job__subscription_plan',
+            ).get(id=shard_id)
+            num_new_licenses = min(batch_size, shard.num_licenses - shard.num_licenses_provisioned)
+            if num_new_licenses <= 0:
+                return 0
+
+            job = shard.job
+            subscription_plan = job.subscription_plan
+            subscription_plan.increase_num_licenses(num_new_licenses, count_licenses=False)
+            cls.objects.filter(id=shard.id).update(
+                num_licenses_provisioned=F('num_licenses_provisioned') + num_new_licenses,
+                modified=localized_utcnow(),
+            )
+
+            # The rows of the plan's license counts and of the job are shared by all of the job's shards, so they're
+            # only updated once the batch's licenses are written, right before committing, to hold their locks briefly.
+            SubscriptionPlanLicenseCounts.apply_deltas({(subscription_plan.uuid, UNASSIGNED): num_new_licenses})
+            LicenseProvisioningJob.objects.filter(uuid=job.uuid).update(
+                num_licenses_provisioned=F('num_licenses_provisioned') + num_new_licenses,
+                modified=localized_utcnow(),
+            )
+            job_completed = LicenseProvisioningJob.objects.filter(
+                uuid=job.uuid,
+                completed_at__isnull=True,
+                num_licenses_provisioned__gte=F('num_licenses'),
+            ).update(completed_at=localized_utcnow())
+            if job_completed:
+                transaction.on_commit(
+                    lambda: SubscriptionPlan.objects.get(uuid=subscription_plan.uuid).provision_licenses()
+                )
+        return num_new_licenses
+
+
+class LicenseExpirationEventBatch(TimeStampedModel):
+    """
+    A batch of the non-renewed licenses of an expired SubscriptionPlan, whose expiration events are sent together.
+
+    Batches are cut from the plan's licenses in order of uuid, between ``first_license_uuid`` and
+    ``last_license_uuid`` inclusive, and recorded before their events are sent. Resuming the plan's expiration
+    events after a crash only sends the batches that weren't sent, and cuts new ones after the last recorded batch.
+
+    .. no_pii: This model has no PII
+    """
+    subscription_plan = models.ForeignKey(
+        SubscriptionPlan,
+        related_name='expiration_event_batches',
+        on_delete=models.CASCADE,
+    )
+    first_license_uuid = models.UUIDField()
+    last_license_uuid = models.UUIDField()
+    sent_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text=_("The time at which the expiration events of the batch's licenses were sent."),
+    )
+
+    class Meta:
+        verbose_name = _("License Expiration Event Batch")
+        verbose_name_plural = _("License Expiration Event Batches")
+
+    def __str__(self):
+        return (
+            f'<LicenseExpirationEventBatch for plan {self.subscription_plan_id}: '
+            f'{self.first_license_uuid} to {self.last_license_uuid}>'
+        )
+
+    @staticmethod
+    def get_expired_licenses(subscription_plan_id):
+        """
+        Returns the licenses of the given plan that expiration events are sent for, i.e. the ones that
+        weren't renewed, in order of uuid.
+        """
+        return License.objects.filter(
+            subscription_plan_id=subscription_plan_id,
+            renewed_to__isnull=True,
+        ).order_by('uuid')
+
+    def get_licenses(self):
+        """
+        Returns the licenses of the batch.
+        """
+        return self.get_expired_licenses(self.subscription_plan_id).filter(
+            uuid__gte=self.first_license_uuid,
+            uuid__lte=self.last_license_uuid,
+        )
+
+    @classmethod
+    def create_batches(cls, subscription_plan, batch_size):
+        """
+        Records the batches of the given plan's expired licenses that come after its last recorded batch,
+        reading ``batch_size`` license uuids at a time.
+
+        Returns the batches that were created.
+        """
+        last_batch = cls.objects.filter(subscription_plan=subscription_plan).order_by('-last_license_uuid').first()
+        last_license_uuid = last_batch.last_license_uuid if last_batch else None
+
+        batches = []
+        while True:
+            licenses = cls.get_expired_licenses(subscription_plan.uuid)
+            if last_license_uuid:
+                licenses = licenses.filter(uuid__gt=last_license_uuid)
+            license_uuids = list(licenses.values_list('uuid', flat=True)[:batch_size])
+            if not license_uuids:
+                break
+            # Record each batch as it's cut, so a crash only loses the batch being cut
+            batches.append(cls.objects.create(
+                subscription_plan=subscription_plan,
+                first_license_uuid=license_uuids[0],
+                last_license_uuid=license_uuids[-1],
+            ))
+            last_license_uuid = license_uuids[-1]
+        return batches
+
+
+class LicenseEnrollmentExpirationBatch(TimeStampedModel):
+    """
+    A batch of the allocated licenses of an expired SubscriptionPlan, whose licensed course enrollments
+    are expired together by a single request to the enterprise api.
+
+    Batches are cut from the plan's assigned and activated licenses in order of uuid, between
+    ``first_license_uuid`` and ``last_license_uuid`` inclusive. The plan's expiration is processed
+    once all of its batches are completed, and running the expiration again only sends the batches
+    that aren't completed yet.
+
+    .. no_pii: This model has no PII
+    """
+    subscription_plan = models.ForeignKey(
+        SubscriptionPlan,
+        related_name='enrollment_expiration_batches',
+        on_delete=models.CASCADE,
+    )
+    first_license_uuid = models.UUIDField()
+    last_license_uuid = models.UUIDField()
+    completed_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text=_("The time at which the course enrollments of the batch's licenses were expired."),
+    )
+
+    class Meta:
+        verbose_name = _("License Enrollment Expiration Batch")
+        verbose_name_plural = _("License Enrollment Expiration Batches")
+
+    def __str__(self):
+        return (
+            f'<LicenseEnrollmentExpirationBatch for plan {self.subscription_plan_id}: '
+            f'{self.first_license_uuid} to {self.last_license_uuid}>'
+        )
+
+    @staticmethod
+    def get_allocated_licenses(subscription_plan_id):
+        """
+        Returns the licenses of the given plan whose course enrollments are expired, i.e. the assigned
+        and activated ones, in order of uuid.
+        """
+        return License.objects.filter(
+            subscription_plan_id=subscription_plan_id,
+            status__in=[ASSIGNED, ACTIVATED],
+        ).order_by('uuid')
+
+    def get_license_uuids(self):
+        """
+        Returns the uuids of the batch's licenses.
+        """
+        return list(self.get_allocated_licenses(self.subscription_plan_id).filter(
+            uuid__gte=self.first_license_uuid,
+            uuid__lte=self.last_license_uuid,
+        ).values_list('uuid', flat=True))
+
+    @classmethod
+    def create_batches(cls, subscription_plan, batch_size):
+        """
+        Records the batches of the given plan's allocated licenses that come after its last recorded batch,
+        reading ``batch_size`` license uuids at a time.
+
+        Returns the batches that were created.
+        """
+        last_batch = cls.objects.filter(subscription_plan=subscription_plan).order_by('-last_license_uuid').first()
+        last_license_uuid = last_batch.last_license_uuid if last_batch else None
+
+        batches = []
+        while True:
+            licenses = cls.get_allocated_licenses(subscription_plan.uuid)
+            if last_license_uuid:
+                licenses = licenses.filter(uuid__gt=last_license_uuid)
+            license_uuids = list(licenses.values_list('uuid', flat=True)[:batch_size])
+            if not license_uuids:
+                break
+            batches.append(cls.objects.create(
+                subscription_plan=subscription_plan,
+                first_license_uuid=license_uuids[0],
+                last_license_uuid=license_uuids[-1],
+            ))
+            last_license_uuid = license_uuids[-1]
+        return batches
+
+    @classmethod
+    def complete_batch(cls, batch_id):
+        """
+        Marks the given batch completed, and marks its plan's expiration processed if that was the plan's
+        last incomplete batch.
+
+        Returns:
+            bool: Whether the plan's expiration was marked processed.
+        """
+        with transaction.atomic():
+            batch = cls.objects.get(id=batch_id)
+            # Lock the plan, so that exactly one of its batches completing at the same time sees that
+            # it was the last one
+            subscription_plan = SubscriptionPlan.objects.select_for_update().get(uuid=batch.subscription_plan_id)
+            cls.objects.filter(id=batch_id).update(completed_at=localized_utcnow())
+            if cls.objects.filter(subscription_plan=subscription_plan, completed_at__isnull=True).exists():
+                return False
+            # Saved with update_fields so that the plan's license expiration events are tracked
+            subscription_plan.expiration_processed = True
+            subscription_plan.save(update_fields=['expiration_processed'])
+        return True
+
+
 class LicenseTransferJob(TimeStampedModel):
     """
     A record to help run a job that "physically" transfers
@@ -1966,18 +2752,81 @@ class LicenseEvent(TimeStampedModel):
     class Meta:
         verbose_name = _("License Triggered Event")
         verbose_name_plural = _("License Triggered Events")
+        indexes = [
+            # Looks up whether an event was already triggered for a license
+            models.Index(fields=["license", "event_name"], name="license_event_name_idx"),
+        ]
 
     def __str__(self):
         return f'{self.license.uuid}'
 
 
+class PendingTrackingEvent(TimeStampedModel):
+    """
+    An outbox of tracking events waiting to be sent to Segment (or Braze, for learners without an lms user id).
+
+    Events are written in the same transaction as the license changes they describe, so an event is only
+    ever sent for a change that was committed, and sending it doesn't hold up the request or command that
+    made the change. The ``send_tracking_events`` management command sends them in batches, and retries
+    any that failed to send.
+
+    .. pii: Stores the event properties, which include the email address and lms user id of the learner
+        the event is about. Events are deleted once they're sent, or when their learner is retired.
+    .. pii_types: id,email_address
+    .. pii_retirement: local_api
+    """
+    lms_user_id = models.IntegerField(
+        blank=True,
+        null=True,
+    )
+    event_name = models.CharField(
+        max_length=255,
+    )
+    properties = models.JSONField(
+        encoder=DjangoJSONEncoder,
+    )
+    num_attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text=_("The number of times sending the event has failed."),
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        help_text=_("The event is not sent before this time, to back off from retrying failed events."),
+    )
+
+    class Meta:
+        verbose_name = _("Pending Tracking Event")
+        verbose_name_plural = _("Pending Tracking Events")
+
+    def __str__(self):
+        return f'<PendingTrackingEvent {self.event_name} for lms user {self.lms_user_id}>'
+
+    @classmethod
+    def delete_for_user(cls, lms_user_id, user_emails):
+        """
+        Deletes the unsent events about the learner with the given lms user id, or any of the given email addresses.
+
+        Returns the number of events deleted.
+        """
+        user_emails = [user_email for user_email in user_emails if user_email]
+        events_for_user = Q(lms_user_id=lms_user_id)
+        if user_emails:
+            events_for_user |= Q(properties__assigned_email__in=user_emails) | Q(properties__user_email__in=user_emails)
+        num_deleted, _ = cls.objects.filter(events_for_user).delete()
+        return num_deleted
+
+
 @receiver(post_delete, sender=License)
 def dispatch_license_delete_event(sender, **kwargs):  # pylint: disable=unused-argument
     license_obj = kwargs['instance']
+    counted_as = getattr(license_obj, '_counted_as', None)
+    if counted_as:
+        SubscriptionPlanLicenseCounts.apply_deltas({counted_as: -1})
     event_properties = get_license_tracking_properties(license_obj)
-    track_event(license_obj.lms_user_id,
-                SegmentEvents.LICENSE_DELETED,
-                event_properties)
+    enqueue_event(license_obj.lms_user_id,
+                  SegmentEvents.LICENSE_DELETED,
+                  event_properties)
 
 
 @receiver(post_save, sender=License)
@@ -1994,20 +2843,20 @@ def dispatch_license_create_events(sender, **kwargs):  # pylint: disable=unused-
 
     event_properties = get_license_tracking_properties(license_obj)
     # We always send a creation event.
-    track_event(license_obj.lms_user_id,
-                SegmentEvents.LICENSE_CREATED,
-                event_properties)
+    enqueue_event(license_obj.lms_user_id,
+                  SegmentEvents.LICENSE_CREATED,
+                  event_properties)
 
     # If the license has extra statuses on creation that would normally fire events,
     # then programmatically fire events for those also
     if license_obj.status == ASSIGNED:
-        track_event(license_obj.lms_user_id,
-                    SegmentEvents.LICENSE_ASSIGNED,
-                    event_properties)
+        enqueue_event(license_obj.lms_user_id,
+                      SegmentEvents.LICENSE_ASSIGNED,
+                      event_properties)
     if license_obj.status == ACTIVATED:
-        track_event(license_obj.lms_user_id,
-                    SegmentEvents.LICENSE_ACTIVATED,
-                    event_properties)
+        enqueue_event(license_obj.lms_user_id,
+                      SegmentEvents.LICENSE_ACTIVATED,
+                      event_properties)
 
 
 @receiver(post_save, sender=SubscriptionPlan)
@@ -2016,11 +2865,30 @@ def dispatch_license_expiration_event(sender, **kwargs):  # pylint: disable=unus
     Post save hook to handle tracking license lifecycle events:
     Sends an expiration event for all linked licenses when a top level subscription plan is marked as
     expired and individual license WASN'T renewed.
+
+    The events are sent in the background, in batches, by ``track_license_expirations_task``,
+    which is queued once the transaction that saved the plan is committed.
     """
+    # pylint: disable=import-outside-toplevel
+    from license_manager.apps.subscriptions.tasks import (
+        track_license_expirations_task,
+    )
+
     # if we updated the expiration_processed field and it's true now:
     subscription_plan_obj = kwargs['instance']
     update_fields = kwargs.get('update_fields', None)
 
     if subscription_plan_obj and update_fields and 'expiration_processed' in update_fields:
-        expired_licenses = [lcs for lcs in subscription_plan_obj.licenses.all() if not lcs.renewed_to]
-        track_license_changes(expired_licenses, SegmentEvents.LICENSE_EXPIRED)
+        if subscription_plan_obj.expiration_processed:
+            # Only once the plan's expiration is committed, and never if it's rolled back
+            subscription_plan_uuid = str(subscription_plan_obj.uuid)
+            transaction.on_commit(lambda: track_license_expirations_task.delay(subscription_plan_uuid))
+
+
+@receiver(post_save, sender=SubscriptionPlan)
+def create_license_counts(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Post creation hook to start a new plan off with zeroed license counts.
+    """
+    if kwargs.get('created', False):
+        SubscriptionPlanLicenseCounts.objects.get_or_create(subscription_plan=kwargs['instance'])
@@ -3,28 +3,62 @@ Celery tasks for the subscriptions app.
 """
 import functools
 import logging
+from datetime import timedelta
 
 from celery import shared_task
 from celery_utils.logged_task import LoggedTask
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
 from django.db.utils import OperationalError
 
 from license_manager.apps.api.utils import (
     acquire_subscription_plan_lock,
     release_subscription_plan_lock,
 )
-from license_manager.apps.subscriptions.models import SubscriptionPlan
-from license_manager.apps.subscriptions.utils import batch_counts
+from license_manager.apps.api_client.enterprise import EnterpriseApiClient
+from license_manager.apps.subscriptions.constants import (
+    ACTIVATED,
+    ASSIGNED,
+    EXPIRED_LICENSE_UNLINKED,
+    TRACK_LICENSE_CHANGES_BATCH_SIZE,
+    SegmentEvents,
+)
+from license_manager.apps.subscriptions.event_utils import (
+    enqueue_events,
+    track_license_changes,
+)
+from license_manager.apps.subscriptions.models import (
+    CustomerAgreement,
+    License,
+    LicenseEvent,
+    LicenseExpirationEventBatch,
+    LicenseProvisioningJob,
+    LicenseProvisioningShard,
+    SubscriptionPlan,
+    SubscriptionPlanLock,
+)
+from license_manager.apps.subscriptions.utils import (
+    keyset_batches,
+    localized_utcnow,
+)
 
 
 logger = logging.getLogger(__name__)
 
 TASK_RETRY_SECONDS = 60
-PROVISION_LICENSES_BATCH_SIZE = 300
+# Plans short of at most this many licenses are provisioned synchronously
+PROVISION_LICENSES_SYNCHRONOUS_MAX = 300
+# Each batch is written with a handful of multi-row INSERTs, see License.bulk_create
+PROVISION_LICENSES_BATCH_SIZE = 5000
+# Each shard is provisioned by its own provision_licenses_shard_task, in parallel with the others
+PROVISION_LICENSES_SHARD_SIZE = 50000
 
 # 200 minutes will get you about 2 million licenses, give or take.
 PROVISION_LICENSES_TIME_LIMIT_SECONDS = 60 * 200
 
+# The most licenses whose custom events are sent, or whose learners are unlinked, together
+LICENSE_EVENTS_BATCH_SIZE = 100
+
 
 class RequiredTaskUnreadyError(Exception):
     """
@@ -43,7 +77,13 @@ def subscription_plan_semaphore():
         @functools.wraps(task)
         def wrapped_task(self, *args, **kwargs):
             subscription_plan = SubscriptionPlan.objects.get(uuid=kwargs['subscription_plan_uuid'])
-            if not acquire_subscription_plan_lock(subscription_plan):
+            # Hold the lock for as long as the task may run, under the task's id, which is kept across retries
+            lock_holder = acquire_subscription_plan_lock(
+                subscription_plan,
+                lease_seconds=self.time_limit or SubscriptionPlanLock.DEFAULT_LEASE_SECONDS,
+                holder=self.request.id,
+            )
+            if not lock_holder:
                 logger.info(
                     f'Deferring task {self.name} with id {self.request.id} '
                     f'and args: {self.request.args}, kwargs: {self.request.kwargs}, '
@@ -54,7 +94,7 @@ def subscription_plan_semaphore():
             try:
                 task_results = task(self, *args, **kwargs)
             finally:
-                release_subscription_plan_lock(subscription_plan)
+                release_subscription_plan_lock(subscription_plan, holder=lock_holder)
             return task_results
         return wrapped_task
     return decorator
@@ -92,6 +132,11 @@ def provision_licenses_task(self, subscription_plan_uuid=None):  # pylint: disab
     `desired_num_licenses` field of that subscription plan.  Never decrease the count of licenses; if there are already
     more licenses than `desired_num_licenses`, do nothing.
 
+    The licenses are provisioned by a LicenseProvisioningJob, whose shards are each provisioned in parallel by
+    ``provision_licenses_shard_task``. If the plan already has an unfinished job, its unfinished shards are
+    enqueued again instead of starting a new job; the gap left once that job completes is provisioned
+    when its last batch is committed, see ``LicenseProvisioningShard.provision_batch``.
+
     Args:
         subscription_plan_uuid (str): UUID of the SubscriptionPlan object to provision licenses for.
     """
@@ -103,17 +148,374 @@ def provision_licenses_task(self, subscription_plan_uuid=None):  # pylint: disab
             f'because desired_num_licenses is not set on this subscription plan.'
         )
         return
-    license_count_gap = subscription_plan.desired_num_licenses - subscription_plan.num_licenses
-    if license_count_gap <= 0:
+    job = LicenseProvisioningJob.get_unfinished_job(subscription_plan)
+    if job:
+        logger.info(
+            f'Resuming license provisioning job {job.uuid} for subscription plan {subscription_plan_uuid}, '
+            f'which has provisioned {job.num_licenses_provisioned} of {job.num_licenses} licenses.'
+        )
+    else:
+        license_count_gap = subscription_plan.desired_num_licenses - subscription_plan.num_licenses
+        if license_count_gap <= 0:
+            logger.info(
+                f'Skipping task {self.name} with id {self.request.id} '
+                f'and args: {self.request.args}, kwargs: {self.request.kwargs}, '
+                f'because the actual license count ({subscription_plan.num_licenses}) '
+                f'already meets or exceeds the desired license count ({subscription_plan.desired_num_licenses}).'
+            )
+            return
+        # It's safe to size the job from the current license count, since we lock this subscription plan
+        # (via @subscription_plan_semaphore decorator) and only ever have one unfinished job per plan.
+        job = LicenseProvisioningJob.create_job(
+            subscription_plan,
+            license_count_gap,
+            shard_size=PROVISION_LICENSES_SHARD_SIZE,
+        )
+        logger.info(
+            f'Created license provisioning job {job.uuid} for subscription plan {subscription_plan_uuid} '
+            f'to provision {license_count_gap} licenses.'
+        )
+
+    for shard_id in job.get_unfinished_shards().values_list('id', flat=True):
+        provision_licenses_shard_task.delay(shard_id)
+
+
+@shared_task(
+    base=LoggedTaskWithRetry,
+    bind=True,
+    default_retry_delay=TASK_RETRY_SECONDS,
+    soft_time_limit=PROVISION_LICENSES_TIME_LIMIT_SECONDS,
+    time_limit=PROVISION_LICENSES_TIME_LIMIT_SECONDS,
+)
+def provision_licenses_shard_task(self, shard_id):  # pylint: disable=unused-argument
+    """
+    Provision the licenses of one shard of a license provisioning job that haven't been provisioned yet,
+    in batches of ``PROVISION_LICENSES_BATCH_SIZE`` licenses.
+
+    Every batch commits along with the shard's progress, so retrying (or re-running) the task
+    resumes the shard rather than provisioning its licenses again.
+
+    Args:
+        shard_id (int): ID of the LicenseProvisioningShard object to provision licenses for.
+    """
+    num_provisioned = 0
+    while True:
+        num_new_licenses = LicenseProvisioningShard.provision_batch(shard_id, PROVISION_LICENSES_BATCH_SIZE)
+        if not num_new_licenses:
+            break
+        num_provisioned += num_new_licenses
+    logger.info(f'Provisioned {num_provisioned} licenses for license provisioning shard {shard_id}.')
+
+
+@shared_task(
+    base=LoggedTaskWithRetry,
+    bind=True,
+    default_retry_delay=TASK_RETRY_SECONDS,
+    soft_time_limit=PROVISION_LICENSES_TIME_LIMIT_SECONDS,
+    time_limit=PROVISION_LICENSES_TIME_LIMIT_SECONDS,
+)
+@subscription_plan_semaphore()
+def auto_scale_plan_task(self, subscription_plan_uuid=None, num_licenses=None, num_new_licenses=None):
+    """
+    Add ``num_new_licenses`` licenses to an auto-scaling subscription plan, unless the plan's license count
+    has changed from the ``num_licenses`` it was evaluated with (e.g. because it was already auto-scaled),
+    so that running the task twice for the same evaluation only scales the plan once.
+
+    Args:
+        subscription_plan_uuid (str): UUID of the SubscriptionPlan object to auto-scale.
+        num_licenses (int): The plan's license count when it was evaluated for auto-scaling.
+        num_new_licenses (int): The number of licenses to add to the plan.
+    """
+    subscription_plan = SubscriptionPlan.objects.get(uuid=subscription_plan_uuid)
+    if subscription_plan.num_licenses != num_licenses:
         logger.info(
             f'Skipping task {self.name} with id {self.request.id} '
             f'and args: {self.request.args}, kwargs: {self.request.kwargs}, '
-            f'because the actual license count ({subscription_plan.num_licenses}) '
-            f'already meets or exceeds the desired license count ({subscription_plan.desired_num_licenses}).'
+            f'because the license count ({subscription_plan.num_licenses}) changed since the plan was evaluated.'
         )
         return
+    logger.info('Auto-scaling %s by %s licenses', subscription_plan, num_new_licenses)
+    subscription_plan.increase_num_licenses(num_new_licenses)
+    logger.info('Auto-scaling completed for %s', subscription_plan)
+
+
+@shared_task(base=LoggedTaskWithRetry, default_retry_delay=TASK_RETRY_SECONDS)
+def track_license_expirations_task(subscription_plan_uuid):
+    """
+    Send the expiration events of an expired subscription plan's licenses that weren't renewed.
+
+    The licenses are split into LicenseExpirationEventBatches of ``TRACK_LICENSE_CHANGES_BATCH_SIZE`` licenses,
+    whose events are each sent in parallel by ``track_license_expiration_batch_task``. Running the task again
+    only sends the events of batches that haven't been sent yet, and of licenses that aren't in a batch yet.
+
+    Args:
+        subscription_plan_uuid (str): UUID of the SubscriptionPlan object whose licenses expired.
+    """
+    subscription_plan = SubscriptionPlan.objects.get(uuid=subscription_plan_uuid)
+    new_batches = LicenseExpirationEventBatch.create_batches(subscription_plan, TRACK_LICENSE_CHANGES_BATCH_SIZE)
+    logger.info(
+        f'Recorded {len(new_batches)} new license expiration event batches for subscription plan '
+        f'{subscription_plan_uuid}.'
+    )
+
+    unsent_batch_ids = LicenseExpirationEventBatch.objects.filter(
+        subscription_plan=subscription_plan,
+        sent_at__isnull=True,
+    ).order_by('first_license_uuid').values_list('id', flat=True)
+    for batch_id in unsent_batch_ids:
+        track_license_expiration_batch_task.delay(batch_id)
+
+
+@shared_task(base=LoggedTaskWithRetry, default_retry_delay=TASK_RETRY_SECONDS)
+def track_license_expiration_batch_task(batch_id):
+    """
+    Send the expiration events of the licenses in a LicenseExpirationEventBatch, unless they were already sent.
+
+    Args:
+        batch_id (int): ID of the LicenseExpirationEventBatch object to send events for.
+    """
+    with transaction.atomic():
+        # Lock the batch, so that the same batch running twice at once doesn't send its events twice
+        batch = LicenseExpirationEventBatch.objects.select_for_update().get(id=batch_id)
+        if batch.sent_at:
+            logger.info(f'Skipping license expiration event batch {batch_id}, whose events were already sent.')
+            return
+
+        licenses = batch.get_licenses()
+        track_license_changes(licenses, SegmentEvents.LICENSE_EXPIRED)
+        batch.sent_at = localized_utcnow()
+        batch.save(update_fields=['sent_at', 'modified'])
+
+
+def get_licenses_activated_180_days_ago(enterprise_customer_uuid):
+    """
+    Get activated licenses.
+
+    Fetch licenses where:
+        * A user is a linked VSF learner.
+        * They had a subscription license activated to them 180 days ago.
+        * The license is still active.
+        * No ``LICENSE_ACTIVATED_180_DAYS_AGO`` event was triggered for the license yet.
+    """
+    now = localized_utcnow()
+
+    customer_agreement = CustomerAgreement.objects.get(enterprise_customer_uuid=enterprise_customer_uuid)
+
+    subscription_plan_uuids = list(customer_agreement.subscriptions.values_list('uuid', flat=True))
+
+    # Looked up with the (license, event_name) index of LicenseEvent
+    event_exists_subquery = LicenseEvent.objects.filter(
+        license=OuterRef('pk'),
+        event_name=SegmentEvents.LICENSE_ACTIVATED_180_DAYS_AGO
+    )
+
+    return License.objects.filter(
+        subscription_plan__uuid__in=subscription_plan_uuids,
+        subscription_plan__is_active=True,
+        activation_date__lt=(now - timedelta(days=180)),
+        status=ACTIVATED
+    ).exclude(Exists(event_exists_subquery))
+
+
+@shared_task(base=LoggedTaskWithRetry, default_retry_delay=TASK_RETRY_SECONDS)
+def trigger_license_activated_180_days_ago_events_task(enterprise_customer_uuid, log_prefix, fire_event):
+    """
+    Trigger segment event for learners of an enterprise, whose licenses were activated 180 days ago.
+
+    The events of each batch of ``LICENSE_EVENTS_BATCH_SIZE`` licenses are written to the outbox of pending
+    tracking events along with the LicenseEvents that record them, so running the task again only triggers
+    the events of licenses that it hasn't triggered them for yet.
+
+    Args:
+        enterprise_customer_uuid (str): UUID of the enterprise customer whose learners to trigger events for.
+        log_prefix (str): Prefix of the task's log messages.
+        fire_event (bool): Whether to trigger the events, or to only log the learners they would be triggered for.
+    """
+    logger.info('%s Processing started for licenses. Enterprise: [%s]', log_prefix, enterprise_customer_uuid)
+
+    activated_licenses = get_licenses_activated_180_days_ago(enterprise_customer_uuid)
+    if not activated_licenses.exists():
+        logger.info(
+            '%s No licenses were found that were activated by a learner 180 days ago.',
+            log_prefix
+        )
+
+    for licenses in keyset_batches(
+        activated_licenses,
+        LICENSE_EVENTS_BATCH_SIZE,
+        key_field='uuid',
+        values=['lms_user_id', 'user_email'],
+    ):
+        user_ids = [license.get('lms_user_id') for license in licenses]
+
+        if fire_event:
+            with transaction.atomic():
+                enqueue_events(
+                    (
+                        license.get('lms_user_id'),
+                        SegmentEvents.LICENSE_ACTIVATED_180_DAYS_AGO,
+                        {'user_email': license.get('user_email')},
+                    )
+                    for license in licenses
+                )
+                LicenseEvent.objects.bulk_create([
+                    LicenseEvent(
+                        license_id=license.get('uuid'),
+                        event_name=SegmentEvents.LICENSE_ACTIVATED_180_DAYS_AGO,
+                    )
+                    for license in licenses
+                ])
+
+        logger.info(
+            "%s segment events triggered. Enterprise: [%s], UserIds: [%s].",
+            log_prefix,
+            enterprise_customer_uuid,
+            user_ids
+        )
+
+    logger.info('%s Processing completed for licenses. Enterprise: [%s]', log_prefix, enterprise_customer_uuid)
+
+
+def get_unlinkable_expired_licenses(log_prefix, enterprise_customer_uuid):
+    """
+    Get the expired licenses of an enterprise whose learners weren't unlinked yet.
+    """
+    now = localized_utcnow()
+
+    customer_agreement = CustomerAgreement.objects.get(enterprise_customer_uuid=enterprise_customer_uuid)
+
+    # fetch expired subscription plans where the expiration date is older than 90 days.
+    expired_subscription_plans = SubscriptionPlan.objects.filter(
+        customer_agreement=customer_agreement,
+        expiration_date__lt=now - timedelta(days=90),
+    ).values('uuid', 'expiration_date')
+
+    # log expired plan uuids and their expiration dates
+    for plan in expired_subscription_plans:
+        logger.info(
+            '%s Expired plan. UUID: [%s], ExpirationDate: [%s]',
+            log_prefix,
+            plan.get('uuid'),
+            plan.get('expiration_date')
+        )
+
+    expired_subscription_plan_uuids = [
+        plan.get('uuid') for plan in expired_subscription_plans
+    ]
+
+    # exclude previously processed licenses, looked up with the (license, event_name) index of LicenseEvent
+    event_exists_subquery = LicenseEvent.objects.filter(
+        license=OuterRef('pk'),
+        event_name=EXPIRED_LICENSE_UNLINKED
+    )
+
+    return License.objects.filter(
+        status__in=[ASSIGNED, ACTIVATED],
+        renewed_to=None,
+        subscription_plan__uuid__in=expired_subscription_plan_uuids,
+    ).exclude(Exists(event_exists_subquery))
+
+
+def _get_learners_with_active_licenses(licenses, enterprise_customer_uuid):
+    """
+    Returns the emails and the lms user ids of the learners of the given licenses (``values()`` dicts)
+    that have an active license of a current plan of the enterprise, read with a single query.
+    """
+    user_emails = {license.get('user_email') for license in licenses if license.get('user_email')}
+    lms_user_ids = {license.get('lms_user_id') for license in licenses if license.get('lms_user_id') is not None}
+    now = localized_utcnow()
+    active_learners = License.objects.filter(
+        Q(user_email__in=user_emails) | Q(lms_user_id__in=lms_user_ids),
+        subscription_plan__customer_agreement__enterprise_customer_uuid=enterprise_customer_uuid,
+        subscription_plan__is_active=True,
+        subscription_plan__start_date__lte=now,
+        subscription_plan__expiration_date__gte=now,
+    ).values_list('user_email', 'lms_user_id')
+    active_user_emails = {user_email for user_email, _ in active_learners}
+    active_lms_user_ids = {lms_user_id for _, lms_user_id in active_learners if lms_user_id is not None}
+    return active_user_emails, active_lms_user_ids
+
+
+@shared_task(base=LoggedTaskWithRetry, default_retry_delay=TASK_RETRY_SECONDS)
+def unlink_expired_licenses_task(enterprise_customer_uuid, log_prefix, unlink):
+    """
+    Unlink the learners of an enterprise's licenses that expired over 90 days ago, unless they have
+    other active licenses with the enterprise.
+
+    The learners of each batch of ``LICENSE_EVENTS_BATCH_SIZE`` licenses are unlinked with a single request,
+    and LicenseEvents are recorded for the batch's licenses once it succeeds, so running the task again only
+    unlinks the learners of licenses that it hasn't unlinked yet.
+
+    Args:
+        enterprise_customer_uuid (str): UUID of the enterprise customer whose learners to unlink.
+        log_prefix (str): Prefix of the task's log messages.
+        unlink (bool): Whether to unlink the learners, or to only log the learners that would be unlinked.
+    """
+    logger.info('%s Unlinking started for licenses. Enterprise: [%s]', log_prefix, enterprise_customer_uuid)
+
+    expired_licenses = get_unlinkable_expired_licenses(log_prefix, enterprise_customer_uuid)
+    if not expired_licenses.exists():
+        logger.info(
+            '%s No expired licenses were found for enterprise: [%s].',
+            log_prefix, enterprise_customer_uuid
+        )
+
+    for licenses in keyset_batches(
+        expired_licenses,
+        LICENSE_EVENTS_BATCH_SIZE,
+        key_field='uuid',
+        values=['lms_user_id', 'user_email'],
+    ):
+        # check if the users associated with the expired licenses
+        # have any other active licenses with the same customer
+        active_user_emails, active_lms_user_ids = _get_learners_with_active_licenses(
+            licenses,
+            enterprise_customer_uuid,
+        )
+
+        license_uuids = []
+        user_emails = []
+        for license in licenses:
+            logger.info(
+                "%s Processing. Enterprise: [%s], User: [%s]. License: [%s]",
+                log_prefix,
+                enterprise_customer_uuid,
+                license.get('user_email'),
+                license.get('uuid')
+            )
+
+            if license.get('user_email') in active_user_emails or license.get('lms_user_id') in active_lms_user_ids:
+                logger.info(
+                    '%s Can not unlink. User has other active licenses. User: [%s]. License: [%s]',
+                    log_prefix,
+                    license.get('user_email'),
+                    license.get('uuid')
+                )
+                continue
+
+            license_uuids.append(license.get('uuid'))
+            user_emails.append(license.get('user_email'))
+
+        if unlink and user_emails:
+            EnterpriseApiClient().bulk_unlink_enterprise_users(
+                enterprise_customer_uuid,
+                {
+                    'user_emails': user_emails,
+                    'is_relinkable': True
+                },
+            )
+
+            # Create license events for unlinked licenses to avoid processing them again.
+            LicenseEvent.objects.bulk_create([
+                LicenseEvent(license_id=license_uuid, event_name=EXPIRED_LICENSE_UNLINKED)
+                for license_uuid in license_uuids
+            ])
+
+        logger.info(
+            "%s learners unlinked for licenses. Enterprise: [%s], LicenseUUIDs: [%s].",
+            log_prefix,
+            enterprise_customer_uuid,
+            license_uuids
+        )
 
-    # There's work to do, creating licenses! It should be safe to not re-check the license count between batches
-    # because we lock this subscription plan anyway (via @subscription_plan_semaphore decorator).
-    for batch_count in batch_counts(license_count_gap, batch_size=PROVISION_LICENSES_BATCH_SIZE):
-        subscription_plan.increase_num_licenses(batch_count)
+    logger.info('%s Unlinking completed for licenses. Enterprise: [%s]', log_prefix, enterprise_customer_uuid)
@@ -367,6 +367,96 @@ class RevocationTests(TestCase):
         self.assertEqual(subscription_plan.unassigned_licenses.count(), 1)
 
 
+@ddt.ddt
+class BulkRevocationTests(TestCase):
+    """
+    Tests for the ``revoke_licenses()`` and ``revoke_licenses_by_email()`` functions.
+    """
+    def setUp(self):
+        super().setUp()
+        self.subscription_plan = SubscriptionPlanFactory.create(
+            is_revocation_cap_enabled=True,
+            num_revocations_applied=0,
+            revoke_max_percentage=50,
+        )
+        self.activated_licenses = [
+            LicenseFactory.create(
+                status=constants.ACTIVATED,
+                subscription_plan=self.subscription_plan,
+                user_email=f'activated-{index}@example.com',
+            ) for index in range(3)
+        ]
+        self.assigned_license = LicenseFactory.create(
+            status=constants.ASSIGNED,
+            subscription_plan=self.subscription_plan,
+            user_email='assigned@example.com',
+        )
+
+    def test_revoke_licenses_respects_revocation_cap(self):
+        """
+        Only ceil(4 * 50%) = 2 activated licenses can be revoked, while assigned licenses are never capped.
+        """
+        user_licenses = self.activated_licenses + [self.assigned_license]
+
+        with freezegun.freeze_time(NOW):
+            revocation_results, revocation_failures = api.revoke_licenses(self.subscription_plan, user_licenses)
+
+        assert [result['revoked_license'] for result in revocation_results] == [
+            self.activated_licenses[0], self.activated_licenses[1], self.assigned_license,
+        ]
+        assert [result['original_status'] for result in revocation_results] == [
+            constants.ACTIVATED, constants.ACTIVATED, constants.ASSIGNED,
+        ]
+        assert len(revocation_failures) == 1
+        failed_license, exc = revocation_failures[0]
+        assert failed_license == self.activated_licenses[2]
+        assert 'limit has been reached' in str(exc)
+
+        self.subscription_plan.refresh_from_db()
+        assert self.subscription_plan.num_revocations_applied == 2
+        assert self.subscription_plan.license_count_by_status() == {
+            constants.ACTIVATED: 1,
+            constants.ASSIGNED: 0,
+            constants.UNASSIGNED: 3,
+            constants.REVOKED: 3,
+        }
+        for result in revocation_results:
+            revoked_license = result['revoked_license']
+            revoked_license.refresh_from_db()
+            assert revoked_license.revoked_date == NOW
+            assert revoked_license.history.filter(status=constants.REVOKED).exists()
+
+    @ddt.data(constants.REVOKED, constants.UNASSIGNED)
+    def test_revoke_licenses_unrevocable_status(self, license_status):
+        user_license = LicenseFactory.create(status=license_status, subscription_plan=self.subscription_plan)
+
+        revocation_results, revocation_failures = api.revoke_licenses(self.subscription_plan, [user_license])
+
+        assert revocation_results == []
+        assert 'status of {} cannot be revoked'.format(license_status) in str(revocation_failures[0][1])
+        user_license.refresh_from_db()
+        assert user_license.status == license_status
+
+    def test_revoke_licenses_by_email(self):
+        """
+        Results and errors follow the order of the given emails.
+        """
+        user_emails = ['assigned@example.com', 'nobody@example.com', 'activated-0@example.com']
+
+        # The number of queries doesn't depend on the number of emails or licenses
+        with self.assertNumQueries(18):
+            revocation_results, revocation_errors = api.revoke_licenses_by_email(self.subscription_plan, user_emails)
+
+        assert [(result['user_email'], result['revoked_license'].uuid) for result in revocation_results] == [
+            ('assigned@example.com', self.assigned_license.uuid),
+            ('activated-0@example.com', self.activated_licenses[0].uuid),
+        ]
+        assert len(revocation_errors) == 1
+        user_email, exc = revocation_errors[0]
+        assert user_email == 'nobody@example.com'
+        assert isinstance(exc, exceptions.LicenseNotFoundError)
+
+
 class SubscriptionFreezeTests(TestCase):
     """
     Tests for the freezing of a Subscription Plan where all unassigned licenses are deleted.
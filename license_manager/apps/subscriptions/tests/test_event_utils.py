@@ -8,14 +8,24 @@ from pytest import mark
 from license_manager.apps.subscriptions.constants import (
     ASSIGNED,
     ENTERPRISE_BRAZE_ALIAS_LABEL,
+    TRACKING_EVENT_MAX_ATTEMPTS,
     SegmentEvents,
 )
 from license_manager.apps.subscriptions.event_utils import (
     _iso_8601_format_string,
     _track_batch_events_via_braze_alias,
+    _track_events_via_braze_alias,
+    enqueue_event,
     get_license_tracking_properties,
+    get_license_tracking_properties_by_uuid,
+    identify_braze_alias,
+    send_pending_tracking_events,
     track_license_changes,
 )
+from license_manager.apps.subscriptions.models import (
+    License,
+    PendingTrackingEvent,
+)
 from license_manager.apps.subscriptions.tests.factories import (
     LicenseFactory,
     SubscriptionPlanFactory,
@@ -59,7 +69,61 @@ def test_get_license_tracking_properties():
 
 
 @mark.django_db
-@mock.patch('license_manager.apps.subscriptions.event_utils.get_license_tracking_properties', return_value={})
+def test_get_license_tracking_properties_by_uuid():
+    prior_license = LicenseFactory.create(subscription_plan=SubscriptionPlanFactory.create())
+    licenses = [
+        LicenseFactory.create(
+            subscription_plan=SubscriptionPlanFactory.create(),
+            lms_user_id=5,
+            user_email='edx@myexample.com',
+            status=ASSIGNED,
+        ),
+        LicenseFactory.create(subscription_plan=SubscriptionPlanFactory.create()),
+    ]
+    renewed_license_uuid = licenses[1].uuid
+    prior_license.renewed_to = licenses[1]
+    prior_license.save()
+    # Re-read the licenses, so none of their related objects are cached
+    licenses = list(License.objects.filter(uuid__in=[license_obj.uuid for license_obj in licenses]))
+
+    properties_by_uuid = get_license_tracking_properties_by_uuid(licenses)
+
+    assert properties_by_uuid == {
+        license_obj.uuid: get_license_tracking_properties(license_obj)
+        for license_obj in licenses
+    }
+    assert properties_by_uuid[renewed_license_uuid]['previous_license_uuid'] == str(prior_license.uuid)
+
+
+@mark.django_db
+def test_get_license_tracking_properties_by_uuid_deleted_license():
+    license_obj = LicenseFactory.create(subscription_plan=SubscriptionPlanFactory.create())
+    expected_properties = get_license_tracking_properties(license_obj)
+    License.objects.filter(uuid=license_obj.uuid).delete()
+
+    assert get_license_tracking_properties_by_uuid([license_obj]) == {license_obj.uuid: expected_properties}
+
+
+@mark.django_db
+def test_get_license_tracking_properties_by_uuid_num_queries(django_assert_num_queries):
+    """
+    Building the properties of 1000 licenses reads all of their related objects in a single query.
+    """
+    subscription_plan = SubscriptionPlanFactory.create()
+    License.objects.bulk_create([License(subscription_plan=subscription_plan) for _ in range(1000)])
+    licenses = list(License.objects.filter(subscription_plan=subscription_plan))
+
+    with django_assert_num_queries(1):
+        properties_by_uuid = get_license_tracking_properties_by_uuid(licenses)
+
+    assert len(properties_by_uuid) == 1000
+
+
+@mark.django_db
+@mock.patch(
+    'license_manager.apps.subscriptions.event_utils.get_license_tracking_properties_by_uuid',
+    side_effect=lambda licenses: {license_obj.uuid: {} for license_obj in licenses},
+)
 @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
 def test_track_license_changes(mock_track_event, _):
     licenses = LicenseFactory.create_batch(5)
@@ -70,7 +134,8 @@ def test_track_license_changes(mock_track_event, _):
 
 @mark.django_db
 @mock.patch(
-    'license_manager.apps.subscriptions.event_utils.get_license_tracking_properties', return_value={'counter': 1},
+    'license_manager.apps.subscriptions.event_utils.get_license_tracking_properties_by_uuid',
+    side_effect=lambda licenses: {license_obj.uuid: {'counter': 1} for license_obj in licenses},
 )
 @mock.patch('license_manager.apps.subscriptions.event_utils.track_event')
 def test_track_license_changes_with_properties(mock_track_event, _):
@@ -117,3 +182,118 @@ def test_track_event_via_braze_alias(mock_braze_client):
     _track_batch_events_via_braze_alias(test_event_name, {test_email: test_event_properties})
     mock_braze_client.return_value.create_braze_alias.assert_any_call([test_email], ENTERPRISE_BRAZE_ALIAS_LABEL)
     mock_braze_client.return_value.track_user.assert_any_call(attributes=[expected_attributes], events=[expected_event])
+
+
+@mock.patch('license_manager.apps.subscriptions.event_utils.BrazeApiClient', return_value=mock.MagicMock())
+def test_track_events_via_braze_alias_coalesces_emails(mock_braze_client):
+    events = [
+        ('a@example.com', 'first-event', {'license_uuid': '1', 'enterprise_customer_slug': 'x'}),
+        ('b@example.com', 'first-event', {'license_uuid': '2', 'enterprise_customer_slug': 'x'}),
+        ('a@example.com', 'second-event', {'license_uuid': '3', 'enterprise_customer_slug': 'y'}),
+    ]
+    _track_events_via_braze_alias(events)
+
+    mock_braze_client.return_value.create_braze_alias.assert_called_once_with(
+        ['a@example.com', 'b@example.com'], ENTERPRISE_BRAZE_ALIAS_LABEL,
+    )
+    track_user_kwargs = mock_braze_client.return_value.track_user.call_args.kwargs
+    # One attribute record per email, with the profile attributes of its latest event
+    assert [(attribute['email'], attribute['license_uuid']) for attribute in track_user_kwargs['attributes']] == [
+        ('a@example.com', '3'), ('b@example.com', '2'),
+    ]
+    assert [event['name'] for event in track_user_kwargs['events']] == ['first-event', 'first-event', 'second-event']
+
+
+@mock.patch('license_manager.apps.subscriptions.event_utils.BrazeApiClient', return_value=mock.MagicMock())
+def test_identify_braze_alias(mock_braze_client):
+    identify_braze_alias(5, 'edx@myexample.com')
+    mock_braze_client.return_value.identify_users.assert_called_once_with([
+        {'external_id': '5', 'user_alias': {'alias_label': 'hubspot', 'alias_name': 'edx@myexample.com'}},
+        {
+            'external_id': '5',
+            'user_alias': {'alias_label': ENTERPRISE_BRAZE_ALIAS_LABEL, 'alias_name': 'edx@myexample.com'},
+        },
+    ])
+
+
+@mock.patch('license_manager.apps.subscriptions.event_utils.BrazeApiClient', side_effect=ValueError)
+def test_identify_braze_alias_not_configured(_):
+    assert identify_braze_alias(5, 'edx@myexample.com') is None
+
+
+@mark.django_db
+def test_enqueue_event():
+    enqueue_event(5, SegmentEvents.LICENSE_ACTIVATED, {'assigned_email': 'edx@myexample.com'})
+    event = PendingTrackingEvent.objects.get()
+    assert event.lms_user_id == 5
+    assert event.event_name == SegmentEvents.LICENSE_ACTIVATED
+    assert event.properties == {'assigned_email': 'edx@myexample.com'}
+
+
+@mark.django_db
+@mock.patch('license_manager.apps.subscriptions.event_utils._track_events_via_braze_alias')
+@mock.patch('license_manager.apps.subscriptions.event_utils.analytics.track')
+def test_send_pending_tracking_events(mock_track, mock_track_via_braze_alias, settings):
+    settings.SEGMENT_KEY = 'test-key'
+    PendingTrackingEvent.objects.all().delete()
+    enqueue_event(5, SegmentEvents.LICENSE_ACTIVATED, {'assigned_email': 'a@example.com'})
+    enqueue_event(None, SegmentEvents.LICENSE_CREATED, {'assigned_email': ''})
+    for email in ['b@example.com', 'c@example.com', 'b@example.com']:
+        enqueue_event(None, SegmentEvents.LICENSE_ASSIGNED, {'assigned_email': email})
+    enqueue_event(None, SegmentEvents.LICENSE_REVOKED, {'assigned_email': 'c@example.com'})
+
+    assert send_pending_tracking_events() == (6, 0)
+
+    mock_track.assert_called_once_with(
+        user_id=5, event=SegmentEvents.LICENSE_ACTIVATED, properties={'assigned_email': 'a@example.com'},
+    )
+    # Events of any name, including several for the same email, are coalesced into a single braze batch
+    mock_track_via_braze_alias.assert_called_once_with([
+        ('b@example.com', SegmentEvents.LICENSE_ASSIGNED, {'assigned_email': 'b@example.com'}),
+        ('c@example.com', SegmentEvents.LICENSE_ASSIGNED, {'assigned_email': 'c@example.com'}),
+        ('b@example.com', SegmentEvents.LICENSE_ASSIGNED, {'assigned_email': 'b@example.com'}),
+        ('c@example.com', SegmentEvents.LICENSE_REVOKED, {'assigned_email': 'c@example.com'}),
+    ])
+    assert not PendingTrackingEvent.objects.exists()
+
+
+@mark.django_db
+@mock.patch(
+    'license_manager.apps.subscriptions.event_utils._track_events_via_braze_alias',
+    side_effect=Exception('braze is down'),
+)
+def test_send_pending_tracking_events_retries_failures(_, settings):
+    settings.SEGMENT_KEY = 'test-key'
+    PendingTrackingEvent.objects.all().delete()
+    enqueue_event(None, SegmentEvents.LICENSE_ASSIGNED, {'assigned_email': 'b@example.com'})
+
+    assert send_pending_tracking_events() == (0, 1)
+
+    event = PendingTrackingEvent.objects.get()
+    assert event.num_attempts == 1
+    assert event.next_attempt_at > localized_utcnow()
+    # The failed event isn't due to be retried yet
+    assert send_pending_tracking_events() == (0, 0)
+
+    PendingTrackingEvent.objects.update(num_attempts=TRACKING_EVENT_MAX_ATTEMPTS - 1, next_attempt_at=localized_utcnow())
+    assert send_pending_tracking_events() == (0, 1)
+    assert not PendingTrackingEvent.objects.exists()
+
+
+@mark.django_db
+@mock.patch('license_manager.apps.subscriptions.event_utils.analytics.track')
+def test_send_pending_tracking_events_leases_claimed_events(mock_track, settings):
+    settings.SEGMENT_KEY = 'test-key'
+    PendingTrackingEvent.objects.all().delete()
+    enqueue_event(5, SegmentEvents.LICENSE_ACTIVATED, {'assigned_email': 'a@example.com'})
+
+    def assert_event_leased(**kwargs):
+        # The event is leased to the call sending it, so a concurrent call doesn't send it again
+        assert PendingTrackingEvent.objects.get().next_attempt_at > localized_utcnow()
+        assert send_pending_tracking_events() == (0, 0)
+
+    mock_track.side_effect = assert_event_leased
+
+    assert send_pending_tracking_events() == (1, 0)
+    mock_track.assert_called_once()
+    assert not PendingTrackingEvent.objects.exists()
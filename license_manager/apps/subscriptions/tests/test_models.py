@@ -20,7 +20,9 @@ from license_manager.apps.subscriptions.models import (
     License,
     LicenseTransferJob,
     Notification,
+    SubscriptionLicenseSource,
     SubscriptionLicenseSourceType,
+    SubscriptionPlanLicenseCounts,
 )
 from license_manager.apps.subscriptions.tests.factories import (
     CustomerAgreementFactory,
@@ -48,14 +50,14 @@ class SubscriptionsModelTests(TestCase):
 
         cls.subscription_plan = SubscriptionPlanFactory()
 
-    @mock.patch('license_manager.apps.subscriptions.models.EnterpriseCatalogApiClient', return_value=mock.MagicMock())
+    @mock.patch('license_manager.apps.subscriptions.utils.EnterpriseCatalogApiClient')
     @ddt.data(True, False)
     def test_contains_content(self, contains_content, mock_enterprise_catalog_client):
         # Mock the value from the enterprise catalog client
         mock_enterprise_catalog_client().contains_content_items.return_value = contains_content
-        content_ids = ['test-key', 'another-key']
+        content_ids = ['test-key']
 
-        cache.delete(self.subscription_plan.get_contains_content_cache_key(content_ids))
+        cache.clear()
 
         assert self.subscription_plan.contains_content(content_ids) == contains_content
 
@@ -63,11 +65,26 @@ class SubscriptionsModelTests(TestCase):
         assert self.subscription_plan.contains_content(content_ids) == contains_content
 
         # ...but assert we only used the catalog client once
-        mock_enterprise_catalog_client().contains_content_items.assert_called_with(
+        mock_enterprise_catalog_client().contains_content_items.assert_called_once_with(
             self.subscription_plan.enterprise_catalog_uuid,
             content_ids,
         )
 
+    @mock.patch('license_manager.apps.subscriptions.utils.EnterpriseCatalogApiClient')
+    def test_contains_content_shared_by_catalog(self, mock_enterprise_catalog_client):
+        """
+        Plans linked to the same enterprise catalog share its cached content membership.
+        """
+        mock_enterprise_catalog_client().contains_content_items.return_value = True
+        other_plan = SubscriptionPlanFactory(enterprise_catalog_uuid=self.subscription_plan.enterprise_catalog_uuid)
+
+        cache.clear()
+
+        assert self.subscription_plan.contains_content(['test-key'])
+        assert other_plan.contains_content(['test-key'])
+
+        assert mock_enterprise_catalog_client().contains_content_items.call_count == 1
+
     def test_prior_renewals(self):
         renewed_subscription_plan_1 = SubscriptionPlanFactory.create()
         renewed_subscription_plan_2 = SubscriptionPlanFactory.create()
@@ -373,6 +390,16 @@ class LicenseModelTests(TestCase):
             assert self.CREATE_HISTORY_TYPE == user_license.history.earliest().history_type
             assert self.UPDATE_HISTORY_TYPE == user_license.history.first().history_type
 
+    @mock.patch('license_manager.apps.subscriptions.models.BULK_UPDATE_MAX_BATCH_SIZE', 2)
+    def test_get_bulk_write_batch_size_for_update(self):
+        """
+        Test that licenses are bulk updated in smaller batches than they're bulk created in.
+        """
+        licenses = [License(subscription_plan=self.subscription_plan) for _ in range(3)]
+
+        assert License.get_bulk_write_batch_size(licenses) == 3
+        assert License.get_bulk_write_batch_size(licenses, ['status']) == 2
+
     def test_for_user_and_customer_no_kwargs(self):
         expected_licenses = [
             self.active_current_license,
@@ -455,6 +482,35 @@ class LicenseModelTests(TestCase):
             unassigned_license.status = new_status
             unassigned_license.save()
 
+    def test_bulk_retire_pii(self):
+        """
+        Test that pii is removed from the licenses and their history, the given fields are set,
+        and the licenses' sources are deleted.
+        """
+        # A plan may only have one activated license per email
+        licenses = [
+            LicenseFactory.create(
+                user_email=f'retired-{index}@example.com',
+                subscription_plan=self.active_current_plan,
+                status=ACTIVATED,
+            )
+            for index in range(3)
+        ]
+        SubscriptionLicenseSourceFactory.create(license=licenses[0])
+
+        with self.assertLogs(level='WARNING') as log:
+            License.bulk_retire_pii(licenses, status=REVOKED)
+        assert len(log.output) == 2
+
+        for license_obj in licenses:
+            license_obj.refresh_from_db()
+            assert license_obj.user_email is None
+            assert license_obj.status == REVOKED
+            assert not license_obj.history.filter(user_email__isnull=False).exists()
+            assert license_obj.history.first().history_type == self.UPDATE_HISTORY_TYPE
+        assert not SubscriptionLicenseSource.objects.filter(license__in=licenses).exists()
+        assert SubscriptionPlanLicenseCounts.objects.get(subscription_plan=self.active_current_plan).num_revoked == 3
+
 
 class CustomerAgreementTests(TestCase):
     """
@@ -482,6 +538,68 @@ class CustomerAgreementTests(TestCase):
             assert self.customer_agreement.net_days_until_expiration == expected_days
 
 
+class SubscriptionPlanLicenseCountsTests(TestCase):
+    """
+    Tests for the `SubscriptionPlanLicenseCounts` model.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.plan = SubscriptionPlanFactory()
+        self.other_plan = SubscriptionPlanFactory()
+
+    def assert_counts_match_licenses(self, *plans):
+        for plan in plans:
+            stored = SubscriptionPlanLicenseCounts.objects.get(subscription_plan=plan).count_by_status()
+            assert stored == SubscriptionPlanLicenseCounts.count_licenses_by_status(plan)
+
+    def test_counts_follow_license_transitions(self):
+        """
+        Verify the stored counts track saves, bulk writes, queryset updates and deletes.
+        """
+        self.plan.increase_num_licenses(4)
+        assigned_license = LicenseFactory(subscription_plan=self.plan, status=ASSIGNED, user_email='a@example.com')
+        self.assert_counts_match_licenses(self.plan)
+        assert self.plan.license_count_by_status() == {ACTIVATED: 0, ASSIGNED: 1, UNASSIGNED: 4, REVOKED: 0}
+
+        assigned_license.activate(lms_user_id=1)
+        assigned_license.revoke()
+        self.plan.increase_num_licenses(1)
+        assert self.plan.num_licenses == 5
+        assert self.plan.num_allocated_licenses == 0
+
+        unassigned_licenses = list(self.plan.unassigned_licenses)
+        for index, unassigned_license in enumerate(unassigned_licenses[:2]):
+            unassigned_license.status = ASSIGNED
+            unassigned_license.user_email = f'learner-{index}@example.com'
+        License.bulk_update(unassigned_licenses[:2], ['status', 'user_email'])
+        assert self.plan.num_allocated_licenses == 2
+
+        for transferred_license in unassigned_licenses[:2]:
+            transferred_license.subscription_plan = self.other_plan
+        License.bulk_update(unassigned_licenses[:2], ['subscription_plan'])
+        self.plan.licenses.filter(status=UNASSIGNED).update(status=REVOKED)
+        self.other_plan.licenses.first().delete()
+        self.assert_counts_match_licenses(self.plan, self.other_plan)
+        assert self.plan.license_count_by_status() == {ACTIVATED: 0, ASSIGNED: 0, UNASSIGNED: 0, REVOKED: 4}
+        assert self.other_plan.license_count_by_status() == {ACTIVATED: 0, ASSIGNED: 1, UNASSIGNED: 0, REVOKED: 0}
+
+    def test_counts_computed_when_missing(self):
+        """
+        Verify that a plan without stored counts has them computed from its licenses on first read.
+        """
+        LicenseFactory.create_batch(3, subscription_plan=self.plan)
+        SubscriptionPlanLicenseCounts.objects.filter(subscription_plan=self.plan).delete()
+
+        assert self.plan.num_licenses == 3
+        self.assert_counts_match_licenses(self.plan)
+
+    def test_num_licenses_is_single_query(self):
+        LicenseFactory.create_batch(3, subscription_plan=self.plan, status=ASSIGNED)
+        with self.assertNumQueries(1):
+            assert self.plan.highest_utilization_threshold_reached == 1
+
+
 @ddt.ddt
 class SubscriptionLicenseSourceModelTests(TestCase):
     """
@@ -4,6 +4,7 @@ Tests for subscriptions app celery tasks
 from unittest import mock
 
 import ddt
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
 from license_manager.apps.api.utils import (
@@ -11,9 +12,21 @@ from license_manager.apps.api.utils import (
     release_subscription_plan_lock,
 )
 from license_manager.apps.subscriptions import tasks
+from license_manager.apps.subscriptions.constants import SegmentEvents
+from license_manager.apps.subscriptions.models import (
+    LicenseExpirationEventBatch,
+    LicenseProvisioningJob,
+    LicenseProvisioningShard,
+    SubscriptionPlanLicenseCounts,
+)
 from license_manager.apps.subscriptions.tests.factories import (
+    LicenseFactory,
     SubscriptionPlanFactory,
 )
+from license_manager.apps.subscriptions.utils import (
+    localized_utcnow,
+    provision_licenses,
+)
 
 
 # pylint: disable=unused-argument
@@ -25,12 +38,19 @@ class ProvisionLicensesTaskTests(TestCase):
     def setUp(self):
         super().setUp()
         self.subscription_plan = SubscriptionPlanFactory()
+        # Provision the shards in place, rather than dispatching a task per shard to the workers
+        self.mock_provision_shard_mocker = mock.patch(
+            'license_manager.apps.subscriptions.tasks.provision_licenses_shard_task.delay',
+            side_effect=tasks.provision_licenses_shard_task,
+        )
+        self.mock_provision_shard = self.mock_provision_shard_mocker.start()
 
     def tearDown(self):
         super().tearDown()
+        self.mock_provision_shard_mocker.stop()
         release_subscription_plan_lock(self.subscription_plan)
 
-    # For all cases below, assume batch size of 5.
+    # For all cases below, assume batch size of 5 and shard size of 8.
     @ddt.data(
         # Don't add licenses if none are desired.
         {
@@ -83,6 +103,7 @@ class ProvisionLicensesTaskTests(TestCase):
     )
     @ddt.unpack
     @mock.patch('license_manager.apps.subscriptions.tasks.PROVISION_LICENSES_BATCH_SIZE', 5)
+    @mock.patch('license_manager.apps.subscriptions.tasks.PROVISION_LICENSES_SHARD_SIZE', 8)
     def test_provision_licenses_task(self, num_initial_licenses, desired_num_licenses, expected_num_licenses):
         """
         Test provision_licenses_task.
@@ -96,6 +117,113 @@ class ProvisionLicensesTaskTests(TestCase):
 
         assert self.subscription_plan.num_licenses == expected_num_licenses
 
+    @mock.patch('license_manager.apps.subscriptions.tasks.PROVISION_LICENSES_BATCH_SIZE', 5)
+    @mock.patch('license_manager.apps.subscriptions.tasks.PROVISION_LICENSES_SHARD_SIZE', 8)
+    def test_provision_licenses_task_records_job(self):
+        """
+        Test provision_licenses_task splits the gap into shards and records the job as completed.
+        """
+        self.subscription_plan.desired_num_licenses = 20
+        self.subscription_plan.save()
+
+        # pylint: disable=no-value-for-parameter
+        tasks.provision_licenses_task(subscription_plan_uuid=self.subscription_plan.uuid)
+
+        job = LicenseProvisioningJob.objects.get(subscription_plan=self.subscription_plan)
+        assert job.num_licenses == job.num_licenses_provisioned == 20
+        assert self.mock_provision_shard.call_args_list == [
+            mock.call(shard_id) for shard_id in job.shards.order_by('index').values_list('id', flat=True)
+        ]
+        assert job.completed_at is not None
+        assert list(job.shards.order_by('index').values_list('num_licenses', 'num_licenses_provisioned')) == [
+            (8, 8), (8, 8), (4, 4),
+        ]
+        assert LicenseProvisioningJob.get_unfinished_job(self.subscription_plan) is None
+
+    def test_provision_licenses_task_resumes_unfinished_job(self):
+        """
+        Test provision_licenses_task finishes an unfinished job rather than sizing a new one, so that it never
+        provisions more licenses than the plan was short of.
+        """
+        self.subscription_plan.desired_num_licenses = 10
+        self.subscription_plan.save()
+        job = LicenseProvisioningJob.create_job(self.subscription_plan, 10, shard_size=4)
+        LicenseProvisioningShard.provision_batch(job.shards.get(index=0).id, batch_size=4)
+        LicenseProvisioningShard.provision_batch(job.shards.get(index=1).id, batch_size=1)
+
+        # pylint: disable=no-value-for-parameter
+        tasks.provision_licenses_task(subscription_plan_uuid=self.subscription_plan.uuid)
+
+        assert self.subscription_plan.num_licenses == 10
+        job.refresh_from_db()
+        assert job.num_licenses_provisioned == 10
+        assert job.completed_at is not None
+        assert LicenseProvisioningJob.objects.filter(subscription_plan=self.subscription_plan).count() == 1
+
+    def test_provision_licenses_shard_task_is_idempotent(self):
+        """
+        Test running provision_licenses_shard_task again for a shard that's done provisions no more licenses.
+        """
+        job = LicenseProvisioningJob.create_job(self.subscription_plan, 6, shard_size=3)
+        shard = job.shards.get(index=0)
+
+        tasks.provision_licenses_shard_task(shard.id)
+        tasks.provision_licenses_shard_task(shard.id)
+
+        assert self.subscription_plan.num_licenses == 3
+        shard.refresh_from_db()
+        assert shard.num_licenses_provisioned == 3
+        job.refresh_from_db()
+        assert job.num_licenses_provisioned == 3
+        assert job.completed_at is None
+
+    def test_provision_batch_counts_licenses(self):
+        """
+        Test the licenses of each batch of a shard are added to the plan's license counts.
+        """
+        SubscriptionPlanLicenseCounts.reconcile(self.subscription_plan)
+        job = LicenseProvisioningJob.create_job(self.subscription_plan, 6, shard_size=3)
+
+        LicenseProvisioningShard.provision_batch(job.shards.get(index=0).id, batch_size=2)
+        LicenseProvisioningShard.provision_batch(job.shards.get(index=1).id, batch_size=3)
+
+        counts = SubscriptionPlanLicenseCounts.objects.get(subscription_plan=self.subscription_plan)
+        assert counts.num_unassigned == 5
+        assert counts.num_unassigned == self.subscription_plan.licenses.count()
+
+    @mock.patch('license_manager.apps.subscriptions.tasks.provision_licenses_task.delay')
+    def test_provision_licenses_defers_to_unfinished_job(self, mock_provision_licenses_task):
+        """
+        Test provisioning a plan that has an unfinished job defers to provision_licenses_task, rather than
+        synchronously provisioning licenses that the job will also provision.
+        """
+        self.subscription_plan.desired_num_licenses = 10
+        self.subscription_plan.save()
+        job = LicenseProvisioningJob.create_job(self.subscription_plan, 10, shard_size=4)
+        LicenseProvisioningShard.provision_batch(job.shards.get(index=0).id, batch_size=4)
+
+        provision_licenses(self.subscription_plan)
+
+        assert self.subscription_plan.num_licenses == 4
+        mock_provision_licenses_task.assert_called_once_with(subscription_plan_uuid=self.subscription_plan.uuid)
+
+    def test_completed_job_provisions_remaining_gap(self):
+        """
+        Test the plan is provisioned again once its job completes, in case its desired_num_licenses
+        was raised while the job ran.
+        """
+        self.subscription_plan.desired_num_licenses = 3
+        self.subscription_plan.save()
+        job = LicenseProvisioningJob.create_job(self.subscription_plan, 3, shard_size=3)
+        self.subscription_plan.desired_num_licenses = 5
+        self.subscription_plan.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks.provision_licenses_shard_task(job.shards.get().id)
+
+        assert self.subscription_plan.num_licenses == 5
+        assert LicenseProvisioningJob.get_unfinished_job(self.subscription_plan) is None
+
     def test_provision_licenses_task_locked(self):
         """
         Test provision_licenses_task throws an exception if the subscription is locked.
@@ -110,3 +238,109 @@ class ProvisionLicensesTaskTests(TestCase):
             tasks.provision_licenses_task(subscription_plan_uuid=self.subscription_plan.uuid)
 
         assert self.subscription_plan.num_licenses == 0
+
+
+class TrackLicenseExpirationsTaskTests(TestCase):
+    """
+    Tests for track_license_expirations_task and track_license_expiration_batch_task.
+    """
+    def setUp(self):
+        super().setUp()
+        self.subscription_plan = SubscriptionPlanFactory()
+        self.licenses = LicenseFactory.create_batch(5, subscription_plan=self.subscription_plan)
+        # A renewed license doesn't expire
+        self.renewed_license = LicenseFactory(
+            subscription_plan=self.subscription_plan,
+            renewed_to=LicenseFactory(),
+        )
+        # Run the tasks in place, rather than dispatching them to the workers
+        self.mock_track_expirations_mocker = mock.patch(
+            'license_manager.apps.subscriptions.tasks.track_license_expirations_task.delay',
+            side_effect=tasks.track_license_expirations_task,
+        )
+        self.mock_track_expirations = self.mock_track_expirations_mocker.start()
+        self.mock_track_expiration_batch_mocker = mock.patch(
+            'license_manager.apps.subscriptions.tasks.track_license_expiration_batch_task.delay',
+            side_effect=tasks.track_license_expiration_batch_task,
+        )
+        self.mock_track_expiration_batch = self.mock_track_expiration_batch_mocker.start()
+
+    def tearDown(self):
+        super().tearDown()
+        self.mock_track_expirations_mocker.stop()
+        self.mock_track_expiration_batch_mocker.stop()
+
+    def _tracked_license_uuids(self, mock_track_license_changes):
+        return [
+            license_obj.uuid
+            for call in mock_track_license_changes.call_args_list
+            for license_obj in call.args[0]
+        ]
+
+    @mock.patch('license_manager.apps.subscriptions.tasks.TRACK_LICENSE_CHANGES_BATCH_SIZE', 2)
+    @mock.patch('license_manager.apps.subscriptions.tasks.track_license_changes')
+    def test_expiring_plan_tracks_events_in_batches(self, mock_track_license_changes):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subscription_plan.expiration_processed = True
+            self.subscription_plan.save(update_fields=['expiration_processed'])
+
+        self.mock_track_expirations.assert_called_once_with(str(self.subscription_plan.uuid))
+        assert self.mock_track_expiration_batch.call_count == 3
+        assert mock_track_license_changes.call_count == 3
+        for call in mock_track_license_changes.call_args_list:
+            assert call.args[1] == SegmentEvents.LICENSE_EXPIRED
+        assert sorted(self._tracked_license_uuids(mock_track_license_changes)) == sorted(
+            license_obj.uuid for license_obj in self.licenses
+        )
+        assert not self.subscription_plan.expiration_event_batches.filter(sent_at__isnull=True).exists()
+
+    @mock.patch('license_manager.apps.subscriptions.tasks.TRACK_LICENSE_CHANGES_BATCH_SIZE', 2)
+    @mock.patch('license_manager.apps.subscriptions.tasks.track_license_changes')
+    def test_resume_only_sends_unsent_batches(self, mock_track_license_changes):
+        license_uuids = sorted(license_obj.uuid for license_obj in self.licenses)
+        # Simulate a crash after the first batch was sent and the second one was recorded
+        LicenseExpirationEventBatch.objects.create(
+            subscription_plan=self.subscription_plan,
+            first_license_uuid=license_uuids[0],
+            last_license_uuid=license_uuids[1],
+            sent_at=localized_utcnow(),
+        )
+        LicenseExpirationEventBatch.objects.create(
+            subscription_plan=self.subscription_plan,
+            first_license_uuid=license_uuids[2],
+            last_license_uuid=license_uuids[3],
+        )
+
+        tasks.track_license_expirations_task(str(self.subscription_plan.uuid))
+
+        assert sorted(self._tracked_license_uuids(mock_track_license_changes)) == license_uuids[2:]
+        assert self.subscription_plan.expiration_event_batches.count() == 3
+
+        # Running the task again sends nothing more
+        mock_track_license_changes.reset_mock()
+        tasks.track_license_expirations_task(str(self.subscription_plan.uuid))
+        mock_track_license_changes.assert_not_called()
+
+    @mock.patch('license_manager.apps.subscriptions.tasks.track_license_changes')
+    def test_rolled_back_expiration_not_tracked(self, mock_track_license_changes):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.subscription_plan.expiration_processed = True
+                    self.subscription_plan.save(update_fields=['expiration_processed'])
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+
+        assert not callbacks
+        self.mock_track_expirations.assert_not_called()
+        mock_track_license_changes.assert_not_called()
+
+    @mock.patch('license_manager.apps.subscriptions.tasks.track_license_changes')
+    def test_unprocessed_expiration_not_tracked(self, mock_track_license_changes):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subscription_plan.expiration_processed = False
+            self.subscription_plan.save(update_fields=['expiration_processed'])
+
+        mock_track_license_changes.assert_not_called()
+        assert not self.subscription_plan.expiration_event_batches.exists()
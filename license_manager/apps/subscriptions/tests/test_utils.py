@@ -8,8 +8,17 @@ import uuid
 from unittest import TestCase, mock
 
 import ddt
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase as DjangoTestCase
+from django.test.utils import CaptureQueriesContext
 
 from license_manager.apps.subscriptions import utils
+from license_manager.apps.subscriptions.models import License
+from license_manager.apps.subscriptions.tests.factories import (
+    LicenseFactory,
+    SubscriptionPlanFactory,
+)
 
 
 def test_get_subsidy_checksum():
@@ -78,3 +87,171 @@ class TestBatchCounts(TestCase):
         """
         actual_batch_counts = list(utils.batch_counts(total_count, batch_size=batch_size))
         assert actual_batch_counts == expected_batch_counts
+
+
+class TestKeysetBatches(DjangoTestCase):
+    """
+    Tests for keyset_batches().
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.plan = SubscriptionPlanFactory()
+        licenses = LicenseFactory.create_batch(5, subscription_plan=self.plan)
+        self.license_uuids = sorted(license.uuid for license in licenses)
+        self.queryset = License.objects.filter(subscription_plan=self.plan)
+
+    def test_reads_each_batch_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            batches = [
+                [license.uuid for license in batch] for batch in utils.keyset_batches(self.queryset, 2)
+            ]
+        assert batches == [self.license_uuids[:2], self.license_uuids[2:4], self.license_uuids[4:]]
+        assert len(queries) == 3
+
+    def test_values(self):
+        batches = list(utils.keyset_batches(self.queryset, 3, key_field='uuid', values=['status']))
+        assert [row['uuid'] for row in batches[0]] == self.license_uuids[:3]
+        assert set(batches[0][0]) == {'uuid', 'status'}
+
+    def test_resumes_from_cursor(self):
+        batches = list(utils.keyset_batches(self.queryset, 10, start_after=self.license_uuids[2]))
+        assert [[license.uuid for license in batch] for batch in batches] == [self.license_uuids[3:]]
+
+    def test_rows_changed_while_iterating_are_not_skipped(self):
+        seen_uuids = []
+        for batch in utils.keyset_batches(self.queryset, 2):
+            seen_uuids.extend(license.uuid for license in batch)
+            License.objects.filter(uuid__in=[license.uuid for license in batch]).delete()
+        assert seen_uuids == self.license_uuids
+
+
+@ddt.ddt
+class TestGetBulkWriteBatchSize(TestCase):
+    """
+    Tests for get_bulk_write_batch_size().
+    """
+
+    @ddt.data(
+        # Without a packet size limit, everything up to the max batch size goes in one statement
+        {'num_objs': 0, 'row_bytes': 100, 'max_packet_bytes': None, 'expected_batch_size': 1},
+        {'num_objs': 300, 'row_bytes': 100, 'max_packet_bytes': None, 'expected_batch_size': 300},
+        {'num_objs': 20000, 'row_bytes': 100, 'max_packet_bytes': None, 'expected_batch_size': 5000},
+        # Small writes that fit in the packet go in one statement
+        {'num_objs': 300, 'row_bytes': 100, 'max_packet_bytes': 64 * 1024 * 1024, 'expected_batch_size': 300},
+        # Larger ones are capped at half the packet size
+        {'num_objs': 3000, 'row_bytes': 1000, 'max_packet_bytes': 1000 * 1000, 'expected_batch_size': 500},
+        # Rows bigger than half the packet are still written one at a time
+        {'num_objs': 3, 'row_bytes': 1000, 'max_packet_bytes': 1000, 'expected_batch_size': 1},
+    )
+    @ddt.unpack
+    def test_get_bulk_write_batch_size(self, num_objs, row_bytes, max_packet_bytes, expected_batch_size):
+        with mock.patch.object(utils, 'get_max_packet_bytes', return_value=max_packet_bytes):
+            assert utils.get_bulk_write_batch_size([object()] * num_objs, row_bytes) == expected_batch_size
+
+    def test_get_bulk_write_batch_size_max_batch_size(self):
+        with mock.patch.object(utils, 'get_max_packet_bytes', return_value=None):
+            assert utils.get_bulk_write_batch_size(
+                [object()] * 20000, 100, max_batch_size=utils.BULK_UPDATE_MAX_BATCH_SIZE,
+            ) == utils.BULK_UPDATE_MAX_BATCH_SIZE
+
+    def test_get_max_packet_bytes_sqlite(self):
+        assert utils.get_max_packet_bytes() is None
+
+
+CATALOG_CLIENT_PATH = 'license_manager.apps.subscriptions.utils.EnterpriseCatalogApiClient'
+
+
+@ddt.ddt
+class TestGetCatalogContentMembership(TestCase):
+    """
+    Tests for get_catalog_content_membership().
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.catalog_uuid = uuid.uuid4()
+
+    def _mock_catalog_client(self, catalog_content_ids):
+        """
+        Returns a mock catalog client whose catalog contains the given content ids.
+        """
+        mock_client = mock.MagicMock()
+        mock_client.contains_content_items.side_effect = lambda _, content_ids: bool(
+            set(content_ids) & set(catalog_content_ids)
+        )
+        return mock_client
+
+    @ddt.data(
+        # None of the content is in the catalog, settled by a single request.
+        {'catalog_content_ids': [], 'expected_num_requests': 1},
+        # A single content id in the catalog is found by splitting the batch in halves.
+        {'catalog_content_ids': ['course-b'], 'expected_num_requests': 4},
+        # Only the last content id is in the catalog, which the requests about the other halves settle.
+        {'catalog_content_ids': ['course-e'], 'expected_num_requests': 4},
+        {
+            'catalog_content_ids': ['course-a', 'course-b', 'course-c', 'course-d', 'course-e'],
+            'expected_num_requests': 9,
+        },
+    )
+    @ddt.unpack
+    def test_get_catalog_content_membership(self, catalog_content_ids, expected_num_requests):
+        content_ids = ['course-a', 'course-b', 'course-c', 'course-d', 'course-e']
+        mock_client = self._mock_catalog_client(catalog_content_ids)
+
+        with mock.patch(CATALOG_CLIENT_PATH, return_value=mock_client):
+            membership = utils.get_catalog_content_membership(self.catalog_uuid, content_ids)
+            assert membership == {content_id: content_id in catalog_content_ids for content_id in content_ids}
+            assert mock_client.contains_content_items.call_count == expected_num_requests
+
+            # Every content id is now cached, in any order and any combination.
+            mock_client.contains_content_items.reset_mock()
+            assert utils.get_catalog_content_membership(self.catalog_uuid, ['course-c', 'course-a']) == {
+                'course-c': 'course-c' in catalog_content_ids,
+                'course-a': 'course-a' in catalog_content_ids,
+            }
+            assert mock_client.contains_content_items.call_count == 0
+
+    def test_get_catalog_content_membership_only_requests_misses(self):
+        mock_client = self._mock_catalog_client(['course-a', 'course-b'])
+
+        with mock.patch(CATALOG_CLIENT_PATH, return_value=mock_client):
+            utils.get_catalog_content_membership(self.catalog_uuid, ['course-a'])
+            mock_client.contains_content_items.reset_mock()
+
+            membership = utils.get_catalog_content_membership(self.catalog_uuid, ['course-a', 'course-b'])
+
+        assert membership == {'course-a': True, 'course-b': True}
+        mock_client.contains_content_items.assert_called_once_with(self.catalog_uuid, ['course-b'])
+
+    def test_catalog_contains_any_content_cached_hit(self):
+        mock_client = self._mock_catalog_client(['course-a'])
+
+        with mock.patch(CATALOG_CLIENT_PATH, return_value=mock_client):
+            utils.get_catalog_content_membership(self.catalog_uuid, ['course-a'])
+            mock_client.contains_content_items.reset_mock()
+
+            assert utils.catalog_contains_any_content(self.catalog_uuid, ['course-b', 'course-a', 'course-c'])
+
+        mock_client.contains_content_items.assert_not_called()
+
+    @ddt.data(
+        {'catalog_content_ids': [], 'expected_cached_content_ids': ['course-a', 'course-b', 'course-c']},
+        # Which of the content ids is in the catalog isn't resolved, so none of them are cached
+        {'catalog_content_ids': ['course-b'], 'expected_cached_content_ids': []},
+    )
+    @ddt.unpack
+    def test_catalog_contains_any_content_single_request(self, catalog_content_ids, expected_cached_content_ids):
+        content_ids = ['course-a', 'course-b', 'course-c']
+        mock_client = self._mock_catalog_client(catalog_content_ids)
+
+        with mock.patch(CATALOG_CLIENT_PATH, return_value=mock_client):
+            assert utils.catalog_contains_any_content(self.catalog_uuid, content_ids) == bool(catalog_content_ids)
+
+        mock_client.contains_content_items.assert_called_once_with(self.catalog_uuid, content_ids)
+        cached_content_ids = [
+            content_id for content_id in content_ids
+            if utils.get_catalog_content_membership_cache_key(self.catalog_uuid, content_id) in cache
+        ]
+        assert cached_content_ids == expected_cached_content_ids
@@ -198,3 +198,10 @@ def assert_historical_pii_cleared(license_obj):
     """
     for history_record in license_obj.history.all():
         assert history_record.user_email is None
+
+
+def catalog_contains_all(enterprise_catalog_uuid, content_ids):  # pylint: disable=unused-argument
+    """
+    Stand-in for ``get_catalog_content_membership`` whose catalogs contain every piece of content.
+    """
+    return dict.fromkeys(content_ids, True)
@@ -1,11 +1,14 @@
 """ Utility functions for the subscriptions app. """
 import hashlib
 import hmac
+import logging
 import re
 from base64 import b64encode
 from datetime import datetime
 
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
 from pytz import UTC
 from requests.exceptions import HTTPError
 from rest_framework import status
@@ -21,6 +24,26 @@ from license_manager.apps.subscriptions.exceptions import (
 )
 
 
+logger = logging.getLogger(__name__)
+
+CONTAINS_CONTENT_CACHE_TIMEOUT = 60 * 60
+
+# The most rows a single bulk write statement will hold, however small the rows are
+BULK_WRITE_MAX_BATCH_SIZE = 5000
+# The most rows a single bulk_update() statement will hold. Its CASE WHEN expressions get slower to evaluate
+# with every row they hold, so these statements are kept much smaller than inserts of the same size
+BULK_UPDATE_MAX_BATCH_SIZE = 500
+# The share of the database's max packet size a single bulk write statement may fill
+BULK_WRITE_PACKET_FILL_RATIO = 0.5
+# The number of objects sampled to estimate the size of each row in a bulk write
+BULK_WRITE_ROW_SAMPLE_SIZE = 50
+# Rough number of bytes of SQL around each value, e.g. quotes and commas, or "WHEN pk = .. THEN" in an update
+BULK_WRITE_VALUE_OVERHEAD_BYTES = 4
+BULK_WRITE_UPDATE_VALUE_OVERHEAD_BYTES = 24
+
+_max_packet_bytes_by_alias = {}
+
+
 # pylint: disable=no-value-for-parameter
 def localized_utcnow():
     """Helper function to return localized utcnow()."""
@@ -74,6 +97,41 @@ def chunks(a_list, chunk_size):
         yield a_list[i:i + chunk_size]
 
 
+def keyset_batches(queryset, batch_size, key_field='pk', values=None, start_after=None):
+    """
+    Yields the rows of a queryset in lists of up to ``batch_size`` rows, ordered by ``key_field``.
+
+    Each batch is read with a single query that seeks past the key of the previous batch's last row,
+    so reading a batch costs the same however deep into the table it is, and rows that the caller
+    changes or deletes while iterating don't cause other rows to be skipped.
+
+    Arguments:
+        queryset (QuerySet): The rows to iterate over. Its ordering is replaced by ``key_field``.
+        batch_size (int): The most rows to read per query.
+        key_field (str): A unique field to order and seek by.
+        values (list of str): If given, yields ``values()`` dicts of these fields (and the key field)
+            instead of model instances.
+        start_after: If given, a cursor to resume from: only rows whose key is greater than it are yielded,
+            e.g. the key of the last row of a batch that was processed by a previous run.
+    Returns:
+        generator: returns a list of rows for each batch.
+    """
+    queryset = queryset.order_by(key_field)
+    if values is not None:
+        queryset = queryset.values(key_field, *[field for field in values if field != key_field])
+
+    last_key = start_after
+    while True:
+        batch_queryset = queryset if last_key is None else queryset.filter(**{f'{key_field}__gt': last_key})
+        batch = list(batch_queryset[:batch_size])
+        if batch:
+            yield batch
+        if len(batch) < batch_size:
+            return
+        last_row = batch[-1]
+        last_key = last_row[key_field] if isinstance(last_row, dict) else getattr(last_row, key_field)
+
+
 def batch_counts(total_count, batch_size=1):
     """
     Break up a total count into equal-sized batch counts.
@@ -91,6 +149,62 @@ def batch_counts(total_count, batch_size=1):
         yield last_batch_count
 
 
+def get_max_packet_bytes(using='default'):
+    """
+    Returns the largest statement the given database accepts, in bytes (MySQL's ``max_allowed_packet``),
+    or None if the database has no such limit.
+    """
+    connection = connections[using]
+    if connection.vendor != 'mysql':
+        return None
+    if using not in _max_packet_bytes_by_alias:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT @@max_allowed_packet')
+            _max_packet_bytes_by_alias[using] = cursor.fetchone()[0]
+    return _max_packet_bytes_by_alias[using]
+
+
+def estimate_row_bytes(objs, fields, for_update=False, using='default'):
+    """
+    Estimates the most bytes of SQL that writing the given fields of any one of the given objects takes,
+    from a sample of the objects.
+    """
+    connection = connections[using]
+    value_overhead = BULK_WRITE_UPDATE_VALUE_OVERHEAD_BYTES if for_update else BULK_WRITE_VALUE_OVERHEAD_BYTES
+    pk_bytes = 0
+    row_bytes = 0
+    for obj in objs[:BULK_WRITE_ROW_SAMPLE_SIZE]:
+        if for_update:
+            # bulk_update() repeats the primary key in a CASE branch for every field it sets
+            pk_bytes = len(str(obj.pk))
+        row_bytes = max(row_bytes, sum(
+            len(str(field.get_db_prep_save(getattr(obj, field.attname), connection))) + pk_bytes + value_overhead
+            for field in fields
+        ))
+    return row_bytes
+
+
+def get_bulk_write_batch_size(objs, row_bytes, using='default', max_batch_size=BULK_WRITE_MAX_BATCH_SIZE):
+    """
+    Returns how many of the given objects to write per bulk INSERT or UPDATE statement.
+
+    Small writes go in a single statement. Larger ones are split into the biggest statements that
+    fit comfortably in the database's max packet size, up to ``max_batch_size`` rows each.
+    Databases without a packet size limit (like SQLite) are left to Django, which splits statements
+    by their own limit on query parameters.
+
+    Arguments:
+        objs (list): The objects to write.
+        row_bytes (int): The estimated size of the SQL for a single row, see ``estimate_row_bytes``.
+        max_batch_size (int): The most rows per statement, ``BULK_UPDATE_MAX_BATCH_SIZE`` for bulk_update().
+    """
+    batch_size = max(1, min(len(objs), max_batch_size))
+    max_packet_bytes = get_max_packet_bytes(using)
+    if max_packet_bytes and row_bytes:
+        batch_size = max(1, min(batch_size, int(max_packet_bytes * BULK_WRITE_PACKET_FILL_RATIO) // row_bytes))
+    return batch_size
+
+
 def get_learner_portal_url(enterprise_slug):
     """
     Returns the link to the learner portal, given an enterprise slug.
@@ -189,24 +303,167 @@ def validate_enterprise_catalog_uuid(enterprise_catalog_uuid, enterprise_custome
         ) from ex
 
 
+def get_catalog_content_membership_cache_key(enterprise_catalog_uuid, content_id):
+    return f'catalog_contains_content:{enterprise_catalog_uuid}:{content_id}'
+
+
+def get_catalog_content_membership(enterprise_catalog_uuid, content_ids):
+    """
+    Checks which of the given content ids are contained in an enterprise catalog.
+
+    Results are cached per (catalog, content id), so every subscription plan linked to the same catalog shares them.
+    All of the content ids missing from the cache are resolved together, see ``_resolve_catalog_content_membership``.
+
+    Arguments:
+        enterprise_catalog_uuid (UUID): UUID of the enterprise catalog to check.
+        content_ids (list of str): Content ids to check whether the catalog contains.
+
+    Returns:
+        dict: Maps each of the given content ids to whether the catalog contains it.
+    """
+    cache_keys_by_content_id, membership = _get_cached_catalog_content_membership(enterprise_catalog_uuid, content_ids)
+
+    missing_content_ids = [content_id for content_id in cache_keys_by_content_id if content_id not in membership]
+    if missing_content_ids:
+        resolved_membership = {}
+        num_requests = _resolve_catalog_content_membership(
+            EnterpriseCatalogApiClient(),
+            enterprise_catalog_uuid,
+            missing_content_ids,
+            resolved_membership,
+        )
+        if num_requests > 1:
+            logger.info(
+                'Resolved the membership of %s content ids in enterprise catalog %s with %s requests',
+                len(missing_content_ids), enterprise_catalog_uuid, num_requests,
+            )
+        cache.set_many(
+            {
+                cache_keys_by_content_id[content_id]: in_catalog
+                for content_id, in_catalog in resolved_membership.items()
+            },
+            timeout=CONTAINS_CONTENT_CACHE_TIMEOUT,
+        )
+        membership.update(resolved_membership)
+
+    return membership
+
+
+def catalog_contains_any_content(enterprise_catalog_uuid, content_ids):
+    """
+    Checks whether an enterprise catalog contains any of the given content ids.
+
+    Unlike ``get_catalog_content_membership``, this returns as soon as a cached content id is known to be in the
+    catalog, and otherwise asks the catalog about all of the uncached content ids with a single request, without
+    resolving which of them it contains. The result is cached per content id whenever it settles one.
+
+    Arguments:
+        enterprise_catalog_uuid (UUID): UUID of the enterprise catalog to check.
+        content_ids (list of str): Content ids to check whether the catalog contains.
+
+    Returns:
+        bool: Whether the catalog contains any of the given content ids.
+    """
+    cache_keys_by_content_id, membership = _get_cached_catalog_content_membership(enterprise_catalog_uuid, content_ids)
+    if any(membership.values()):
+        return True
+
+    missing_content_ids = [content_id for content_id in cache_keys_by_content_id if content_id not in membership]
+    if not missing_content_ids:
+        return False
+
+    contains_any = EnterpriseCatalogApiClient().contains_content_items(enterprise_catalog_uuid, missing_content_ids)
+    # Only a negative answer, or an answer about a single content id, tells us the membership of each content id
+    if not contains_any or len(missing_content_ids) == 1:
+        cache.set_many(
+            {cache_keys_by_content_id[content_id]: contains_any for content_id in missing_content_ids},
+            timeout=CONTAINS_CONTENT_CACHE_TIMEOUT,
+        )
+    return contains_any
+
+
+def _get_cached_catalog_content_membership(enterprise_catalog_uuid, content_ids):
+    """
+    Returns the cache key of each of the given content ids, and the catalog membership of those that are cached.
+    """
+    cache_keys_by_content_id = {
+        content_id: get_catalog_content_membership_cache_key(enterprise_catalog_uuid, content_id)
+        for content_id in content_ids
+    }
+    cached_values = cache.get_many(cache_keys_by_content_id.values())
+    membership = {
+        content_id: cached_values[cache_key]
+        for content_id, cache_key in cache_keys_by_content_id.items()
+        if cache_key in cached_values
+    }
+    return cache_keys_by_content_id, membership
+
+
+def _resolve_catalog_content_membership(client, enterprise_catalog_uuid, content_ids, resolved, contains_any=None):
+    """
+    Resolves the catalog membership of each of the given content ids into ``resolved``.
+
+    The enterprise catalog only tells us whether it contains *any* of the content ids it is asked about, so
+    a single request settles the whole batch when none (or the only one) of them is in the catalog. Otherwise
+    the batch is split in halves that are resolved the same way, which finds the few content ids of a batch
+    that are in the catalog with a number of requests logarithmic in the size of the batch. ``contains_any``
+    may be given when it's already known whether the catalog contains any of the batch.
+
+    Returns the number of requests made.
+    """
+    num_requests = 0
+    if contains_any is None:
+        contains_any = client.contains_content_items(enterprise_catalog_uuid, content_ids)
+        num_requests += 1
+    if not contains_any or len(content_ids) == 1:
+        resolved.update(dict.fromkeys(content_ids, contains_any))
+        return num_requests
+
+    middle = len(content_ids) // 2
+    first_half, second_half = content_ids[:middle], content_ids[middle:]
+    num_requests += _resolve_catalog_content_membership(client, enterprise_catalog_uuid, first_half, resolved)
+    # The batch contains something, so if it wasn't in the first half, it's in the second.
+    second_half_contains_any = None if any(resolved[content_id] for content_id in first_half) else True
+    num_requests += _resolve_catalog_content_membership(
+        client, enterprise_catalog_uuid, second_half, resolved, contains_any=second_half_contains_any,
+    )
+    return num_requests
+
+
 def provision_licenses(subscription):
     """
     For a given subscription plan, try to provision it synchronously or asynchronously.
     Args:
         subscription: SubscriptionPlan instance
     """
+    from license_manager.apps.api.utils import (
+        acquire_subscription_plan_lock,
+        release_subscription_plan_lock,
+    )
+    from license_manager.apps.subscriptions.models import LicenseProvisioningJob
     from license_manager.apps.subscriptions.tasks import (
-        PROVISION_LICENSES_BATCH_SIZE,
+        PROVISION_LICENSES_SYNCHRONOUS_MAX,
         provision_licenses_task,
     )
 
     if subscription.desired_num_licenses and not subscription.last_freeze_timestamp:
         license_count_gap = subscription.desired_num_licenses - subscription.num_licenses
-        if license_count_gap > 0:
-            if license_count_gap <= PROVISION_LICENSES_BATCH_SIZE:
-                # We can handle just one batch synchronously.
-                subscription.increase_num_licenses(license_count_gap)
-            else:
-                # Multiple batches of licenses will need to be created, so provision them asynchronously.
-                provision_licenses_task.delay(
-                    subscription_plan_uuid=subscription.uuid)
+        if license_count_gap <= 0:
+            return
+        if license_count_gap <= PROVISION_LICENSES_SYNCHRONOUS_MAX:
+            # We can handle just one batch synchronously, under the same lock as provision_licenses_task, unless
+            # the plan is being provisioned already: the licenses of an unfinished job count towards the gap too.
+            lock_holder = acquire_subscription_plan_lock(subscription)
+            if lock_holder:
+                try:
+                    if not LicenseProvisioningJob.get_unfinished_job(subscription):
+                        license_count_gap = subscription.desired_num_licenses - subscription.num_licenses
+                        if license_count_gap > 0:
+                            subscription.increase_num_licenses(license_count_gap)
+                        return
+                finally:
+                    release_subscription_plan_lock(subscription, holder=lock_holder)
+        # Multiple batches of licenses will need to be created, or the plan is being provisioned already,
+        # so provision them asynchronously; provision_licenses_task finishes any unfinished job first.
+        provision_licenses_task.delay(
+            subscription_plan_uuid=subscription.uuid)
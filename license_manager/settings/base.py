@@ -408,6 +408,9 @@ BULK_ENROLL_REQUEST_LIMIT = os.environ.get('BULK_ENROLL_REQUEST_LIMIT', 500)
 BULK_ENROLL_JOB_AWS_BUCKET = os.environ.get('BULK_ENROLL_JOB_AWS_BUCKET', '')
 BULK_ENROLL_RESULT_CAMPAIGN = os.environ.get('BULK_ENROLL_RESULT_CAMPAIGN', '')
 
+# License CSV export specific
+LICENSE_EXPORT_JOB_AWS_BUCKET = os.environ.get('LICENSE_EXPORT_JOB_AWS_BUCKET', '')
+
 # Set up system-to-feature roles mapping for edx-rbac
 SYSTEM_TO_FEATURE_ROLE_MAPPING = {
     SYSTEM_ENTERPRISE_OPERATOR_ROLE: [SUBSCRIPTIONS_ADMIN_ROLE],
@@ -453,6 +456,12 @@ BRAZE_REVOKE_CAP_EMAIL_CAMPAIGN = ''
 BRAZE_API_URL = ''
 BRAZE_API_KEY = os.environ.get('BRAZE_API_KEY', '')
 BRAZE_APP_ID = os.environ.get('BRAZE_APP_ID', '')
+# Every Braze client in a worker process shares a pooled HTTP session and a rate limiter
+BRAZE_HTTP_POOL_MAXSIZE = 10
+BRAZE_REQUESTS_PER_SECOND = 10
+BRAZE_REQUEST_BURST = 20
+BRAZE_RATE_LIMIT_MAX_RETRIES = 3
+BRAZE_RATE_LIMIT_MAX_BACKOFF_SECONDS = 60
 
 # Set a datetime that a django action can reset license state to
 # Use year-month-day hour:minute:second format